@@ -0,0 +1,448 @@
+"""
+프록시 목록 수집(파싱 / 정규화 / 중복 제거) 마이크로 벤치마크 (백만 줄 단위, 인터넷 접속 없음).
+
+collector마다 조금씩 다른 _normalize_addr / normalize_line_to_addr / unique dict 중복 제거 / iter_chunks가
+아주 큰 목록에서 어떻게 동작하는지(속도, 메모리, 받아들이는 줄 수)를 같은 입력으로 비교한다.
+
+  입력: 수집기가 받는 형식별 합성 소스 파일 (--dir에 캐시, 같은 --seed면 같은 파일)
+    plain     : ip:port
+    scheme    : http:// https:// socks4:// socks5:// 접두사 (+ 끝 "/")
+    speedx    : ip:port 뒤에 공백 / 국가·익명성 필드 / 주석 / CRLF
+    geonode   : geonode API JSON ({"data": [{"ip", "port", "protocols"}]}) - naver_exposure_monitor.fetch_all_proxies만 해석
+    malformed : 깨진 줄만 (빈 줄, 포트 없음, 포트 범위 밖, user:pass 포함, IPv6, HTML ...)
+  텍스트 형식에는 --bad-rate 비율로 깨진 줄이 섞이고, 주소 풀을 형식끼리 공유해서 --dup-rate만큼 중복이 생김.
+
+  suite (--suite, 쉼표로 여러 개)
+    normalize : 정규화 함수별 (줄 -> 주소) 처리량 / 통과 줄 수
+    dedup     : 전체 소스를 합친 레코드에 collector별 중복 제거 방식 (dict 먼저 온 것 / dict 나중 것 / 문자열 set)
+    chunks    : live_collector2.iter_chunks (Redis 청크 저장 전 단계)
+    fetch     : 각 collector의 실제 소스 다운로드 함수 (모듈의 requests만 로컬 본문으로 바꿔 끼움) = 파싱 + 정규화 전체
+
+  python bench_ingest.py --lines 2000000
+  python bench_ingest.py --lines 5000000 --formats plain,speedx --suite normalize,dedup --repeat 3 --out before.json
+  python bench_ingest.py --lines 200000 --no-memory --compare before.json
+
+메모리는 같은 작업을 tracemalloc을 켜고 한 번 더 돌려서 구한 최대 할당량(MB, 입력 본문 제외).
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "playwright"))
+from proxy_log import configure as configure_logs  # noqa: E402
+
+FORMATS = ("plain", "scheme", "speedx", "geonode", "malformed")
+SUITES = ("normalize", "dedup", "chunks", "fetch")
+PROTOCOLS = ("http", "socks4", "socks5", "https")
+SCHEMES = ("http://", "https://", "socks4://", "socks5://")
+SPEEDX_TAILS = ("", " ", "\t", " US elite", " KR anonymous  ", "  # checked 5m ago", "\r")
+COMPARE_FIELDS = ("lines_per_sec", "peak_mb")
+DEFAULT_DIR = os.path.join(tempfile.gettempdir(), "bench_ingest")
+FETCH_URL = "http://bench.local/ingest/{fmt}.txt"
+# 통과한 주소 중 실제로 쓸 수 있는 형태(IPv4:1~65535)인지 -> "valid" (정규화가 쓰레기를 통과시키는지 확인용)
+_VALID_ADDR = re.compile(r"(?:\d{1,3}\.){3}\d{1,3}:(?:[1-9]\d{0,3}|[1-5]\d{4}|6[0-4]\d{3}|65[0-4]\d{2}|655[0-2]\d|6553[0-5])")
+
+# 정규화 함수: 이름 -> (모듈, 함수)
+NORMALIZERS = {
+    "lease_patched": ("collect_to_redis_lease_compatible_patched", "_normalize_addr"),
+    "lease_compatible": ("collect_to_redis_lease_compatible", "_normalize_addr"),
+    "updated": ("collect_to_redis_updated", "_normalize_addr"),
+    "live_claude": ("live_collect_to_redis_claude", "_normalize_addr"),
+    "live_collector2": ("live_collector2", "normalize_line_to_addr"),
+}
+
+
+# ======================================================
+# 합성 소스
+# ======================================================
+
+def _bad_line(rng: random.Random, ip: str) -> str:
+    return rng.choice(
+        (
+            "",
+            "   ",
+            "# free proxy list - updated hourly",
+            ip,
+            f"{ip}:",
+            ":8080",
+            f"{ip}:{rng.randint(1, 65535)}:user:pass",
+            f"{ip}:{rng.randint(65536, 99999)}",
+            f"{ip}:http",
+            f"{ip} {rng.randint(1, 65535)}",
+            f"[2001:db8::{rng.randint(1, 9999):x}]:{rng.randint(1, 65535)}",
+            "<html><body>rate limited</body></html>",
+            "http://",
+            "socks5://user@:1080",
+        )
+    )
+
+
+def address_pool(n: int, dup_rate: float, seed: int) -> List[str]:
+    """형식끼리 공유하는 고유 주소 풀 (n x (1 - dup_rate)개)"""
+    rng = random.Random(seed)
+    size = max(1, int(n * (1.0 - dup_rate)))
+    out = []
+    for _ in range(size):
+        x = rng.getrandbits(32)
+        out.append(f"{x >> 24 & 255}.{x >> 16 & 255}.{x >> 8 & 255}.{x & 255}:{rng.randint(80, 65535)}")
+    return out
+
+
+def generate(fmt: str, n: int, pool: List[str], bad_rate: float, seed: int) -> Iterable[str]:
+    """fmt 형식으로 n줄 (geonode는 n개 항목의 JSON 한 덩어리)"""
+    rng = random.Random(f"{seed}:{fmt}")
+    if fmt == "geonode":
+        items = []
+        for _ in range(n):
+            ip, _, port = rng.choice(pool).rpartition(":")
+            items.append({"ip": ip, "port": port, "protocols": [rng.choice(PROTOCOLS[:3])], "country": "KR", "anonymityLevel": "elite"})
+        yield json.dumps({"data": items, "total": n, "page": 1, "limit": n}, separators=(",", ":"))
+        return
+    for _ in range(n):
+        addr = rng.choice(pool)
+        if fmt == "malformed" or rng.random() < bad_rate:
+            yield _bad_line(rng, addr.rpartition(":")[0])
+        elif fmt == "plain":
+            yield addr
+        elif fmt == "scheme":
+            yield rng.choice(SCHEMES) + addr + ("/" if rng.random() < 0.1 else "")
+        else:  # speedx
+            yield addr + rng.choice(SPEEDX_TAILS)
+
+
+def source_file(directory: str, fmt: str, n: int, args: argparse.Namespace, pool: Optional[List[str]]) -> str:
+    """형식별 합성 파일 경로 (없거나 --regen이면 생성)"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{fmt}-{n}-s{args.seed}-d{args.dup_rate}-b{args.bad_rate}.txt")
+    if args.regen or not os.path.exists(path):
+        if pool is None:
+            pool = address_pool(n, args.dup_rate, args.seed)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+            for line in generate(fmt, n, pool, args.bad_rate, args.seed):
+                f.write(line)
+                f.write("\n")
+        os.replace(tmp, path)
+    return path
+
+
+# ======================================================
+# 측정
+# ======================================================
+
+def _address(item: Any) -> str:
+    """구현마다 다른 결과 항목(주소 문자열 / "proto://addr" / dict / ProxyInfo) -> 주소"""
+    if isinstance(item, dict):
+        return item["address"]
+    addr = getattr(item, "address", item)
+    return addr.split("://", 1)[1] if "://" in addr else addr
+
+
+def count_valid(items: List[Any]) -> int:
+    return sum(1 for x in items if _VALID_ADDR.fullmatch(_address(x)))
+
+
+def measure(fn: Callable[[], object], *, repeat: int, memory: bool) -> Tuple[object, Dict]:
+    """fn()을 repeat번 돌린 최소 시간 (+ tracemalloc 최대 할당량은 한 번 더 돌려서)"""
+    best_wall = best_cpu = float("inf")
+    out = None
+    for _ in range(max(1, repeat)):
+        out = None  # 직전 결과를 먼저 놓아서 메모리가 두 벌 잡히지 않게
+        c0, t0 = time.process_time(), time.perf_counter()
+        out = fn()
+        best_wall = min(best_wall, time.perf_counter() - t0)
+        best_cpu = min(best_cpu, time.process_time() - c0)
+    peak_mb = None
+    if memory:
+        out = None
+        tracemalloc.start()
+        try:
+            out = fn()
+            peak_mb = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+        finally:
+            tracemalloc.stop()
+    return out, {"wall_s": round(best_wall, 3), "cpu_s": round(best_cpu, 3), "peak_mb": peak_mb}
+
+
+def _load(module: str, attr: str):
+    """구현을 가져옴 (모듈 의존성이 없으면 None -> 건너뜀)"""
+    try:
+        return getattr(importlib.import_module(module), attr)
+    except ImportError as e:
+        print(f"[BENCH] skip {module}.{attr}: {e}")
+        return None
+
+
+def bench_normalize(bodies: Dict[str, str], args: argparse.Namespace) -> List[Dict]:
+    rows = []
+    for name, (module, attr) in NORMALIZERS.items():
+        fn = _load(module, attr)
+        if fn is None:
+            continue
+        for fmt, body in bodies.items():
+            if fmt == "geonode":  # JSON은 줄 단위 정규화 대상이 아님 (fetch suite의 naver만 해석)
+                continue
+            lines = body.splitlines()
+
+            def run(fn=fn, lines=lines):
+                return [a for a in map(fn, lines) if a]
+
+            out, m = measure(run, repeat=args.repeat, memory=args.memory)
+            rows.append(
+                {"suite": "normalize", "impl": name, "format": fmt, "lines": len(lines), "accepted": len(out), "valid": count_valid(out), **m}
+            )
+    return rows
+
+
+def _records(bodies: Dict[str, str]) -> List[Dict]:
+    """텍스트 소스를 프로토콜별 소스로 보고 정규화해서 합친 레코드 (collector의 raw 목록과 같은 모양)"""
+    normalize = _load(*NORMALIZERS["lease_patched"])
+    raw: List[Dict] = []
+    for i, (fmt, body) in enumerate(sorted(bodies.items())):
+        if fmt == "geonode":
+            continue
+        protocol = PROTOCOLS[i % len(PROTOCOLS)]
+        for line in body.splitlines():
+            addr = normalize(line)
+            if addr:
+                raw.append({"address": addr, "protocol": protocol, "source": fmt})
+    return raw
+
+
+def _dedup_dict_first(raw: List[Dict]) -> List[Dict]:
+    # collect_to_redis_* / collector_redis / live_collect_to_redis_claude의 fetch_all_proxies
+    unique: Dict[tuple, Dict] = {}
+    for p in raw:
+        key = (p["protocol"], p["address"])
+        if key not in unique:
+            unique[key] = p
+    return list(unique.values())
+
+
+def _dedup_dict_last(raw: List[Dict]) -> List[Dict]:
+    # naver_exposure_monitor.fetch_all_proxies (dict comprehension -> 나중 것이 남음)
+    return list({(p["protocol"], p["address"]): p for p in raw}.values())
+
+
+def _dedup_set_str(raw: List[Dict]) -> List[str]:
+    # live_collector2.collect_all_unique ("proto://addr" 문자열 set)
+    unique = set()
+    for p in raw:
+        unique.add(f"{p['protocol']}://{p['address']}")
+    return list(unique)
+
+
+DEDUPS = {"dict_first": _dedup_dict_first, "dict_last": _dedup_dict_last, "set_str": _dedup_set_str}
+
+
+def bench_dedup(bodies: Dict[str, str], args: argparse.Namespace) -> List[Dict]:
+    raw = _records(bodies)
+    if not raw:
+        return []
+    rows = []
+    for name, fn in DEDUPS.items():
+        out, m = measure(lambda fn=fn: fn(raw), repeat=args.repeat, memory=args.memory)
+        rows.append({"suite": "dedup", "impl": name, "format": "all", "lines": len(raw), "accepted": len(out), **m})
+    return rows
+
+
+def bench_chunks(bodies: Dict[str, str], args: argparse.Namespace) -> List[Dict]:
+    iter_chunks = _load("live_collector2", "iter_chunks")
+    chunk = _load("live_collector2", "REDIS_CHUNK_SIZE")
+    raw = _records(bodies)
+    if iter_chunks is None or not raw:
+        return []
+    items = _dedup_set_str(raw)
+
+    def run():
+        n = 0
+        for ck in iter_chunks(items, chunk):
+            n += len(ck)
+        return items[:n]
+
+    out, m = measure(run, repeat=args.repeat, memory=args.memory)
+    return [{"suite": "chunks", "impl": f"iter_chunks({chunk})", "format": "all", "lines": len(items), "accepted": len(out), **m}]
+
+
+class _FakeResponse:
+    status_code = 200
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self):
+        return json.loads(self.text)
+
+
+@contextlib.contextmanager
+def _local_requests(module, bodies: Dict[str, str]):
+    """모듈의 requests를 URL -> 로컬 본문으로 응답하는 객체로 잠시 교체 (출력도 버림)"""
+    saved = module.requests
+    module.requests = types.SimpleNamespace(get=lambda url, **kw: _FakeResponse(bodies[url]))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        module.requests = saved
+
+
+def _fetch_naver(module, url: str) -> List:
+    saved = module.ALL_SOURCES
+    module.ALL_SOURCES = [(url, "http", False)]
+    try:
+        return module.fetch_all_proxies()
+    finally:
+        module.ALL_SOURCES = saved
+
+
+# 실제 소스 다운로드 함수: 이름 -> (모듈, 호출)
+FETCHERS: Dict[str, Tuple[str, Callable]] = {
+    "lease_patched": ("collect_to_redis_lease_compatible_patched", lambda m, url: m.fetch_plain_proxy_list(url, "http", "bench")),
+    "lease_compatible": ("collect_to_redis_lease_compatible", lambda m, url: m.fetch_plain_proxy_list(url, "http", "bench")),
+    "updated": ("collect_to_redis_updated", lambda m, url: m.fetch_plain_proxy_list(url, "http", "bench")),
+    "live_claude": ("live_collect_to_redis_claude", lambda m, url: m.fetch_proxy_list(url, "http", "bench")),
+    "live_collector2": ("live_collector2", lambda m, url: m.fetch_source(url, "http", "bench")),
+    "collector_redis": ("collector_redis", lambda m, url: m.fetch_http_proxy_list(url)),
+    "naver": ("naver_exposure_monitor", _fetch_naver),
+}
+
+
+def bench_fetch(bodies: Dict[str, str], args: argparse.Namespace) -> List[Dict]:
+    by_url = {FETCH_URL.format(fmt=fmt): body for fmt, body in bodies.items()}
+    rows = []
+    for name, (module_name, call) in FETCHERS.items():
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            print(f"[BENCH] skip {module_name}: {e}")
+            continue
+        for fmt, body in bodies.items():
+            url = FETCH_URL.format(fmt=fmt)
+            with _local_requests(module, by_url):
+                out, m = measure(lambda: call(module, url), repeat=args.repeat, memory=args.memory)
+            lines = body.count("\n") if fmt != "geonode" else args.lines
+            rows.append(
+                {"suite": "fetch", "impl": name, "format": fmt, "lines": lines, "accepted": len(out), "valid": count_valid(out), **m}
+            )
+    return rows
+
+
+SUITE_FUNCS = {"normalize": bench_normalize, "dedup": bench_dedup, "chunks": bench_chunks, "fetch": bench_fetch}
+
+
+# ======================================================
+# 출력 / 비교
+# ======================================================
+
+def _key(row: Dict) -> str:
+    return f"{row['suite']}/{row['impl']}/{row['format']}"
+
+
+def compare(before: Dict, after: Dict) -> List[str]:
+    old = {_key(r): r for r in before.get("results", [])}
+    lines = ["[BENCH] compare (after / before)"]
+    for row in after["results"]:
+        prev = old.get(_key(row))
+        if prev is None:
+            continue
+        parts = []
+        for f in COMPARE_FIELDS:
+            a, b = row.get(f), prev.get(f)
+            if a is None or not b:
+                continue
+            parts.append(f"{f}={b} -> {a} ({(a / b - 1) * 100:+.1f}%)")
+        if parts:
+            lines.append(f"[BENCH]   {_key(row):40s} " + " | ".join(parts))
+    return lines
+
+
+def run(args: argparse.Namespace) -> List[Dict]:
+    pool = None
+    if args.regen or any(
+        not os.path.exists(os.path.join(args.dir, f"{fmt}-{args.lines}-s{args.seed}-d{args.dup_rate}-b{args.bad_rate}.txt"))
+        for fmt in args.formats
+    ):
+        t0 = time.perf_counter()
+        pool = address_pool(args.lines, args.dup_rate, args.seed)
+        print(f"[BENCH] address pool {len(pool)} ({time.perf_counter() - t0:.1f}s)")
+    bodies: Dict[str, str] = {}
+    for fmt in args.formats:
+        t0 = time.perf_counter()
+        path = source_file(args.dir, fmt, args.lines, args, pool)
+        with open(path, encoding="utf-8") as f:
+            bodies[fmt] = f.read()
+        print(f"[BENCH] source {fmt:9s} {len(bodies[fmt]) / 1e6:7.1f}MB {path} ({time.perf_counter() - t0:.1f}s)")
+    pool = None
+
+    results: List[Dict] = []
+    for suite in args.suite:
+        for row in SUITE_FUNCS[suite](bodies, args):
+            row["lines_per_sec"] = round(row["lines"] / row["wall_s"]) if row["wall_s"] > 0 else None
+            results.append(row)
+            peak = "-" if row["peak_mb"] is None else f"{row['peak_mb']}MB"
+            print(
+                f"[BENCH] {row['suite']:9s} {row['impl']:22s} {row['format']:9s} lines={row['lines']:<9} "
+                f"accepted={row['accepted']:<9} valid={row.get('valid', '-')!s:<9} {row['lines_per_sec'] or 0:>10} lines/s cpu={row['cpu_s']}s peak={peak}"
+            )
+    return results
+
+
+def _csv(choices: Tuple[str, ...]):
+    def parse(value: str) -> List[str]:
+        items = [v.strip() for v in value.split(",") if v.strip()]
+        unknown = [v for v in items if v not in choices]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown: {', '.join(unknown)} (choices: {', '.join(choices)})")
+        return items
+
+    return parse
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="프록시 목록 파싱 / 정규화 / 중복 제거 벤치마크")
+    parser.add_argument("--lines", type=int, default=2_000_000, help="형식별 줄 수 (geonode는 항목 수)")
+    parser.add_argument("--formats", type=_csv(FORMATS), default=list(FORMATS))
+    parser.add_argument("--suite", type=_csv(SUITES), default=list(SUITES))
+    parser.add_argument("--dup-rate", type=float, default=0.3, help="중복 줄 비율 (형식끼리 주소 풀 공유)")
+    parser.add_argument("--bad-rate", type=float, default=0.05, help="텍스트 형식에 섞는 깨진 줄 비율")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="합성 소스 파일 캐시 디렉터리")
+    parser.add_argument("--regen", action="store_true", help="캐시가 있어도 소스 파일을 다시 생성")
+    parser.add_argument("--repeat", type=int, default=1, help="반복 후 최소 시간")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="tracemalloc 측정 생략")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로(선택)")
+    parser.add_argument("--compare", default=None, help="이전 결과 JSON과 비교")
+    args = parser.parse_args(argv)
+    configure_logs(level="warning")  # collector들의 다운로드 로그가 결과 사이에 섞이지 않게
+
+    print(
+        f"[BENCH] lines={args.lines} formats={','.join(args.formats)} suite={','.join(args.suite)} "
+        f"dup={args.dup_rate} bad={args.bad_rate} python={sys.version.split()[0]}"
+    )
+    doc = {"args": vars(args), "results": run(args)}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            for line in compare(json.load(f), doc):
+                print(line)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, indent=2)
+        print(f"[BENCH] saved -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
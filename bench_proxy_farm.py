@@ -0,0 +1,529 @@
+"""
+로컬 가짜 프록시 팜 + 검증기 벤치마크 (인터넷 접속 없음).
+
+별도 프로세스에서 asyncio로 loopback에 가짜 프록시 수천 개(HTTP / SOCKS4 / SOCKS5)와 judge 서버를 띄우고,
+검증 엔진(test_proxy / collect_once / 교체 후보 함수)을 그 목록에 돌려서
+  checks/sec, CPU 시간, 최대 RSS, 분류 정확도(alive/dead + Static/Full/Partial Rotating)
+를 출력한다. --seed가 같으면 같은 팜이 만들어지므로 엔진 변경 전/후를 같은 조건으로 비교할 수 있음.
+
+  python bench_proxy_farm.py --proxies 2000 --workers 40
+  python bench_proxy_farm.py --mix static=0.4,full=0.1,partial=0.1,flaky=0.1,blackhole=0.1,dead=0.2 --latency-ms 50-800
+  python bench_proxy_farm.py --engine collect_once --db 15           # Redis 쓰기까지 포함 (테스트용 DB에서만!)
+  python bench_proxy_farm.py --engine mypkg.engine:check_all --out after.json
+
+프록시 종류 (--mix 비율):
+  static    : 항상 같은 출구 IP                    -> 기대 결과 Static
+  full      : 요청마다 다른 출구 IP                -> Full Rotating
+  partial   : 출구 IP 2개를 2번씩 번갈아 사용       -> Partial Rotating
+  flaky     : static + 연결마다 --flaky-fail-rate 확률로 끊음 (확률적이라 정확도에서 제외, 통과율만 따로 표시)
+  blackhole : 접속은 받지만 응답 없음 (클라이언트 타임아웃까지 대기)
+  dead      : 포트가 닫혀 있음 (연결 거부)
+모든 프록시는 연결마다 --latency-ms 범위에서 정해진 지연 후 핸드셰이크에 응답.
+
+judge는 평문 HTTP (http://127.0.0.1:{port}/ -> 출구 IP, /geo/{ip} -> ip-api 형식 JSON).
+프록시는 judge에 접속한 뒤 "FAKE-EXIT {ip}" 한 줄을 먼저 보내 자기 출구 IP를 알려 줌.
+※ 운영 IP_CHECK_URLS는 HTTPS(CONNECT + TLS)라 TLS 핸드셰이크 비용은 이 벤치마크에 포함되지 않음.
+
+교체 엔진(--engine module:function)은 fn(proxies: List[Dict], settings: Dict) -> List[Dict]
+(proxies와 같은 순서로 test_proxy와 같은 형식의 결과: ok / proxy_type ...). settings: judge_url, geoip_url, timeout, workers, runs
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import json
+import multiprocessing as mp
+import os
+import random
+import socket
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import resource  # Windows에는 없음 -> RSS / fd 한도 조정 생략
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+KINDS = ("static", "full", "partial", "flaky", "blackhole", "dead")
+EXPECTED_TYPE = {"static": "Static", "full": "Full Rotating", "partial": "Partial Rotating", "flaky": "Static"}
+DEFAULT_MIX = "static=0.35,full=0.1,partial=0.1,flaky=0.1,blackhole=0.1,dead=0.25"
+PREAMBLE = b"FAKE-EXIT "
+
+
+@dataclass
+class FakeProxy:
+    protocol: str  # http | socks4 | socks5
+    kind: str  # KINDS
+    latency_ms: float
+    fail_rate: float = 0.0
+    port: int = 0
+
+    @property
+    def expected_ok(self) -> bool:
+        return self.kind not in ("blackhole", "dead")
+
+    def proxy_info(self) -> Dict:
+        return {"address": f"127.0.0.1:{self.port}", "protocol": self.protocol, "source": f"farm_{self.kind}"}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise ValueError(f"unknown proxy kind: {kind} (choose from {', '.join(KINDS)})")
+        mix[kind] = float(weight)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("empty mix")
+    return mix
+
+
+def parse_range(text: str) -> Tuple[float, float]:
+    lo, _, hi = text.partition("-")
+    lo_f = float(lo)
+    return lo_f, float(hi) if hi else lo_f
+
+
+def build_farm(
+    n: int,
+    *,
+    mix: Dict[str, float],
+    protocols: List[str],
+    latency_ms: Tuple[float, float],
+    flaky_fail_rate: float,
+    seed: int,
+) -> List[FakeProxy]:
+    """seed가 같으면 같은 구성 (종류 개수는 비율대로 정확히 나누고 순서만 섞음)"""
+    rng = random.Random(seed)
+    total = sum(mix.values())
+    kinds: List[str] = []
+    for kind, weight in mix.items():
+        kinds += [kind] * int(round(n * weight / total))
+    kinds = (kinds + [next(iter(mix))] * n)[:n]
+    rng.shuffle(kinds)
+    return [
+        FakeProxy(
+            protocol=protocols[i % len(protocols)],
+            kind=kind,
+            latency_ms=round(rng.uniform(*latency_ms), 1),
+            fail_rate=flaky_fail_rate if kind == "flaky" else 0.0,
+        )
+        for i, kind in enumerate(kinds)
+    ]
+
+
+# ======================================================
+# 가짜 프록시 팜 (별도 프로세스, asyncio)
+# ======================================================
+
+class _Farm:
+    def __init__(self, specs: List[FakeProxy], seed: int):
+        self.specs = specs
+        self.rng = random.Random(seed)
+        self.requests = [0] * len(specs)  # 프록시별 judge 요청 수 (출구 IP 회전용)
+        self.connections = 0
+        self.judge_port = 0
+        self._servers: List[asyncio.AbstractServer] = []
+        self._reserved: List[socket.socket] = []
+
+    def exit_ip(self, i: int, n: int) -> str:
+        kind = self.specs[i].kind
+        if kind == "full":
+            rot = n % 250 + 1
+        elif kind == "partial":
+            rot = (n // 2) % 2 + 1
+        else:
+            rot = 1
+        return f"100.{64 + i // 256 % 64}.{i % 256}.{rot}"
+
+    async def start(self) -> List[int]:
+        judge = await asyncio.start_server(self._handle_judge, "127.0.0.1", 0, backlog=1024)
+        self._servers.append(judge)
+        self.judge_port = judge.sockets[0].getsockname()[1]
+        ports = []
+        for i, spec in enumerate(self.specs):
+            if spec.kind == "dead":
+                # bind만 하고 listen은 안 함 -> 연결 거부 (팜이 끝날 때까지 잡고 있어서 다른 서버가 같은 포트를 못 씀)
+                s = socket.socket()
+                s.bind(("127.0.0.1", 0))
+                self._reserved.append(s)
+                ports.append(s.getsockname()[1])
+                continue
+            server = await asyncio.start_server(
+                lambda r, w, i=i: self._handle_proxy(i, r, w), "127.0.0.1", 0, backlog=256
+            )
+            self._servers.append(server)
+            ports.append(server.sockets[0].getsockname()[1])
+        return ports
+
+    async def close(self) -> None:
+        for s in self._servers:
+            s.close()
+        for s in self._reserved:
+            s.close()
+
+    async def _handle_proxy(self, i: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        spec = self.specs[i]
+        self.connections += 1
+        try:
+            if spec.kind == "blackhole":
+                while await reader.read(65536):
+                    pass
+                return
+            if spec.latency_ms:
+                await asyncio.sleep(spec.latency_ms / 1000.0)
+            if spec.fail_rate and self.rng.random() < spec.fail_rate:
+                return
+            if spec.protocol == "http":
+                target, first = await self._http_handshake(reader, writer)
+            elif spec.protocol == "socks4":
+                target, first = await self._socks4_handshake(reader, writer), b""
+            else:
+                target, first = await self._socks5_handshake(reader, writer), b""
+            up_r, up_w = await asyncio.open_connection(*target)
+            n = self.requests[i]
+            self.requests[i] += 1
+            up_w.write(PREAMBLE + self.exit_ip(i, n).encode() + b"\r\n" + first)
+            to_up = asyncio.ensure_future(self._pipe(reader, up_w))
+            await self._pipe(up_r, writer)
+            to_up.cancel()
+            up_w.close()
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _pipe(src: asyncio.StreamReader, dst: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                data = await src.read(65536)
+                if not data:
+                    break
+                dst.write(data)
+                await dst.drain()
+        except (OSError, asyncio.CancelledError):
+            pass
+
+    @staticmethod
+    async def _http_handshake(reader, writer) -> Tuple[Tuple[str, int], bytes]:
+        head = await reader.readuntil(b"\r\n\r\n")
+        method, target, _ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+        if method == "CONNECT":
+            host, port = target.rsplit(":", 1)
+            writer.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+            await writer.drain()
+            return (host, int(port)), b""
+        url = urlsplit(target)  # absolute-form: GET http://host:port/path HTTP/1.1 -> 그대로 judge에 전달
+        return (url.hostname, url.port or 80), head
+
+    @staticmethod
+    async def _socks4_handshake(reader, writer) -> Tuple[str, int]:
+        hdr = await reader.readexactly(8)
+        await reader.readuntil(b"\x00")  # userid
+        port = int.from_bytes(hdr[2:4], "big")
+        host = socket.inet_ntoa(hdr[4:8])
+        if hdr[4:7] == b"\x00\x00\x00" and hdr[7]:  # SOCKS4a: 도메인이 뒤따라옴
+            host = (await reader.readuntil(b"\x00"))[:-1].decode("idna")
+        writer.write(b"\x00\x5a" + hdr[2:8])
+        await writer.drain()
+        return host, port
+
+    @staticmethod
+    async def _socks5_handshake(reader, writer) -> Tuple[str, int]:
+        _, nmethods = await reader.readexactly(2)
+        await reader.readexactly(nmethods)
+        writer.write(b"\x05\x00")  # 인증 없음
+        await writer.drain()
+        _, _, _, atyp = await reader.readexactly(4)
+        if atyp == 1:
+            host = socket.inet_ntoa(await reader.readexactly(4))
+        elif atyp == 3:
+            host = (await reader.readexactly((await reader.readexactly(1))[0])).decode("idna")
+        else:
+            host = socket.inet_ntop(socket.AF_INET6, await reader.readexactly(16))
+        port = int.from_bytes(await reader.readexactly(2), "big")
+        writer.write(b"\x05\x00\x00\x01\x00\x00\x00\x00\x00\x00")
+        await writer.drain()
+        return host, port
+
+    async def _handle_judge(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            line = await reader.readline()
+            exit_ip = None
+            if line.startswith(PREAMBLE):
+                exit_ip = line[len(PREAMBLE):].strip().decode()
+                line = await reader.readline()
+            if line not in (b"\r\n", b""):
+                await reader.readuntil(b"\r\n\r\n")  # 헤더는 읽고 버림
+            path = line.decode("latin-1").split(" ")[1] if line.count(b" ") >= 2 else "/"
+            if "://" in path:
+                path = urlsplit(path).path or "/"
+            if path.startswith("/geo/"):
+                body = json.dumps({"status": "success", "country": "Farmland", "countryCode": "FL"}).encode()
+                ctype = b"application/json"
+            else:
+                body = (exit_ip or writer.get_extra_info("peername")[0]).encode()
+                ctype = b"text/plain"
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: " + ctype
+                + b"\r\nContent-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+
+def _raise_nofile_limit() -> None:
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else 65536, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def _farm_main(specs: List[Dict], seed: int, conn) -> None:
+    _raise_nofile_limit()
+    loop = asyncio.new_event_loop()
+    farm = _Farm([FakeProxy(**s) for s in specs], seed)
+    try:
+        ports = loop.run_until_complete(farm.start())
+    except OSError as e:
+        conn.send({"error": str(e)})
+        return
+    conn.send({"ports": ports, "judge_port": farm.judge_port})
+    loop.run_until_complete(loop.run_in_executor(None, conn.recv))  # 부모가 stop을 보낼 때까지
+    conn.send({"connections": farm.connections})
+    loop.run_until_complete(farm.close())
+    loop.close()
+
+
+class FarmProcess:
+    """가짜 프록시 팜을 자식 프로세스로 실행 (엔진의 CPU / RSS 측정에 섞이지 않게)"""
+
+    def __init__(self, specs: List[FakeProxy], seed: int = 0):
+        self.specs = specs
+        self.seed = seed
+        self.judge_port = 0
+        self.connections = 0
+        self._conn = None
+        self._proc: Optional[mp.Process] = None
+
+    def __enter__(self) -> "FarmProcess":
+        parent, child = mp.Pipe()
+        self._conn = parent
+        self._proc = mp.Process(target=_farm_main, args=([asdict(s) for s in self.specs], self.seed, child), daemon=True)
+        self._proc.start()
+        msg = parent.recv()
+        if "error" in msg:
+            raise RuntimeError(f"fake proxy farm failed to start: {msg['error']}")
+        for spec, port in zip(self.specs, msg["ports"]):
+            spec.port = port
+        self.judge_port = msg["judge_port"]
+        return self
+
+    def __exit__(self, *exc) -> None:
+        try:
+            self._conn.send("stop")
+            if self._conn.poll(10):
+                self.connections = self._conn.recv().get("connections", 0)
+        except (OSError, EOFError):
+            pass
+        self._proc.join(10)
+        if self._proc.is_alive():
+            self._proc.terminate()
+
+
+# ======================================================
+# 엔진
+# ======================================================
+
+def _collector(settings: Dict):
+    """collector 모듈을 가져와 judge / GeoIP / 타임아웃 / 동시성을 벤치마크용으로 바꿈"""
+    import collect_to_redis_lease_compatible_patched as collector
+
+    collector.IP_CHECK_URLS = [(settings["judge_url"], "http")]
+    collector.GEOIP_URL = settings["geoip_url"]
+    collector.CONNECT_TIMEOUT = collector.READ_TIMEOUT = settings["timeout"]
+    collector.MAX_WORKERS = settings["workers"]
+    collector.RR_TEST_RUNS = settings["runs"]
+    collector.get_ip_country.cache_clear()
+    return collector
+
+
+def engine_test_proxy(proxies: List[Dict], settings: Dict) -> List[Dict]:
+    """collector.test_proxy를 MAX_WORKERS 쓰레드로 (Redis 없음)"""
+    collector = _collector(settings)
+    with ThreadPoolExecutor(max_workers=settings["workers"]) as executor:
+        return list(executor.map(collector.test_proxy, proxies))
+
+
+def engine_collect_once(proxies: List[Dict], settings: Dict) -> List[Dict]:
+    """collect_once 전체 (목록 다운로드만 팜 목록으로 대체, Redis 저장 포함)"""
+    collector = _collector(settings)
+    collector.REDIS_HOST, collector.REDIS_PORT, collector.REDIS_DB, collector.REDIS_PASSWORD = settings["redis"]
+    collector.MAX_TOTAL_PROXIES = None
+    results: Dict[str, Dict] = {}
+    test_proxy = collector.test_proxy
+
+    def capture(info: Dict) -> Dict:
+        res = test_proxy(info)
+        results[info["address"]] = res
+        return res
+
+    collector.fetch_all_proxies = lambda: list(proxies)
+    collector.test_proxy = capture
+    try:
+        collector.collect_once()
+    finally:
+        collector.test_proxy = test_proxy
+        collector.flush_logs()
+    missing = {"ok": False, "proxy_type": "Skipped", "error": "not tested"}
+    return [results.get(p["address"], missing) for p in proxies]
+
+
+ENGINES: Dict[str, Callable[[List[Dict], Dict], List[Dict]]] = {
+    "test_proxy": engine_test_proxy,
+    "collect_once": engine_collect_once,
+}
+
+
+def load_engine(name: str) -> Callable[[List[Dict], Dict], List[Dict]]:
+    if name in ENGINES:
+        return ENGINES[name]
+    module, _, attr = name.partition(":")
+    if not attr:
+        raise ValueError(f"engine must be one of {', '.join(ENGINES)} or module:function")
+    return getattr(importlib.import_module(module), attr)
+
+
+# ======================================================
+# 측정 / 채점
+# ======================================================
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)  # macOS는 bytes, Linux는 KB
+
+
+def score(specs: List[FakeProxy], results: List[Dict]) -> Dict:
+    """기대 결과 대비 채점. flaky는 확률적이라 정확도에서 빼고 통과율만"""
+    confusion: Counter = Counter()
+    correct = graded = 0
+    flaky_ok = flaky = 0
+    for spec, res in zip(specs, results):
+        got = res.get("proxy_type") if res.get("ok") else "dead"
+        confusion[(spec.kind, got)] += 1
+        if spec.kind == "flaky":
+            flaky += 1
+            flaky_ok += bool(res.get("ok"))
+            continue
+        graded += 1
+        expected = EXPECTED_TYPE.get(spec.kind, "dead") if spec.expected_ok else "dead"
+        correct += got == expected
+    return {
+        "accuracy": round(correct / graded, 4) if graded else None,
+        "graded": graded,
+        "flaky_ok_rate": round(flaky_ok / flaky, 4) if flaky else None,
+        "confusion": {f"{k}->{g}": n for (k, g), n in sorted(confusion.items())},
+    }
+
+
+def run(args) -> Dict:
+    specs = build_farm(
+        args.proxies,
+        mix=parse_mix(args.mix),
+        protocols=[p.strip() for p in args.protocols.split(",") if p.strip()],
+        latency_ms=parse_range(args.latency_ms),
+        flaky_fail_rate=args.flaky_fail_rate,
+        seed=args.seed,
+    )
+    engine = load_engine(args.engine)
+    with FarmProcess(specs, seed=args.seed) as farm:
+        settings = {
+            "judge_url": f"http://127.0.0.1:{farm.judge_port}/",
+            "geoip_url": f"http://127.0.0.1:{farm.judge_port}/geo/{{ip}}",
+            "timeout": args.timeout,
+            "workers": args.workers,
+            "runs": args.runs,
+            "redis": (args.host, args.port, args.db, args.password),
+        }
+        proxies = [s.proxy_info() for s in specs]
+        t0 = time.perf_counter()
+        c0 = os.times()
+        results = engine(proxies, settings)
+        c1 = os.times()
+        wall = time.perf_counter() - t0
+    cpu = (c1.user - c0.user) + (c1.system - c0.system)
+    out = {
+        "engine": args.engine,
+        "proxies": len(specs),
+        "kinds": dict(Counter(s.kind for s in specs)),
+        "wall_s": round(wall, 2),
+        "checks_per_sec": round(len(results) / wall, 1) if wall > 0 else 0.0,
+        "cpu_s": round(cpu, 2),
+        "cpu_pct": round(cpu / wall * 100.0, 1) if wall > 0 else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "farm_connections": farm.connections,
+    }
+    out.update(score(specs, results))
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="로컬 가짜 프록시 팜으로 검증기 처리량 / 정확도 벤치마크")
+    parser.add_argument("--proxies", type=int, default=1000, help="가짜 프록시 수")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"종류별 비율 ({', '.join(KINDS)})")
+    parser.add_argument("--protocols", default="http,socks4,socks5", help="돌아가며 배정할 프로토콜")
+    parser.add_argument("--latency-ms", default="20-300", help="연결마다 핸드셰이크 전 지연 범위 (ms), 예) 50-800")
+    parser.add_argument("--flaky-fail-rate", type=float, default=0.5, help="flaky 프록시가 연결을 끊을 확률")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--engine", default="test_proxy", help=f"{' | '.join(ENGINES)} | module:function")
+    parser.add_argument("--workers", type=int, default=40, help="검사 쓰레드 수 (collector MAX_WORKERS)")
+    parser.add_argument("--runs", type=int, default=3, help="프록시당 IP 체크 횟수 (collector RR_TEST_RUNS)")
+    parser.add_argument("--timeout", type=float, default=3.0, help="연결 / 읽기 타임아웃 (초, blackhole 대기 시간)")
+    parser.add_argument("--host", default="127.0.0.1", help="--engine collect_once용 Redis")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--db", type=int, default=15)
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로(선택)")
+    args = parser.parse_args(argv)
+
+    print(
+        f"[BENCH] engine={args.engine} proxies={args.proxies} workers={args.workers} runs={args.runs} "
+        f"timeout={args.timeout}s latency={args.latency_ms}ms seed={args.seed}"
+    )
+    res = run(args)
+    print(
+        f"[BENCH] {res['checks_per_sec']:>8} checks/s | wall={res['wall_s']}s cpu={res['cpu_s']}s ({res['cpu_pct']}%) "
+        f"| peak_rss={res['peak_rss_mb']}MB | accuracy={res['accuracy']} (n={res['graded']}) "
+        f"flaky_ok={res['flaky_ok_rate']} | farm_conns={res['farm_connections']}"
+    )
+    for key, n in res["confusion"].items():
+        print(f"[BENCH]   {key:32s} {n}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "result": res}, f, ensure_ascii=False, indent=2)
+        print(f"[BENCH] saved -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
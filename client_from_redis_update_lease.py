@@ -5,6 +5,7 @@ import tempfile
 import os
 import shutil
 import json
+import sys
 from typing import Dict, Any, Optional
 
 # 외부 라이브러리
@@ -22,6 +23,13 @@ from selenium.common.exceptions import (
     NoSuchElementException,
 )
 
+# lease 스크립트는 playwright/redis_proxy_lease.py 한 곳에서 관리 (Functions 라이브러리 / EVALSHA)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "playwright"))
+from redis_proxy_lease import RedisProxyLeaseClient, RedisConnConfig, LeaseHeartbeat  # noqa: E402
+from proxy_log import get_logger, flush as flush_logs  # noqa: E402
+
+log = get_logger("client")
+
 # 드라이버 생성 시 동시 접근 방지용 Lock
 driver_creation_lock = threading.Lock()
 
@@ -37,7 +45,8 @@ REDIS_PASSWORD = None
 # Lease 방식 키
 REDIS_ZSET_ALIVE = "proxies:alive"        # collector가 넣는 풀 (score는 next_available_epoch 권장. 0이면 즉시 사용 가능)
 REDIS_ZSET_LEASE = "proxies:lease"        # client가 임대 중인 프록시 (score는 lease_expire_epoch)
-REDIS_HASH_FAIL  = "proxies:fail"         # 실패 카운트 (선택)
+REDIS_HASH_HEALTH = "proxies:health"     # 세션 결과 health(EWMA, 시간 감쇠) - release_on_result가 관리
+REDIS_LIST_SIGNAL = "proxies:signal"      # 멤버가 사용 가능해지면 LPUSH 되는 깨우기 신호(collector/release/reaper)
 
 # (옵션) 최근 사용 기록용
 REDIS_ZSET_USED  = "proxies:used_recent"  # timestamp score로 기록
@@ -51,123 +60,84 @@ def get_redis() -> redis.Redis:
         decode_responses=True,  # member를 str로 다루기
     )
 
-# --------------------- Lease Lua (원자적) ---------------------
-# claim:
-#  1) 만료된 lease를 alive로 회수
-#  2) alive에서 (score<=now) 인 후보 중 앞쪽 sample_k개를 가져와 랜덤 1개 선택
-#  3) alive -> lease로 이동
-_LUA_CLAIM = r"""
-local alive = KEYS[1]
-local lease = KEYS[2]
-local now = tonumber(ARGV[1])
-local lease_sec = tonumber(ARGV[2])
-local reclaim_limit = tonumber(ARGV[3])
-local sample_k = tonumber(ARGV[4])
-local rand_int = tonumber(ARGV[5])
-
--- 1) 만료된 lease 회수
-local expired = redis.call('ZRANGEBYSCORE', lease, '-inf', now, 'LIMIT', 0, reclaim_limit)
-for i, m in ipairs(expired) do
-  redis.call('ZREM', lease, m)
-  redis.call('ZADD', alive, 0, m)
-end
-
--- 2) 사용 가능한 후보들 중 앞쪽 sample_k개
-local cands = redis.call('ZRANGEBYSCORE', alive, '-inf', now, 'LIMIT', 0, sample_k)
-if (not cands) or (#cands == 0) then
-  return nil
-end
-
--- 3) 랜덤 1개 선택 (rand_int를 이용해 결정)
-local idx = (rand_int % #cands) + 1
-local m = cands[idx]
-
-redis.call('ZREM', alive, m)
-redis.call('ZADD', lease, now + lease_sec, m)
-return m
-"""
-
-# release: lease -> alive 로 이동, score = next_time(epoch)
-_LUA_RELEASE = r"""
-local alive = KEYS[1]
-local lease = KEYS[2]
-local member = ARGV[1]
-local next_time = tonumber(ARGV[2])
-
-redis.call('ZREM', lease, member)
-redis.call('ZADD', alive, next_time, member)
-return 1
-"""
-
-# ban: alive/lease 모두에서 제거
-_LUA_BAN = r"""
-local alive = KEYS[1]
-local lease = KEYS[2]
-local member = ARGV[1]
-redis.call('ZREM', alive, member)
-redis.call('ZREM', lease, member)
-return 1
-"""
+# --------------------- Lease (원자적) ---------------------
+# claim / release_on_result는 RedisProxyLeaseClient 사용 (playwright 러너들과 동일한 스크립트/소유권 토큰)
+#  - 서버에는 Functions 라이브러리로 한 번만 로드되고 이후 FCALL/EVALSHA로 호출
+_lease_client: Optional[RedisProxyLeaseClient] = None
+_lease_client_lock = threading.Lock()
+
+def get_lease_client() -> RedisProxyLeaseClient:
+    global _lease_client
+    with _lease_client_lock:
+        if _lease_client is None:
+            client = RedisProxyLeaseClient(
+                RedisConnConfig(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, password=REDIS_PASSWORD),
+                alive_key=REDIS_ZSET_ALIVE,
+                lease_key=REDIS_ZSET_LEASE,
+                health_hash=REDIS_HASH_HEALTH,
+                signal_key=REDIS_LIST_SIGNAL,
+            )
+            client.connect()
+            _lease_client = client
+        return _lease_client
 
 def claim_proxy(
-    r: redis.Redis,
     lease_seconds: int,
     reclaim_limit: int = 200,
     sample_k: int = 50,
 ) -> Optional[str]:
     """alive에서 프록시 1개를 임대(claim). 반환: 'proto://ip:port' or None"""
-    now = int(time.time())
-    rand_int = random.randint(0, 2_147_483_647)
     try:
-        member = r.eval(
-            _LUA_CLAIM,
-            2,
-            REDIS_ZSET_ALIVE,
-            REDIS_ZSET_LEASE,
-            now,
-            int(lease_seconds),
-            int(reclaim_limit),
-            int(sample_k),
-            int(rand_int),
+        return get_lease_client().claim(
+            lease_seconds=int(lease_seconds), reclaim_limit=int(reclaim_limit), sample_k=int(sample_k)
         )
     except redis.RedisError as e:
-        print(f"[REDIS] claim_proxy 실패: {e}")
-        return None
-
-    if not member:
+        log.warning("redis", f"[REDIS] claim_proxy 실패: {e}")
         return None
-    if "://" not in member:
-        return None
-    return member
-
-def release_proxy(r: redis.Redis, member: str, cooldown_seconds: int = 0) -> None:
-    """임대된 프록시를 alive로 반납(release)."""
-    next_time = int(time.time()) + max(0, int(cooldown_seconds))
-    try:
-        r.eval(_LUA_RELEASE, 2, REDIS_ZSET_ALIVE, REDIS_ZSET_LEASE, member, next_time)
-    except redis.RedisError as e:
-        print(f"[REDIS] release_proxy 실패: {e}")
 
-def ban_proxy(r: redis.Redis, member: str) -> None:
-    """문제 프록시를 풀에서 제거(ban)."""
-    try:
-        r.eval(_LUA_BAN, 2, REDIS_ZSET_ALIVE, REDIS_ZSET_LEASE, member)
-    except redis.RedisError as e:
-        print(f"[REDIS] ban_proxy 실패: {e}")
+def wait_for_proxy_signal(r: redis.Redis, max_wait: float, stop_event: threading.Event) -> bool:
+    """
+    프록시가 사용 가능해질 때까지 대기 (고정 sleep 대신).
+    - signal list BLPOP: collector 신규 등록 / release / 만료 회수 시 즉시 깨어남
+    - alive의 가장 빠른 미래 score(쿨다운 만료 시각)가 되면 깨어남
+    - stop_event 확인을 위해 최대 5초 단위로 끊어서 대기
+    반환: 신호를 받았으면 True
+    """
+    deadline = time.time() + max(0.0, float(max_wait))
+    while not stop_event.is_set():
+        now = time.time()
+        wait = deadline - now
+        if wait <= 0:
+            return False
+        try:
+            nxt = r.zrangebyscore(REDIS_ZSET_ALIVE, f"({int(now)}", "+inf", start=0, num=1, withscores=True)
+            if nxt:
+                wait = min(wait, max(0.0, float(nxt[0][1]) - now))
+                if wait <= 0:
+                    return True
+            if r.blpop([REDIS_LIST_SIGNAL], timeout=max(0.1, min(wait, 5.0))):
+                return True
+        except redis.RedisError as e:
+            log.warning("redis", f"[REDIS] wait_for_proxy_signal 실패: {e}")
+            time.sleep(1)
+    return False
+
+def session_stop_event(stop_event: threading.Event, heartbeat: LeaseHeartbeat) -> threading.Event:
+    """
+    전역 중단 신호 또는 heartbeat의 lease 상실(lost) 중 하나라도 set 되면 set 되는 세션용 Event.
+    세션이 끝나면 반환된 Event를 set 해서 감시 쓰레드를 종료.
+    """
+    ev = threading.Event()
 
-def inc_fail(r: redis.Redis, member: str) -> int:
-    """실패 카운트 +1"""
-    try:
-        return int(r.hincrby(REDIS_HASH_FAIL, member, 1))
-    except redis.RedisError:
-        return 1
+    def _watch():
+        while not ev.is_set():
+            if stop_event.is_set() or heartbeat.lost.is_set():
+                ev.set()
+                return
+            heartbeat.lost.wait(1.0)
 
-def reset_fail(r: redis.Redis, member: str) -> None:
-    """실패 카운트 초기화"""
-    try:
-        r.hdel(REDIS_HASH_FAIL, member)
-    except redis.RedisError:
-        pass
+    threading.Thread(target=_watch, name=f"session-stop-{heartbeat.member}", daemon=True).start()
+    return ev
 
 def log_proxy_used(r: redis.Redis, member: str) -> None:
     """최근 사용 기록만 남김(풀에서는 제거하지 않음)."""
@@ -196,9 +166,9 @@ def load_region_profiles(json_path: Optional[str] = None) -> Dict[str, Dict[str,
 
 try:
     REGION_PROFILES: Dict[str, Dict[str, Any]] = load_region_profiles()
-    print(f"[INIT] region_profiles.json 로드 완료. 지역 수: {len(REGION_PROFILES)}")
+    log.info("init", f"[INIT] region_profiles.json 로드 완료. 지역 수: {len(REGION_PROFILES)}")
 except Exception as e:
-    print(f"[INIT] ❌ REGION_PROFILES 로드 실패: {e}")
+    log.error("init", f"[INIT] ❌ REGION_PROFILES 로드 실패: {e}")
     REGION_PROFILES = {}
 
 # ===================== 공통 설정 =====================
@@ -218,12 +188,15 @@ HEADLESS = False
 WAIT_WHEN_NO_PROXY_SECONDS = 60
 
 # ---- Lease 운영 파라미터 (필요시 네가 조정) ----
-LEASE_SECONDS = max(120, int(ENSURE_TIMEOUT + STAY_DURATION + 120))
+# 세션 길이(ENSURE_TIMEOUT + STAY_DURATION)와 무관하게 짧게 잡고 heartbeat로 계속 연장
+#  -> 워커/프로세스가 죽으면 LEASE_SECONDS 안에 풀로 복귀
+LEASE_SECONDS = 60
 
 COOLDOWN_SUCCESS = 0
 COOLDOWN_FAIL_BASE = 30
+COOLDOWN_FAIL_MAX = 1800   # health가 0에 가까울 때 실패 쿨다운
 COOLDOWN_FAIL_JITTER = 60
-MAX_FAIL = 5
+BAN_BELOW = 0.25           # health(0~1)가 이 값 미만이면 probation(collector 재검증 전까지 제외)
 
 # ===================== 사람처럼 행동하는 유틸 =====================
 def human_sleep(min_sec=0.5, max_sec=2.0, mu=None, sigma=None):
@@ -302,7 +275,7 @@ def reset_browser_data_in_session(driver):
             try:
                 driver.get("about:blank")
             except:
-                print("   [Reset] ⚠️ about:blank 이동 실패, 초기화 스킵")
+                log.warning("reset", "   [Reset] ⚠️ about:blank 이동 실패, 초기화 스킵")
                 return False
 
         try:
@@ -320,11 +293,11 @@ def reset_browser_data_in_session(driver):
         except WebDriverException:
             pass
 
-        print("   [Reset] 🧹 쿠키, 로컬/세션 스토리지를 세션 내에서 초기화했습니다.")
+        log.info("reset", "   [Reset] 🧹 쿠키, 로컬/세션 스토리지를 세션 내에서 초기화했습니다.")
         return True
 
     except Exception as e:
-        print(f"   [Reset] ⚠️ 데이터 초기화 중 예외 발생: {e.__class__.__name__}")
+        log.warning("reset", f"   [Reset] ⚠️ 데이터 초기화 중 예외 발생: {e.__class__.__name__}")
         return False
 
 # ===================== undetected_chromedriver 생성 =====================
@@ -382,7 +355,7 @@ def create_undetected_driver(profile: Dict[str, Any], proxy: Optional[str], thre
             )
 
         except Exception as e:
-            print(f"[ERR] Driver creation failed: {e}")
+            log.error("driver", f"[ERR] Driver creation failed: {e}")
             # 드라이버 생성 실패 시 temp 디렉토리 정리
             try:
                 if os.path.exists(temp_dir):
@@ -461,7 +434,7 @@ def click_youtube_consent_accept_all(driver, timeout=8):
             "form[action='https://consent.youtube.com/save']",
         )
         if not forms:
-            print("[Consent] save 폼이 없어 동의 페이지가 아닌 것으로 판단 → 스킵")
+            log.info("consent", "[Consent] save 폼이 없어 동의 페이지가 아닌 것으로 판단 → 스킵")
             return False
 
         btn = WebDriverWait(driver, timeout).until(
@@ -473,14 +446,14 @@ def click_youtube_consent_accept_all(driver, timeout=8):
             )
         )
         btn.click()
-        print("[Consent] ✅ 유튜브 동의 '모두 수락' 버튼 자동 클릭 완료")
+        log.info("consent", "[Consent] ✅ 유튜브 동의 '모두 수락' 버튼 자동 클릭 완료")
         return True
 
     except (TimeoutException, NoSuchElementException):
-        print("[Consent] ⚠ 동의 버튼을 찾지 못함 (구조 변경/언어 이슈?)")
+        log.warning("consent", "[Consent] ⚠ 동의 버튼을 찾지 못함 (구조 변경/언어 이슈?)")
         return False
     except Exception as e:
-        print(f"[Consent] ⚠ 예외 발생: {e}")
+        log.warning("consent", f"[Consent] ⚠ 예외 발생: {e}")
         return False
 
 # ===================== 메인 워커 =====================
@@ -496,29 +469,33 @@ def monitor_service(
 
     session_ok = False
 
+    # 짧은 lease를 세션 내내 heartbeat로 연장. 연장이 거부되면(lease 상실) 세션을 중단
+    heartbeat = get_lease_client().heartbeat(proxy_member, lease_seconds=LEASE_SECONDS)
+    session_stop = session_stop_event(stop_event, heartbeat)
+
     try:
         if not REGION_PROFILES:
-            print(f"[Bot-{index}] ❌ REGION_PROFILES가 비어 있습니다. region_profiles.json 로드를 확인하세요.")
+            log.error("bot", f"[Bot-{index}] ❌ REGION_PROFILES가 비어 있습니다. region_profiles.json 로드를 확인하세요.", bot=index)
             return
 
         region = random.choice(list(REGION_PROFILES.keys()))
         profile = REGION_PROFILES[region]
 
-        print(f"\n[Bot-{index}] 🌍 Profile: {region} ({profile['timezone']})")
-        print(f"[Bot-{index}] 🧩 Proxy(leased): {proxy_member}")
+        log.info("bot", f"\n[Bot-{index}] 🌍 Profile: {region} ({profile['timezone']})", bot=index)
+        log.info("bot", f"[Bot-{index}] 🧩 Proxy(leased): {proxy_member}", bot=index)
 
-        if stop_event.is_set():
-            print(f"[Bot-{index}] 🛑 시작 전 중단 신호 수신. 종료.")
+        if session_stop.is_set():
+            log.info("bot", f"[Bot-{index}] 🛑 시작 전 중단 신호 수신. 종료.", bot=index)
             return
 
         driver, temp_dir = create_undetected_driver(profile, proxy_member, index)
         if not driver:
-            print(f"[Bot-{index}] ❌ 드라이버 생성 실패.")
+            log.error("bot", f"[Bot-{index}] ❌ 드라이버 생성 실패.", bot=index)
             return
 
         # (디버그) 브라우저가 처음 어떤 URL로 떠 있는지 확인
         try:
-            print(f"[Bot-{index}] (debug) initial url={driver.current_url} title={driver.title!r}")
+            log.debug("bot", f"[Bot-{index}] (debug) initial url={driver.current_url} title={driver.title!r}", bot=index)
         except Exception:
             pass
 
@@ -532,16 +509,16 @@ def monitor_service(
             y = base_y
             if not HEADLESS:
                 driver.set_window_position(x, y)
-                print(f"[Bot-{index}] 🪟 창 위치 설정: ({x}, {y}) [slot {slot}]")
+                log.info("bot", f"[Bot-{index}] 🪟 창 위치 설정: ({x}, {y}) [slot {slot}]", bot=index)
         except Exception as e:
-            print(f"[Bot-{index}] ⚠ 창 위치 설정 실패: {e}")
+            log.warning("bot", f"[Bot-{index}] ⚠ 창 위치 설정 실패: {e}", bot=index)
 
         # 초기 페이지
         try:
             driver.get("about:blank")
-            print(f"[Bot-{index}] 초기 페이지(about:blank) 로드 완료")
+            log.info("bot", f"[Bot-{index}] 초기 페이지(about:blank) 로드 완료", bot=index)
         except Exception as e:
-            print(f"[Bot-{index}] ⚠️ 초기 페이지 로드 실패: {e}")
+            log.warning("bot", f"[Bot-{index}] ⚠️ 초기 페이지 로드 실패: {e}", bot=index)
             return
 
         reset_browser_data_in_session(driver)
@@ -552,12 +529,12 @@ def monitor_service(
             driver.execute_cdp_cmd(
                 "Network.setExtraHTTPHeaders", {"headers": {"Referer": referer}}
             )
-            print(f"[Bot-{index}] Referer: {referer}")
+            log.info("bot", f"[Bot-{index}] Referer: {referer}", bot=index)
         except Exception as e:
-            print(f"[Bot-{index}] ⚠ Referer 설정 실패: {e}")
+            log.warning("bot", f"[Bot-{index}] ⚠ Referer 설정 실패: {e}", bot=index)
 
         # 타겟 페이지 접속
-        print(f"[Bot-{index}] 접속 요청: {url}")
+        log.info("bot", f"[Bot-{index}] 접속 요청: {url}", bot=index)
         browse_start = time.time()
         hard_deadline = browse_start + BROWSE_MAX_SECONDS
 
@@ -574,36 +551,39 @@ def monitor_service(
                 except TimeoutException:
                     pass
         except TimeoutException:
-            print(f"[Bot-{index}] ⚠️ Get 요청 타임아웃. 로딩 상태 확인 시도.")
+            log.warning("bot", f"[Bot-{index}] ⚠️ Get 요청 타임아웃. 로딩 상태 확인 시도.", bot=index)
 
         remaining_for_load = hard_deadline - time.time()
         if remaining_for_load <= 0:
-            print(f"[Bot-{index}] ⏰ 브라우징 최대 시간({BROWSE_MAX_SECONDS}초) 도달(로딩 대기 중). 세션 종료.")
+            log.info("bot", f"[Bot-{index}] ⏰ 브라우징 최대 시간({BROWSE_MAX_SECONDS}초) 도달(로딩 대기 중). 세션 종료.", bot=index)
             return
 
         if not ensure_page_ready(driver, timeout=min(ENSURE_TIMEOUT, max(5, remaining_for_load))):
-            print(f"[Bot-{index}] ❌ 페이지 로딩 실패로 종료.")
+            log.error("bot", f"[Bot-{index}] ❌ 페이지 로딩 실패로 종료.", bot=index)
+            return
+
+        if heartbeat.lost.is_set():
             return
 
         session_ok = True
 
         remaining = hard_deadline - time.time()
         if remaining <= 0:
-            print(f"[Bot-{index}] ⏰ 브라우징 최대 시간({BROWSE_MAX_SECONDS}초) 도달(로딩 직후). 세션 종료.")
+            log.info("bot", f"[Bot-{index}] ⏰ 브라우징 최대 시간({BROWSE_MAX_SECONDS}초) 도달(로딩 직후). 세션 종료.", bot=index)
             return
 
         reaction_time = min(random.uniform(0.8, 2.5), remaining)
         if reaction_time > 0:
-            print(f"[Bot-{index}] ✅ 로딩 완료. 인지 반응 대기: {reaction_time:.2f}초 (남은 상한: {remaining:.1f}초)")
-            stop_event.wait(timeout=reaction_time)
+            log.info("bot", f"[Bot-{index}] ✅ 로딩 완료. 인지 반응 대기: {reaction_time:.2f}초 (남은 상한: {remaining:.1f}초)", bot=index)
+            session_stop.wait(timeout=reaction_time)
 
-        if stop_event.is_set():
-            print(f"[Bot-{index}] 🛑 인지 대기 중 중단 신호. 종료.")
+        if session_stop.is_set():
+            log.info("bot", f"[Bot-{index}] 🛑 인지 대기 중 중단 신호. 종료.", bot=index)
             return
 
         remaining = hard_deadline - time.time()
         if remaining <= 0:
-            print(f"[Bot-{index}] ⏰ 브라우징 최대 시간({BROWSE_MAX_SECONDS}초) 도달(체류 전). 세션 종료.")
+            log.info("bot", f"[Bot-{index}] ⏰ 브라우징 최대 시간({BROWSE_MAX_SECONDS}초) 도달(체류 전). 세션 종료.", bot=index)
             return
 
         stay_time = max(10, random.gauss(STAY_DURATION, 10))
@@ -612,19 +592,19 @@ def monitor_service(
         action_offset = 15.0
 
         if stay_time <= action_offset:
-            print(f"[Bot-{index}] 체류 시작 (총 {stay_time:.1f}초, 즉시 휴먼 이벤트 실행 후 대기)")
+            log.info("bot", f"[Bot-{index}] 체류 시작 (총 {stay_time:.1f}초, 즉시 휴먼 이벤트 실행 후 대기)", bot=index)
             try:
                 body = driver.find_element(By.TAG_NAME, "body")
                 human_mouse_move(driver, end_el=body)
             except Exception:
                 pass
             human_scroll(driver)
-            stop_event.wait(timeout=stay_time)
+            session_stop.wait(timeout=stay_time)
         else:
             pre_wait = stay_time - action_offset
-            print(f"[Bot-{index}] 체류 시작 (총 {stay_time:.1f}초, {pre_wait:.1f}초 후 휴먼 이벤트 실행, 이후 15초 유지)")
-            stop_event.wait(timeout=pre_wait)
-            if stop_event.is_set():
+            log.info("bot", f"[Bot-{index}] 체류 시작 (총 {stay_time:.1f}초, {pre_wait:.1f}초 후 휴먼 이벤트 실행, 이후 15초 유지)", bot=index)
+            session_stop.wait(timeout=pre_wait)
+            if session_stop.is_set():
                 return
             try:
                 body = driver.find_element(By.TAG_NAME, "body")
@@ -635,12 +615,15 @@ def monitor_service(
             remaining2 = hard_deadline - time.time()
             tail = min(action_offset, max(0, remaining2))
             if tail > 0:
-                stop_event.wait(timeout=tail)
+                session_stop.wait(timeout=tail)
 
-        print(f"[Bot-{index}] 모니터링 정상 종료.")
+        if heartbeat.lost.is_set():
+            return
+
+        log.info("bot", f"[Bot-{index}] 모니터링 정상 종료.", bot=index)
 
     except Exception as e:
-        print(f"[Bot-{index}] 🛑 오류 발생: {e.__class__.__name__}: {e}")
+        log.error("bot", f"[Bot-{index}] 🛑 오류 발생: {e.__class__.__name__}: {e}", bot=index)
 
     finally:
         if driver:
@@ -655,36 +638,77 @@ def monitor_service(
             for attempt in range(3):
                 try:
                     shutil.rmtree(temp_dir)
-                    print(f"[Bot-{index}] 🧹 임시 디렉토리 삭제 완료: {temp_dir}")
+                    log.info("bot", f"[Bot-{index}] 🧹 임시 디렉토리 삭제 완료: {temp_dir}", bot=index)
                     break
                 except PermissionError:
                     if attempt < 2:
-                        print(f"[Bot-{index}] ⚠️ 삭제 재시도 {attempt + 1}/3 (파일 사용 중)")
+                        log.warning("bot", f"[Bot-{index}] ⚠️ 삭제 재시도 {attempt + 1}/3 (파일 사용 중)", bot=index)
                         time.sleep(2)
                     else:
-                        print(f"[Bot-{index}] ⚠️ 임시 디렉토리 삭제 최종 실패")
+                        log.warning("bot", f"[Bot-{index}] ⚠️ 임시 디렉토리 삭제 최종 실패", bot=index)
                 except Exception as e:
-                    print(f"[Bot-{index}] ⚠️ 임시 디렉토리 삭제 실패: {e}")
+                    log.warning("bot", f"[Bot-{index}] ⚠️ 임시 디렉토리 삭제 실패: {e}", bot=index)
                     break
 
+        heartbeat.stop()
+        session_stop.set()
+        if heartbeat.lost.is_set():
+            log.warning(
+                "proxy_lease_lost",
+                f"[Bot-{index}] ⚠️ lease lost during session (heartbeat rejected): {proxy_member}",
+                bot=index,
+                member=proxy_member,
+            )
+
         if redis_client and proxy_member:
-            if session_ok:
-                reset_fail(redis_client, proxy_member)
-                release_proxy(redis_client, proxy_member, cooldown_seconds=COOLDOWN_SUCCESS)
-                print(f"[Bot-{index}] 🔁 proxy released (ok): {proxy_member}")
+            info = get_lease_client().release_on_result(
+                proxy_member,
+                session_ok=session_ok,
+                cooldown_success=COOLDOWN_SUCCESS,
+                cooldown_fail_base=COOLDOWN_FAIL_BASE,
+                cooldown_fail_max=COOLDOWN_FAIL_MAX,
+                cooldown_fail_jitter=COOLDOWN_FAIL_JITTER,
+                ban_below=BAN_BELOW,
+            )
+            action = info.get("action")
+            if action == "probation":
+                log.info(
+                    "proxy_probation",
+                    f"[Bot-{index}] ⏸️ proxy on probation (health={info['health']:.2f}, strikes={info['strikes']}): {proxy_member}",
+                    bot=index,
+                    member=proxy_member,
+                    health=info["health"],
+                    strikes=info["strikes"],
+                )
+            elif action == "banned":
+                log.warning(
+                    "proxy_banned",
+                    f"[Bot-{index}] ⛔ proxy banned (strikes={info['strikes']}): {proxy_member}",
+                    bot=index,
+                    member=proxy_member,
+                    strikes=info["strikes"],
+                )
+            elif action == "rejected":
+                log.warning(
+                    "proxy_release_rejected",
+                    f"[Bot-{index}] ⚠️ release rejected (lease no longer owned): {proxy_member}",
+                    bot=index,
+                    member=proxy_member,
+                )
             else:
-                fails = inc_fail(redis_client, proxy_member)
-                if fails >= MAX_FAIL:
-                    ban_proxy(redis_client, proxy_member)
-                    print(f"[Bot-{index}] ⛔ proxy banned (fails={fails}): {proxy_member}")
-                else:
-                    cooldown = COOLDOWN_FAIL_BASE + random.randint(0, max(0, COOLDOWN_FAIL_JITTER))
-                    release_proxy(redis_client, proxy_member, cooldown_seconds=cooldown)
-                    print(f"[Bot-{index}] 🔁 proxy released (fail={fails}, cooldown={cooldown}s): {proxy_member}")
+                log.info(
+                    "proxy_released",
+                    f"[Bot-{index}] 🔁 proxy released (ok={session_ok}, health={info['health']:.2f}, cooldown={info['cooldown']}s): {proxy_member}",
+                    bot=index,
+                    member=proxy_member,
+                    ok=session_ok,
+                    health=info["health"],
+                    cooldown=info["cooldown"],
+                )
 
 # ===================== 임시 디렉토리 정리 (전역, 예비용) =====================
 def cleanup_temp_dirs():
-    print("\n🧹 남은 임시 파일 확인 중...")
+    log.info("client", "\n🧹 남은 임시 파일 확인 중...")
     cleaned = 0
     failed = 0
     try:
@@ -706,21 +730,21 @@ def cleanup_temp_dirs():
         pass
 
     if cleaned > 0:
-        print(f"   ✅ {cleaned}개 디렉토리 정리 완료")
+        log.info("client", f"   ✅ {cleaned}개 디렉토리 정리 완료")
     if failed > 0:
-        print(f"   ⚠️ {failed}개 디렉토리 정리 실패 (재부팅 후 수동 삭제 권장)")
+        log.warning("client", f"   ⚠️ {failed}개 디렉토리 정리 실패 (재부팅 후 수동 삭제 권장)")
     if cleaned == 0 and failed == 0:
-        print(f"   ✅ 정리할 항목 없음")
+        log.info("client", f"   ✅ 정리할 항목 없음")
 
 import atexit
 atexit.register(cleanup_temp_dirs)
 
 # ===================== 메인 (워커 스케줄러) =====================
 if __name__ == "__main__":
-    print(f"=== 🛡️ Redis 기반 Stealth Monitor Started (TARGET_URL: {TARGET_URL}) ===")
+    log.info("client", f"=== 🛡️ Redis 기반 Stealth Monitor Started (TARGET_URL: {TARGET_URL}) ===")
 
     if not REGION_PROFILES:
-        print("[MAIN] ❌ REGION_PROFILES가 비어 있습니다. region_profiles.json 상태를 확인하세요.")
+        log.error("main", "[MAIN] ❌ REGION_PROFILES가 비어 있습니다. region_profiles.json 상태를 확인하세요.")
         exit(1)
 
     r = get_redis()
@@ -736,7 +760,7 @@ if __name__ == "__main__":
             # 1) 죽은 스레드 정리
             alive_threads = [t for t in threads if t.is_alive()]
             if len(alive_threads) != len(threads):
-                print(f"[MAIN] 🔄 스레드 정리: {len(threads)} → {len(alive_threads)} alive")
+                log.info("main", f"[MAIN] 🔄 스레드 정리: {len(threads)} → {len(alive_threads)} alive")
             threads = alive_threads
 
             capacity = max(0, NUM_BROWSERS - len(threads))
@@ -747,10 +771,10 @@ if __name__ == "__main__":
                 if stop_event.is_set():
                     break
 
-                proxy_member = claim_proxy(r, lease_seconds=LEASE_SECONDS, reclaim_limit=200, sample_k=50)
+                proxy_member = claim_proxy(lease_seconds=LEASE_SECONDS, reclaim_limit=200, sample_k=50)
                 if not proxy_member:
                     no_proxy_available = True
-                    print("[MAIN] ⚠️ 사용할 프록시가 없습니다(사용 가능 score<=now 없음). collector가 채울 때까지 대기.")
+                    log.warning("main", "[MAIN] ⚠️ 사용할 프록시가 없습니다(사용 가능 score<=now 없음). collector가 채울 때까지 대기.")
                     break
 
                 log_proxy_used(r, proxy_member)
@@ -758,7 +782,7 @@ if __name__ == "__main__":
                 idx = worker_index
                 worker_index += 1
 
-                print(f"[MAIN] ▶ 새 워커 Bot-{idx} 시작, 프록시(leased): {proxy_member}")
+                log.info("worker_start", f"[MAIN] ▶ 새 워커 Bot-{idx} 시작, 프록시(leased): {proxy_member}", bot=idx, member=proxy_member)
                 t = threading.Thread(
                     target=monitor_service,
                     args=(TARGET_URL, proxy_member, idx, stop_event, r),
@@ -770,16 +794,15 @@ if __name__ == "__main__":
 
             # 3) 프록시도 없고, 돌고 있는 스레드도 없으면 → 길게 대기
             if no_proxy_available and not threads:
-                print(f"[MAIN] ⚠️ 프록시 없음 + 활성 워커 0 ⇒ {WAIT_WHEN_NO_PROXY_SECONDS}초 대기 후 재시도.")
-                for _ in range(WAIT_WHEN_NO_PROXY_SECONDS):
-                    if stop_event.is_set():
-                        break
-                    time.sleep(1)
+                log.warning("main", f"[MAIN] ⚠️ 프록시 없음 + 활성 워커 0 ⇒ 최대 {WAIT_WHEN_NO_PROXY_SECONDS}초 대기(새 프록시 신호 시 즉시 재시도).")
+                wait_for_proxy_signal(r, WAIT_WHEN_NO_PROXY_SECONDS, stop_event)
+            elif no_proxy_available:
+                wait_for_proxy_signal(r, 2, stop_event)
             else:
                 time.sleep(2)
 
     except KeyboardInterrupt:
-        print("\n[MAIN] Ctrl+C (KeyboardInterrupt) 수신. Graceful Shutdown 시작.")
+        log.info("main", "\n[MAIN] Ctrl+C (KeyboardInterrupt) 수신. Graceful Shutdown 시작.")
         stop_event.set()
 
     finally:
@@ -788,4 +811,5 @@ if __name__ == "__main__":
                 t.join(timeout=10)
 
         cleanup_temp_dirs()
-        print("\n=== ✅ 모든 작업 완료 및 정리 완료 ===")
+        log.info("client", "\n=== ✅ 모든 작업 완료 및 정리 완료 ===")
+        flush_logs()
@@ -0,0 +1,265 @@
+"""
+collect_once 단계별 시간 측정 + 선택적 프로파일링.
+
+  PHASES.begin_cycle()
+  with PHASES.phase("download:vakhov_http"):
+      ...
+  PHASES.checkpoint("fetch")        # 메모리 프로파일링 중이면 tracemalloc 스냅샷
+  report = PHASES.end_cycle()       # 사이클 단계별 합계 (+ 직전 사이클 대비 변화)
+
+- 단계 시간은 스레드별로 따로 재서 합산 -> 검사 쓰레드에서 쓰는 단계(judge/geoip/redis_store ...)는
+  "스레드 합계 시간"이라 벽시계 사이클 시간보다 클 수 있음 (비율은 단계 간 비교용).
+- 같은 스레드에서 단계가 중첩되면 바깥 단계 시간에 안쪽 시간이 포함됨 (리프 단계끼리는 겹치지 않게 쓸 것).
+- 프로파일링 (기본 꺼짐): PROXY_PROFILE=cpu|mem|cpu,mem|1 또는 SIGUSR1로 다음 사이클부터 켜고/끔.
+    cpu: 단계별 cProfile (스레드마다 바깥 단계에서만 켬) -> {dir}/{cycle}/{phase}.prof + .txt(누적 시간 상위)
+    mem: 사이클 동안 tracemalloc, checkpoint마다 {dir}/{cycle}/mem-NN-{label}.snap + .txt(직전 대비 증가 상위)
+  .prof는 python -m pstats / snakeviz 등으로, .snap은 tracemalloc.Snapshot.load()로 열면 됨.
+"""
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Set
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+PROFILE_TOP = 40  # .txt 요약에 남길 함수 / 할당 위치 수
+TRACEMALLOC_FRAMES = 10
+
+
+def parse_modes(value: Optional[str]) -> Set[str]:
+    """PROXY_PROFILE 값 -> {"cpu", "mem"} 부분집합 ("1"/"all"/"on" = 둘 다)"""
+    value = (value or "").strip().lower()
+    if value in ("", "0", "off", "false", "no"):
+        return set()
+    if value in ("1", "all", "on", "true", "yes"):
+        return {"cpu", "mem"}
+    modes = {m.strip() for m in value.split(",") if m.strip()}
+    unknown = modes - {"cpu", "mem"}
+    if unknown:
+        raise ValueError(f"unknown profile mode: {', '.join(sorted(unknown))}")
+    return modes
+
+
+class _Phase:
+    __slots__ = ("_timer", "_name", "_t0", "_prof")
+
+    def __init__(self, timer: "PhaseTimer", name: str):
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self) -> "_Phase":
+        self._prof = self._timer._profile_enter(self._name)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self._t0
+        if self._prof is not None:
+            self._prof.disable()
+        self._timer._profile_exit()
+        self._timer.add(self._name, elapsed)
+
+
+class PhaseTimer:
+    """
+    단계 이름 -> [횟수, 합계(초), 최대(초)] 누적. 사이클 단위로 begin_cycle()/end_cycle().
+    metric(Histogram, 라벨 phase)을 주면 단계 1회마다 observe도 함.
+    """
+
+    def __init__(self, *, metric=None, profile_dir: str = DEFAULT_PROFILE_DIR, modes: Optional[Set[str]] = None):
+        self.metric = metric
+        self.profile_dir = profile_dir
+        self.modes: Set[str] = set(modes or ())  # 다음 사이클에 쓸 프로파일링 모드
+        self._lock = threading.Lock()
+        self._totals: Dict[str, List[float]] = {}
+        self._local = threading.local()
+        self._cycle_t0 = time.perf_counter()
+        self._cycle_id = 0
+        self._active: Set[str] = set()  # 진행 중인 사이클의 프로파일링 모드
+        self._profiles: Dict[str, List[cProfile.Profile]] = {}
+        self._snapshots: List = []  # [(label, tracemalloc.Snapshot)]
+        self._started_tracemalloc = False
+        self._out_dir: Optional[str] = None
+        self.last: Dict[str, Dict[str, float]] = {}  # 직전 사이클 report["phases"] (변화 비교용)
+
+    # ---------------- 측정 ----------------
+
+    def phase(self, name: str) -> _Phase:
+        return _Phase(self, name)
+
+    def add(self, name: str, seconds: float, count: int = 1) -> None:
+        with self._lock:
+            t = self._totals.get(name)
+            if t is None:
+                self._totals[name] = [count, seconds, seconds]
+            else:
+                t[0] += count
+                t[1] += seconds
+                if seconds > t[2]:
+                    t[2] = seconds
+        if self.metric is not None:
+            self.metric.labels(name).observe(seconds)
+
+    # ---------------- 사이클 ----------------
+
+    def toggle(self, modes: Optional[Set[str]] = None) -> Set[str]:
+        """프로파일링 켜기/끄기 (다음 begin_cycle부터 적용). 켜져 있으면 끄고, 꺼져 있으면 modes(기본 cpu+mem)로 켬."""
+        self.modes = set() if self.modes else set(modes or {"cpu", "mem"})
+        return set(self.modes)
+
+    def begin_cycle(self, cycle_id: Optional[int] = None) -> None:
+        self._cycle_id = int(cycle_id if cycle_id is not None else time.time())
+        with self._lock:
+            self._totals = {}
+            self._profiles = {}
+        self._snapshots = []
+        self._active = set(self.modes)
+        self._out_dir = None
+        if self._active:
+            self._out_dir = os.path.join(self.profile_dir, time.strftime("%Y%m%d-%H%M%S", time.localtime(self._cycle_id)))
+            try:
+                os.makedirs(self._out_dir, exist_ok=True)
+            except OSError:  # 기록할 곳이 없으면 이번 사이클은 시간 측정만
+                self._active = set()
+                self._out_dir = None
+        if "mem" in self._active and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        self._cycle_t0 = time.perf_counter()
+        self.checkpoint("begin")
+
+    def checkpoint(self, label: str) -> None:
+        """메모리 프로파일링 중이면 tracemalloc 스냅샷 (단계 경계에서 메인 스레드가 호출)"""
+        if "mem" not in self._active or not tracemalloc.is_tracing():
+            return
+        snap = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>"))
+        )
+        n = len(self._snapshots)
+        base = os.path.join(self._out_dir, f"mem-{n:02d}-{label}")
+        try:
+            snap.dump(base + ".snap")
+        except OSError:
+            pass
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"# checkpoint={label} traced={current / 1e6:.1f}MB peak={peak / 1e6:.1f}MB"]
+        if self._snapshots:
+            prev_label, prev = self._snapshots[-1]
+            lines.append(f"# {prev_label} 대비 증가 상위 {PROFILE_TOP}")
+            lines += [str(s) for s in snap.compare_to(prev, "lineno")[:PROFILE_TOP]]
+        else:
+            lines.append(f"# 할당 상위 {PROFILE_TOP}")
+            lines += [str(s) for s in snap.statistics("lineno")[:PROFILE_TOP]]
+        try:
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError:
+            pass
+        self._snapshots.append((label, snap))
+
+    def end_cycle(self) -> Dict:
+        """
+        사이클 종료: 프로파일 파일 기록, 단계별 합계 반환.
+          {"wall_s", "phases": {name: {"count", "total_s", "avg_ms", "max_ms", "share"}}, "delta": {name: 비율 변화}, "profile_dir"}
+        """
+        wall = time.perf_counter() - self._cycle_t0
+        self.checkpoint("end")
+        with self._lock:
+            totals = {k: list(v) for k, v in self._totals.items()}
+            profiles = self._profiles
+            self._profiles = {}
+        phases = {
+            name: {
+                "count": int(c),
+                "total_s": round(s, 3),
+                "avg_ms": round(s / c * 1000.0, 2) if c else 0.0,
+                "max_ms": round(m * 1000.0, 2),
+                "share": round(s / wall, 4) if wall > 0 else 0.0,
+            }
+            for name, (c, s, m) in sorted(totals.items(), key=lambda kv: -kv[1][1])
+        }
+        delta = {
+            name: round(p["total_s"] / self.last[name]["total_s"] - 1.0, 3)
+            for name, p in phases.items()
+            if name in self.last and self.last[name]["total_s"] > 0
+        }
+        out_dir = self._out_dir
+        if "cpu" in self._active and out_dir:
+            self._dump_profiles(profiles, out_dir)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self._snapshots = []
+        self._active = set()
+        self._out_dir = None
+        self.last = phases
+        return {"wall_s": round(wall, 3), "phases": phases, "delta": delta, "profile_dir": out_dir}
+
+    @staticmethod
+    def format_report(report: Dict) -> str:
+        wall = report["wall_s"]
+        lines = [f"⏱️  단계별 시간 (사이클 {wall:.1f}초, 쓰레드 단계는 스레드 합계)"]
+        lines.append(f"  {'phase':24s} {'count':>7} {'total(s)':>10} {'avg(ms)':>9} {'max(ms)':>9} {'%wall':>7} {'Δ직전':>7}")
+        for name, p in report["phases"].items():
+            d = report["delta"].get(name)
+            lines.append(
+                f"  {name:24s} {p['count']:>7} {p['total_s']:>10.1f} {p['avg_ms']:>9.1f} {p['max_ms']:>9.1f} "
+                f"{p['share'] * 100:>6.1f}% {(f'{d * 100:+.0f}%' if d is not None else '-'):>7}"
+            )
+        if report.get("profile_dir"):
+            lines.append(f"  🔬 프로파일: {report['profile_dir']}")
+        return "\n".join(lines)
+
+    # ---------------- cProfile ----------------
+
+    def _profile_enter(self, name: str) -> Optional[cProfile.Profile]:
+        # 스레드마다 가장 바깥 단계에서만 켬 (cProfile은 스레드당 하나만 활성 가능)
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        if depth or "cpu" not in self._active:
+            return None
+        profs = getattr(self._local, "profs", None)
+        if profs is None or getattr(self._local, "cycle", None) != self._cycle_id:
+            profs = self._local.profs = {}
+            self._local.cycle = self._cycle_id
+        prof = profs.get(name)
+        if prof is None:
+            prof = profs[name] = cProfile.Profile()
+            with self._lock:
+                self._profiles.setdefault(name, []).append(prof)
+        try:
+            prof.enable()
+        except ValueError:  # 다른 프로파일러가 이미 활성
+            return None
+        return prof
+
+    def _profile_exit(self) -> None:
+        self._local.depth -= 1
+
+    @staticmethod
+    def _dump_profiles(profiles: Dict[str, List[cProfile.Profile]], out_dir: str) -> None:
+        for name, profs in profiles.items():
+            stats = None
+            for prof in profs:
+                try:
+                    if stats is None:
+                        stats = pstats.Stats(prof)
+                    else:
+                        stats.add(prof)
+                except TypeError:  # 한 번도 활성화되지 않은 프로파일 (수집된 데이터 없음)
+                    continue
+            if stats is None:
+                continue
+            base = os.path.join(out_dir, name.replace(":", "_").replace("/", "_"))
+            buf = io.StringIO()
+            stats.stream = buf
+            stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+            try:
+                stats.dump_stats(base + ".prof")
+                with open(base + ".txt", "w", encoding="utf-8") as f:
+                    f.write(buf.getvalue())
+            except OSError:
+                continue
@@ -1,32 +1,125 @@
+import os
+import sys
 import time
 import json
 import requests
 from typing import List, Dict, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from functools import lru_cache
-from collections import Counter
+from functools import lru_cache, partial
+from collections import Counter, deque
 
 import redis  # pip install redis
 import threading
+import signal
 # SOCKS 프록시 사용 시: pip install "requests[socks]"
 
+# playwright/ 공용 모듈 (로거 / 메트릭 / 이력 ...), 속성 인덱스 키 규칙은 pool_config -> lease 클라이언트(claim filters)와 공유
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "playwright"))
+# 키 이름 등은 이 모듈 속성으로도 그대로 노출 (pool_top / pool_sim 등이 collector.REDIS_* 로 참조)
+from pool_config import (  # noqa: E402, F401
+    REDIS_HOST,
+    REDIS_PORT,
+    REDIS_DB,
+    REDIS_PASSWORD,
+    REDIS_ZSET_ALIVE,
+    REDIS_ZSET_LEASE,
+    REDIS_HASH_QUALITY,
+    REDIS_LIST_SIGNAL,
+    REDIS_ZSET_PROBATION,
+    REDIS_FENCE_KEY,
+    REDIS_HASH_STATS,
+    REDIS_STREAM_EVENTS,
+    REDIS_EVENTS_MAXLEN,
+    REDIS_SIGNAL_CAP,
+    REDIS_KEY_PREFIX,
+    REDIS_INDEX_PREFIX,
+    REDIS_HASH_COLLECTOR,
+    REDIS_SHARDS,
+    REDIS_CLUSTER,
+    HISTORY_SIZE,
+    HISTORY_HOURS,
+    HISTORY_WINDOW_HOURS,
+    pool_keys,
+    member_keys,
+    make_proxy_key,
+    index_keys_for,
+)
+from pool_snapshot import PoolSnapshot, SnapshotEntry, write_snapshot  # noqa: E402
+from validation_archive import ValidationArchive, result_row  # noqa: E402
+from result_spool import ResultSpool  # noqa: E402
+from proxy_metrics import REGISTRY, start_http_server  # noqa: E402
+from proxy_history import HistoryTotals, load_check_script, queue_check  # noqa: E402
+from proxy_log import get_logger, flush as flush_logs  # noqa: E402
+from collect_phases import PhaseTimer, parse_modes  # noqa: E402
+
+# print 대신 큐 기반 구조화 로거 (PROXY_LOG_FORMAT=json 이면 JSON lines)
+log = get_logger("collector")
+
 # ================= 전역 중단 신호 =================
 STOP_EVENT = threading.Event()
+# 수집 중 풀이 목표 크기(+여유분)에 도달하면 설정 -> 남은 후보 테스트 생략
+POOL_FULL_EVENT = threading.Event()
 
 # ================= Redis 설정 =================
-REDIS_HOST = "127.0.0.1"
-REDIS_PORT = 6379
-REDIS_DB = 0
-REDIS_PASSWORD = None  # 필요하면 문자열로 설정
-
-REDIS_ZSET_ALIVE = "proxies:alive"  # 살아있는 프록시 모음 (score=next_available_epoch, lease 방식과 호환)
-REDIS_ZSET_LEASE = "proxies:lease"  # 사용 중(임대) 프록시 모음 (score=lease_expire_epoch)
-REDIS_KEY_PREFIX = "proxy"          # proxy:{protocol}:{address}
+# 접속 설정 / 풀 키 이름 / 샤딩(REDIS_SHARDS, REDIS_CLUSTER)은 pool_config.py (pool_admin.py와 공유)
 
 # ================= 수집/테스트 주기 설정 =================
 COLLECT_INTERVAL_MINUTES = 240   # 240분(4시간)마다 한 번 수집
 
+# 수요 기반 수집: 풀 크기/claim·ban 속도를 샘플링해 고갈 시각을 예측
+#  - 사용 가능 풀(alive+lease)이 POOL_TARGET_SIZE 미만이거나, 예측 고갈까지 DEPLETION_LEAD_MINUTES 미만이면 주기와 무관하게 즉시 수집
+#  - 풀이 POOL_TARGET_SIZE * (1 + POOL_HEADROOM) 이상이면 정기 수집을 미루고(최대 COLLECT_MAX_INTERVAL_MINUTES),
+#    수집 중에도 그 크기에 도달하면 남은 후보 테스트를 건너뜀
+#  - POOL_TARGET_SIZE = None 이면 기존처럼 고정 주기로만 수집
+POOL_TARGET_SIZE: Optional[int] = 3000
+POOL_HEADROOM = 0.25
+DEPLETION_LEAD_MINUTES = 30
+DEMAND_SAMPLE_SECONDS = 30
+DEMAND_WINDOW_MINUTES = 30
+MIN_COLLECT_GAP_MINUTES = 15
+COLLECT_MAX_INTERVAL_MINUTES = 720
+
+# warm start 스냅샷: 주기적으로 alive 멤버 + 품질 메타를 디스크에 저장, 풀이 비어 있으면 복원
+#  - SNAPSHOT_TRUST_MINUTES 이내에 검증된 멤버는 재검증 없이 바로 alive 복원 (수 초 내 사용 가능)
+#  - 그 외(SNAPSHOT_MAX_AGE_HOURS 이내)는 최신 검증 순으로 최대 WARM_START_REVALIDATE개 재검증 후 복귀
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pool_snapshot.bin")
+SNAPSHOT_INTERVAL_MINUTES = 10
+SNAPSHOT_MAX_AGE_HOURS = 24
+SNAPSHOT_TRUST_MINUTES = 30
+WARM_START_REVALIDATE = 2000
+
+# 검증 결과 아카이브 (SQLite 월별 파티션, 조회: python validation_archive.py ..., None이면 기록 안 함)
+ARCHIVE_DIR: Optional[str] = os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+ARCHIVE: Optional[ValidationArchive] = None  # main_loop에서 생성
+CURRENT_CYCLE = 0  # 진행 중인 collect_once 시작 시각 (아카이브 cycle 컬럼)
+
+# Redis 장애 중 결과 spool (result_spool.py, 복구되면 순서대로 반영, None이면 spool 없이 실패한 결과는 버림)
+SPOOL_DIR: Optional[str] = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spool")
+SPOOL_MAX_AGE_MINUTES = 6 * 60  # 이보다 오래된 spool 결과는 alive로 넣지 않고 버림
+SPOOL_REPLAY_RATE = 500  # 복구 후 반영 속도 상한 (건/초)
+SPOOL: Optional[ResultSpool] = None  # main_loop에서 생성
+# replay가 백오프 후 재시도할 일시적 오류만. WRONGTYPE / Lua 오류 같은 ResponseError는 재시도해도 같으므로 deadletter로
+SPOOL_RETRY_ON = (redis.ConnectionError, redis.TimeoutError, redis.BusyLoadingError)
+REDIS_SOCKET_TIMEOUT = 5.0  # Redis가 멈췄을 때 worker가 무한정 묶이지 않도록
+
+# 단계별 시간 측정 / 프로파일링 (PROXY_PROFILE=cpu|mem|cpu,mem 또는 실행 중 SIGUSR1로 켜고 끔, collect_phases.py 참고)
+PROFILE_DIR = os.environ.get("PROXY_PROFILE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+
+# 메트릭 HTTP 엔드포인트 (http://host:METRICS_PORT/metrics, None이면 끔)
+METRICS_PORT: Optional[int] = 9108
+
+# probation 재검증 주기 / 1회 최대 재검증 수
+PROBATION_CHECK_MINUTES = 5
+PROBATION_BATCH = 200
+
+# 멤버별 검증/세션 이력 크기(HISTORY_SIZE / HISTORY_HOURS / HISTORY_WINDOW_HOURS)는 pool_config.py
+# 최근 구간에 검증 HISTORY_GRACE_MIN_CHECKS회 이상, 통과율 HISTORY_GRACE_RATE 이상이던 멤버는
+# 한 번 실패로 바로 버리지 않고 probation(HISTORY_GRACE_RETRY_MINUTES 후 재검증)으로 보냄
+HISTORY_GRACE_MIN_CHECKS = 3
+HISTORY_GRACE_RATE = 0.75
+HISTORY_GRACE_RETRY_MINUTES = 15
+
 # 개별 프록시 정보 TTL(초) – 수집 주기의 3배 정도로 넉넉하게
 PROXY_TTL_SECONDS = COLLECT_INTERVAL_MINUTES * 3 * 60
 
@@ -85,23 +178,73 @@ RR_TEST_RUNS = 3      # 한 프록시당 IP 체크 반복 횟수
 # GeoIP 조회용 URL
 GEOIP_URL = "http://ip-api.com/json/{ip}?fields=status,country,countryCode,query,message"
 
+# ======================================================
+# 메트릭 (proxy_metrics: 스레드별 셀 누적이라 검사 스레드 간 락 경합 없음)
+# ======================================================
+
+M_CHECKS = REGISTRY.counter("proxycollector_checks_total", "프록시 검증 완료 수 (result=alive|dead)", ["result"])
+M_CHECKS_IN_FLIGHT = REGISTRY.gauge("proxycollector_checks_in_flight", "진행 중인 프록시 검증 수")
+M_CHECK_SECONDS = REGISTRY.histogram(
+    "proxycollector_check_seconds", "프록시 1개 검증 소요 시간", buckets=(0.5, 1, 2, 5, 10, 20, 40, 60, 120)
+)
+M_STAGE = REGISTRY.counter("proxycollector_stage_total", "단계별 시도 결과 (stage=ip_check:<host>|validate)", ["stage", "result"])
+M_SOURCE = REGISTRY.counter("proxycollector_source_total", "소스별 검증 결과 (수율)", ["source", "result"])
+M_PROXY_LATENCY = REGISTRY.histogram(
+    "proxycollector_proxy_latency_seconds", "검증 통과 프록시의 평균 응답 지연", buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 12)
+)
+M_REDIS_WRITE = REGISTRY.histogram("proxycollector_redis_write_seconds", "Redis 쓰기 배치 지연 (op=store|snapshot|restore)", ["op"])
+M_SPOOL = REGISTRY.counter("proxycollector_spool_total", "Redis 장애 spool 건수 (op=append|replayed)", ["op"])
+M_SPOOL_PENDING = REGISTRY.gauge("proxycollector_spool_pending", "spool에서 Redis 반영을 기다리는 결과 수")
+M_SPOOL_PENDING.set_function(lambda: SPOOL.pending() if SPOOL is not None else 0)
+M_POOL = REGISTRY.gauge("proxycollector_pool_members", "풀 크기 (state=pool|eligible, 마지막 샘플)", ["state"])
+M_PHASE = REGISTRY.histogram(
+    "proxycollector_phase_seconds",
+    "collect_once 단계별 1회 소요 시간 (phase=download:<source>|parse|dedup|check|judge_ok|judge_fail|backoff|geoip|redis_store|...)",
+    ["phase"],
+    buckets=(0.001, 0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1800),
+)
+
+PHASES = PhaseTimer(metric=M_PHASE, profile_dir=PROFILE_DIR, modes=parse_modes(os.environ.get("PROXY_PROFILE")))
+
 # ======================================================
 # Redis 유틸
 # ======================================================
 
 def get_redis() -> redis.Redis:
+    if REDIS_CLUSTER:
+        return redis.RedisCluster(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            password=REDIS_PASSWORD,
+            decode_responses=True,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+        )
     return redis.Redis(
         host=REDIS_HOST,
         port=REDIS_PORT,
         db=REDIS_DB,
         password=REDIS_PASSWORD,
         decode_responses=True,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
     )
 
 
-def make_proxy_key(protocol: str, address: str) -> str:
-    """proxy:http:1.2.3.4:8080 또는 proxy:socks5:5.6.7.8:1080"""
-    return f"{REDIS_KEY_PREFIX}:{protocol}:{address}"
+def publish_event(r: redis.Redis, keys: Dict[str, str], event: str, member: str, **fields) -> None:
+    """events stream에 상태 변경 기록 (필드 구성은 LeaseClientBase 문서 참고)"""
+    if REDIS_EVENTS_MAXLEN <= 0:
+        return
+    r.xadd(keys["events_key"], {"e": event, "m": member, **fields}, maxlen=REDIS_EVENTS_MAXLEN, approximate=True)
+
+
+def publish_progress(r: redis.Redis, **fields) -> None:
+    """collector 진행 상황을 REDIS_HASH_COLLECTOR에 기록 (대시보드용, 실패해도 수집은 계속)"""
+    fields["updated"] = int(time.time())
+    try:
+        r.hset(REDIS_HASH_COLLECTOR, mapping={k: "" if v is None else v for k, v in fields.items()})
+    except redis.RedisError:
+        pass
 
 
 # ======================================================
@@ -112,13 +255,14 @@ def make_proxy_key(protocol: str, address: str) -> str:
 def get_ip_country(ip: str) -> str:
     """IP의 국가 정보 반환: 'Netherlands (NL)' 또는 'Unknown'"""
     try:
-        resp = requests.get(
-            GEOIP_URL.format(ip=ip),
-            timeout=(5, 5),
-            headers={"User-Agent": "Mozilla/5.0"}
-        )
-        resp.raise_for_status()
-        data = resp.json()
+        with PHASES.phase("geoip"):
+            resp = requests.get(
+                GEOIP_URL.format(ip=ip),
+                timeout=(5, 5),
+                headers={"User-Agent": "Mozilla/5.0"}
+            )
+            resp.raise_for_status()
+            data = resp.json()
 
         if data.get("status") == "success":
             country = data.get("country")
@@ -159,56 +303,60 @@ def _normalize_addr(line: str) -> Optional[str]:
 def fetch_http_proxy_list(url: str) -> List[Dict]:
     if STOP_EVENT.is_set():
         return []
-    print(f"📥 HTTP 프록시 목록 다운로드: {url}")
+    log.info("fetch_start", f"📥 HTTP 프록시 목록 다운로드: {url}", url=url, source="proxifly_http")
     proxies: List[Dict] = []
     try:
-        resp = requests.get(url, timeout=30)
-        resp.raise_for_status()
-        for line in resp.text.strip().splitlines():
-            if STOP_EVENT.is_set():
-                break
-            addr = _normalize_addr(line)
-            if not addr:
-                continue
-            proxies.append({
-                "address": addr,
-                "protocol": "http",
-                "source": "proxifly_http",
-            })
-        print(f"✅ HTTP 프록시 {len(proxies)}개 수집\n")
+        with PHASES.phase("download:proxifly_http"):
+            resp = requests.get(url, timeout=30)
+            resp.raise_for_status()
+        with PHASES.phase("parse"):
+            for line in resp.text.strip().splitlines():
+                if STOP_EVENT.is_set():
+                    break
+                addr = _normalize_addr(line)
+                if not addr:
+                    continue
+                proxies.append({
+                    "address": addr,
+                    "protocol": "http",
+                    "source": "proxifly_http",
+                })
+        log.info("fetch_done", f"✅ HTTP 프록시 {len(proxies)}개 수집\n", source="proxifly_http", count=len(proxies))
     except Exception as e:
         if not STOP_EVENT.is_set():
-            print(f"❌ HTTP 프록시 목록 다운로드 실패: {e}")
+            log.error("fetch_failed", f"❌ HTTP 프록시 목록 다운로드 실패: {e}", source="proxifly_http", error=str(e))
     return proxies
 
 
 def fetch_socks5_proxy_list(url: str, source_name: str) -> List[Dict]:
     if STOP_EVENT.is_set():
         return []
-    print(f"📥 SOCKS5 프록시 목록 다운로드: {url} (source={source_name})")
+    log.info("fetch_start", f"📥 SOCKS5 프록시 목록 다운로드: {url} (source={source_name})", url=url, source=source_name)
     proxies: List[Dict] = []
     try:
-        resp = requests.get(url, timeout=30)
-        resp.raise_for_status()
-        for line in resp.text.strip().splitlines():
-            if STOP_EVENT.is_set():
-                break
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            parts = line.split()
-            addr = parts[0].strip()
-            if ":" not in addr:
-                continue
-            proxies.append({
-                "address": addr,
-                "protocol": "socks5",
-                "source": source_name,
-            })
-        print(f"✅ SOCKS5 프록시 {len(proxies)}개 수집 (source={source_name})\n")
+        with PHASES.phase(f"download:{source_name}"):
+            resp = requests.get(url, timeout=30)
+            resp.raise_for_status()
+        with PHASES.phase("parse"):
+            for line in resp.text.strip().splitlines():
+                if STOP_EVENT.is_set():
+                    break
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = line.split()
+                addr = parts[0].strip()
+                if ":" not in addr:
+                    continue
+                proxies.append({
+                    "address": addr,
+                    "protocol": "socks5",
+                    "source": source_name,
+                })
+        log.info("fetch_done", f"✅ SOCKS5 프록시 {len(proxies)}개 수집 (source={source_name})\n", source=source_name, count=len(proxies))
     except Exception as e:
         if not STOP_EVENT.is_set():
-            print(f"❌ SOCKS5 프록시 목록 다운로드 실패 ({source_name}): {e}")
+            log.error("fetch_failed", f"❌ SOCKS5 프록시 목록 다운로드 실패 ({source_name}): {e}", source=source_name, error=str(e))
     return proxies
 
 
@@ -219,26 +367,32 @@ def fetch_plain_proxy_list(url: str, protocol: str, source_name: str) -> List[Di
     """
     if STOP_EVENT.is_set():
         return []
-    print(f"📥 {protocol.upper()} 프록시 목록 다운로드: {url} (source={source_name})")
+    log.info("fetch_start", f"📥 {protocol.upper()} 프록시 목록 다운로드: {url} (source={source_name})", url=url, source=source_name)
     proxies: List[Dict] = []
     try:
-        resp = requests.get(url, timeout=30)
-        resp.raise_for_status()
-        for line in resp.text.strip().splitlines():
-            if STOP_EVENT.is_set():
-                break
-            addr = _normalize_addr(line)
-            if not addr:
-                continue
-            proxies.append({
-                "address": addr,
-                "protocol": protocol,
-                "source": source_name,
-            })
-        print(f"✅ {protocol.upper()} 프록시 {len(proxies)}개 수집 (source={source_name})\n")
+        with PHASES.phase(f"download:{source_name}"):
+            resp = requests.get(url, timeout=30)
+            resp.raise_for_status()
+        with PHASES.phase("parse"):
+            for line in resp.text.strip().splitlines():
+                if STOP_EVENT.is_set():
+                    break
+                addr = _normalize_addr(line)
+                if not addr:
+                    continue
+                proxies.append({
+                    "address": addr,
+                    "protocol": protocol,
+                    "source": source_name,
+                })
+        log.info(
+            "fetch_done", f"✅ {protocol.upper()} 프록시 {len(proxies)}개 수집 (source={source_name})\n", source=source_name, count=len(proxies)
+        )
     except Exception as e:
         if not STOP_EVENT.is_set():
-            print(f"❌ {protocol.upper()} 프록시 목록 다운로드 실패 ({source_name}): {e}")
+            log.error(
+                "fetch_failed", f"❌ {protocol.upper()} 프록시 목록 다운로드 실패 ({source_name}): {e}", source=source_name, error=str(e)
+            )
     return proxies
 
 
@@ -264,27 +418,45 @@ def fetch_all_proxies() -> List[Dict]:
 
     # protocol + address 기준 중복 제거
     unique: Dict[tuple, Dict] = {}
-    for p in raw:
-        key = (p["protocol"], p["address"])
-        if key not in unique:
-            unique[key] = p
+    with PHASES.phase("dedup"):
+        for p in raw:
+            key = (p["protocol"], p["address"])
+            if key not in unique:
+                unique[key] = p
 
     all_proxies = list(unique.values())
 
-    print("📦 프록시 집계 (중복 제거 후):")
-    print(f"  • HTTP              : {len(http_proxies) + len(vakhov_http)} (proxifly_http + vakhov_http)")
-    print(f"  • HTTP(https-list)  : {len(vakhov_https)} (vakhov_https)")
-    print(f"  • SOCKS4            : {len(vakhov_s4)} (vakhov_socks4)")
-    print(f"  • SOCKS5 SpeedX     : {len(s5_speedx)}")
-    print(f"  • SOCKS5 Proxifly   : {len(s5_proxifly)}")
-    print(f"  • SOCKS5 vakhov     : {len(vakhov_s5)}")
-    print(f"  → Uniq 총합         : {len(all_proxies)}")
-
+    unique_total = len(all_proxies)
+    lines = [
+        "📦 프록시 집계 (중복 제거 후):",
+        f"  • HTTP              : {len(http_proxies) + len(vakhov_http)} (proxifly_http + vakhov_http)",
+        f"  • HTTP(https-list)  : {len(vakhov_https)} (vakhov_https)",
+        f"  • SOCKS4            : {len(vakhov_s4)} (vakhov_socks4)",
+        f"  • SOCKS5 SpeedX     : {len(s5_speedx)}",
+        f"  • SOCKS5 Proxifly   : {len(s5_proxifly)}",
+        f"  • SOCKS5 vakhov     : {len(vakhov_s5)}",
+        f"  → Uniq 총합         : {unique_total}",
+    ]
     if MAX_TOTAL_PROXIES is not None and len(all_proxies) > MAX_TOTAL_PROXIES:
-        print(f"  ⚠️ 너무 많아서 {MAX_TOTAL_PROXIES}개까지만 사용합니다.")
+        lines.append(f"  ⚠️ 너무 많아서 {MAX_TOTAL_PROXIES}개까지만 사용합니다.")
         all_proxies = all_proxies[:MAX_TOTAL_PROXIES]
-
-    print(f"  ▶ 실제 테스트 대상  : {len(all_proxies)}개\n")
+    lines.append(f"  ▶ 실제 테스트 대상  : {len(all_proxies)}개\n")
+
+    log.info(
+        "fetch_summary",
+        "\n".join(lines),
+        sources={
+            "proxifly_http": len(http_proxies),
+            "vakhov_http": len(vakhov_http),
+            "vakhov_https": len(vakhov_https),
+            "vakhov_socks4": len(vakhov_s4),
+            "speedx_socks5": len(s5_speedx),
+            "proxifly_socks5": len(s5_proxifly),
+            "vakhov_socks5": len(vakhov_s5),
+        },
+        unique=unique_total,
+        selected=len(all_proxies),
+    )
     return all_proxies
 
 
@@ -315,6 +487,11 @@ def build_requests_proxies(proxy_info: Dict) -> Dict[str, str]:
     }
 
 
+@lru_cache(maxsize=64)
+def _stage_name(url: str) -> str:
+    return "ip_check:" + url.split("://", 1)[-1].split("/", 1)[0].split("?", 1)[0]
+
+
 def check_ip_once(proxy_info: Dict) -> Optional[Tuple[str, str]]:
     """
     프록시를 통해 IP 체크
@@ -328,6 +505,8 @@ def check_ip_once(proxy_info: Dict) -> Optional[Tuple[str, str]]:
     for url, protocol in IP_CHECK_URLS:
         if STOP_EVENT.is_set():
             return None
+        # 연결 + judge 응답은 requests 호출 하나라 같이 잼 (성공/실패로 나눠서: 실패 = 타임아웃 대기 시간)
+        t0 = time.perf_counter()
         try:
             r = requests.get(
                 url,
@@ -341,17 +520,46 @@ def check_ip_once(proxy_info: Dict) -> Optional[Tuple[str, str]]:
             ip = r.text.strip()
             # 기본적인 IP 형식 체크
             if ip and ('.' in ip or ':' in ip) and len(ip) < 50:
+                PHASES.add("judge_ok", time.perf_counter() - t0)
+                M_STAGE.labels(_stage_name(url), "ok").inc()
                 return (ip, url)
+            PHASES.add("judge_fail", time.perf_counter() - t0)
+            M_STAGE.labels(_stage_name(url), "fail").inc()
         except Exception:
+            PHASES.add("judge_fail", time.perf_counter() - t0)
+            M_STAGE.labels(_stage_name(url), "fail").inc()
             continue
 
         # 실패 시 짧은 대기 후 다음 시도
-        time.sleep(0.3)
+        with PHASES.phase("backoff"):
+            time.sleep(0.3)
 
     return None
 
 
 def test_proxy(proxy_info: Dict) -> Dict:
+    """_test_proxy + 메트릭 (진행 중 수 / 소요 시간 / 결과 / 소스별 수율 / 지연 분포) + 아카이브 기록"""
+    M_CHECKS_IN_FLIGHT.inc()
+    t0 = time.time()
+    try:
+        with PHASES.phase("check"):
+            result = _test_proxy(proxy_info)
+    finally:
+        M_CHECKS_IN_FLIGHT.dec()
+    if result.get("proxy_type") != "Interrupted":
+        status = "alive" if result["ok"] else "dead"
+        M_CHECK_SECONDS.observe(time.time() - t0)
+        M_CHECKS.labels(status).inc()
+        M_STAGE.labels("validate", "ok" if result["ok"] else "fail").inc()
+        M_SOURCE.labels(proxy_info.get("source") or "unknown", status).inc()
+        if result.get("latency_ms"):
+            M_PROXY_LATENCY.observe(result["latency_ms"] / 1000.0)
+        if ARCHIVE is not None:
+            ARCHIVE.append(result_row(proxy_info, result, cycle=CURRENT_CYCLE))
+    return result
+
+
+def _test_proxy(proxy_info: Dict) -> Dict:
     """
     프록시를 RR_TEST_RUNS번 테스트하고 결과 반환
     {
@@ -382,7 +590,8 @@ def test_proxy(proxy_info: Dict) -> Dict:
 
         # 다음 테스트 전 짧은 대기
         if i < RR_TEST_RUNS - 1 and not STOP_EVENT.is_set():
-            time.sleep(0.5)
+            with PHASES.phase("backoff"):
+                time.sleep(0.5)
 
     if STOP_EVENT.is_set():
         return {
@@ -437,62 +646,547 @@ def test_proxy(proxy_info: Dict) -> Dict:
 # Redis 저장
 # ======================================================
 
-def store_proxy_to_redis(r: redis.Redis, proxy_info: Dict, test_result: Dict):
+def update_proxy_index(
+    pipe,
+    member: str,
+    old_keys: List[str],
+    new_keys: List[str],
+    latency_ms,
+    prefix: str = REDIS_INDEX_PREFIX,
+) -> None:
+    """
+    claim(filters=...)용 속성 인덱스 갱신을 pipeline에 추가 (execute는 호출부).
+    - 이전 값 기준 인덱스에서 빠진 것은 SREM, 새 값은 SADD
+    - latency zset은 값이 있을 때만 유지
+    (ban/lease 등으로 alive에 없는 멤버가 인덱스에 남아도 claim 시 alive와 교집합하므로 무해)
+    """
+    for k in set(old_keys) - set(new_keys):
+        pipe.srem(k, member)
+    for k in new_keys:
+        pipe.sadd(k, member)
+    if new_keys:
+        pipe.sadd(f"{prefix}:keys", *new_keys)
+    if latency_ms:
+        pipe.zadd(f"{prefix}:latency", {member: float(latency_ms)})
+    else:
+        pipe.zrem(f"{prefix}:latency", member)
+
+
+def _execute_with_history(r: redis.Redis, build) -> List:
+    """build(pipe)로 채운 pipeline 실행. history 스크립트가 서버에 없으면(재시작/SCRIPT FLUSH) 로드 후 1회 재시도"""
+    for attempt in (0, 1):
+        pipe = r.pipeline(transaction=False)
+        build(pipe)
+        try:
+            return pipe.execute()
+        except redis.exceptions.NoScriptError:
+            if attempt:
+                raise
+            load_check_script(r)
+
+
+def store_proxy_to_redis(r: redis.Redis, proxy_info: Dict, test_result: Dict, ts: Optional[float] = None, replay: bool = False):
+    # ts: 검증 시각 (spool replay처럼 나중에 기록할 때 updated_at / quality validated_epoch / 이력 시각에 씀, 기본 지금)
+    # replay: spool replay면 True -> 같은 ts의 이력이 이미 있으면(1번 왕복 후 실패했던 결과) 다시 세지 않음
     # NOTE:
     #  - "https 프록시 리스트"는 대개 'HTTP 프록시(HTTPS CONNECT 가능)'을 의미합니다.
     #  - Chrome/uc는 --proxy-server=https://ip:port 를 기대대로 처리하지 않는 케이스가 많아
     #    Redis member는 http://ip:port 로 정규화해서 저장합니다.
+    #  - 왕복 2번: (1) 이전 상태 읽기 + 이력 기록(history 스크립트) (2) 나머지 쓰기 전부 + 이벤트 (둘 다 pipeline)
     raw_protocol = proxy_info["protocol"]
     address = proxy_info["address"]
     source = proxy_info.get("source", "")
+    # 어떤 경로의 검증인지 (collect=정기 수집 / probation=재검증 / warm_start=스냅샷 복원). source(리스트 출처)와 별개로 기록
+    check = proxy_info.get("check") or "collect"
 
     # Canonical protocol (브라우저/requests 공용)
     protocol = "http" if raw_protocol == "https" else raw_protocol
 
     key = make_proxy_key(protocol, address)
-    now = datetime.utcnow().isoformat()
+    checked_at = time.time() if ts is None else float(ts)
+    now = datetime.utcfromtimestamp(checked_at).isoformat()
 
     member = f"{protocol}://{address}"
+    keys = member_keys(member)
+    index_prefix = keys["index_prefix"]
+
+    # (1) 이전 상태 + 이번 결과를 이력에 남기고 최근 구간 합계를 받아 옴 (이번 결과 포함)
+    def read(pipe):
+        pipe.hmget(key, "countries", "proxy_type", "is_residential")
+        pipe.zscore(keys["alive_key"], member)
+        pipe.zscore(keys["probation_key"], member)
+        pipe.zscore(keys["lease_key"], member)
+        queue_check(
+            pipe,
+            member,
+            ok=test_result["ok"],
+            latency_ms=test_result.get("latency_ms"),
+            prefix=keys["history_prefix"],
+            size=HISTORY_SIZE,
+            hours=HISTORY_HOURS,
+            window=HISTORY_WINDOW_HOURS,
+            now=checked_at,
+            dedup=replay,
+        )
+
+    old_fields, alive_score, probation_until, lease_score, recent = _execute_with_history(r, read)
+    old_index_keys = index_keys_for(protocol, *old_fields, prefix=index_prefix)
+    recent = HistoryTotals.from_reply(recent)
+    in_alive = alive_score is not None
 
+    # (2) 쓰기
+    pipe = r.pipeline(transaction=False)
     if not test_result["ok"]:
-        r.hset(
+        pipe.hset(
             key,
             mapping={
                 "protocol": protocol,
                 "list_protocol": raw_protocol,  # 원본 분류(분석용)
                 "address": address,
                 "source": source,
+                "check": check,
                 "status": "dead",
                 "updated_at": now,
                 "error": test_result.get("error") or "",
             },
         )
-        r.zrem(REDIS_ZSET_ALIVE, member)
+        pipe.zrem(keys["alive_key"], member)
+        # 최근 이력이 좋은 멤버는 일시 장애로 보고 probation으로 (재검증 통과 시 alive 복귀, 인덱스/quality 유지)
+        prev_checks, prev_ok = recent.checks - 1, recent.checks_ok
+        if (
+            in_alive
+            and prev_checks >= HISTORY_GRACE_MIN_CHECKS
+            and prev_ok / prev_checks >= HISTORY_GRACE_RATE
+            and probation_until is None
+        ):
+            retry_at = int(time.time()) + HISTORY_GRACE_RETRY_MINUTES * 60
+            pipe.zadd(keys["probation_key"], {member: retry_at})
+            publish_event(pipe, keys, "p", member, t=retry_at)
+            pipe.execute()
+            return
+        pipe.hdel(keys["quality_hash"], member)
+        if in_alive:
+            publish_event(pipe, keys, "d", member, o=check)
+        update_proxy_index(pipe, member, old_index_keys, [], None, prefix=index_prefix)
+        pipe.execute()
         return
 
-    r.hset(
-        key,
-        mapping={
-            "protocol": protocol,
-            "list_protocol": raw_protocol,  # 원본 분류(분석용)
-            "address": address,
-            "source": source,
-            "status": "alive",
-            "updated_at": now,
-            "latency_ms": test_result.get("latency_ms") or "",
-            "proxy_type": test_result.get("proxy_type") or "",
-            "ips": json.dumps(test_result.get("ips") or [], ensure_ascii=False),
-            "countries": json.dumps(test_result.get("countries") or [], ensure_ascii=False),
-        },
+    fields = {
+        "protocol": protocol,
+        "list_protocol": raw_protocol,  # 원본 분류(분석용)
+        "address": address,
+        "source": source,
+        "check": check,
+        "status": "alive",
+        "updated_at": now,
+        "latency_ms": test_result.get("latency_ms") or "",
+        "proxy_type": test_result.get("proxy_type") or "",
+        "ips": json.dumps(test_result.get("ips") or [], ensure_ascii=False),
+        "countries": json.dumps(test_result.get("countries") or [], ensure_ascii=False),
+    }
+    if test_result.get("is_residential") is not None:
+        fields["is_residential"] = "1" if test_result["is_residential"] else "0"
+    pipe.hset(key, mapping=fields)
+    update_proxy_index(
+        pipe,
+        member,
+        old_index_keys,
+        index_keys_for(protocol, fields["countries"], fields["proxy_type"], fields.get("is_residential"), prefix=index_prefix),
+        test_result.get("latency_ms"),
+        prefix=index_prefix,
     )
 
+    # claim 스크립트가 후보별로 HGET 1번에 읽을 수 있도록 품질 메타를 압축 문자열로 기록
+    # (latency는 마지막 샘플이 아니라 최근 HISTORY_WINDOW_HOURS 동안 통과한 검증의 평균)
+    latency_ms = recent.avg_latency_ms or test_result.get("latency_ms")
+    latency_txt = f"{latency_ms:.1f}" if latency_ms else ""
+    pipe.hset(keys["quality_hash"], member, f"{latency_txt}|{int(checked_at)}|{test_result.get('proxy_type') or ''}")
+
+    # probation 멤버: 재검증 시각 전이면 alive에 넣지 않고, 지났으면(= 이번 테스트 통과로 재검증 완료) 해제
+    if probation_until is not None:
+        if probation_until > time.time():
+            pipe.execute()
+            return
+        pipe.zrem(keys["probation_key"], member)
+
     # 이미 lease(사용 중)에 잡혀있다면 alive에 다시 넣지 않습니다(중복 배정 방지).
-    if r.zscore(REDIS_ZSET_LEASE, member) is None:
+    if lease_score is None:
         # NX로만 추가해서, client가 설정한 cooldown(score)을 collector가 덮어쓰지 않게 함
-        try:
-            r.zadd(REDIS_ZSET_ALIVE, {member: 0}, nx=True)
-        except TypeError:
-            r.execute_command("ZADD", REDIS_ZSET_ALIVE, "NX", 0, member)
+        pipe.zadd(keys["alive_key"], {member: 0}, nx=True)
+        # 새로 풀에 들어온 멤버가 있으면 빈 풀에서 대기 중인 consumer를 바로 깨움
+        if not in_alive:
+            publish_event(pipe, keys, "a", member, t=0, o=check)
+            pipe.lpush(keys["signal_key"], 1)
+            pipe.ltrim(keys["signal_key"], 0, REDIS_SIGNAL_CAP - 1)
+    pipe.execute()
+
+
+def store_result(r: redis.Redis, proxy_info: Dict, test_result: Dict) -> bool:
+    """
+    검증 결과를 Redis에 기록. Redis 오류면 spool에 넣고 바로 반환 (검증은 멈추지 않음).
+    spool에 밀린 결과가 있으면 순서가 뒤집히지 않도록 새 결과도 spool로 보냄.
+    반환: Redis에 바로 기록했으면 True
+    검증 시각 ts를 바로 기록과 spool 양쪽에 같이 써서, 이력 기록 후 쓰기가 실패해 replay 되더라도
+    history 스크립트가 같은 시각의 기록으로 보고 다시 세지 않음 (_spool_store -> replay=True).
+    """
+    ts = time.time()
+    if SPOOL is not None and SPOOL.pending():
+        SPOOL.append(proxy_info, test_result, ts=ts)
+        M_SPOOL.labels("append").inc()
+        return False
+    try:
+        store_proxy_to_redis(r, proxy_info, test_result, ts=ts)
+        return True
+    except redis.RedisError as e:
+        if SPOOL is None:
+            log.warning("store_error", f"⚠️ Redis 기록 실패, 결과 버림 ({proxy_info.get('address')}): {e}", error=str(e))
+            return False
+        SPOOL.append(proxy_info, test_result, ts=ts)
+        M_SPOOL.labels("append").inc()
+        return False
+
+
+def _spool_store(r: redis.Redis, proxy_info: Dict, test_result: Dict, ts: float) -> None:
+    """
+    spool replay 쓰레드에서 호출. 원래 검증 시각(ts)으로 기록 (몇 시간 전 결과가 방금 검증된 것처럼 보이지 않도록).
+    예외는 그대로 -> SPOOL_RETRY_ON(연결/타임아웃/로딩 중)이면 spool이 백오프 후 재시도,
+    그 밖의 예외(ResponseError 포함)는 spool이 그 건만 deadletter로 보내고 다음 건으로 넘어감.
+    """
+    store_proxy_to_redis(r, proxy_info, test_result, ts=ts, replay=True)
+    M_SPOOL.labels("replayed").inc()
+
+
+def revalidate_probation(r: redis.Redis) -> None:
+    """
+    재검증 시각이 지난 probation 멤버를 다시 테스트.
+    - 통과: store_proxy_to_redis가 probation 해제 + alive 복귀 (health 기록은 유지 -> 다시 실패하면 strikes 누적)
+    - 실패: dead 처리 + probation에서도 제거 (다음 수집에서 살아있으면 새로 들어옴)
+    """
+    due: List[str] = []
+    for shard in range(max(1, REDIS_SHARDS)):
+        due.extend(r.zrangebyscore(pool_keys(shard)["probation_key"], "-inf", int(time.time()), start=0, num=PROBATION_BATCH))
+    due = due[:PROBATION_BATCH]
+    if not due or STOP_EVENT.is_set():
+        return
+
+    log.info("probation_check", f"🩺 probation 재검증: {len(due)}개", due=len(due))
+    # source는 원래 리스트 출처를 유지 (소스별 수율 / 아카이브 / pool_top이 source 기준), 재검증 여부는 check 필드로
+    pipe = r.pipeline(transaction=False)
+    for member in due:
+        protocol, _, address = member.partition("://")
+        pipe.hget(make_proxy_key(protocol, address), "source")
+    infos = []
+    for member, source in zip(due, pipe.execute()):
+        protocol, _, address = member.partition("://")
+        infos.append((member, {"protocol": protocol, "address": address, "source": source or "", "check": "probation"}))
+
+    restored = 0
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(infos))) as executor:
+        futures = {executor.submit(test_proxy, info): (member, info) for member, info in infos}
+        for f in as_completed(futures):
+            member, info = futures[f]
+            try:
+                result = f.result()
+            except Exception as e:
+                log.warning("probation_error", f"⚠️ probation 재검증 예외 ({member}): {e}", member=member, error=str(e))
+                continue
+            if STOP_EVENT.is_set():
+                break
+            stored = store_result(r, info, result)
+            if result["ok"]:
+                restored += 1
+            elif stored:
+                keys = member_keys(member)
+                if r.zrem(keys["probation_key"], member):
+                    publish_event(r, keys, "d", member)
+
+    log.info(
+        "probation_done",
+        f"🩺 probation 재검증 완료: 복귀 {restored}개 / 제거 {len(infos) - restored}개",
+        restored=restored,
+        removed=len(infos) - restored,
+    )
+
+# ======================================================
+# warm start 스냅샷
+# ======================================================
+
+_SNAPSHOT_INFO_FIELDS = ("source", "list_protocol", "countries", "proxy_type", "is_residential")
+
+
+def save_pool_snapshot(r: redis.Redis, path: str = SNAPSHOT_PATH) -> int:
+    """alive + lease 멤버와 품질 메타를 스냅샷 파일로 저장 (풀이 비어 있으면 기존 스냅샷 유지)"""
+    entries: List[SnapshotEntry] = []
+    for shard in range(max(1, REDIS_SHARDS)):
+        keys = pool_keys(shard)
+        members = r.zrange(keys["alive_key"], 0, -1) + r.zrange(keys["lease_key"], 0, -1)
+        for i in range(0, len(members), 2000):
+            chunk = members[i : i + 2000]
+            pipe = r.pipeline(transaction=False)
+            for m in chunk:
+                protocol, _, address = m.partition("://")
+                pipe.hget(keys["quality_hash"], m)
+                pipe.hmget(make_proxy_key(protocol, address), *_SNAPSHOT_INFO_FIELDS)
+            res = pipe.execute()
+            for j, m in enumerate(chunk):
+                quality, info_values = res[j * 2], res[j * 2 + 1]
+                parts = (quality or "").split("|")
+                try:
+                    latency = float(parts[0]) if parts[0] else None
+                    validated = int(parts[1]) if len(parts) > 1 and parts[1] else 0
+                except ValueError:
+                    latency, validated = None, 0
+                info = {k: v for k, v in zip(_SNAPSHOT_INFO_FIELDS, info_values) if v not in (None, "")}
+                entries.append(SnapshotEntry(member=m, latency_ms=latency, validated_epoch=validated, info=info))
+
+    if not entries:
+        return 0
+    with M_REDIS_WRITE.labels("snapshot").time():
+        return write_snapshot(path, entries)
+
+
+def _restore_snapshot_entries(r: redis.Redis, entries: List[SnapshotEntry]) -> int:
+    """최근 검증된 스냅샷 멤버를 재검증 없이 alive로 복원 (pipeline, 품질 메타의 검증 시각은 원래 값 유지)"""
+    restored = 0
+    now = datetime.utcnow().isoformat()
+    for i in range(0, len(entries), 1000):
+        chunk = entries[i : i + 1000]
+        pipe = r.pipeline(transaction=False)
+        for e in chunk:
+            keys = member_keys(e.member)
+            pipe.zadd(keys["alive_key"], {e.member: 0}, nx=True)
+        for e in chunk:
+            keys = member_keys(e.member)
+            protocol, _, address = e.member.partition("://")
+            fields = {"protocol": protocol, "address": address, "status": "alive", "updated_at": now, **e.info}
+            if e.latency_ms:
+                fields["latency_ms"] = e.latency_ms
+            pipe.hset(make_proxy_key(protocol, address), mapping=fields)
+            pipe.hset(keys["quality_hash"], e.member, e.quality)
+            for k in index_keys_for(
+                protocol, e.info.get("countries"), e.info.get("proxy_type"), e.info.get("is_residential"), prefix=keys["index_prefix"]
+            ):
+                pipe.sadd(k, e.member)
+            if e.latency_ms:
+                pipe.zadd(f"{keys['index_prefix']}:latency", {e.member: e.latency_ms})
+        with M_REDIS_WRITE.labels("restore").time():
+            res = pipe.execute()
+        added = [e for e, x in zip(chunk, res[: len(chunk)]) if x]
+        restored += len(added)
+
+        # 이벤트 기록 + 대기 중인 consumer 깨우기
+        if not added:
+            continue
+        pipe = r.pipeline(transaction=False)
+        for e in added:
+            keys = member_keys(e.member)
+            if REDIS_EVENTS_MAXLEN > 0:
+                pipe.xadd(keys["events_key"], {"e": "a", "m": e.member, "t": 0}, maxlen=REDIS_EVENTS_MAXLEN, approximate=True)
+        for shard in range(max(1, REDIS_SHARDS)):
+            keys = pool_keys(shard)
+            pipe.lpush(keys["signal_key"], *([1] * min(len(added), REDIS_SIGNAL_CAP)))
+            pipe.ltrim(keys["signal_key"], 0, REDIS_SIGNAL_CAP - 1)
+        pipe.execute()
+    return restored
+
+
+def warm_start_from_snapshot(r: redis.Redis, path: str = SNAPSHOT_PATH) -> int:
+    """
+    풀(alive+lease)이 비어 있을 때만 스냅샷에서 복원.
+    1) SNAPSHOT_TRUST_MINUTES 이내 검증분은 바로 복원
+    2) 나머지는 최신 검증 순으로 재검증 -> 통과하는 대로 store_proxy_to_redis (하나씩 바로 사용 가능해짐)
+    복원/복귀된 멤버 수 반환.
+    """
+    pipe = r.pipeline(transaction=False)
+    for shard in range(max(1, REDIS_SHARDS)):
+        keys = pool_keys(shard)
+        pipe.zcard(keys["alive_key"])
+        pipe.zcard(keys["lease_key"])
+    if sum(pipe.execute()) > 0:
+        return 0
+    if not os.path.exists(path):
+        log.info("warm_start_skip", "ℹ️ 풀이 비어 있지만 warm start 스냅샷이 없습니다.", path=path)
+        return 0
+
+    now = time.time()
+    try:
+        with PoolSnapshot(path) as snap:
+            entries = list(snap.iter_fresh(max_age=SNAPSHOT_MAX_AGE_HOURS * 3600, now=now))
+            snap_age_min = (now - snap.created_epoch) / 60
+    except (OSError, ValueError) as e:
+        log.warning("warm_start_error", f"⚠️ warm start 스냅샷 읽기 실패: {e}", path=path, error=str(e))
+        return 0
+
+    trusted = [e for e in entries if now - e.validated_epoch <= SNAPSHOT_TRUST_MINUTES * 60]
+    stale = entries[len(trusted) :][:WARM_START_REVALIDATE]
+    t0 = time.time()
+    restored = _restore_snapshot_entries(r, trusted)
+    log.info(
+        "warm_start",
+        f"🔥 warm start: 스냅샷({snap_age_min:.0f}분 전, {len(entries)}개)에서 {restored}개 즉시 복원 "
+        f"({time.time() - t0:.2f}초), {len(stale)}개 재검증 시작",
+        snapshot_age_min=round(snap_age_min, 1),
+        entries=len(entries),
+        restored=restored,
+        stale=len(stale),
+    )
+    if not stale or STOP_EVENT.is_set():
+        return restored
+
+    revalidated = 0
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {}
+        for e in stale:
+            protocol, _, address = e.member.partition("://")
+            info = {"protocol": protocol, "address": address, "source": e.info.get("source", "snapshot"), "check": "warm_start"}
+            futures[executor.submit(test_proxy, info)] = info
+        for f in as_completed(futures):
+            if STOP_EVENT.is_set():
+                break
+            try:
+                result = f.result()
+            except Exception:
+                continue
+            if result["ok"]:
+                store_result(r, futures[f], result)
+                revalidated += 1
+
+    log.info("warm_start_done", f"🔥 warm start 재검증 완료: {revalidated}/{len(stale)}개 복귀", revalidated=revalidated, stale=len(stale))
+    return restored + revalidated
+
+
+# ======================================================
+# 수요 추적 / 고갈 예측
+# ======================================================
+
+class PoolDemandTracker:
+    """
+    풀 상태를 주기적으로 샘플링해 claim / ban 속도와 고갈 시각을 추정.
+    - pool     : alive + lease (사용 가능한 멤버 전체, 샤드 합산)
+    - eligible : alive 중 지금 바로 claim 가능한 멤버 (score <= now)
+    - claims   : fence 카운터 합 (claim마다 INCR)
+    - bans     : stats hash의 ban + probation 합
+    속도는 DEMAND_WINDOW_MINUTES 창의 처음/마지막 샘플 차이, eligible 추세는 최소제곱 기울기.
+    """
+
+    def __init__(self, window_seconds: float = DEMAND_WINDOW_MINUTES * 60):
+        self.window_seconds = float(window_seconds)
+        self.samples: deque = deque()
+
+    def sample(self, r: redis.Redis) -> Dict:
+        now = time.time()
+        pipe = r.pipeline(transaction=False)
+        shards = [pool_keys(shard) for shard in range(max(1, REDIS_SHARDS))]
+        for keys in shards:
+            pipe.zcard(keys["alive_key"])
+            pipe.zcard(keys["lease_key"])
+            pipe.zcount(keys["alive_key"], "-inf", int(now))
+            pipe.get(keys["fence_key"])
+            pipe.hmget(keys["stats_hash"], "ban", "probation")
+        res = pipe.execute()
+
+        snap = {"ts": now, "pool": 0, "eligible": 0, "claims": 0, "bans": 0}
+        for i in range(len(shards)):
+            alive, leased, eligible, fence, (ban, probation) = res[i * 5 : i * 5 + 5]
+            snap["pool"] += int(alive) + int(leased)
+            snap["eligible"] += int(eligible)
+            snap["claims"] += int(fence or 0)
+            snap["bans"] += int(ban or 0) + int(probation or 0)
+
+        self.samples.append(snap)
+        M_POOL.labels("pool").set(snap["pool"])
+        M_POOL.labels("eligible").set(snap["eligible"])
+        while len(self.samples) > 2 and now - self.samples[0]["ts"] > self.window_seconds:
+            self.samples.popleft()
+        return snap
+
+    def _rate(self, field: str) -> float:
+        if len(self.samples) < 2:
+            return 0.0
+        first, last = self.samples[0], self.samples[-1]
+        dt = last["ts"] - first["ts"]
+        # 카운터가 초기화된 경우(FLUSH 등) 음수가 되지 않도록
+        return max(0.0, last[field] - first[field]) / dt if dt > 0 else 0.0
+
+    def claim_rate(self) -> float:
+        """초당 claim 수"""
+        return self._rate("claims")
+
+    def ban_rate(self) -> float:
+        """초당 퇴출(ban + probation) 수"""
+        return self._rate("bans")
+
+    def eligible_slope(self) -> float:
+        """eligible 수의 초당 변화량 (음수면 줄어드는 중)"""
+        n = len(self.samples)
+        if n < 2:
+            return 0.0
+        t0 = self.samples[0]["ts"]
+        xs = [x["ts"] - t0 for x in self.samples]
+        ys = [x["eligible"] for x in self.samples]
+        mx, my = sum(xs) / n, sum(ys) / n
+        var = sum((x - mx) ** 2 for x in xs)
+        if var <= 0:
+            return 0.0
+        return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var
+
+    def seconds_to_depletion(self) -> float:
+        """
+        eligible이 0이 될 때까지 예상 시간(초). 두 경로 중 빠른 쪽:
+        - 쿨다운/임대로 eligible이 줄어드는 추세 (eligible / -기울기)
+        - 퇴출로 풀 자체가 줄어드는 속도 (pool / ban_rate)
+        줄어드는 추세가 없으면 inf.
+        """
+        if not self.samples:
+            return float("inf")
+        last = self.samples[-1]
+        if last["eligible"] <= 0 and last["pool"] > 0 and self.claim_rate() > 0:
+            return 0.0
+        eta = float("inf")
+        slope = self.eligible_slope()
+        if slope < 0:
+            eta = min(eta, last["eligible"] / -slope)
+        ban_rate = self.ban_rate()
+        if ban_rate > 0:
+            eta = min(eta, last["pool"] / ban_rate)
+        return eta
+
+    def pool_full(self) -> bool:
+        """
+        지금 바로 claim 가능한 멤버(eligible)가 목표(+여유분) 이상이고 고갈 예측도 없으면 True.
+        pool(alive+lease)로 보면 임대 중인 멤버가 많을 때 eligible이 바닥나도 가득 찬 것으로 보여
+        고갈 예측으로 시작한 수집이 후보를 전부 건너뛰게 됨.
+        """
+        if POOL_TARGET_SIZE is None or not self.samples:
+            return False
+        if self.samples[-1]["eligible"] < POOL_TARGET_SIZE * (1 + POOL_HEADROOM):
+            return False
+        return self.seconds_to_depletion() >= DEPLETION_LEAD_MINUTES * 60
+
+    def collect_reason(self) -> Optional[str]:
+        """지금 바로 수집해야 하는 이유 (없으면 None)"""
+        if POOL_TARGET_SIZE is None or not self.samples:
+            return None
+        last = self.samples[-1]
+        if last["pool"] < POOL_TARGET_SIZE:
+            return f"풀 {last['pool']}개 < 목표 {POOL_TARGET_SIZE}개"
+        eta = self.seconds_to_depletion()
+        if eta < DEPLETION_LEAD_MINUTES * 60:
+            return f"고갈 예상 {eta / 60:.1f}분 후 (claim {self.claim_rate() * 60:.1f}/분, ban {self.ban_rate() * 60:.1f}/분)"
+        return None
+
+    def describe(self) -> str:
+        if not self.samples:
+            return "샘플 없음"
+        last = self.samples[-1]
+        eta = self.seconds_to_depletion()
+        eta_txt = "-" if eta == float("inf") else f"{eta / 60:.0f}분"
+        return (
+            f"pool={last['pool']} eligible={last['eligible']} "
+            f"claim={self.claim_rate() * 60:.1f}/분 ban={self.ban_rate() * 60:.1f}/분 고갈예상={eta_txt}"
+        )
+
+
 # ======================================================
 # 한 번 수집+테스트 실행
 # ======================================================
@@ -502,15 +1196,16 @@ def process_one_proxy(idx: int, total: int, proxy_info: Dict, r: redis.Redis) ->
     한 개 프록시 테스트 및 저장
     Returns: 결과 통계용 딕셔너리
     """
-    if STOP_EVENT.is_set():
+    if STOP_EVENT.is_set() or POOL_FULL_EVENT.is_set():
         return {"status": "skipped", "protocol": proxy_info["protocol"]}
 
     address = proxy_info["address"]
     protocol = proxy_info["protocol"]
 
-    # 간결한 로그 (진행 상황만)
+    # 간결한 로그 (진행 상황만, 양은 PROXY_LOG_LEVEL / configure(sample=...)로 조절)
+    #  - msg는 lambda로 넘겨 writer 스레드에서 포매팅 (레벨/샘플링으로 버려지면 f-string 비용도 없음)
     if idx % 10 == 0 or idx == total:
-        print(f"[{idx}/{total}] 진행 중... (최근: {protocol.upper()}://{address})")
+        log.info("check_progress", lambda: f"[{idx}/{total}] 진행 중... (최근: {protocol.upper()}://{address})", idx=idx, total=total)
 
     try:
         result = test_proxy(proxy_info)
@@ -527,7 +1222,8 @@ def process_one_proxy(idx: int, total: int, proxy_info: Dict, r: redis.Redis) ->
     if STOP_EVENT.is_set():
         return {"status": "interrupted", "protocol": protocol}
 
-    store_proxy_to_redis(r, proxy_info, result)
+    with M_REDIS_WRITE.labels("store").time(), PHASES.phase("redis_store"):
+        store_result(r, proxy_info, result)
 
     return {
         "status": "alive" if result["ok"] else "dead",
@@ -537,42 +1233,62 @@ def process_one_proxy(idx: int, total: int, proxy_info: Dict, r: redis.Redis) ->
     }
 
 
-def collect_once():
-    """프록시 수집 + 테스트 + Redis 업데이트를 한 번 수행"""
+def collect_once(tracker: Optional[PoolDemandTracker] = None):
+    """
+    프록시 수집 + 테스트 + Redis 업데이트를 한 번 수행.
+    tracker가 있으면 진행 중 eligible 수를 확인해 목표(+여유분)에 도달하면 남은 테스트를 건너뜀 (PoolDemandTracker.pool_full).
+    """
     if STOP_EVENT.is_set():
-        print("⏹ collect_once 호출 시 이미 중단 신호가 설정되어 있음. 스킵.")
+        log.info("collect_skip", "⏹ collect_once 호출 시 이미 중단 신호가 설정되어 있음. 스킵.")
         return
 
+    global CURRENT_CYCLE
     start_dt = datetime.now()
 
-    print("=" * 80)
-    print(f"🕒 수집 작업 시작: {start_dt.strftime('%Y-%m-%d %H:%M:%S')}")
-    print("=" * 80)
+    log.info("collect_start", "\n".join(["=" * 80, f"🕒 수집 작업 시작: {start_dt.strftime('%Y-%m-%d %H:%M:%S')}", "=" * 80]))
 
+    # 단계 시간: download:<source> / parse / dedup (메인), check ⊃ judge_ok·judge_fail·backoff·geoip / redis_store (검사 쓰레드),
+    # check_pool (검사 전체 벽시계) / summary. 사이클 끝에 cycle_phases로 출력
+    PHASES.begin_cycle(int(start_dt.timestamp()))
     r = get_redis()
+    publish_progress(r, state="fetching", started=int(start_dt.timestamp()), total=0, done=0, alive=0, dead=0)
     proxies = fetch_all_proxies()
     total = len(proxies)
+    PHASES.checkpoint("fetch")
 
     if STOP_EVENT.is_set():
-        print("⏹ 수집 중단 신호로 인해 테스트를 시작하지 않습니다.")
+        log.info("collect_stopped", "⏹ 수집 중단 신호로 인해 테스트를 시작하지 않습니다.")
+        PHASES.end_cycle()
         return
 
     if not total:
-        print("❌ 수집된 프록시가 없습니다. 작업 종료.")
+        log.error("collect_empty", "❌ 수집된 프록시가 없습니다. 작업 종료.")
+        publish_progress(r, state="idle")
+        PHASES.end_cycle()
         return
 
-    print(f"🔍 총 {total}개 프록시 테스트 시작 (workers={MAX_WORKERS})")
-    print(f"⏱️  타임아웃: 연결 {CONNECT_TIMEOUT}초 / 읽기 {READ_TIMEOUT}초\n")
+    log.info(
+        "check_start",
+        f"🔍 총 {total}개 프록시 테스트 시작 (workers={MAX_WORKERS})\n⏱️  타임아웃: 연결 {CONNECT_TIMEOUT}초 / 읽기 {READ_TIMEOUT}초\n",
+        total=total,
+        workers=MAX_WORKERS,
+    )
 
     start = time.time()
+    CURRENT_CYCLE = int(start_dt.timestamp())
     idx = 0
     results = []
+    progress = Counter()
+    publish_progress(r, state="testing", total=total)
+    POOL_FULL_EVENT.clear()
+    if tracker is not None and tracker.pool_full():
+        POOL_FULL_EVENT.set()
 
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+    with PHASES.phase("check_pool"), ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         futures = []
         for p in proxies:
             if STOP_EVENT.is_set():
-                print("\n⏹ 중단 신호 감지, 나머지 프록시는 제출하지 않습니다.")
+                log.info("collect_stopped", "\n⏹ 중단 신호 감지, 나머지 프록시는 제출하지 않습니다.", submitted=idx)
                 break
             idx += 1
             futures.append(executor.submit(process_one_proxy, idx, total, p, r))
@@ -585,16 +1301,31 @@ def collect_once():
                 result = f.result()
                 results.append(result)
             except Exception as e:
-                print(f"⚠️ 쓰레드 처리 중 예외: {e}")
+                log.warning("check_error", f"⚠️ 쓰레드 처리 중 예외: {e}", error=str(e))
                 results.append({"status": "error", "protocol": "unknown"})
+            progress[results[-1]["status"]] += 1
+            if len(results) % 50 == 0:
+                publish_progress(r, done=len(results), alive=progress["alive"], dead=progress["dead"])
+
+            # 주기적으로 풀 크기 확인 -> 목표 도달 시 남은 후보는 건너뜀
+            if tracker is not None and not POOL_FULL_EVENT.is_set() and len(results) % 100 == 0:
+                try:
+                    tracker.sample(r)
+                except redis.RedisError:
+                    pass
+                else:
+                    if tracker.pool_full():
+                        log.info("pool_full", f"\n🎯 목표 풀 크기 도달 ({tracker.describe()}), 남은 후보 테스트 생략", tested=len(results))
+                        POOL_FULL_EVENT.set()
 
     elapsed = time.time() - start
     end_dt = datetime.now()
+    CURRENT_CYCLE = 0
+    PHASES.checkpoint("check")
+    summary_t0 = time.perf_counter()
 
-    # 통계 출력
-    print("\n" + "=" * 80)
-    print("📊 테스트 결과 통계")
-    print("=" * 80)
+    # 통계 출력 (사람용 요약은 msg 한 덩어리, 집계 값은 필드로)
+    lines = ["\n" + "=" * 80, "📊 테스트 결과 통계", "=" * 80]
 
     status_counts = Counter(r["status"] for r in results)
     protocol_counts = Counter(r["protocol"] for r in results)
@@ -603,31 +1334,44 @@ def collect_once():
     dead_count = status_counts.get("dead", 0)
     total_tested = len(results)
     success_rate = (alive_count / total_tested * 100) if total_tested > 0 else 0
+    other_count = status_counts.get("skipped", 0) + status_counts.get("interrupted", 0) + status_counts.get("error", 0)
 
-    print(f"✅ 성공: {alive_count}개 ({success_rate:.1f}%)")
-    print(f"❌ 실패: {dead_count}개")
-    print(f"⏹  중단/에러: {status_counts.get('skipped', 0) + status_counts.get('interrupted', 0) + status_counts.get('error', 0)}개")
+    lines.append(f"✅ 성공: {alive_count}개 ({success_rate:.1f}%)")
+    lines.append(f"❌ 실패: {dead_count}개")
+    lines.append(f"⏹  중단/에러: {other_count}개")
 
-    print(f"\n📋 프로토콜별 통계:")
+    lines.append(f"\n📋 프로토콜별 통계:")
+    by_protocol = {}
     for proto, count in protocol_counts.most_common():
         proto_alive = sum(1 for r in results if r["protocol"] == proto and r["status"] == "alive")
-        print(f"  • {proto.upper():8s}: {proto_alive}/{count} alive")
+        by_protocol[proto] = {"alive": proto_alive, "tested": count}
+        lines.append(f"  • {proto.upper():8s}: {proto_alive}/{count} alive")
 
     # Redis alive 풀 현황
-    redis_alive = r.zcard(REDIS_ZSET_ALIVE)
-    print(f"\n💾 Redis alive 풀: {redis_alive}개 (key={REDIS_ZSET_ALIVE})")
-
-    # 상위 10개 프록시 (가장 빨리 사용 가능한 순: next_available_epoch 기준)
-    top_proxies = r.zrange(REDIS_ZSET_ALIVE, 0, 9, withscores=True)
-    # 상위 10개 프록시 (가장 빨리 사용 가능한 순: score=next_available_epoch 기준)
-    top_proxies = r.zrange(REDIS_ZSET_ALIVE, 0, 9, withscores=True)
+    alive_keys = [pool_keys(shard)["alive_key"] for shard in range(max(1, REDIS_SHARDS))]
+    top_proxies = []
+    try:
+        redis_alive = sum(r.zcard(k) for k in alive_keys)
+        lines.append(f"\n💾 Redis alive 풀: {redis_alive}개 (key={', '.join(alive_keys)})")
+        # 상위 10개 프록시 (가장 빨리 사용 가능한 순: score=next_available_epoch 기준, 샤드 합산)
+        for k in alive_keys:
+            top_proxies.extend(r.zrange(k, 0, 9, withscores=True))
+    except redis.RedisError as e:
+        redis_alive = None
+        lines.append(f"\n💾 Redis alive 풀: 조회 실패 ({e})")
+    if SPOOL is not None and SPOOL.pending():
+        st = SPOOL.stats()
+        lines.append(
+            f"📼 spool 대기: {st['pending']}건 (반영 {st['replayed']} / 버림 {st['dropped']} / deadletter {st['dead']}, Redis 장애={st['outage']})"
+        )
+    top_proxies = sorted(top_proxies, key=lambda x: x[1])[:10]
     if top_proxies:
-        print(f"\n🏆 사용 가능 시각(score) 기준 상위 10개 프록시:")
-        for proxy_str, score in top_proxies:
-            protocol, addr = proxy_str.split("://", 1)
-            pkey = make_proxy_key(protocol, addr)
-            pinfo = r.hgetall(pkey)
-            countries = pinfo.get("countries", "Unknown")
+        lines.append(f"\n🏆 사용 가능 시각(score) 기준 상위 10개 프록시:")
+        pipe = r.pipeline(transaction=False)
+        for proxy_str, _ in top_proxies:
+            pipe.hget(make_proxy_key(*proxy_str.split("://", 1)), "countries")
+        for (proxy_str, score), countries in zip(top_proxies, pipe.execute()):
+            countries = countries or "Unknown"
 
             score_int = int(score)
             if score_int <= 0:
@@ -635,11 +1379,41 @@ def collect_once():
             else:
                 score_human = datetime.fromtimestamp(score_int).strftime("%Y-%m-%d %H:%M:%S")
 
-            print(f"  • {proxy_str:30s} | score={score_int} ({score_human}) | {countries}")
-    print(f"\n⏱️  소요시간: {elapsed:.1f}초")
-    print(f"✅ 완료 시각: {end_dt.strftime('%Y-%m-%d %H:%M:%S')}")
-    print("=" * 80)
-    print()
+            lines.append(f"  • {proxy_str:30s} | score={score_int} ({score_human}) | {countries}")
+    publish_progress(
+        r,
+        state="idle",
+        done=total_tested,
+        alive=alive_count,
+        dead=dead_count,
+        finished=int(end_dt.timestamp()),
+        elapsed=round(elapsed, 1),
+    )
+    PHASES.add("summary", time.perf_counter() - summary_t0)
+    phases = PHASES.end_cycle()
+    lines.append(f"\n⏱️  소요시간: {elapsed:.1f}초")
+    lines.append(f"✅ 완료 시각: {end_dt.strftime('%Y-%m-%d %H:%M:%S')}")
+    lines.append("=" * 80 + "\n")
+
+    log.info(
+        "collect_done",
+        "\n".join(lines),
+        tested=total_tested,
+        alive=alive_count,
+        dead=dead_count,
+        other=other_count,
+        by_protocol=by_protocol,
+        pool_alive=redis_alive,
+        elapsed_s=round(elapsed, 1),
+    )
+    log.info(
+        "cycle_phases",
+        PhaseTimer.format_report(phases) + "\n",
+        wall_s=phases["wall_s"],
+        phases=phases["phases"],
+        delta=phases["delta"],
+        profile_dir=phases["profile_dir"],
+    )
 
 
 # ======================================================
@@ -647,48 +1421,165 @@ def collect_once():
 # ======================================================
 
 def main_loop():
-    print("=" * 80)
-    print("🚀 Redis 프록시 수집 데몬")
-    print("=" * 80)
-    print(f"⏱️  주기: {COLLECT_INTERVAL_MINUTES}분마다 한 번 수집/테스트")
-    print(f"🧪 최대 테스트 프록시 수: {MAX_TOTAL_PROXIES if MAX_TOTAL_PROXIES is not None else '제한 없음'}")
-    print(f"🔧 동시 작업 스레드: {MAX_WORKERS}개")
-    print(f"🌍 IP 체크: HTTP 우선, HTTPS 백업 전략")
-    print("🛑 언제든지 Ctrl + C로 중단 가능")
-    print("=" * 80)
-    print()
+    global ARCHIVE, SPOOL
+    banner = ["=" * 80, "🚀 Redis 프록시 수집 데몬", "=" * 80, f"⏱️  주기: {COLLECT_INTERVAL_MINUTES}분마다 한 번 수집/테스트"]
+    if POOL_TARGET_SIZE is not None:
+        banner.append(f"🎯 목표 풀: {POOL_TARGET_SIZE}개 (+{POOL_HEADROOM:.0%} 여유), 고갈 {DEPLETION_LEAD_MINUTES}분 전 조기 수집")
+    banner += [
+        f"🧪 최대 테스트 프록시 수: {MAX_TOTAL_PROXIES if MAX_TOTAL_PROXIES is not None else '제한 없음'}",
+        f"🔧 동시 작업 스레드: {MAX_WORKERS}개",
+        f"🌍 IP 체크: HTTP 우선, HTTPS 백업 전략",
+        "🛑 언제든지 Ctrl + C로 중단 가능",
+        "=" * 80 + "\n",
+    ]
+    log.info(
+        "daemon_start",
+        "\n".join(banner),
+        interval_min=COLLECT_INTERVAL_MINUTES,
+        pool_target=POOL_TARGET_SIZE,
+        max_proxies=MAX_TOTAL_PROXIES,
+        workers=MAX_WORKERS,
+    )
+
+    if METRICS_PORT is not None:
+        try:
+            start_http_server(METRICS_PORT)
+            log.info("metrics_start", f"📈 메트릭: http://0.0.0.0:{METRICS_PORT}/metrics", port=METRICS_PORT)
+        except OSError as e:
+            log.warning("metrics_error", f"⚠️ 메트릭 서버 시작 실패: {e}", port=METRICS_PORT, error=str(e))
+
+    if ARCHIVE_DIR:
+        ARCHIVE = ValidationArchive(ARCHIVE_DIR)
+    if SPOOL_DIR:
+        SPOOL = ResultSpool(
+            SPOOL_DIR,
+            partial(_spool_store, get_redis()),
+            retry_on=SPOOL_RETRY_ON,
+            replay_rate=SPOOL_REPLAY_RATE,
+            max_age_seconds=SPOOL_MAX_AGE_MINUTES * 60,
+        )
+
+    if PHASES.modes:
+        log.info("profile_on", f"🔬 프로파일링 켜짐 ({','.join(sorted(PHASES.modes))}) -> {PROFILE_DIR}", modes=sorted(PHASES.modes))
+    if hasattr(signal, "SIGUSR1"):  # Windows에는 없음 -> 환경 변수로만
+        def toggle_profile(signum, frame) -> None:
+            modes = PHASES.toggle()
+            log.info(
+                "profile_toggle",
+                f"🔬 다음 수집부터 프로파일링 {'켜짐 (' + ','.join(sorted(modes)) + ')' if modes else '꺼짐'} (SIGUSR1)",
+                modes=sorted(modes),
+            )
+
+        signal.signal(signal.SIGUSR1, toggle_profile)
+
+    tracker = PoolDemandTracker()
+
+    def sample_demand() -> None:
+        try:
+            tracker.sample(get_redis())
+        except redis.RedisError as e:
+            log.warning("demand_sample_error", f"⚠️ 풀 상태 샘플링 실패: {e}", error=str(e))
+
+    def snapshot() -> None:
+        try:
+            n = save_pool_snapshot(get_redis())
+            if n:
+                log.info("snapshot_saved", f"💾 warm start 스냅샷 저장: {n}개 ({SNAPSHOT_PATH})", count=n, path=SNAPSHOT_PATH)
+        except (redis.RedisError, OSError) as e:
+            log.warning("snapshot_error", f"⚠️ 스냅샷 저장 실패: {e}", error=str(e))
+
+    def warm_start() -> None:
+        try:
+            warm_start_from_snapshot(get_redis())
+        except redis.RedisError as e:
+            log.warning("warm_start_error", f"⚠️ warm start 실패: {e}", error=str(e))
 
     try:
-        # 시작하자마자 한 번 실행
-        collect_once()
+        # Redis가 비어 있으면(재시작 / 새 환경) 스냅샷으로 먼저 풀을 채운 뒤 전체 수집
+        warm_start()
+        last_warm_start = time.time()
 
-        # 이후 주기적으로 반복
+        # 시작하자마자 한 번 실행
+        sample_demand()
+        collect_once(tracker)
+        last_collect = time.time()
+        snapshot()
+        last_snapshot = time.time()
+        paused = False
+
+        # 이후 주기적으로 반복 (정기 주기 + 수요 기반 조기 수집 / 목표 도달 시 보류)
         while not STOP_EVENT.is_set():
-            print(f"💤 {COLLECT_INTERVAL_MINUTES}분 대기 후 다음 수집 실행...")
-            print(f"   (현재 시각: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')})")
+            log.info(
+                "idle",
+                f"💤 다음 정기 수집까지 {COLLECT_INTERVAL_MINUTES}분 (수요에 따라 앞당기거나 미룸)\n"
+                f"   (현재 시각: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')})",
+            )
 
             # 1초 단위로 잘게 쪼개서 중간에 Ctrl+C 누르면 바로 반응
-            total_sleep = COLLECT_INTERVAL_MINUTES * 60
-            for i in range(total_sleep):
-                if STOP_EVENT.is_set():
-                    break
+            i = 0
+            reason = None
+            while not STOP_EVENT.is_set():
+                # 수집 사이사이 probation 재검증
+                if i % (PROBATION_CHECK_MINUTES * 60) == 0:
+                    try:
+                        revalidate_probation(get_redis())
+                    except redis.RedisError as e:
+                        log.warning("probation_error", f"⚠️ probation 재검증 실패: {e}", error=str(e))
+
+                if i % DEMAND_SAMPLE_SECONDS == 0:
+                    sample_demand()
+                    now = time.time()
+                    # 수집 사이에 Redis가 비워졌으면(재시작 등) 스냅샷 복원
+                    if tracker.samples and tracker.samples[-1]["pool"] == 0 and now - last_warm_start >= SNAPSHOT_INTERVAL_MINUTES * 60:
+                        warm_start()
+                        last_warm_start = now
+                        sample_demand()
+                    if now - last_snapshot >= SNAPSHOT_INTERVAL_MINUTES * 60:
+                        snapshot()
+                        last_snapshot = now
+                    since_last = time.time() - last_collect
+                    if since_last >= MIN_COLLECT_GAP_MINUTES * 60:
+                        reason = tracker.collect_reason()
+                        if reason is None and since_last >= COLLECT_INTERVAL_MINUTES * 60:
+                            if tracker.pool_full() and since_last < COLLECT_MAX_INTERVAL_MINUTES * 60:
+                                if not paused:
+                                    log.info("collect_paused", f"⏸  풀이 목표 이상이라 정기 수집 보류 ({tracker.describe()})")
+                                    publish_progress(get_redis(), state="paused")
+                                    paused = True
+                            else:
+                                reason = "정기 수집"
+                        if reason:
+                            break
+
                 # 1분마다 진행 상황 표시
                 if i > 0 and i % 60 == 0:
-                    remaining_min = (total_sleep - i) // 60
-                    print(f"   ⏳ 대기 중... (남은 시간: {remaining_min}분)")
+                    log.info("idle_tick", f"   ⏳ 대기 중... ({tracker.describe()})")
                 time.sleep(1)
+                i += 1
 
             if STOP_EVENT.is_set():
                 break
-            collect_once()
+            log.info("collect_trigger", f"▶️  수집 시작: {reason}", reason=reason)
+            publish_progress(get_redis(), reason=reason)
+            paused = False
+            collect_once(tracker)
+            last_collect = time.time()
+            snapshot()
+            last_snapshot = time.time()
 
     except KeyboardInterrupt:
-        print("\n🛑 KeyboardInterrupt (Ctrl+C) 감지, 중단 신호 설정.")
+        log.info("interrupted", "\n🛑 KeyboardInterrupt (Ctrl+C) 감지, 중단 신호 설정.")
         STOP_EVENT.set()
-        print("⏳ 실행 중인 작업이 완료될 때까지 잠시 기다려주세요...")
+        log.info("shutdown_wait", "⏳ 실행 중인 작업이 완료될 때까지 잠시 기다려주세요...")
 
     finally:
-        print("🔚 collector_redis.py 종료 완료.")
+        publish_progress(get_redis(), state="stopped")
+        if ARCHIVE is not None:
+            ARCHIVE.close()
+        if SPOOL is not None:
+            SPOOL.close()
+        log.info("shutdown", "🔚 collector_redis.py 종료 완료.")
+        flush_logs()
 
 
 if __name__ == "__main__":
@@ -1,3 +1,5 @@
+import os
+import sys
 import time
 import requests
 from typing import List, Dict, Optional, Tuple
@@ -10,6 +12,11 @@ import redis  # pip install redis
 import threading
 # SOCKS 프록시 사용 시: pip install "requests[socks]"
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "playwright"))
+from proxy_log import get_logger, flush as flush_logs  # noqa: E402
+
+log = get_logger("collector")
+
 # ================= 전역 중단 신호 =================
 STOP_EVENT = threading.Event()
 
@@ -147,7 +154,7 @@ def _normalize_addr(line: str) -> Optional[str]:
 def fetch_http_proxy_list(url: str) -> List[Dict]:
     if STOP_EVENT.is_set():
         return []
-    print(f"📥 HTTP 프록시 목록 다운로드: {url}")
+    log.info("fetch_start", f"📥 HTTP 프록시 목록 다운로드: {url}", url=url, source="proxifly_http")
     proxies: List[Dict] = []
     try:
         resp = requests.get(url, timeout=30)
@@ -163,17 +170,17 @@ def fetch_http_proxy_list(url: str) -> List[Dict]:
                 "protocol": "http",
                 "source": "proxifly_http",
             })
-        print(f"✅ HTTP 프록시 {len(proxies)}개 수집\n")
+        log.info("fetch_done", f"✅ HTTP 프록시 {len(proxies)}개 수집\n", source="proxifly_http", count=len(proxies))
     except Exception as e:
         if not STOP_EVENT.is_set():
-            print(f"❌ HTTP 프록시 목록 다운로드 실패: {e}")
+            log.error("fetch_failed", f"❌ HTTP 프록시 목록 다운로드 실패: {e}", source="proxifly_http", error=str(e))
     return proxies
 
 
 def fetch_socks5_proxy_list(url: str, source_name: str) -> List[Dict]:
     if STOP_EVENT.is_set():
         return []
-    print(f"📥 SOCKS5 프록시 목록 다운로드: {url} (source={source_name})")
+    log.info("fetch_start", f"📥 SOCKS5 프록시 목록 다운로드: {url} (source={source_name})", url=url, source=source_name)
     proxies: List[Dict] = []
     try:
         resp = requests.get(url, timeout=30)
@@ -193,10 +200,10 @@ def fetch_socks5_proxy_list(url: str, source_name: str) -> List[Dict]:
                 "protocol": "socks5",
                 "source": source_name,
             })
-        print(f"✅ SOCKS5 프록시 {len(proxies)}개 수집 (source={source_name})\n")
+        log.info("fetch_done", f"✅ SOCKS5 프록시 {len(proxies)}개 수집 (source={source_name})\n", source=source_name, count=len(proxies))
     except Exception as e:
         if not STOP_EVENT.is_set():
-            print(f"❌ SOCKS5 프록시 목록 다운로드 실패 ({source_name}): {e}")
+            log.error("fetch_failed", f"❌ SOCKS5 프록시 목록 다운로드 실패 ({source_name}): {e}", source=source_name, error=str(e))
     return proxies
 
 
@@ -207,7 +214,7 @@ def fetch_plain_proxy_list(url: str, protocol: str, source_name: str) -> List[Di
     """
     if STOP_EVENT.is_set():
         return []
-    print(f"📥 {protocol.upper()} 프록시 목록 다운로드: {url} (source={source_name})")
+    log.info("fetch_start", f"📥 {protocol.upper()} 프록시 목록 다운로드: {url} (source={source_name})", url=url, source=source_name)
     proxies: List[Dict] = []
     try:
         resp = requests.get(url, timeout=30)
@@ -223,10 +230,14 @@ def fetch_plain_proxy_list(url: str, protocol: str, source_name: str) -> List[Di
                 "protocol": protocol,
                 "source": source_name,
             })
-        print(f"✅ {protocol.upper()} 프록시 {len(proxies)}개 수집 (source={source_name})\n")
+        log.info(
+            "fetch_done", f"✅ {protocol.upper()} 프록시 {len(proxies)}개 수집 (source={source_name})\n", source=source_name, count=len(proxies)
+        )
     except Exception as e:
         if not STOP_EVENT.is_set():
-            print(f"❌ {protocol.upper()} 프록시 목록 다운로드 실패 ({source_name}): {e}")
+            log.error(
+                "fetch_failed", f"❌ {protocol.upper()} 프록시 목록 다운로드 실패 ({source_name}): {e}", source=source_name, error=str(e)
+            )
     return proxies
 
 
@@ -258,20 +269,37 @@ def fetch_all_proxies() -> List[Dict]:
 
     all_proxies = list(unique.values())
 
-    print("📦 프록시 집계 (중복 제거 후):")
-    print(f"  • HTTP              : {len(http_proxies) + len(vakhov_http)} (proxifly_http + vakhov_http)")
-    print(f"  • HTTPS             : {len(vakhov_https)} (vakhov_https)")
-    print(f"  • SOCKS4            : {len(vakhov_s4)} (vakhov_socks4)")
-    print(f"  • SOCKS5 SpeedX     : {len(s5_speedx)}")
-    print(f"  • SOCKS5 Proxifly   : {len(s5_proxifly)}")
-    print(f"  • SOCKS5 vakhov     : {len(vakhov_s5)}")
-    print(f"  → Uniq 총합         : {len(all_proxies)}")
-
+    unique_total = len(all_proxies)
+    lines = [
+        "📦 프록시 집계 (중복 제거 후):",
+        f"  • HTTP              : {len(http_proxies) + len(vakhov_http)} (proxifly_http + vakhov_http)",
+        f"  • HTTPS             : {len(vakhov_https)} (vakhov_https)",
+        f"  • SOCKS4            : {len(vakhov_s4)} (vakhov_socks4)",
+        f"  • SOCKS5 SpeedX     : {len(s5_speedx)}",
+        f"  • SOCKS5 Proxifly   : {len(s5_proxifly)}",
+        f"  • SOCKS5 vakhov     : {len(vakhov_s5)}",
+        f"  → Uniq 총합         : {unique_total}",
+    ]
     if MAX_TOTAL_PROXIES is not None and len(all_proxies) > MAX_TOTAL_PROXIES:
-        print(f"  ⚠️ 너무 많아서 {MAX_TOTAL_PROXIES}개까지만 사용합니다.")
+        lines.append(f"  ⚠️ 너무 많아서 {MAX_TOTAL_PROXIES}개까지만 사용합니다.")
         all_proxies = all_proxies[:MAX_TOTAL_PROXIES]
-
-    print(f"  ▶ 실제 테스트 대상  : {len(all_proxies)}개\n")
+    lines.append(f"  ▶ 실제 테스트 대상  : {len(all_proxies)}개\n")
+
+    log.info(
+        "fetch_summary",
+        "\n".join(lines),
+        sources={
+            "proxifly_http": len(http_proxies),
+            "vakhov_http": len(vakhov_http),
+            "vakhov_https": len(vakhov_https),
+            "vakhov_socks4": len(vakhov_s4),
+            "speedx_socks5": len(s5_speedx),
+            "proxifly_socks5": len(s5_proxifly),
+            "vakhov_socks5": len(vakhov_s5),
+        },
+        unique=unique_total,
+        selected=len(all_proxies),
+    )
     return all_proxies
 
 
@@ -491,9 +519,9 @@ def process_one_proxy(idx: int, total: int, proxy_info: Dict, r: redis.Redis) ->
     address = proxy_info["address"]
     protocol = proxy_info["protocol"]
 
-    # 간결한 로그 (진행 상황만)
+    # 간결한 로그 (진행 상황만, msg는 writer 스레드에서 포매팅)
     if idx % 10 == 0 or idx == total:
-        print(f"[{idx}/{total}] 진행 중... (최근: {protocol.upper()}://{address})")
+        log.info("check_progress", lambda: f"[{idx}/{total}] 진행 중... (최근: {protocol.upper()}://{address})", idx=idx, total=total)
 
     try:
         result = test_proxy(proxy_info)
@@ -523,29 +551,31 @@ def process_one_proxy(idx: int, total: int, proxy_info: Dict, r: redis.Redis) ->
 def collect_once():
     """프록시 수집 + 테스트 + Redis 업데이트를 한 번 수행"""
     if STOP_EVENT.is_set():
-        print("⏹ collect_once 호출 시 이미 중단 신호가 설정되어 있음. 스킵.")
+        log.info("collect_skip", "⏹ collect_once 호출 시 이미 중단 신호가 설정되어 있음. 스킵.")
         return
 
     start_dt = datetime.now()
 
-    print("=" * 80)
-    print(f"🕒 수집 작업 시작: {start_dt.strftime('%Y-%m-%d %H:%M:%S')}")
-    print("=" * 80)
+    log.info("collect_start", "\n".join(["=" * 80, f"🕒 수집 작업 시작: {start_dt.strftime('%Y-%m-%d %H:%M:%S')}", "=" * 80]))
 
     r = get_redis()
     proxies = fetch_all_proxies()
     total = len(proxies)
 
     if STOP_EVENT.is_set():
-        print("⏹ 수집 중단 신호로 인해 테스트를 시작하지 않습니다.")
+        log.info("collect_stopped", "⏹ 수집 중단 신호로 인해 테스트를 시작하지 않습니다.")
         return
 
     if not total:
-        print("❌ 수집된 프록시가 없습니다. 작업 종료.")
+        log.error("collect_empty", "❌ 수집된 프록시가 없습니다. 작업 종료.")
         return
 
-    print(f"🔍 총 {total}개 프록시 테스트 시작 (workers={MAX_WORKERS})")
-    print(f"⏱️  타임아웃: 연결 {CONNECT_TIMEOUT}초 / 읽기 {READ_TIMEOUT}초\n")
+    log.info(
+        "check_start",
+        f"🔍 총 {total}개 프록시 테스트 시작 (workers={MAX_WORKERS})\n⏱️  타임아웃: 연결 {CONNECT_TIMEOUT}초 / 읽기 {READ_TIMEOUT}초\n",
+        total=total,
+        workers=MAX_WORKERS,
+    )
 
     start = time.time()
     idx = 0
@@ -555,7 +585,7 @@ def collect_once():
         futures = []
         for p in proxies:
             if STOP_EVENT.is_set():
-                print("\n⏹ 중단 신호 감지, 나머지 프록시는 제출하지 않습니다.")
+                log.info("collect_stopped", "\n⏹ 중단 신호 감지, 나머지 프록시는 제출하지 않습니다.", submitted=idx)
                 break
             idx += 1
             futures.append(executor.submit(process_one_proxy, idx, total, p, r))
@@ -568,16 +598,14 @@ def collect_once():
                 result = f.result()
                 results.append(result)
             except Exception as e:
-                print(f"⚠️ 쓰레드 처리 중 예외: {e}")
+                log.warning("check_error", f"⚠️ 쓰레드 처리 중 예외: {e}", error=str(e))
                 results.append({"status": "error", "protocol": "unknown"})
 
     elapsed = time.time() - start
     end_dt = datetime.now()
 
     # 통계 출력
-    print("\n" + "=" * 80)
-    print("📊 테스트 결과 통계")
-    print("=" * 80)
+    lines = ["\n" + "=" * 80, "📊 테스트 결과 통계", "=" * 80]
 
     status_counts = Counter(r["status"] for r in results)
     protocol_counts = Counter(r["protocol"] for r in results)
@@ -587,35 +615,49 @@ def collect_once():
     total_tested = len(results)
     success_rate = (alive_count / total_tested * 100) if total_tested > 0 else 0
 
-    print(f"✅ 성공: {alive_count}개 ({success_rate:.1f}%)")
-    print(f"❌ 실패: {dead_count}개")
-    print(f"⏹  중단/에러: {status_counts.get('skipped', 0) + status_counts.get('interrupted', 0) + status_counts.get('error', 0)}개")
+    other_count = status_counts.get('skipped', 0) + status_counts.get('interrupted', 0) + status_counts.get('error', 0)
+    lines.append(f"✅ 성공: {alive_count}개 ({success_rate:.1f}%)")
+    lines.append(f"❌ 실패: {dead_count}개")
+    lines.append(f"⏹  중단/에러: {other_count}개")
 
-    print(f"\n📋 프로토콜별 통계:")
+    lines.append(f"\n📋 프로토콜별 통계:")
+    by_protocol: Dict[str, Dict[str, int]] = {}
     for proto, count in protocol_counts.most_common():
         proto_alive = sum(1 for r in results if r["protocol"] == proto and r["status"] == "alive")
-        print(f"  • {proto.upper():8s}: {proto_alive}/{count} alive")
+        by_protocol[proto] = {"alive": proto_alive, "tested": count}
+        lines.append(f"  • {proto.upper():8s}: {proto_alive}/{count} alive")
 
     # Redis alive 풀 현황
     redis_alive = r.zcard(REDIS_ZSET_ALIVE)
-    print(f"\n💾 Redis alive 풀: {redis_alive}개 (key={REDIS_ZSET_ALIVE})")
+    lines.append(f"\n💾 Redis alive 풀: {redis_alive}개 (key={REDIS_ZSET_ALIVE})")
 
     # 상위 10개 프록시 (latency 기준)
     top_proxies = r.zrange(REDIS_ZSET_ALIVE, 0, 9, withscores=True)
     if top_proxies:
-        print(f"\n🏆 레이턴시 상위 10개 프록시:")
+        lines.append(f"\n🏆 레이턴시 상위 10개 프록시:")
         for proxy_str, latency in top_proxies:
             # proxy 정보 가져오기
             protocol, addr = proxy_str.split("://", 1)
             pkey = make_proxy_key(protocol, addr)
             pinfo = r.hgetall(pkey)
             countries = pinfo.get("countries", "Unknown")
-            print(f"  • {proxy_str:30s} | {latency:6.1f}ms | {countries}")
-
-    print(f"\n⏱️  소요시간: {elapsed:.1f}초")
-    print(f"✅ 완료 시각: {end_dt.strftime('%Y-%m-%d %H:%M:%S')}")
-    print("=" * 80)
-    print()
+            lines.append(f"  • {proxy_str:30s} | {latency:6.1f}ms | {countries}")
+
+    lines.append(f"\n⏱️  소요시간: {elapsed:.1f}초")
+    lines.append(f"✅ 완료 시각: {end_dt.strftime('%Y-%m-%d %H:%M:%S')}")
+    lines.append("=" * 80 + "\n")
+
+    log.info(
+        "collect_done",
+        "\n".join(lines),
+        tested=total_tested,
+        alive=alive_count,
+        dead=dead_count,
+        other=other_count,
+        by_protocol=by_protocol,
+        pool_alive=redis_alive,
+        elapsed_s=round(elapsed, 1),
+    )
 
 
 # ======================================================
@@ -623,16 +665,24 @@ def collect_once():
 # ======================================================
 
 def main_loop():
-    print("=" * 80)
-    print("🚀 Redis 프록시 수집 데몬")
-    print("=" * 80)
-    print(f"⏱️  주기: {COLLECT_INTERVAL_MINUTES}분마다 한 번 수집/테스트")
-    print(f"🧪 최대 테스트 프록시 수: {MAX_TOTAL_PROXIES if MAX_TOTAL_PROXIES is not None else '제한 없음'}")
-    print(f"🔧 동시 작업 스레드: {MAX_WORKERS}개")
-    print(f"🌍 IP 체크: HTTP 우선, HTTPS 백업 전략")
-    print("🛑 언제든지 Ctrl + C로 중단 가능")
-    print("=" * 80)
-    print()
+    banner = [
+        "=" * 80,
+        "🚀 Redis 프록시 수집 데몬",
+        "=" * 80,
+        f"⏱️  주기: {COLLECT_INTERVAL_MINUTES}분마다 한 번 수집/테스트",
+        f"🧪 최대 테스트 프록시 수: {MAX_TOTAL_PROXIES if MAX_TOTAL_PROXIES is not None else '제한 없음'}",
+        f"🔧 동시 작업 스레드: {MAX_WORKERS}개",
+        f"🌍 IP 체크: HTTP 우선, HTTPS 백업 전략",
+        "🛑 언제든지 Ctrl + C로 중단 가능",
+        "=" * 80 + "\n",
+    ]
+    log.info(
+        "daemon_start",
+        "\n".join(banner),
+        interval_min=COLLECT_INTERVAL_MINUTES,
+        max_proxies=MAX_TOTAL_PROXIES,
+        workers=MAX_WORKERS,
+    )
 
     try:
         # 시작하자마자 한 번 실행
@@ -640,8 +690,11 @@ def main_loop():
 
         # 이후 주기적으로 반복
         while not STOP_EVENT.is_set():
-            print(f"💤 {COLLECT_INTERVAL_MINUTES}분 대기 후 다음 수집 실행...")
-            print(f"   (현재 시각: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')})")
+            log.info(
+                "idle",
+                f"💤 {COLLECT_INTERVAL_MINUTES}분 대기 후 다음 수집 실행...\n   (현재 시각: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')})",
+                minutes=COLLECT_INTERVAL_MINUTES,
+            )
 
             # 1초 단위로 잘게 쪼개서 중간에 Ctrl+C 누르면 바로 반응
             total_sleep = COLLECT_INTERVAL_MINUTES * 60
@@ -651,7 +704,7 @@ def main_loop():
                 # 1분마다 진행 상황 표시
                 if i > 0 and i % 60 == 0:
                     remaining_min = (total_sleep - i) // 60
-                    print(f"   ⏳ 대기 중... (남은 시간: {remaining_min}분)")
+                    log.info("idle_tick", f"   ⏳ 대기 중... (남은 시간: {remaining_min}분)", remaining_min=remaining_min)
                 time.sleep(1)
 
             if STOP_EVENT.is_set():
@@ -659,12 +712,13 @@ def main_loop():
             collect_once()
 
     except KeyboardInterrupt:
-        print("\n🛑 KeyboardInterrupt (Ctrl+C) 감지, 중단 신호 설정.")
+        log.info("interrupted", "\n🛑 KeyboardInterrupt (Ctrl+C) 감지, 중단 신호 설정.")
         STOP_EVENT.set()
-        print("⏳ 실행 중인 작업이 완료될 때까지 잠시 기다려주세요...")
+        log.info("shutdown_wait", "⏳ 실행 중인 작업이 완료될 때까지 잠시 기다려주세요...")
 
     finally:
-        print("🔚 collector_redis.py 종료 완료.")
+        log.info("shutdown", "🔚 collector_redis.py 종료 완료.")
+        flush_logs()
 
 
 if __name__ == "__main__":
@@ -1,3 +1,5 @@
+import os
+import sys
 import time
 import requests
 from typing import List, Dict, Optional
@@ -6,6 +8,11 @@ from datetime import datetime
 
 import redis  # pip install redis
 import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "playwright"))
+from proxy_log import get_logger, flush as flush_logs  # noqa: E402
+
+log = get_logger("collector")
 # SOCKS 프록시 사용 시: pip install "requests[socks]"
 
 # ================= 전역 중단 신호 =================
@@ -86,7 +93,7 @@ def make_proxy_key(protocol: str, address: str) -> str:
 def fetch_http_proxy_list(url: str) -> List[Dict]:
     if STOP_EVENT.is_set():
         return []
-    print(f"📥 HTTP 프록시 목록 다운로드: {url}")
+    log.info("fetch_start", f"📥 HTTP 프록시 목록 다운로드: {url}", url=url, source="proxifly_http")
     proxies: List[Dict] = []
     try:
         resp = requests.get(url, timeout=30)
@@ -116,17 +123,17 @@ def fetch_http_proxy_list(url: str) -> List[Dict]:
                     "source": "proxifly_http",
                 }
             )
-        print(f"✅ HTTP 프록시 {len(proxies)}개 수집\n")
+        log.info("fetch_done", f"✅ HTTP 프록시 {len(proxies)}개 수집\n", source="proxifly_http", count=len(proxies))
     except Exception as e:
         if not STOP_EVENT.is_set():
-            print(f"❌ HTTP 프록시 목록 다운로드 실패: {e}")
+            log.error("fetch_failed", f"❌ HTTP 프록시 목록 다운로드 실패: {e}", source="proxifly_http", error=str(e))
     return proxies
 
 
 def fetch_socks5_proxy_list(url: str, source_name: str) -> List[Dict]:
     if STOP_EVENT.is_set():
         return []
-    print(f"📥 SOCKS5 프록시 목록 다운로드: {url} (source={source_name})")
+    log.info("fetch_start", f"📥 SOCKS5 프록시 목록 다운로드: {url} (source={source_name})", url=url, source=source_name)
     proxies: List[Dict] = []
     try:
         resp = requests.get(url, timeout=30)
@@ -149,10 +156,10 @@ def fetch_socks5_proxy_list(url: str, source_name: str) -> List[Dict]:
                     "source": source_name,
                 }
             )
-        print(f"✅ SOCKS5 프록시 {len(proxies)}개 수집 (source={source_name})\n")
+        log.info("fetch_done", f"✅ SOCKS5 프록시 {len(proxies)}개 수집 (source={source_name})\n", source=source_name, count=len(proxies))
     except Exception as e:
         if not STOP_EVENT.is_set():
-            print(f"❌ SOCKS5 프록시 목록 다운로드 실패 ({source_name}): {e}")
+            log.error("fetch_failed", f"❌ SOCKS5 프록시 목록 다운로드 실패 ({source_name}): {e}", source=source_name, error=str(e))
     return proxies
 
 
@@ -175,18 +182,32 @@ def fetch_all_proxies() -> List[Dict]:
 
     all_proxies = list(unique.values())
 
-    print("📦 프록시 집계 (중복 제거 후):")
-    print(f"  • HTTP           : {len(http_proxies)}")
-    print(f"  • SOCKS5 SpeedX  : {len(s5_speedx)}")
-    print(f"  • SOCKS5 Proxifly: {len(s5_proxifly)}")
-    print(f"  → Uniq 총합      : {len(all_proxies)}")
+    unique_total = len(all_proxies)
+    lines = [
+        "📦 프록시 집계 (중복 제거 후):",
+        f"  • HTTP           : {len(http_proxies)}",
+        f"  • SOCKS5 SpeedX  : {len(s5_speedx)}",
+        f"  • SOCKS5 Proxifly: {len(s5_proxifly)}",
+        f"  → Uniq 총합      : {unique_total}",
+    ]
 
     # 너무 많으면 상단 일부만 사용 (선택 사항)
     if MAX_TOTAL_PROXIES is not None and len(all_proxies) > MAX_TOTAL_PROXIES:
-        print(f"  ⚠️ 너무 많아서 {MAX_TOTAL_PROXIES}개까지만 사용합니다.")
+        lines.append(f"  ⚠️ 너무 많아서 {MAX_TOTAL_PROXIES}개까지만 사용합니다.")
         all_proxies = all_proxies[:MAX_TOTAL_PROXIES]
 
-    print(f"  ▶ 실제 테스트 대상: {len(all_proxies)}개\n")
+    lines.append(f"  ▶ 실제 테스트 대상: {len(all_proxies)}개\n")
+    log.info(
+        "fetch_summary",
+        "\n".join(lines),
+        sources={
+            "proxifly_http": len(http_proxies),
+            "speedx_socks5": len(s5_speedx),
+            "proxifly_socks5": len(s5_proxifly),
+        },
+        unique=unique_total,
+        selected=len(all_proxies),
+    )
     return all_proxies
 
 
@@ -357,60 +378,59 @@ def store_proxy_to_redis(r: redis.Redis, proxy_info: Dict, test_result: Dict):
 
 def process_one_proxy(idx: int, total: int, proxy_info: Dict, r: redis.Redis) -> None:
     if STOP_EVENT.is_set():
-        print(f"[{idx}/{total}] ⏹ 중단 신호 감지, 이 프록시는 스킵합니다.")
+        log.info("check_skip", f"[{idx}/{total}] ⏹ 중단 신호 감지, 이 프록시는 스킵합니다.", idx=idx, total=total)
         return
 
     address = proxy_info["address"]
     protocol = proxy_info["protocol"]
-    print(f"[{idx}/{total}] 테스트 시작: {protocol.upper()}://{address}")
+    log.info("check_start", lambda: f"[{idx}/{total}] 테스트 시작: {protocol.upper()}://{address}", idx=idx, total=total)
 
     try:
         result = test_proxy(proxy_info)
     except Exception as e:
-        print(f"  ❌ 테스트 중 예외: {e}")
+        log.warning("check_error", f"  ❌ 테스트 중 예외: {e}", error=str(e))
         result = {"ok": False, "latency_ms": None, "ips": [], "proxy_type": "Unknown"}
 
     if STOP_EVENT.is_set():
-        print(f"  ⏹ 중단 신호로 인해 결과 저장 스킵.")
+        log.info("store_skip", "  ⏹ 중단 신호로 인해 결과 저장 스킵.")
         return
 
     if result["ok"]:
-        print(
-            f"  ✅ OK  | type={result['proxy_type']}, "
-            f"avg_latency={result['latency_ms']:.1f} ms, ips={result['ips']}"
+        log.info(
+            "check_alive",
+            lambda: f"  ✅ OK  | type={result['proxy_type']}, avg_latency={result['latency_ms']:.1f} ms, ips={result['ips']}\n",
+            member=f"{protocol}://{address}",
+            latency_ms=result["latency_ms"],
         )
     else:
-        print(f"  ❌ DEAD (type={result.get('proxy_type')})")
+        log.info("check_dead", lambda: f"  ❌ DEAD (type={result.get('proxy_type')})\n", member=f"{protocol}://{address}")
 
     store_proxy_to_redis(r, proxy_info, result)
-    print()
 
 
 def collect_once():
     """프록시 수집 + 테스트 + Redis 업데이트를 한 번 수행"""
     if STOP_EVENT.is_set():
-        print("⏹ collect_once 호출 시 이미 중단 신호가 설정되어 있음. 스킵.")
+        log.info("collect_skip", "⏹ collect_once 호출 시 이미 중단 신호가 설정되어 있음. 스킵.")
         return
 
     start_dt = datetime.now()
 
-    print("=" * 80)
-    print(f"🕒 수집 작업 시작: {start_dt.strftime('%Y-%m-%d %H:%M:%S')}")
-    print("=" * 80)
+    log.info("collect_start", "\n".join(["=" * 80, f"🕒 수집 작업 시작: {start_dt.strftime('%Y-%m-%d %H:%M:%S')}", "=" * 80]))
 
     r = get_redis()
     proxies = fetch_all_proxies()
     total = len(proxies)
 
     if STOP_EVENT.is_set():
-        print("⏹ 수집 중단 신호로 인해 테스트를 시작하지 않습니다.")
+        log.info("collect_stopped", "⏹ 수집 중단 신호로 인해 테스트를 시작하지 않습니다.")
         return
 
     if not total:
-        print("❌ 수집된 프록시가 없습니다. 작업 종료.")
+        log.error("collect_empty", "❌ 수집된 프록시가 없습니다. 작업 종료.")
         return
 
-    print(f"🔍 총 {total}개 프록시 테스트 시작 (workers={MAX_WORKERS})\n")
+    log.info("check_start_all", f"🔍 총 {total}개 프록시 테스트 시작 (workers={MAX_WORKERS})\n", total=total, workers=MAX_WORKERS)
 
     start = time.time()
     idx = 0
@@ -418,7 +438,7 @@ def collect_once():
         futures = []
         for p in proxies:
             if STOP_EVENT.is_set():
-                print("⏹ 중단 신호 감지, 나머지 프록시는 제출하지 않습니다.")
+                log.info("collect_stopped", "⏹ 중단 신호 감지, 나머지 프록시는 제출하지 않습니다.", submitted=idx)
                 break
             idx += 1
             futures.append(executor.submit(process_one_proxy, idx, total, p, r))
@@ -430,18 +450,27 @@ def collect_once():
             try:
                 _ = f.result()
             except Exception as e:
-                print(f"⚠️ 쓰레드 처리 중 예외: {e}")
+                log.warning("check_error", f"⚠️ 쓰레드 처리 중 예외: {e}", error=str(e))
 
     elapsed = time.time() - start
     alive_count = r.zcard(REDIS_ZSET_ALIVE)
     end_dt = datetime.now()
 
-    print("=" * 80)
-    print(f"⏱️ 이번 수집/테스트 소요시간: {elapsed:.1f}초")
-    print(f"💾 Redis alive 풀 현재 개수: {alive_count}개 (key={REDIS_ZSET_ALIVE})")
-    print(f"✅ 수집 작업 완료 시각: {end_dt.strftime('%Y-%m-%d %H:%M:%S')}")
-    print("=" * 80)
-    print()
+    log.info(
+        "collect_done",
+        "\n".join(
+            [
+                "=" * 80,
+                f"⏱️ 이번 수집/테스트 소요시간: {elapsed:.1f}초",
+                f"💾 Redis alive 풀 현재 개수: {alive_count}개 (key={REDIS_ZSET_ALIVE})",
+                f"✅ 수집 작업 완료 시각: {end_dt.strftime('%Y-%m-%d %H:%M:%S')}",
+                "=" * 80,
+                "",
+            ]
+        ),
+        elapsed=round(elapsed, 1),
+        alive=alive_count,
+    )
 
 
 # ======================================================
@@ -449,14 +478,21 @@ def collect_once():
 # ======================================================
 
 def main_loop():
-    print("=" * 80)
-    print("🚀 Redis 프록시 수집 데몬")
-    print("=" * 80)
-    print(f"⏱️ 주기: {COLLECT_INTERVAL_MINUTES}분 마다 한 번 수집/테스트")
-    print(f"🧪 한 번에 테스트할 최대 프록시 수: {MAX_TOTAL_PROXIES if MAX_TOTAL_PROXIES is not None else '제한 없음'}")
-    print("🛑 언제든지 Ctrl + C 로 중단 가능")
-    print("=" * 80)
-    print()
+    log.info(
+        "banner",
+        "\n".join(
+            [
+                "=" * 80,
+                "🚀 Redis 프록시 수집 데몬",
+                "=" * 80,
+                f"⏱️ 주기: {COLLECT_INTERVAL_MINUTES}분 마다 한 번 수집/테스트",
+                f"🧪 한 번에 테스트할 최대 프록시 수: {MAX_TOTAL_PROXIES if MAX_TOTAL_PROXIES is not None else '제한 없음'}",
+                "🛑 언제든지 Ctrl + C 로 중단 가능",
+                "=" * 80,
+                "",
+            ]
+        ),
+    )
 
     try:
         # 시작하자마자 한 번 실행
@@ -464,7 +500,7 @@ def main_loop():
 
         # 이후 주기적으로 반복
         while not STOP_EVENT.is_set():
-            print(f"💤 {COLLECT_INTERVAL_MINUTES}분 대기 후 다음 수집 실행...")
+            log.info("idle", f"💤 {COLLECT_INTERVAL_MINUTES}분 대기 후 다음 수집 실행...", minutes=COLLECT_INTERVAL_MINUTES)
             # 1초 단위로 잘게 쪼개서 중간에 Ctrl+C 누르면 바로 반응하게
             total_sleep = COLLECT_INTERVAL_MINUTES * 60
             for _ in range(total_sleep):
@@ -476,11 +512,12 @@ def main_loop():
             collect_once()
 
     except KeyboardInterrupt:
-        print("\n🛑 KeyboardInterrupt(Ctrl+C) 감지, 중단 신호 설정.")
+        log.info("interrupted", "\n🛑 KeyboardInterrupt(Ctrl+C) 감지, 중단 신호 설정.")
         STOP_EVENT.set()
 
     finally:
-        print("🔚 collector_redis.py 종료 준비 완료.")
+        log.info("shutdown", "🔚 collector_redis.py 종료 준비 완료.")
+        flush_logs()
 
 
 if __name__ == "__main__":
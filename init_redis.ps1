@@ -1,4 +1,2 @@
-redis-cli --raw ZRANGE proxies:lease 0 -1 | while read p; do
-  redis-cli ZADD proxies:alive 0 "$p" >/dev/null
-done
-redis-cli DEL proxies:lease
+# lease -> alive 전부 복귀 (Lua 배치, 멤버마다 redis-cli를 띄우지 않음)
+python pool_admin.py reset-leases
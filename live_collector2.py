@@ -15,8 +15,10 @@
 #   python collector.py
 
 import json
+import os
 import random
 import signal
+import sys
 import time
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Set, Tuple
@@ -24,6 +26,11 @@ from typing import Dict, List, Optional, Set, Tuple
 import redis
 import requests
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "playwright"))
+from proxy_log import get_logger, flush as flush_logs  # noqa: E402
+
+log = get_logger("live_collector")
+
 # =========================
 # 프록시 소스 URL
 # =========================
@@ -90,7 +97,7 @@ STOP = False
 def _handle_sigint(sig, frame):
     global STOP
     STOP = True
-    print("\n🛑 Ctrl+C 감지: 가능한 빨리 중단합니다(현재 작업/청크 완료 후 종료).")
+    log.info("interrupted", "\n🛑 Ctrl+C 감지: 가능한 빨리 중단합니다(현재 작업/청크 완료 후 종료).")
 
 
 signal.signal(signal.SIGINT, _handle_sigint)
@@ -143,7 +150,7 @@ def fetch_source(url: str, protocol: str, source_name: str) -> List[str]:
     if STOP:
         return []
 
-    print(f"📥 GET {source_name:20s} ({protocol})")
+    log.info("fetch_start", f"📥 GET {source_name:20s} ({protocol})", url=url, source=source_name)
     try:
         resp = requests.get(url, timeout=FETCH_TIMEOUT, headers={"User-Agent": UA})
         resp.raise_for_status()
@@ -155,10 +162,10 @@ def fetch_source(url: str, protocol: str, source_name: str) -> List[str]:
                 continue
             out.append(f"{protocol}://{addr}")
 
-        print(f"   ✅ parsed={len(out)}")
+        log.info("fetch_done", f"   ✅ parsed={len(out)}", source=source_name, count=len(out))
         return out
     except Exception as e:
-        print(f"   ❌ fail: {type(e).__name__}: {str(e)[:140]}")
+        log.error("fetch_failed", f"   ❌ fail: {type(e).__name__}: {str(e)[:140]}", source=source_name, error=str(e))
         return []
 
 
@@ -213,7 +220,7 @@ def redis_save_chunked_nx(r: redis.Redis, proxies: List[str]) -> Tuple[int, int]
     pool_added_total = 0
     keys_created_total = 0
 
-    print(f"💾 Redis 저장(청크+NX): total={total}, chunk={REDIS_CHUNK_SIZE}")
+    log.info("store_start", f"💾 Redis 저장(청크+NX): total={total}, chunk={REDIS_CHUNK_SIZE}", total=total, chunk=REDIS_CHUNK_SIZE)
 
     # 1) pool 저장 (SADD) - 청크
     done = 0
@@ -224,11 +231,11 @@ def redis_save_chunked_nx(r: redis.Redis, proxies: List[str]) -> Tuple[int, int]
         try:
             added = r.sadd(POOL_KEY, *ck)
             pool_added_total += int(added) if added is not None else 0
-            print(f"  [POOL] {done}/{total} | +{added} new")
+            log.info("pool_chunk", f"  [POOL] {done}/{total} | +{added} new", done=done, total=total, added=added)
         except KeyboardInterrupt:
             raise
         except Exception as e:
-            print(f"  ⚠️ [POOL] chunk fail: {type(e).__name__}: {str(e)[:160]}")
+            log.warning("pool_chunk_error", f"  ⚠️ [POOL] chunk fail: {type(e).__name__}: {str(e)[:160]}", error=str(e))
 
     if STOP:
         return (pool_added_total, keys_created_total)
@@ -251,11 +258,11 @@ def redis_save_chunked_nx(r: redis.Redis, proxies: List[str]) -> Tuple[int, int]
             created = sum(1 for x in results if x)  # True/OK count
             keys_created_total += created
             done += len(ck)
-            print(f"  [KEYS] {done}/{total} | created={created} (NX)")
+            log.info("keys_chunk", f"  [KEYS] {done}/{total} | created={created} (NX)", done=done, total=total, created=created)
         except KeyboardInterrupt:
             raise
         except Exception as e:
-            print(f"  ⚠️ [KEYS] chunk fail: {type(e).__name__}: {str(e)[:160]}")
+            log.warning("keys_chunk_error", f"  ⚠️ [KEYS] chunk fail: {type(e).__name__}: {str(e)[:160]}", error=str(e))
 
     return (pool_added_total, keys_created_total)
 
@@ -264,56 +271,76 @@ def main_loop():
     r = get_redis()
     try:
         r.ping()
-        print("✅ Redis PING OK")
+        log.info("redis_ok", "✅ Redis PING OK")
     except Exception as e:
-        print(f"❌ Redis 연결 실패: {type(e).__name__}: {e}")
+        log.error("redis_error", f"❌ Redis 연결 실패: {type(e).__name__}: {e}", error=str(e))
+        flush_logs()
         return
 
-    print("=" * 80)
-    print("🚀 collector (fixed design + NX optimization)")
-    print("✅ SADD proxies:pool proxy")
-    print("✅ SET proxy '<meta>' EX 21600 NX  (키 없을 때만 생성)")
-    print(f"• interval: {COLLECT_INTERVAL_MINUTES} min | chunk: {REDIS_CHUNK_SIZE}")
-    print("🛑 Ctrl+C 로 종료")
-    print("=" * 80)
+    log.info(
+        "banner",
+        "\n".join(
+            [
+                "=" * 80,
+                "🚀 collector (fixed design + NX optimization)",
+                "✅ SADD proxies:pool proxy",
+                "✅ SET proxy '<meta>' EX 21600 NX  (키 없을 때만 생성)",
+                f"• interval: {COLLECT_INTERVAL_MINUTES} min | chunk: {REDIS_CHUNK_SIZE}",
+                "🛑 Ctrl+C 로 종료",
+                "=" * 80,
+            ]
+        ),
+    )
 
     while not STOP:
         t0 = time.time()
-        print("\n" + "=" * 80)
-        print(f"🕐 collect start: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("=" * 80)
+        log.info("collect_start", "\n".join(["\n" + "=" * 80, f"🕐 collect start: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", "=" * 80]))
 
         proxies, stats = collect_all_unique()
-        print("-" * 80)
-        print(
-            f"📦 unique={len(proxies)} | "
-            f"http={stats['http']} https={stats['https']} socks4={stats['socks4']} socks5={stats['socks5']} | "
-            f"sources_ok={stats['sources_ok']}/{stats['sources_total']}"
+        log.info(
+            "collect_done",
+            "\n".join(
+                [
+                    "-" * 80,
+                    f"📦 unique={len(proxies)} | "
+                    f"http={stats['http']} https={stats['https']} socks4={stats['socks4']} socks5={stats['socks5']} | "
+                    f"sources_ok={stats['sources_ok']}/{stats['sources_total']}",
+                    "-" * 80,
+                ]
+            ),
+            unique=len(proxies),
+            **stats,
         )
-        print("-" * 80)
 
         try:
             pool_added, keys_created = redis_save_chunked_nx(r, proxies)
             pool_size = r.scard(POOL_KEY)
-            print(f"✅ redis done: pool_added={pool_added} keys_created={keys_created} pool_size={pool_size}")
+            log.info(
+                "store_done",
+                f"✅ redis done: pool_added={pool_added} keys_created={keys_created} pool_size={pool_size}",
+                pool_added=pool_added,
+                keys_created=keys_created,
+                pool_size=pool_size,
+            )
         except KeyboardInterrupt:
-            print("\n🛑 종료합니다.")
+            log.info("interrupted", "\n🛑 종료합니다.")
             break
 
         elapsed = time.time() - t0
-        print(f"⏱️  elapsed: {elapsed:.1f}s")
+        log.info("collect_elapsed", f"⏱️  elapsed: {elapsed:.1f}s", elapsed=round(elapsed, 1))
 
         if STOP:
             break
 
         sleep_sec = max(5, COLLECT_INTERVAL_MINUTES * 60 - int(elapsed))
-        print(f"💤 sleep {sleep_sec}s ...")
+        log.info("sleep", f"💤 sleep {sleep_sec}s ...", seconds=sleep_sec)
         for _ in range(sleep_sec):
             if STOP:
                 break
             time.sleep(1)
 
-    print("👋 collector stopped.")
+    log.info("shutdown", "👋 collector stopped.")
+    flush_logs()
 
 
 if __name__ == "__main__":
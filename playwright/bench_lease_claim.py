@@ -0,0 +1,200 @@
+# bench_lease_claim.py
+"""
+claim 지연시간 벤치마크 (부하 상황).
+
+- before: 기존 _LUA_CLAIM (매 claim마다 ZRANGEBYSCORE lease ... LIMIT 0 200 회수)
+- after : 현재 RedisProxyLeaseClient.claim (회수는 reaper가 분할 상환)
+
+각 모드마다 테스트용 키를 새로 만들고
+  alive = --pool 개 (score=0)
+  lease = --leased 개 (절반은 이미 만료, 절반은 미래 만료)
+를 채운 뒤, --threads 개 쓰레드가 claim -> release 를 반복하면서 claim 지연시간을 측정한다.
+
+예)
+  python bench_lease_claim.py --db 15 --pool 20000 --leased 50000 --threads 32 --claims 20000
+
+※ 반드시 비어있는/테스트용 DB에서 실행하세요. (모든 키가 bench:{mode}: 아래라 운영 키는 건드리지 않지만 대량 쓰기가 발생합니다)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from typing import Dict, List
+
+import redis
+
+from redis_proxy_lease import RedisProxyLeaseClient, RedisConnConfig
+
+
+# 변경 전 claim 스크립트 (비교용 원본 그대로)
+LEGACY_LUA_CLAIM = r"""
+local alive = KEYS[1]
+local lease = KEYS[2]
+local now = tonumber(ARGV[1])
+local lease_sec = tonumber(ARGV[2])
+local reclaim_limit = tonumber(ARGV[3])
+local sample_k = tonumber(ARGV[4])
+local rand_int = tonumber(ARGV[5])
+
+local expired = redis.call('ZRANGEBYSCORE', lease, '-inf', now, 'LIMIT', 0, reclaim_limit)
+for i, m in ipairs(expired) do
+  redis.call('ZREM', lease, m)
+  redis.call('ZADD', alive, 0, m)
+end
+
+local cands = redis.call('ZRANGEBYSCORE', alive, '-inf', now, 'LIMIT', 0, sample_k)
+if (not cands) or (#cands == 0) then
+  return nil
+end
+
+local idx = (rand_int % #cands) + 1
+local m = cands[idx]
+
+redis.call('ZREM', alive, m)
+redis.call('ZADD', lease, now + lease_sec, m)
+return m
+"""
+
+
+def _bench_keys(prefix: str) -> Dict[str, str]:
+    """클라이언트 키 인자 전부(alive/lease/owner/fence/events/signal/quality/feedback ...)를 prefix 아래로"""
+    return {k: prefix + v[len("proxies"):] for k, v in RedisProxyLeaseClient.shard_key_names(0, 1).items()}
+
+
+def _cleanup(r: redis.Redis, prefix: str) -> None:
+    keys = list(r.scan_iter(match=f"{prefix}:*", count=1000))
+    for i in range(0, len(keys), 500):
+        r.delete(*keys[i : i + 500])
+
+
+def _populate(r: redis.Redis, alive_key: str, lease_key: str, pool: int, leased: int) -> None:
+    r.delete(alive_key, lease_key)
+    now = int(time.time())
+    pipe = r.pipeline(transaction=False)
+    for i in range(pool):
+        pipe.zadd(alive_key, {f"http://10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}:8080": 0})
+        if i % 5000 == 4999:
+            pipe.execute()
+    for i in range(leased):
+        score = now - 60 if i % 2 == 0 else now + 3600
+        pipe.zadd(lease_key, {f"socks5://10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}:1080": score})
+        if i % 5000 == 4999:
+            pipe.execute()
+    pipe.execute()
+
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(p / 100.0 * (len(values) - 1)))))
+    return values[k]
+
+
+def run_mode(mode: str, args) -> Dict:
+    cfg = RedisConnConfig(host=args.host, port=args.port, db=args.db, password=args.password)
+    prefix = f"bench:{mode}"
+    keys = _bench_keys(prefix)
+    alive_key, lease_key = keys["alive_key"], keys["lease_key"]
+
+    setup = redis.Redis(host=cfg.host, port=cfg.port, db=cfg.db, password=cfg.password, decode_responses=True)
+    _cleanup(setup, prefix)
+    _populate(setup, alive_key, lease_key, args.pool, args.leased)
+
+    per_thread = max(1, args.claims // args.threads)
+    latencies: List[float] = []
+    empty = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    def worker():
+        nonlocal empty
+        client = RedisProxyLeaseClient(cfg, **keys)
+        client.connect()
+        legacy = client.r.register_script(LEGACY_LUA_CLAIM)
+        local: List[float] = []
+        local_empty = 0
+        barrier.wait()
+        for _ in range(per_thread):
+            t0 = time.perf_counter()
+            if mode == "before":
+                member = legacy(
+                    keys=[alive_key, lease_key],
+                    args=[int(time.time()), args.lease_seconds, 200, 50, random.randint(0, 2_147_483_647)],
+                )
+            else:
+                member = client.claim(lease_seconds=args.lease_seconds, reclaim_limit=200, sample_k=50)
+            local.append((time.perf_counter() - t0) * 1000.0)
+            if member:
+                client.release(member)
+            else:
+                local_empty += 1
+        client.close()
+        with lock:
+            latencies.extend(local)
+            empty += local_empty
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(args.threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    left_expired = setup.zcount(lease_key, "-inf", int(time.time()))
+    _cleanup(setup, prefix)
+    setup.close()
+
+    return {
+        "mode": mode,
+        "claims": len(latencies),
+        "empty": empty,
+        "claims_per_sec": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "max_ms": round(max(latencies) if latencies else 0.0, 3),
+        "mean_ms": round(statistics.fmean(latencies) if latencies else 0.0, 3),
+        "expired_leases_left": int(left_expired),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="claim 지연시간 벤치마크 (before: claim 내 회수 / after: reaper 분리)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--db", type=int, default=15)
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--pool", type=int, default=20000, help="alive 멤버 수")
+    parser.add_argument("--leased", type=int, default=50000, help="lease 멤버 수(절반은 이미 만료)")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--claims", type=int, default=20000, help="전체 claim 횟수")
+    parser.add_argument("--lease-seconds", type=int, default=300)
+    parser.add_argument("--mode", choices=["before", "after", "both"], default="both")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로(선택)")
+    args = parser.parse_args()
+
+    modes = ["before", "after"] if args.mode == "both" else [args.mode]
+    results = []
+    for mode in modes:
+        print(f"[BENCH] mode={mode} pool={args.pool} leased={args.leased} threads={args.threads} claims={args.claims}")
+        res = run_mode(mode, args)
+        results.append(res)
+        print(
+            f"[BENCH] {mode:6s} | {res['claims_per_sec']:>9} claims/s | p50={res['p50_ms']}ms "
+            f"p99={res['p99_ms']}ms max={res['max_ms']}ms | empty={res['empty']} "
+            f"| expired_left={res['expired_leases_left']}"
+        )
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"[BENCH] saved -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+# bench_lease_contention.py
+"""
+lease 엔진 동시성 벤치마크 + 공정성 / 안전성 검사.
+
+--pool 개 멤버를 채운 테스트 키에서 --claimers 개 쓰레드(각자 RedisProxyLeaseClient, owner 따로)가
+--duration 초 동안 claim -> (hold) -> release_on_result / ban / 방치(만료 후 reaper 회수) 를 반복하고,
+  - claims/sec, claim 지연 p50/p99/max, 스크립트별 왕복 지연(claim/release/health/ban/reap/probation)
+  - 서버 측 스크립트 실행 시간 (INFO commandstats의 fcall / evalsha usec_per_call 변화량)
+  - 이중 임대 위반: 아직 만료되지 않은 lease를 다른 claimer가 받은 횟수 (반드시 0)
+    + alive/lease 동시 소속 멤버 수(주기 점검) + 멤버 보존(alive+lease+probation+ban = pool)
+  - 멤버별 사용 공정성: Jain index / Gini / 변동계수 / 한 번도 안 뽑힌 멤버 수
+를 출력한다. --out으로 저장하면 스크립트 버전(LIBRARY_VERSION + 스크립트 sha1)이 같이 기록되고,
+--compare 이전결과.json 으로 스크립트 변경 전/후 수치를 비교할 수 있음.
+
+예)
+  python bench_lease_contention.py --db 15 --pool 5000 --claimers 200 --duration 30 --out v6.json
+  python bench_lease_contention.py --db 15 --pool 500 --claimers 300 --lease-seconds 2 --abandon-rate 0.05 --compare v6.json
+
+※ 반드시 비어있는/테스트용 DB에서 실행하세요. (bench:contention:* 키만 쓰지만 대량 쓰기가 발생합니다)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+import redis
+
+from bench_lease_claim import _percentile
+from redis_proxy_lease import LeaseClientBase, RedisConnConfig, RedisProxyLeaseClient
+
+
+PREFIX = "bench:contention"
+SCRIPT_COMMANDS = ("fcall", "evalsha", "eval")
+COMPARE_FIELDS = ("claims_per_sec", "claim_p50_ms", "claim_p99_ms", "server_usec_per_call", "jain", "gini", "violations")
+
+
+def bench_keys(prefix: str = PREFIX) -> Dict[str, str]:
+    """RedisProxyLeaseClient 키 인자 (운영 키와 겹치지 않게 전부 prefix 아래)"""
+    return {
+        "alive_key": f"{prefix}:alive",
+        "lease_key": f"{prefix}:lease",
+        "health_hash": f"{prefix}:health",
+        "probation_key": f"{prefix}:probation",
+        "quality_hash": f"{prefix}:quality",
+        "feedback_hash": f"{prefix}:feedback",
+        "owner_hash": f"{prefix}:lease:owner",
+        "fence_key": f"{prefix}:lease:fence",
+        "stats_hash": f"{prefix}:stats",
+        "events_key": f"{prefix}:events",
+        "signal_key": f"{prefix}:signal",
+        "index_prefix": f"{prefix}:idx",
+        "history_prefix": f"{prefix}:hist",
+    }
+
+
+def _cleanup(r: redis.Redis, prefix: str = PREFIX) -> None:
+    batch = []
+    for k in r.scan_iter(match=f"{prefix}:*", count=1000):
+        batch.append(k)
+        if len(batch) >= 500:
+            r.delete(*batch)
+            batch = []
+    if batch:
+        r.delete(*batch)
+
+
+def _populate(r: redis.Redis, keys: Dict[str, str], pool: int) -> List[str]:
+    members = [f"http://10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}:8080" for i in range(pool)]
+    pipe = r.pipeline(transaction=False)
+    for i in range(0, pool, 5000):
+        pipe.zadd(keys["alive_key"], {m: 0 for m in members[i : i + 5000]})
+    pipe.execute()
+    return members
+
+
+def _script_stats(r: redis.Redis) -> Dict[str, Tuple[int, int]]:
+    """INFO commandstats -> {command: (calls, usec)} (지원하지 않는 서버면 빈 dict)"""
+    try:
+        info = r.info("commandstats")
+    except redis.RedisError:
+        return {}
+    out = {}
+    for cmd in SCRIPT_COMMANDS:
+        st = info.get(f"cmdstat_{cmd}")
+        if isinstance(st, dict):
+            out[cmd] = (int(st.get("calls", 0)), int(st.get("usec", 0)))
+    return out
+
+
+def _overlap(r: redis.Redis, keys: Dict[str, str]) -> int:
+    """alive와 lease에 동시에 있는 멤버 수 (정상이면 항상 0)"""
+    try:
+        return int(r.execute_command("ZINTERCARD", 2, keys["alive_key"], keys["lease_key"]))
+    except redis.ResponseError:  # Redis 7 미만
+        tmp = f"{PREFIX}:overlap"
+        n = r.zinterstore(tmp, [keys["alive_key"], keys["lease_key"]])
+        r.delete(tmp)
+        return int(n)
+
+
+def fairness(counts: List[int]) -> Dict[str, Any]:
+    """멤버별 claim 횟수 -> Jain index(1=완전 균등) / Gini(0=완전 균등) / 변동계수 / 0회 멤버 수"""
+    n = len(counts)
+    total = sum(counts)
+    if not n or not total:
+        return {"jain": None, "gini": None, "cv": None, "never_claimed": n, "min": 0, "max": 0}
+    sq = sum(c * c for c in counts)
+    xs = sorted(counts)
+    gini = sum((2 * (i + 1) - n - 1) * x for i, x in enumerate(xs)) / (n * total)
+    mean = total / n
+    return {
+        "jain": round(total * total / (n * sq), 4),
+        "gini": round(gini, 4),
+        "cv": round(statistics.pstdev(counts) / mean, 4),
+        "never_claimed": sum(1 for c in counts if c == 0),
+        "min": xs[0],
+        "max": xs[-1],
+    }
+
+
+class _TimedClient(RedisProxyLeaseClient):
+    """스크립트 호출(op)별 왕복 지연 기록"""
+
+    def __init__(self, config: RedisConnConfig, **kwargs: Any):
+        super().__init__(config, **kwargs)
+        self.op_ms: Dict[str, List[float]] = {}
+
+    def _eval(self, call):
+        t0 = time.perf_counter()
+        try:
+            return super()._eval(call)
+        finally:
+            self.op_ms.setdefault(call[0], []).append((time.perf_counter() - t0) * 1000.0)
+
+
+class _Ledger:
+    """
+    벤치마크 쪽 임대 장부. claim 결과를 받으면 기존 보유자가 있는지 확인:
+    보유자의 lease가 아직 만료 전이면 이중 임대 위반 (만료 후 reaper가 회수해 다시 나간 건 정상).
+    반납 전에 먼저 장부에서 지우므로 release 직후의 정상 재임대를 위반으로 세지 않음.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._held: Dict[str, Tuple[int, float]] = {}  # member -> (claimer, expires_at)
+        self.violations = 0
+        self.reclaimed = 0
+        self.samples: List[Dict[str, Any]] = []
+
+    def claimed(self, wid: int, member: str, expires_at: float) -> None:
+        now = time.time()
+        with self._lock:
+            prev = self._held.get(member)
+            if prev is not None:
+                if now < prev[1]:
+                    self.violations += 1
+                    if len(self.samples) < 20:
+                        self.samples.append({"member": member, "holder": prev[0], "claimer": wid, "early_s": round(prev[1] - now, 3)})
+                else:
+                    self.reclaimed += 1
+            self._held[member] = (wid, expires_at)
+
+    def releasing(self, wid: int, member: str) -> None:
+        with self._lock:
+            prev = self._held.get(member)
+            if prev is not None and prev[0] == wid:
+                del self._held[member]
+
+
+def run(args) -> Dict[str, Any]:
+    cfg = RedisConnConfig(host=args.host, port=args.port, db=args.db, password=args.password)
+    keys = bench_keys()
+    setup = redis.Redis(host=cfg.host, port=cfg.port, db=cfg.db, password=cfg.password, decode_responses=True)
+    _cleanup(setup)
+    members = _populate(setup, keys, args.pool)
+
+    ledger = _Ledger()
+    stop = threading.Event()
+    barrier = threading.Barrier(args.claimers + 1)
+    lock = threading.Lock()
+    claim_ms: List[float] = []
+    op_ms: Dict[str, List[float]] = {}
+    usage: Counter = Counter()
+    actions: Counter = Counter()
+    overlap_max = [0]
+    errors: List[str] = []
+
+    def claimer(wid: int) -> None:
+        rng = random.Random(args.seed * 100003 + wid)
+        client = _TimedClient(cfg, **keys, history_size=args.history_size)
+        try:
+            client.connect()
+        except redis.RedisError as e:
+            errors.append(str(e))
+            barrier.wait()
+            return
+        local_claim: List[float] = []
+        local_usage: Counter = Counter()
+        local_actions: Counter = Counter()
+        barrier.wait()
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            lease = client.claim_lease(lease_seconds=args.lease_seconds, sample_k=args.sample_k)
+            local_claim.append((time.perf_counter() - t0) * 1000.0)
+            if lease is None:
+                local_actions["empty"] += 1
+                time.sleep(args.empty_sleep)
+                continue
+            ledger.claimed(wid, lease.member, lease.expires_at)
+            local_usage[lease.member] += 1
+            if args.hold_ms:
+                time.sleep(rng.uniform(0, args.hold_ms) / 1000.0)
+
+            x = rng.random()
+            if x < args.abandon_rate:
+                # 반납하지 않음 -> lease 만료 후 reaper(claim 경로의 reap)가 회수
+                local_actions["abandoned"] += 1
+                client._forget(lease.member)
+                continue
+            ledger.releasing(wid, lease.member)
+            x -= args.abandon_rate
+            if x < args.ban_rate:
+                local_actions["ban" if client.ban(lease.member) else "ban_rejected"] += 1
+            else:
+                ok = rng.random() >= args.fail_rate
+                info = client.release_on_result(lease.member, session_ok=ok, cooldown_fail_base=args.fail_cooldown,
+                                                cooldown_fail_jitter=0)
+                local_actions[info.get("action", "?")] += 1
+        client.close()
+        with lock:
+            claim_ms.extend(local_claim)
+            usage.update(local_usage)
+            actions.update(local_actions)
+            for op, v in client.op_ms.items():
+                op_ms.setdefault(op, []).extend(v)
+
+    def checker() -> None:
+        r = redis.Redis(host=cfg.host, port=cfg.port, db=cfg.db, password=cfg.password, decode_responses=True)
+        while not stop.wait(args.check_interval):
+            try:
+                overlap_max[0] = max(overlap_max[0], _overlap(r, keys))
+            except redis.RedisError:
+                pass
+        r.close()
+
+    threads = [threading.Thread(target=claimer, args=(i,), daemon=True) for i in range(args.claimers)]
+    for t in threads:
+        t.start()
+    check_thread = threading.Thread(target=checker, daemon=True)
+    barrier.wait()
+    stats0 = _script_stats(setup)
+    t0 = time.perf_counter()
+    check_thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    check_thread.join()
+    stats1 = _script_stats(setup)
+
+    overlap_max[0] = max(overlap_max[0], _overlap(setup, keys))
+    pipe = setup.pipeline(transaction=False)
+    pipe.zcard(keys["alive_key"])
+    pipe.zcard(keys["lease_key"])
+    pipe.zcard(keys["probation_key"])
+    alive, leased, probation = pipe.execute()
+    banned = actions["ban"]  # ban 스크립트로 제거된 수 (release_on_result의 "banned"는 probation +inf에 남음)
+    if not args.keep:
+        _cleanup(setup)
+    setup.close()
+
+    calls = sum(stats1.get(c, (0, 0))[0] - stats0.get(c, (0, 0))[0] for c in SCRIPT_COMMANDS)
+    usec = sum(stats1.get(c, (0, 0))[1] - stats0.get(c, (0, 0))[1] for c in SCRIPT_COMMANDS)
+    hits = sum(usage.values())
+    return {
+        "claimers": args.claimers,
+        "pool": args.pool,
+        "duration_s": round(elapsed, 2),
+        "claims": len(claim_ms),
+        "hits": hits,
+        "claims_per_sec": round(hits / elapsed, 1) if elapsed > 0 else 0.0,
+        "claim_p50_ms": round(_percentile(claim_ms, 50), 3),
+        "claim_p99_ms": round(_percentile(claim_ms, 99), 3),
+        "claim_max_ms": round(max(claim_ms) if claim_ms else 0.0, 3),
+        "ops": {
+            op: {"calls": len(v), "p50_ms": round(_percentile(v, 50), 3), "p99_ms": round(_percentile(v, 99), 3)}
+            for op, v in sorted(op_ms.items())
+        },
+        "server_script_calls": calls if stats1 else None,
+        "server_usec_per_call": round(usec / calls, 2) if calls else None,
+        "violations": ledger.violations,
+        "violation_samples": ledger.samples,
+        "reclaimed_after_expiry": ledger.reclaimed,
+        "overlap_max": overlap_max[0],
+        "lost_members": args.pool - (int(alive) + int(leased) + int(probation) + banned),
+        "actions": dict(actions),
+        "fairness": fairness([usage.get(m, 0) for m in members]),
+        "connect_errors": len(errors),
+    }
+
+
+def script_version() -> Dict[str, Any]:
+    return {"library_version": LeaseClientBase.LIBRARY_VERSION, "script_shas": dict(LeaseClientBase._SCRIPT_SHAS)}
+
+
+def _flat(res: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(res)
+    out.update({k: v for k, v in res.get("fairness", {}).items() if k in ("jain", "gini")})
+    return out
+
+
+def compare(prev: Dict[str, Any], cur: Dict[str, Any]) -> List[str]:
+    a, b = _flat(prev["result"]), _flat(cur["result"])
+    va, vb = prev.get("version", {}), cur.get("version", {})
+    changed = sorted(op for op, sha in vb.get("script_shas", {}).items() if va.get("script_shas", {}).get(op) != sha)
+    lines = [
+        f"[BENCH] compare: library v{va.get('library_version')} -> v{vb.get('library_version')}"
+        f" (changed scripts: {', '.join(changed) or '-'})"
+    ]
+    for f in COMPARE_FIELDS:
+        x, y = a.get(f), b.get(f)
+        if isinstance(x, (int, float)) and isinstance(y, (int, float)) and x:
+            lines.append(f"[BENCH]   {f:22s} {x:>12} -> {y:<12} ({(y / x - 1) * 100:+.1f}%)")
+        else:
+            lines.append(f"[BENCH]   {f:22s} {x!s:>12} -> {y!s:<12}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="lease 엔진 동시성 벤치마크 (처리량 / 지연 / 이중 임대 / 공정성)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--db", type=int, default=15)
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--pool", type=int, default=5000, help="alive 멤버 수")
+    parser.add_argument("--claimers", type=int, default=200, help="동시 claimer 쓰레드 수 (쓰레드마다 클라이언트/owner 따로)")
+    parser.add_argument("--duration", type=float, default=20.0, help="측정 시간(초)")
+    parser.add_argument("--lease-seconds", type=int, default=30)
+    parser.add_argument("--sample-k", type=int, default=50)
+    parser.add_argument("--hold-ms", type=float, default=20.0, help="claim 후 보유 시간 상한(ms, 0~값 균등)")
+    parser.add_argument("--fail-rate", type=float, default=0.1, help="세션 실패 비율 (release_on_result session_ok=False)")
+    parser.add_argument("--fail-cooldown", type=int, default=1, help="실패 쿨다운 기본값(초)")
+    parser.add_argument("--ban-rate", type=float, default=0.0, help="ban 비율 (풀에서 영구 제거)")
+    parser.add_argument("--abandon-rate", type=float, default=0.0, help="반납하지 않고 버리는 비율 (만료 후 reaper 회수 경로)")
+    parser.add_argument("--empty-sleep", type=float, default=0.005, help="빈 풀일 때 재시도 전 대기(초)")
+    parser.add_argument("--history-size", type=int, default=0, help="멤버 이력 ring 크기 (0=기록 안 함)")
+    parser.add_argument("--check-interval", type=float, default=0.5, help="alive/lease 중복 점검 주기(초)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="끝난 뒤 bench 키를 지우지 않음")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로(선택)")
+    parser.add_argument("--compare", default=None, help="이전 결과 JSON과 비교")
+    args = parser.parse_args()
+
+    print(
+        f"[BENCH] pool={args.pool} claimers={args.claimers} duration={args.duration}s lease={args.lease_seconds}s "
+        f"hold<={args.hold_ms}ms fail={args.fail_rate} ban={args.ban_rate} abandon={args.abandon_rate} "
+        f"library=v{LeaseClientBase.LIBRARY_VERSION}"
+    )
+    res = run(args)
+    fair = res["fairness"]
+    print(
+        f"[BENCH] {res['claims_per_sec']:>9} claims/s | p50={res['claim_p50_ms']}ms p99={res['claim_p99_ms']}ms "
+        f"max={res['claim_max_ms']}ms | empty={res['actions'].get('empty', 0)} "
+        f"| server={'-' if res['server_usec_per_call'] is None else res['server_usec_per_call']}us/script"
+    )
+    for op, st in res["ops"].items():
+        print(f"[BENCH]   {op:10s} calls={st['calls']:<8} p50={st['p50_ms']}ms p99={st['p99_ms']}ms")
+    print(
+        f"[BENCH] safety | violations={res['violations']} overlap_max={res['overlap_max']} "
+        f"lost_members={res['lost_members']} reclaimed_after_expiry={res['reclaimed_after_expiry']}"
+    )
+    print(
+        f"[BENCH] fairness | jain={fair['jain']} gini={fair['gini']} cv={fair['cv']} "
+        f"min={fair['min']} max={fair['max']} never_claimed={fair['never_claimed']}"
+    )
+    print(f"[BENCH] actions | {json.dumps(res['actions'], sort_keys=True)}")
+    if res["violations"]:
+        print(f"[BENCH] ❌ 이중 임대 발생: {res['violation_samples'][:5]}")
+
+    doc = {"args": vars(args), "version": script_version(), "result": res}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            for line in compare(json.load(f), doc):
+                print(line)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, indent=2)
+        print(f"[BENCH] saved -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
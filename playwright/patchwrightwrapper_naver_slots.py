@@ -10,8 +10,10 @@ import math
 import re
 from urllib.parse import urlparse, urlunparse, parse_qs, urlencode, urlunparse, unquote
 from typing import Optional
-# Redis proxy lease client
-from redis_proxy_lease import RedisProxyLeaseClient, RedisConnConfig
+# Redis proxy lease client (asyncio)
+from redis_proxy_lease import LeasePrefetcher, RedisConnConfig, RedisProxyLeaseClient
+from redis_proxy_lease_async import AsyncRedisProxyLeaseClient
+from proxy_metrics import start_http_server
 from PatchrightWrapper import StealthPatchrightBrowser
 
 _TLS = threading.local()
@@ -501,14 +503,45 @@ async def naver_search_and_click(page, keyword: str, target_url: str) -> dict:
     return result
 
 # ===================== Redis 설정 (proxy lease) =====================
-# (Redis 관련 로직은 redis_proxy_lease.py 의 RedisProxyLeaseClient로 모듈화)
+# (Redis 관련 로직은 redis_proxy_lease_async.py 의 AsyncRedisProxyLeaseClient로 모듈화)
 REDIS_HOST = "127.0.0.1"
 REDIS_PORT = 6379
 REDIS_DB = 0
 REDIS_PASSWORD = None
 
+# (옵션) --prefetch: 프로세스 공용 lease 버퍼 (세션 쓰레드들이 claim 대기 없이 바로 가져감)
+_PREFETCHER: Optional[LeasePrefetcher] = None
 
 
+def start_prefetcher(args) -> None:
+    global _PREFETCHER
+    if not args.proxy_from_redis or int(args.prefetch) <= 0:
+        return
+    client = RedisProxyLeaseClient(
+        RedisConnConfig(
+            host=args.redis_host,
+            port=int(args.redis_port),
+            db=int(args.redis_db),
+            password=args.redis_password,
+        )
+    )
+    client.connect()
+    _PREFETCHER = client.start_prefetch(
+        size=int(args.prefetch),
+        lease_seconds=int(args.lease_seconds),
+        idle_timeout=float(args.prefetch_idle),
+    )
+    log(f"[REDIS] prefetch started size={args.prefetch} idle_timeout={args.prefetch_idle}s")
+
+
+def stop_prefetcher() -> None:
+    global _PREFETCHER
+    prefetcher, _PREFETCHER = _PREFETCHER, None
+    if prefetcher is not None:
+        # 버퍼에 남은 lease 반납 후 연결 종료
+        prefetcher.client.close()
+        log("[REDIS] prefetch stopped (unused leases returned)")
+
 
 def _set_slot(slot_id: int):
     _TLS.slot_id = slot_id
@@ -548,50 +581,83 @@ def init_window_layout(args) -> None:
 async def run_one_session(slot_id: int, args) -> None:
     """
     슬롯 1회 세션:
-    - (옵션) Redis에서 프록시 1개 claim
+    - (옵션) Redis에서 프록시 1개 claim (asyncio 클라이언트, 이벤트 루프를 막지 않음)
     - Patchright browser 실행
     - TASKS 수행 (네이버 검색→도메인 클릭)
     - dwell 후 종료
-    - Redis release/ban 처리
+    - Redis release/ban 처리 (lease 핸들 종료 시 자동)
     """
     _set_slot(slot_id)
 
-    redis_client: Optional[RedisProxyLeaseClient] = None
-    proxy_member: Optional[str] = None
-    session_ok = False
-    local_proxy = args.proxy
+    if not args.proxy_from_redis:
+        await _run_browser_session(slot_id, args, args.proxy)
+        return
 
     # (옵션) Redis에서 프록시 임대
-    if args.proxy_from_redis:
-        log(f"[REDIS] connecting host={args.redis_host}:{args.redis_port} db={args.redis_db} auth={'yes' if bool(args.redis_password) else 'no'}")
-        try:
-            redis_client = RedisProxyLeaseClient(
-                RedisConnConfig(
-                    host=args.redis_host,
-                    port=int(args.redis_port),
-                    db=int(args.redis_db),
-                    password=args.redis_password,
-                )
+    log(f"[REDIS] connecting host={args.redis_host}:{args.redis_port} db={args.redis_db} auth={'yes' if bool(args.redis_password) else 'no'}")
+    try:
+        redis_client = AsyncRedisProxyLeaseClient(
+            RedisConnConfig(
+                host=args.redis_host,
+                port=int(args.redis_port),
+                db=int(args.redis_db),
+                password=args.redis_password,
             )
-            redis_client.connect()
-            log("[REDIS] ping=OK")
-        except Exception as e:
-            log(f"[REDIS] ping=FAIL: {type(e).__name__}: {e}")
-            return
+        )
+        await redis_client.connect()
+        log("[REDIS] ping=OK")
+    except Exception as e:
+        log(f"[REDIS] ping=FAIL: {type(e).__name__}: {e}")
+        return
 
-        proxy_member = redis_client.claim(lease_seconds=int(args.lease_seconds), reclaim_limit=200, sample_k=50)
-        if not proxy_member:
-            log("[REDIS] 사용 가능한 프록시가 없어 종료함.")
-            try:
-                redis_client.close()
-            except Exception:
-                pass
+    # 풀이 비어 있으면 새 프록시 신호/쿨다운 만료까지 최대 claim_wait초 대기
+    # 짧은 lease를 heartbeat task로 계속 연장 (쓰레드/프로세스가 죽으면 lease_seconds 안에 풀로 복귀)
+    lease = redis_client.lease(
+        lease_seconds=int(args.lease_seconds),
+        block_timeout=float(args.claim_wait),
+        cooldown_success=int(args.cooldown_success),
+        cooldown_fail_base=int(args.cooldown_fail_base),
+        cooldown_fail_max=int(args.cooldown_fail_max),
+        cooldown_fail_jitter=int(args.cooldown_fail_jitter),
+        ban_below=float(args.ban_below),
+        prefetcher=_PREFETCHER,
+    )
+    async with lease:
+        if not lease:
+            log(f"[REDIS] {args.claim_wait}초 동안 사용 가능한 프록시가 없어 종료함.")
+            await redis_client.close()
             return
 
-        local_proxy = proxy_member
+        proxy_member = lease.member
         log(f"[REDIS] ✅ proxy claimed: {proxy_member}")
         log(f"[REDIS] lease_seconds={args.lease_seconds} (member is expected to be like proto://ip:port)")
+        lease.session_ok = await _run_browser_session(slot_id, args, proxy_member)
+        if lease.lost.is_set():
+            log(f"[REDIS] ⚠️ lease lost during session (heartbeat rejected): {proxy_member}")
+
+    # ✅ Redis 반납 결과(성공/실패에 따라 cooldown/ban 처리)
+    info = lease.result or {}
+    if info.get("action") == "rejected":
+        log(f"[REDIS] ⚠️ release rejected (lease no longer owned): {proxy_member}")
+    elif info.get("action") == "probation":
+        log(
+            f"[REDIS] ⏸️ proxy on probation (health={info.get('health', 0):.2f}, strikes={info.get('strikes')}, "
+            f"recheck_at={info.get('until')}): {proxy_member}"
+        )
+    elif info.get("action") == "banned":
+        log(f"[REDIS] ⛔ proxy banned (strikes={info.get('strikes')}): {proxy_member}")
+    elif lease.session_ok:
+        log(f"[REDIS] 🔓 proxy released (ok, health={info.get('health', 1):.2f}): {proxy_member}")
+    else:
+        log(
+            f"[REDIS] 🔓 proxy released (fail, health={info.get('health', 1):.2f}, "
+            f"cooldown={info.get('cooldown')}s): {proxy_member}"
+        )
+    await redis_client.close()
 
+
+async def _run_browser_session(slot_id: int, args, local_proxy: Optional[str]) -> bool:
+    """브라우저 세션 본체. 정상 종료 시 True."""
     try:
         log(f"[RUN] proxy_in_use={local_proxy}")
 
@@ -680,37 +746,14 @@ async def run_one_session(slot_id: int, args) -> None:
                     # page 상태 확인 중 예외가 나면 세션 종료로 간주
                     pass
 
-        session_ok = True
         log("[RUN] session_ok=True")
         log(f"[성공횟수] current_total={GLOBAL_CLICK_COUNT}")
+        return True
 
     except Exception as e:
         log(f"[ERR] 실행 중 예외: {type(e).__name__}: {e}")
         log(traceback.format_exc())
-
-    finally:
-        # ✅ Redis 반납(성공/실패에 따라 cooldown/ban 처리)
-        if redis_client and proxy_member:
-            info = redis_client.release_on_result(
-                proxy_member,
-                session_ok=session_ok,
-                cooldown_success=int(args.cooldown_success),
-                cooldown_fail_base=int(args.cooldown_fail_base),
-                cooldown_fail_jitter=int(args.cooldown_fail_jitter),
-                max_fail=int(args.max_fail),
-            )
-            if info.get("action") == "banned":
-                log(f"[REDIS] ⛔ proxy banned (fails={info.get('fails')}): {proxy_member}")
-            else:
-                if session_ok:
-                    log(f"[REDIS] 🔓 proxy released (ok): {proxy_member}")
-                else:
-                    log(f"[REDIS] 🔓 proxy released (fail={info.get('fails')}, cooldown={info.get('cooldown')}s): {proxy_member}")
-            try:
-                redis_client.close()
-            except Exception:
-                pass
-
+        return False
 
 
 def _thread_entry(slot_id: int, args, stop_event: threading.Event):
@@ -814,11 +857,16 @@ async def main():
     parser.add_argument("--redis-password", default=REDIS_PASSWORD)
 
     # 운영 파라미터
-    parser.add_argument("--lease-seconds", type=int, default=300)
+    parser.add_argument("--lease-seconds", type=int, default=60, help="lease 길이(초). 세션 중에는 heartbeat로 연장")
+    parser.add_argument("--claim-wait", type=float, default=60, help="풀이 비었을 때 claim 대기 시간(초). 새 프록시 신호 시 즉시 깨어남")
     parser.add_argument("--cooldown-success", type=int, default=0)
     parser.add_argument("--cooldown-fail-base", type=int, default=30)
+    parser.add_argument("--cooldown-fail-max", type=int, default=1800, help="health가 0에 가까울 때의 실패 쿨다운 상한(초)")
     parser.add_argument("--cooldown-fail-jitter", type=int, default=60)
-    parser.add_argument("--max-fail", type=int, default=5)
+    parser.add_argument("--ban-below", type=float, default=0.25, help="health(0~1)가 이 값 미만이면 probation(재검증 대기)")
+    parser.add_argument("--prefetch", type=int, default=0, help="미리 claim 해둘 lease 수(0이면 끔). 세션 시작 시 claim 대기 제거")
+    parser.add_argument("--prefetch-idle", type=float, default=300, help="이 시간(초) 동안 사용이 없으면 버퍼의 lease를 반납")
+    parser.add_argument("--metrics-port", type=int, default=0, help="lease 메트릭 HTTP 포트(/metrics). 0이면 끔")
 
     # ✅ 슬롯/스레드 옵션
     parser.add_argument("--slots", type=int, default=2, help="동시에 돌릴 슬롯(쓰레드) 수")
@@ -849,23 +897,29 @@ async def main():
     _TLS.slot_id = None
     log(f"[BOOT] url={args.url} | slots={args.slots} cycles={args.cycles} | mobile={args.mobile} | headless={args.headless} | keep_profile={args.keep_profile} | proxy_from_redis={args.proxy_from_redis}")
 
-    # 슬롯이 1이면(단일) 기존처럼 한 번만 실행하고 종료(단, cycles=0이면 무한)
-    if args.slots <= 1:
-        if args.cycles <= 0:
-            # 무한 반복ㄱ
-            n = 0
-            while True:
-                n += 1
-                log(f"[SUP] single-slot loop n={n}")
-                await run_one_session(0, args)
-        else:
-            for n in range(1, args.cycles + 1):
-                log(f"[SUP] single-slot cycle {n}/{args.cycles}")
-                await run_one_session(0, args)
-        return
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+    start_prefetcher(args)
+    try:
+        # 슬롯이 1이면(단일) 기존처럼 한 번만 실행하고 종료(단, cycles=0이면 무한)
+        if args.slots <= 1:
+            if args.cycles <= 0:
+                # 무한 반복ㄱ
+                n = 0
+                while True:
+                    n += 1
+                    log(f"[SUP] single-slot loop n={n}")
+                    await run_one_session(0, args)
+            else:
+                for n in range(1, args.cycles + 1):
+                    log(f"[SUP] single-slot cycle {n}/{args.cycles}")
+                    await run_one_session(0, args)
+            return
 
-    # slots>1이면 supervisor는 동기(메인 스레드에서 감시)
-    run_slot_supervisor(args)
+        # slots>1이면 supervisor는 동기(메인 스레드에서 감시)
+        run_slot_supervisor(args)
+    finally:
+        stop_prefetcher()
 
 
 if __name__ == "__main__":
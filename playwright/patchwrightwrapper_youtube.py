@@ -13,6 +13,7 @@ TARGET_URL = "https://youtube.com/shorts/u7sO-mNEpT4?si=-niEKY13Q38Nqq4W"
 TARGET_URL = "https://www.youtube.com/shorts/Rvp5UG95qjY?feature=share" #샘플
 
 REDIS_CONFIG = RedisConnConfig(host="127.0.0.1", port=6379)
+LEASE_SECONDS = 60  # heartbeat로 연장하므로 짧게 유지
 PROFILES_PATH = Path(__file__).parent / "region_profiles_mobile.json"
 
 async def check_bot_detected(page):
@@ -128,7 +129,7 @@ async def run_single_task(task_id):
     # 2. Redis 프록시 대여
     lease_client = RedisProxyLeaseClient(config=REDIS_CONFIG)
     lease_client.connect()
-    proxy_url = lease_client.claim(lease_seconds=300)
+    proxy_url = lease_client.claim(lease_seconds=LEASE_SECONDS)
     #proxy_url =  "socks5://34.124.190.108:8080" #봇페이지 뜨는 프록시
     if not proxy_url:
         print(f"[{task_id}] ❌ 사용 가능한 프록시 없음")
@@ -136,6 +137,8 @@ async def run_single_task(task_id):
         return False
 
     print(f"[{task_id}] 🚀 시작 | 지역: {region_name} | 프록시: {proxy_url}")
+    # 짧은 lease + heartbeat: 워커가 죽으면 LEASE_SECONDS 안에 풀로 복귀
+    heartbeat = lease_client.heartbeat(proxy_url, lease_seconds=LEASE_SECONDS)
 
     session_ok = False
     response = None # ⭐ 에러 방지를 위해 response 변수를 미리 None으로 초기화
@@ -219,6 +222,7 @@ async def run_single_task(task_id):
     except Exception as e:
         print(f"[{task_id}] 🔥 실행 에러: {e}")
     finally:
+        heartbeat.stop()
         lease_client.release_on_result(member=proxy_url, session_ok=session_ok)
         lease_client.close()
     return session_ok
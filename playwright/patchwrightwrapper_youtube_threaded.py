@@ -5,7 +5,8 @@ import threading
 import signal
 import sys
 from pathlib import Path
-from redis_proxy_lease import RedisProxyLeaseClient, RedisConnConfig
+from redis_proxy_lease import RedisConnConfig
+from redis_proxy_lease_async import AsyncRedisProxyLeaseClient, close_shared_pools
 from PatchrightWrapper import StealthPatchrightBrowser
 from patchright_human_events import HumanEvent, HumanEventMobile
 
@@ -14,6 +15,8 @@ TARGET_URL = "https://youtube.com/shorts/u7sO-mNEpT4?si=-niEKY13Q38Nqq4W" #크
 TARGET_URL = "https://youtube.com/shorts/eewyMV23vXg?si=vtn1a6WMt0bDcDac" #새해
 
 REDIS_CONFIG = RedisConnConfig(host="127.0.0.1", port=6379)
+LEASE_SECONDS = 60  # heartbeat로 연장하므로 짧게 유지
+CLAIM_WAIT_SECONDS = 60  # 풀이 비었을 때 claim 대기(새 프록시 신호 시 즉시 깨어남)
 PROFILES_PATH = Path(__file__).parent / "region_profiles_mobile.json"
 
 # 슬롯 설정
@@ -149,18 +152,27 @@ async def run_single_task(slot_id, task_count):
     region_name = random.choice(list(profiles.keys()))
     profile = profiles[region_name]
     
-    # 2. Redis 프록시 대여
-    lease_client = RedisProxyLeaseClient(config=REDIS_CONFIG)
-    lease_client.connect()
-    proxy_url = lease_client.claim(lease_seconds=300)
-    
-    if not proxy_url:
-        print(f"[{task_id}] ❌ 사용 가능한 프록시 없음")
-        lease_client.close()
-        return False
+    # 2. Redis 프록시 대여 (짧은 lease + heartbeat 태스크: 워커가 죽으면 LEASE_SECONDS 안에 풀로 복귀)
+    lease_client = AsyncRedisProxyLeaseClient(config=REDIS_CONFIG)
+    await lease_client.connect()
+    try:
+        async with lease_client.lease(lease_seconds=LEASE_SECONDS, block_timeout=CLAIM_WAIT_SECONDS) as lease:
+            if not lease:
+                print(f"[{task_id}] ❌ 사용 가능한 프록시 없음")
+                return False
+
+            proxy_url = lease.member
+            print(f"[{task_id}] 🚀 시작 | 지역: {region_name} | 프록시: {proxy_url} | 위치: ({position['x']}, {position['y']})")
+            result = await _run_browser_task(task_id, position, profile, proxy_url)
+            lease.session_ok = result is True
+    finally:
+        await lease_client.close()
 
-    print(f"[{task_id}] 🚀 시작 | 지역: {region_name} | 프록시: {proxy_url} | 위치: ({position['x']}, {position['y']})")
+    return result
 
+
+async def _run_browser_task(task_id, position, profile, proxy_url):
+    """브라우저 세션 실행. True(성공) / False(실패) / "BROWSER_CLOSED" 반환"""
     session_ok = False
     response = None
     nav_ok = False
@@ -255,9 +267,6 @@ async def run_single_task(slot_id, task_count):
 
     except Exception as e:
         print(f"[{task_id}] 🔥 실행 에러: {e}")
-    finally:
-        lease_client.release_on_result(member=proxy_url, session_ok=session_ok)
-        lease_client.close()
     
     return session_ok
 
@@ -297,6 +306,10 @@ def slot_worker(slot_id):
             import time
             time.sleep(5)
     
+    try:
+        loop.run_until_complete(close_shared_pools())
+    except Exception:
+        pass
     loop.close()
     print(f"🎰 슬롯 {slot_id} 워커 종료됨")
 
@@ -0,0 +1,247 @@
+# proxy_events.py
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Callable, Iterable
+
+import redis
+
+from redis_proxy_lease import LeaseClientBase
+
+
+# 이벤트 종류 (events stream의 e 필드) -> 이름
+EVENT_NAMES = {
+    "a": "alive",  # collector 검증 통과 -> alive 등록
+    "d": "dead",  # collector 검증 실패 -> alive/probation에서 제거
+    "c": "claimed",  # t = lease 만료 시각
+    "r": "released",  # t = next_available (쿨다운), o = ok|fail|""
+    "x": "expired",  # lease 만료 -> reaper가 alive로 회수
+    "b": "banned",  # 영구 퇴출
+    "p": "probation",  # t = 재검증 예정 시각
+}
+
+# 이벤트 -> 로컬 뷰 상태 (None이면 뷰에서 제거)
+_EVENT_STATE = {
+    "a": "alive",
+    "d": None,
+    "c": "leased",
+    "r": "alive",
+    "x": "alive",
+    "b": None,
+    "p": "probation",
+}
+
+
+@dataclass
+class PoolEvent:
+    id: str  # stream entry id ("ms-seq")
+    stream: str
+    event: str  # 이벤트 코드 (EVENT_NAMES 키)
+    member: str
+    score: Optional[float] = None  # t 필드 (없으면 None)
+    outcome: str = ""
+
+    @property
+    def name(self) -> str:
+        return EVENT_NAMES.get(self.event, self.event)
+
+    @property
+    def ts(self) -> float:
+        """이벤트 발생 시각(epoch 초, entry id 기준)"""
+        return int(self.id.split("-", 1)[0]) / 1000.0
+
+    @classmethod
+    def from_entry(cls, stream: str, entry_id: str, fields: Dict[str, str]) -> "PoolEvent":
+        t = fields.get("t")
+        try:
+            score = float(t) if t not in (None, "") else None
+        except ValueError:
+            score = None
+        return cls(
+            id=entry_id,
+            stream=stream,
+            event=fields.get("e", ""),
+            member=fields.get("m", ""),
+            score=score,
+            outcome=fields.get("o", ""),
+        )
+
+
+def _id_tuple(entry_id: str) -> tuple:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class PoolView:
+    """
+    events stream으로 유지하는 풀의 로컬 뷰 (member -> (state, score)).
+    - state: alive(score=next_available) / leased(score=lease 만료) / probation(score=재검증 시각)
+    - bootstrap(): ZRANGE로 현재 풀을 한 번 읽어 초기화 (SCAN 없이 풀 키만 읽음)
+    - apply(): 이벤트 1개 반영
+    """
+
+    def __init__(self):
+        self.members: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def bootstrap(self, r: redis.Redis, pools: Iterable[Dict[str, str]]) -> None:
+        members: Dict[str, tuple] = {}
+        for keys in pools:
+            for m, score in r.zrange(keys["probation_key"], 0, -1, withscores=True):
+                members[m] = ("probation", score)
+            for m, score in r.zrange(keys["alive_key"], 0, -1, withscores=True):
+                members[m] = ("alive", score)
+            for m, score in r.zrange(keys["lease_key"], 0, -1, withscores=True):
+                members[m] = ("leased", score)
+        with self._lock:
+            self.members = members
+
+    def apply(self, ev: PoolEvent) -> None:
+        if ev.event not in _EVENT_STATE:
+            return
+        state = _EVENT_STATE[ev.event]
+        with self._lock:
+            if state is None:
+                self.members.pop(ev.member, None)
+            else:
+                self.members[ev.member] = (state, ev.score if ev.score is not None else 0.0)
+
+    def state(self, member: str) -> Optional[str]:
+        with self._lock:
+            cur = self.members.get(member)
+        return cur[0] if cur else None
+
+    def counts(self, now: Optional[float] = None) -> Dict[str, int]:
+        """상태별 멤버 수 + eligible(alive 중 지금 claim 가능한 수)"""
+        now = time.time() if now is None else now
+        out = {"alive": 0, "eligible": 0, "leased": 0, "probation": 0}
+        with self._lock:
+            for state, score in self.members.values():
+                out[state] += 1
+                if state == "alive" and score <= now:
+                    out["eligible"] += 1
+        return out
+
+
+class PoolEventFollower:
+    """
+    events stream(샤드별 1개)을 XREAD로 따라가며 PoolView를 증분 갱신.
+
+    - 시작 시 각 stream의 마지막 id를 먼저 기억한 뒤 bootstrap -> 그 id 이후부터 읽음
+      (bootstrap 중 발생한 이벤트는 다시 적용되지만 상태 덮어쓰기라 결과는 같음)
+    - stream이 MAXLEN으로 잘려 읽지 못한 구간이 생기면(첫 entry id > 마지막으로 읽은 id) 다시 bootstrap
+    - cluster=True 이면 샤드 stream이 서로 다른 슬롯이므로 stream마다 따로 XREAD
+
+    사용 예)
+        follower = PoolEventFollower(redis.Redis(decode_responses=True), shards=1)
+        follower.start()
+        ... follower.view.counts() ...
+        follower.stop()
+    """
+
+    def __init__(
+        self,
+        r: redis.Redis,
+        *,
+        shards: int = 1,
+        cluster: bool = False,
+        pools: Optional[List[Dict[str, str]]] = None,
+        view: Optional[PoolView] = None,
+        block_ms: int = 1000,
+        count: int = 500,
+        gap_check_seconds: float = 30.0,
+        on_event: Optional[Callable[[PoolEvent], None]] = None,
+    ):
+        self.r = r
+        self.cluster = bool(cluster)
+        if pools is None:
+            tagged = True if self.cluster else None
+            pools = [LeaseClientBase.shard_key_names(i, shards, tagged=tagged) for i in range(max(1, shards))]
+        self.pools = pools
+        self.streams = [keys["events_key"] for keys in pools]
+        self.view = view or PoolView()
+        self.block_ms = int(block_ms)
+        self.count = int(count)
+        self.gap_check_seconds = float(gap_check_seconds)
+        self.on_event = on_event
+        self.last_ids: Dict[str, str] = {}
+        self._gap_checked_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def resync(self) -> None:
+        """마지막 id 기억 -> 풀 전체 bootstrap"""
+        for s in self.streams:
+            last = self.r.xrevrange(s, count=1)
+            self.last_ids[s] = last[0][0] if last else "0-0"
+        self.view.bootstrap(self.r, self.pools)
+        self._gap_checked_at = time.time()
+
+    def _check_gap(self) -> bool:
+        """마지막으로 읽은 entry가 이미 잘려나갔고 남은 첫 entry가 그보다 뒤면 누락 구간이 있음"""
+        for s in self.streams:
+            last_id = self.last_ids.get(s, "0-0")
+            if last_id == "0-0":
+                continue
+            first = self.r.xrange(s, count=1)
+            if first and _id_tuple(first[0][0]) > _id_tuple(last_id):
+                if not self.r.xrange(s, min=last_id, max=last_id, count=1):
+                    return True
+        return False
+
+    def poll(self, block_ms: Optional[int] = None) -> List[PoolEvent]:
+        """새 이벤트를 읽어 뷰에 반영하고 반환 (없으면 block_ms 동안 대기)"""
+        if not self.last_ids:
+            self.resync()
+        now = time.time()
+        if now - self._gap_checked_at >= self.gap_check_seconds:
+            self._gap_checked_at = now
+            if self._check_gap():
+                self.resync()
+
+        block = self.block_ms if block_ms is None else int(block_ms)
+        if self.cluster and len(self.streams) > 1:
+            # 슬롯이 다른 stream은 한 XREAD로 못 읽음 -> 대기 시간을 나눠서 순회
+            resp = []
+            for s in self.streams:
+                resp.extend(
+                    self.r.xread({s: self.last_ids[s]}, count=self.count, block=max(1, block // len(self.streams))) or []
+                )
+        else:
+            resp = self.r.xread(dict(self.last_ids), count=self.count, block=block) or []
+
+        events: List[PoolEvent] = []
+        for stream, entries in resp:
+            for entry_id, fields in entries:
+                ev = PoolEvent.from_entry(stream, entry_id, fields)
+                self.view.apply(ev)
+                events.append(ev)
+                self.last_ids[stream] = entry_id
+        if self.on_event is not None:
+            for ev in events:
+                self.on_event(ev)
+        return events
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except redis.RedisError:
+                # 연결 문제: 잠시 후 다시 bootstrap부터
+                self.last_ids = {}
+                self._stop.wait(1.0)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="proxy-events", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.block_ms / 1000.0 + 1.0)
+            self._thread = None
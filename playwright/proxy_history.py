@@ -0,0 +1,195 @@
+# proxy_history.py
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List
+
+import redis
+
+from redis_proxy_lease import LeaseClientBase
+
+
+# 멤버별 이력 (키 구조 / 기록 방식은 LeaseClientBase._LUA_HISTORY_FN 참고)
+#   - collector 검증 결과: record_check() (history 스크립트) / queue_check() (다른 명령과 같은 pipeline에 묶을 때)
+#   - consumer 세션 결과 : release_on_result -> health 스크립트가 같이 기록
+#   - 읽기: load_history() -> ProxyHistory (최근 원본 + 시간대별 집계, 추세 계산)
+
+HISTORY_SIZE = 64
+HISTORY_HOURS = 7 * 24
+
+
+@dataclass
+class HistoryTotals:
+    """시간대 집계 합계 (검증 / 세션)"""
+
+    checks: int = 0
+    checks_ok: int = 0
+    latency_sum: float = 0.0
+    sessions: int = 0
+    sessions_ok: int = 0
+
+    @property
+    def check_rate(self) -> Optional[float]:
+        return self.checks_ok / self.checks if self.checks else None
+
+    @property
+    def session_rate(self) -> Optional[float]:
+        return self.sessions_ok / self.sessions if self.sessions else None
+
+    @property
+    def avg_latency_ms(self) -> Optional[float]:
+        """검증 통과한 샘플의 평균 latency"""
+        return self.latency_sum / self.checks_ok if self.checks_ok else None
+
+    def add(self, other: "HistoryTotals") -> None:
+        self.checks += other.checks
+        self.checks_ok += other.checks_ok
+        self.latency_sum += other.latency_sum
+        self.sessions += other.sessions
+        self.sessions_ok += other.sessions_ok
+
+    @classmethod
+    def from_reply(cls, res: List) -> "HistoryTotals":
+        """history 스크립트 반환값 {checks, checks_ok, latency_sum, sessions, sessions_ok}"""
+        return cls(int(res[0]), int(res[1]), float(res[2]), int(res[3]), int(res[4]))
+
+    @classmethod
+    def parse(cls, raw: str) -> "HistoryTotals":
+        parts = (raw.split("|") + ["0"] * 5)[:5]
+        return cls(int(float(parts[0])), int(float(parts[1])), float(parts[2]), int(float(parts[3])), int(float(parts[4])))
+
+
+@dataclass
+class HistoryEntry:
+    ts: int
+    kind: str  # "v"=collector 검증 / "s"=consumer 세션
+    ok: bool
+    latency_ms: Optional[float] = None
+
+    @classmethod
+    def parse(cls, raw: str) -> "HistoryEntry":
+        ts, kind, ok, value = (raw.split("|", 3) + [""] * 4)[:4]
+        return cls(int(ts), kind, ok == "1", float(value) if value else None)
+
+
+@dataclass
+class ProxyHistory:
+    member: str
+    entries: List[HistoryEntry] = field(default_factory=list)  # 최신순
+    hourly: Dict[int, HistoryTotals] = field(default_factory=dict)  # hour(epoch//3600) -> 합계
+
+    def window(self, hours: int, now: Optional[float] = None) -> HistoryTotals:
+        """최근 hours시간(현재 시간대 포함) 합계"""
+        hour = int((time.time() if now is None else now) // 3600)
+        out = HistoryTotals()
+        for h, t in self.hourly.items():
+            if hour - hours < h <= hour:
+                out.add(t)
+        return out
+
+    def daily(self) -> Dict[int, HistoryTotals]:
+        """시간대 집계 -> 일별(day=epoch//86400) 집계 (오프라인 분석용 다운샘플)"""
+        out: Dict[int, HistoryTotals] = {}
+        for h, t in self.hourly.items():
+            out.setdefault(h // 24, HistoryTotals()).add(t)
+        return dict(sorted(out.items()))
+
+    def latency_trend(self) -> Optional[float]:
+        """시간대별 평균 latency의 최소제곱 기울기 (ms/시간, 양수면 느려지는 중). 시간대 2개 미만이면 None"""
+        pts = [(h, t.avg_latency_ms) for h, t in sorted(self.hourly.items()) if t.avg_latency_ms is not None]
+        n = len(pts)
+        if n < 2:
+            return None
+        mx = sum(h for h, _ in pts) / n
+        my = sum(v for _, v in pts) / n
+        var = sum((h - mx) ** 2 for h, _ in pts)
+        if var <= 0:
+            return None
+        return sum((h - mx) * (v - my) for h, v in pts) / var
+
+    def to_dict(self) -> Dict:
+        return {
+            "member": self.member,
+            "entries": [e.__dict__ for e in self.entries],
+            "hourly": {h * 3600: t.__dict__ for h, t in sorted(self.hourly.items())},
+            "latency_trend_ms_per_hour": self.latency_trend(),
+        }
+
+
+_SCRIPT: list = []  # register_script 결과 캐시 (sha 계산 1회, 호출 시 client=r로 실행)
+
+
+def _check_args(
+    ok: bool, latency_ms: Optional[float], size: int, hours: int, window: int, now: Optional[float], dedup: bool = False
+) -> List:
+    value = f"{float(latency_ms):.1f}" if ok and latency_ms else ""
+    return [
+        int(time.time()) if now is None else int(now), 1 if ok else 0, value, int(size), int(hours), int(window),
+        1 if dedup else 0,
+    ]
+
+
+def queue_check(
+    pipe,
+    member: str,
+    *,
+    ok: bool,
+    latency_ms: Optional[float] = None,
+    prefix: str = LeaseClientBase.DEFAULT_HISTORY_PREFIX,
+    size: int = HISTORY_SIZE,
+    hours: int = HISTORY_HOURS,
+    window: int = 24,
+    now: Optional[float] = None,
+    dedup: bool = False,
+) -> None:
+    """
+    record_check를 pipeline에 추가 (EVALSHA, 결과는 HistoryTotals.from_reply로).
+    서버에 스크립트가 없으면 execute()가 NoScriptError -> load_check_script() 후 다시 실행.
+    dedup=True면 같은 시각(now, 초 단위)의 검증 기록이 이미 있을 때 다시 세지 않음 (spool replay용).
+    """
+    keys = LeaseClientBase.history_keys(member, prefix)
+    pipe.evalsha(
+        LeaseClientBase._SCRIPT_SHAS["history"], len(keys), *keys, *_check_args(ok, latency_ms, size, hours, window, now, dedup)
+    )
+
+
+def load_check_script(r: redis.Redis) -> None:
+    r.script_load(LeaseClientBase._LUA_HISTORY)
+
+
+def record_check(
+    r: redis.Redis,
+    member: str,
+    *,
+    ok: bool,
+    latency_ms: Optional[float] = None,
+    prefix: str = LeaseClientBase.DEFAULT_HISTORY_PREFIX,
+    size: int = HISTORY_SIZE,
+    hours: int = HISTORY_HOURS,
+    window: int = 24,
+    now: Optional[int] = None,
+    dedup: bool = False,
+) -> HistoryTotals:
+    """collector 검증 결과 1건 기록 (Lua 1회). 반환: 이번 결과를 포함한 최근 window시간 합계 (dedup은 queue_check 참고)"""
+    if not _SCRIPT:
+        _SCRIPT.append(r.register_script(LeaseClientBase._LUA_HISTORY))
+    res = _SCRIPT[0](
+        keys=LeaseClientBase.history_keys(member, prefix),
+        args=_check_args(ok, latency_ms, size, hours, window, now, dedup),
+        client=r,
+    )
+    return HistoryTotals.from_reply(res)
+
+
+def load_history(r: redis.Redis, member: str, prefix: str = LeaseClientBase.DEFAULT_HISTORY_PREFIX) -> ProxyHistory:
+    ring, hourly = LeaseClientBase.history_keys(member, prefix)
+    pipe = r.pipeline(transaction=False)
+    pipe.lrange(ring, 0, -1)
+    pipe.hgetall(hourly)
+    entries, buckets = pipe.execute()
+    return ProxyHistory(
+        member=member,
+        entries=[HistoryEntry.parse(e) for e in entries],
+        hourly={int(h): HistoryTotals.parse(v) for h, v in buckets.items()},
+    )
@@ -0,0 +1,235 @@
+# proxy_log.py
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Optional, Dict, Any, IO, List, Union, Callable
+
+
+# 큐 기반 구조화 로거 (collector / lease 클라이언트 공용).
+#
+# - 호출 스레드는 레코드(dict)를 SimpleQueue에 넣기만 함 (stdout 락 / flush 없음)
+# - 백그라운드 writer 스레드 1개가 모아서 한 번에 쓰고 flush
+# - 레벨 필터는 레코드를 만들기 전에 판단, event별 샘플링(sample={"check_progress": 0.1})
+# - msg에 callable을 주면 writer 스레드에서 호출해 문자열을 만듦 (레벨/샘플링으로 버려지는 핫 루프 레코드는 포매팅 비용 0)
+# - 출력 형식: console(사람용, msg 그대로) / json(JSON lines: ts, level, logger, event, thread, msg, 필드...)
+# - 큐가 max_queue를 넘으면 버리고 개수만 세어 다음 쓰기 때 log_dropped 레코드로 알림
+#
+#     log = get_logger("collector")
+#     log.info("check_done", "✅ 검증 통과", member=m, latency_ms=123.4)
+#     log.info("check_progress", lambda: f"[{idx}/{total}] 진행 중...", idx=idx, total=total)
+#
+# 환경 변수로도 설정 가능: PROXY_LOG_LEVEL=debug|info|warning|error, PROXY_LOG_FORMAT=console|json, PROXY_LOG_FILE=경로
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+# 완성된 문자열, 또는 writer 스레드에서 호출될 지연 포매팅 함수
+Msg = Union[str, Callable[[], str]]
+
+
+class _Config:
+    def __init__(self):
+        self.level = LEVELS.get(os.environ.get("PROXY_LOG_LEVEL", "info").lower(), 20)
+        self.fmt = os.environ.get("PROXY_LOG_FORMAT", "console").lower()
+        self.path: Optional[str] = os.environ.get("PROXY_LOG_FILE") or None
+        self.stream: IO[str] = sys.stdout
+        self.sample: Dict[str, float] = {}
+        self.max_queue = 100_000
+
+
+_CFG = _Config()
+_QUEUE: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+_WRITER: Optional[threading.Thread] = None
+_WRITER_LOCK = threading.Lock()
+_DROPPED = [0]
+_STOP = object()
+
+
+def configure(
+    *,
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    stream: Optional[IO[str]] = None,
+    path: Optional[str] = None,
+    sample: Optional[Dict[str, float]] = None,
+    max_queue: Optional[int] = None,
+) -> None:
+    """
+    level : 최소 레벨 (debug/info/warning/error)
+    fmt   : "console"(기본, 사람용) / "json"(JSON lines)
+    stream: 출력 스트림 (기본 stdout), path를 주면 파일에 append (stream 대신)
+    sample: event -> 남길 비율(0~1). 예) {"check_progress": 0.1}
+    """
+    if level is not None:
+        _CFG.level = LEVELS[level.lower()]
+    if fmt is not None:
+        if fmt not in ("console", "json"):
+            raise ValueError(f"unknown log format: {fmt}")
+        _CFG.fmt = fmt
+    if stream is not None:
+        _CFG.stream = stream
+    if path is not None:
+        _CFG.path = path or None
+    if sample is not None:
+        _CFG.sample = dict(sample)
+    if max_queue is not None:
+        _CFG.max_queue = int(max_queue)
+
+
+def _resolve_msg(rec: Dict[str, Any]) -> Dict[str, Any]:
+    msg = rec.get("msg")
+    if callable(msg):
+        try:
+            rec["msg"] = str(msg())
+        except Exception as e:
+            rec["msg"] = f"<msg error: {type(e).__name__}: {e}>"
+    return rec
+
+
+def _render_console(rec: Dict[str, Any]) -> str:
+    # msg가 있으면 기존 print 출력 그대로, 없으면 "[LEVEL] event k=v ..."
+    msg = rec.get("msg")
+    if msg is not None:
+        return msg
+    extra = " ".join(f"{k}={v}" for k, v in rec.items() if k not in ("ts", "level", "logger", "event", "thread"))
+    text = f"{rec['event']} {extra}".rstrip()
+    if rec["level"] != "info":
+        text = f"[{rec['level'].upper()}] {text}"
+    return text
+
+
+def _render_json(rec: Dict[str, Any]) -> str:
+    out = dict(rec)
+    out["ts"] = round(out["ts"], 3)
+    return json.dumps(out, ensure_ascii=False, default=str)
+
+
+def _writer_loop() -> None:
+    f: Optional[IO[str]] = None
+    opened_path: Optional[str] = None
+    while True:
+        batch: List[Dict[str, Any]] = []
+        item = _QUEUE.get()
+        stop = item is _STOP
+        if not stop:
+            batch.append(item)
+        # 쌓인 것은 한 번에 처리 (쓰기/flush 1회)
+        while len(batch) < 5000:
+            try:
+                item = _QUEUE.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+
+        if _DROPPED[0]:
+            n, _DROPPED[0] = _DROPPED[0], 0
+            batch.append(
+                {"ts": time.time(), "level": "warning", "logger": "proxy_log", "event": "log_dropped", "thread": "writer",
+                 "msg": f"⚠️ 로그 큐 초과로 {n}건 버림", "count": n}
+            )
+
+        if batch:
+            render = _render_json if _CFG.fmt == "json" else _render_console
+            text = "\n".join(render(_resolve_msg(rec)) for rec in batch) + "\n"
+            try:
+                if _CFG.path:
+                    if f is None or opened_path != _CFG.path:
+                        if f is not None:
+                            f.close()
+                        f = open(_CFG.path, "a", encoding="utf-8")
+                        opened_path = _CFG.path
+                    f.write(text)
+                    f.flush()
+                else:
+                    _CFG.stream.write(text)
+                    _CFG.stream.flush()
+            except Exception:
+                pass
+        if stop:
+            if f is not None:
+                f.close()
+            return
+
+
+def _ensure_writer() -> None:
+    global _WRITER
+    if _WRITER is not None:
+        return
+    with _WRITER_LOCK:
+        if _WRITER is None:
+            t = threading.Thread(target=_writer_loop, name="proxy-log-writer", daemon=True)
+            t.start()
+            _WRITER = t
+
+
+def flush(timeout: float = 5.0) -> None:
+    """writer를 멈추고 남은 레코드를 모두 씀 (프로세스 종료 시 atexit으로 자동 호출). 이후 로그는 writer를 다시 띄움."""
+    global _WRITER
+    with _WRITER_LOCK:
+        t = _WRITER
+        if t is None:
+            return
+        _QUEUE.put(_STOP)
+        t.join(timeout)
+        _WRITER = None
+
+
+atexit.register(flush)
+
+
+class Logger:
+    def __init__(self, name: str):
+        self.name = name
+
+    def enabled(self, level: str) -> bool:
+        return LEVELS[level] >= _CFG.level
+
+    def log(self, level: str, event: str, msg: Optional[Msg] = None, **fields: Any) -> None:
+        if LEVELS[level] < _CFG.level:
+            return
+        rate = _CFG.sample.get(event)
+        if rate is not None and random.random() >= rate:
+            return
+        if _QUEUE.qsize() >= _CFG.max_queue:
+            _DROPPED[0] += 1
+            return
+        rec = {"ts": time.time(), "level": level, "logger": self.name, "event": event,
+               "thread": threading.current_thread().name}
+        if msg is not None:
+            rec["msg"] = msg
+        if fields:
+            rec.update(fields)
+        _QUEUE.put(rec)
+        if _WRITER is None:
+            _ensure_writer()
+
+    def debug(self, event: str, msg: Optional[Msg] = None, **fields: Any) -> None:
+        self.log("debug", event, msg, **fields)
+
+    def info(self, event: str, msg: Optional[Msg] = None, **fields: Any) -> None:
+        self.log("info", event, msg, **fields)
+
+    def warning(self, event: str, msg: Optional[Msg] = None, **fields: Any) -> None:
+        self.log("warning", event, msg, **fields)
+
+    def error(self, event: str, msg: Optional[Msg] = None, **fields: Any) -> None:
+        self.log("error", event, msg, **fields)
+
+
+_LOGGERS: Dict[str, Logger] = {}
+
+
+def get_logger(name: str) -> Logger:
+    lg = _LOGGERS.get(name)
+    if lg is None:
+        lg = _LOGGERS.setdefault(name, Logger(name))
+    return lg
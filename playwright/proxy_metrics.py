@@ -0,0 +1,333 @@
+# proxy_metrics.py
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List, Tuple, Callable, Sequence
+
+
+# 기본 히스토그램 버킷 (초)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Slot:
+    """스레드 로컬에 두는 셀 보관용 (스레드가 끝나면 thread-local과 함께 사라져 finalize가 호출됨)"""
+
+    __slots__ = ("cell", "__weakref__")
+
+    def __init__(self, cell: List[float]):
+        self.cell = cell
+
+
+class _Cells:
+    """
+    스레드별 누적 셀. 쓰기는 자기 스레드 셀에만 하므로 hot path에서 락을 잡지 않음
+    (셀 등록 시 1회만 락). 값은 scrape 때 모든 셀을 합산.
+    스레드가 끝나면 그 셀은 retired 합계로 접어서 지움 (매 주기 새로 만드는 ThreadPoolExecutor에서 셀이 계속 쌓이지 않도록).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._cells: Dict[int, List[float]] = {}
+        self._retired = [0.0] * size
+        self._lock = threading.Lock()
+
+    def cell(self) -> List[float]:
+        slot = getattr(self._local, "slot", None)
+        if slot is None:
+            slot = _Slot([0.0] * self.size)
+            with self._lock:
+                self._cells[id(slot.cell)] = slot.cell
+            weakref.finalize(slot, self._retire, slot.cell)
+            self._local.slot = slot
+        return slot.cell
+
+    def _retire(self, cell: List[float]) -> None:
+        with self._lock:
+            if self._cells.pop(id(cell), None) is not None:
+                for i, v in enumerate(cell):
+                    self._retired[i] += v
+
+    def total(self) -> List[float]:
+        with self._lock:
+            cells = list(self._cells.values())
+            out = list(self._retired)
+        for c in cells:
+            for i, v in enumerate(c):
+                out[i] += v
+        return out
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any, **kw: Any):
+        if kw:
+            values = tuple(kw[n] for n in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _default(self):
+        # 라벨 없는 메트릭은 빈 라벨 child 하나
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_text(self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        inner = ",".join('%s="%s"' % (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs)
+        return "{" + inner + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("_cells",)
+
+    def __init__(self):
+        self._cells = _Cells(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._cells.cell()[0] += amount
+
+    def get(self) -> float:
+        return self._cells.total()[0]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{self._label_text(key)} {child.get():g}"]
+
+
+class _GaugeChild:
+    __slots__ = ("_cells", "_value", "_fn")
+
+    def __init__(self):
+        self._cells = _Cells(1)
+        self._value = 0.0
+        self._fn: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._cells.cell()[0] += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._cells.cell()[0] -= amount
+
+    def set(self, value: float) -> None:
+        """단일 writer용 (inc/dec 누적분과 합산되므로 한 gauge에 섞어 쓰지 말 것)"""
+        self._value = float(value)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """scrape 시점에 fn()으로 값 계산 (hot path 비용 0)"""
+        self._fn = fn
+
+    def get(self) -> float:
+        if self._fn is not None:
+            try:
+                return float(self._fn())
+            except Exception:
+                return float("nan")
+        return self._value + self._cells.total()[0]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._default().set_function(fn)
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{self._label_text(key)} {child.get():g}"]
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_cells")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # [bucket별 count..., +Inf count, sum]
+        self._cells = _Cells(len(buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        c = self._cells.cell()
+        c[bisect.bisect_left(self._buckets, value)] += 1
+        c[-1] += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_child", "_t0")
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+
+    def __enter__(self) -> "_Timer":
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._child.observe(time.perf_counter() - self._t0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self) -> _Timer:
+        return self._default().time()
+
+    def _render_child(self, key, child) -> List[str]:
+        total = child._cells.total()
+        lines = []
+        acc = 0.0
+        for b, n in zip(self.buckets, total):
+            acc += n
+            lines.append(f"{self.name}_bucket{self._label_text(key, ('le', f'{b:g}'))} {acc:g}")
+        acc += total[len(self.buckets)]
+        lines.append(f"{self.name}_bucket{self._label_text(key, ('le', '+Inf'))} {acc:g}")
+        lines.append(f"{self.name}_sum{self._label_text(key)} {total[-1]:g}")
+        lines.append(f"{self.name}_count{self._label_text(key)} {acc:g}")
+        return lines
+
+
+class Registry:
+    """메트릭 모음. 같은 이름으로 다시 등록하면 기존 메트릭을 반환(모듈 재import / 여러 클라이언트 공유)."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, doc: str, labelnames: Sequence[str], **kw):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = cls(name, doc, labelnames, **kw)
+                self._metrics[name] = m
+            elif not isinstance(m, cls):
+                raise ValueError(f"metric {name} already registered as {m.kind}")
+            return m
+
+    def counter(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, doc, labelnames)
+
+    def gauge(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, doc, labelnames)
+
+    def histogram(
+        self, name: str, doc: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, doc, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for m in metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def start_http_server(port: int, addr: str = "0.0.0.0", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """/metrics 를 노출하는 HTTP 서버를 데몬 스레드로 시작"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, int(port)), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+# ---------------- lease 엔진 공용 메트릭 ----------------
+
+LEASE_CLAIM_SECONDS = REGISTRY.histogram(
+    "proxylease_claim_seconds", "claim 스크립트 호출 지연 (result=hit|empty)", ["result"]
+)
+LEASE_CLAIMS = REGISTRY.counter(
+    "proxylease_claims_total", "claim 스크립트 결과(result=hit|empty) / prefetch 버퍼에서 내준 lease(result=prefetch)", ["result"]
+)
+LEASE_RECLAIMED = REGISTRY.counter("proxylease_reclaimed_total", "reaper가 회수한 만료 lease 수")
+LEASE_RELEASES = REGISTRY.counter(
+    "proxylease_releases_total", "release_on_result 결과 (action=released|probation|banned|rejected)", ["action"]
+)
+LEASE_HELD = REGISTRY.gauge("proxylease_leases_held", "이 프로세스가 잡고 있는 lease 수")
@@ -1,13 +1,30 @@
 # redis_proxy_lease.py
 from __future__ import annotations
 
+import hashlib
 import time
 import random
+import threading
+import uuid
+import weakref
+import zlib
+from collections import deque
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Deque, List, Tuple
 
 import redis
 
+from proxy_log import get_logger
+from proxy_metrics import LEASE_CLAIM_SECONDS, LEASE_CLAIMS, LEASE_HELD, LEASE_RECLAIMED, LEASE_RELEASES
+
+
+# Redis 오류로 삼키는 경로(claim/release 실패 등)는 여기로만 남김 (호출부 반환값은 기존과 동일)
+_log = get_logger("lease")
+
+# 프로세스 내 클라이언트 목록 (lease 보유 수 gauge는 scrape 시점에 합산 -> claim/release 경로 비용 없음)
+_CLIENTS: "weakref.WeakSet[LeaseClientBase]" = weakref.WeakSet()
+LEASE_HELD.set_function(lambda: sum(len(c._leases) for c in list(_CLIENTS)))
+
 
 @dataclass(frozen=True)
 class RedisConnConfig:
@@ -17,104 +34,1100 @@ class RedisConnConfig:
     password: Optional[str] = None
 
 
-class RedisProxyLeaseClient:
+@dataclass
+class ProxyLease:
+    """
+    claim 1건의 임대 정보.
+    - token : "owner_id:fence" (release/ban/renew 시 소유권 확인용)
+    - fence : 전역 단조 증가 카운터. 값이 클수록 최신 임대(외부 자원에 fencing token으로 전달 가능)
+    """
+    member: str
+    token: str
+    fence: int
+    expires_at: float
+
+
+class LeaseClientBase:
     """
-    ZSET 기반 프록시 풀(Alive/Lease) + Fail 카운트(Hash) 관리 클래스.
+    ZSET 기반 프록시 풀(Alive/Lease) + Fail 카운트(Hash) 관리 공통부 (키/파라미터, Lua 스크립트, 인자 구성).
+    실제 Redis I/O는 RedisProxyLeaseClient(동기) / AsyncRedisProxyLeaseClient(asyncio)가 담당.
 
     - alive zset  : score = next_available_epoch (0이면 즉시 사용)
     - lease zset  : score = lease_expire_epoch
-    - fail  hash  : member -> fail_count
+    - health hash : member -> "health|strikes|updated_epoch" (세션 결과 EWMA, 시간이 지나면 1.0 쪽으로 회복)
+    - probation zset: 임시 퇴출 멤버, score = 재검증 예정 시각(+inf면 영구 퇴출). collector가 재검증 후 alive로 복귀
+    - quality hash: member -> "latency_ms|validated_epoch|proxy_type" (collector가 기록)
+    - feedback hash: member -> "ok|fail|updated_epoch" (release_on_result 결과, 시간 감쇠 누적)
+    - owner hash  : member -> "owner_id:fence" (현재 임대 소유자 토큰)
+    - fence key   : claim마다 INCR 되는 fencing 카운터 (claim 누적 횟수로도 사용: collector 수요 예측)
+    - stats hash  : ban / probation 누적 횟수 (collector가 퇴출 속도 계산에 사용)
+    - events stream: 상태 변경 이벤트 (MAXLEN ~ events_maxlen). 필드 e=종류, m=member, t=score/시각, o=결과
+        c=claim(t=lease 만료) / r=release(t=next_available, o=ok|fail) / x=만료 lease 회수 / b=ban(영구 퇴출)
+        p=probation(t=재검증 시각) / a=collector 검증 후 alive 등록 / d=collector dead 처리 (a/d의 o=collect|probation|warm_start)
+        (구독/로컬 뷰는 proxy_events.py 참고)
+    - signal list : 멤버가 사용 가능해질 때 LPUSH 되는 깨우기 신호 (claim(block_timeout=...)이 BLPOP으로 대기)
+                    claim이 성공하면 남은 사용 가능 멤버 수만큼으로 잘라냄 (안 쓰인 신호가 쌓이지 않도록)
+    - history     : 멤버별 검증/세션 결과 ring buffer + 시간대별 집계 (history_keys(), proxy_history.py 참고)
+                    세션 결과는 health 스크립트가, collector 검증 결과는 history 스크립트가 기록
+    - index keys  : collector가 유지하는 속성 인덱스 (index_keys() 참고)
+        {prefix}:proto:{protocol} / {prefix}:country:{CC} / {prefix}:type:{proxy_type} / {prefix}:residential:{0|1} (set)
+        {prefix}:latency (zset, score=latency_ms)
 
     claim:
-      1) 만료된 lease를 alive로 회수
-      2) alive에서 (score<=now) 후보 sample_k개를 가져와 랜덤 1개 선택
-      3) alive -> lease 이동 (lease 만료시간 부여)
+      1) alive에서 (score<=now) 후보 중 랜덤 오프셋에서 sample_k개를 가져옴
+      2) 후보마다 품질 가중치(레이턴시 x 성공률(감쇠) x 최신성)를 계산해 가중 랜덤 1개 선택
+         (min_weight 하한이 있어 품질이 낮은 프록시도 가끔은 선택됨)
+      3) alive -> lease 이동 (lease 만료시간 부여) + 소유자 토큰 기록
+      claim(filters={...}) 이면 1) 전에 속성 인덱스와 alive의 교집합을 서버에서 만들어 그 안에서만 고름
+        (protocol / country / proxy_type / residential / max_latency_ms, 모두 AND)
+
+    lease 소유권 (heartbeat):
+      - lease는 짧게(30~60초) 잡고 renew()/heartbeat()로 연장한다.
+        워커가 죽으면 연장이 끊기므로 lease가 곧 만료되어 reaper가 회수한다.
+      - release/ban/renew는 토큰이 일치할 때만 적용된다(이미 회수/재임대된 멤버에 대한 늦은 호출은 거부).
+
+    health / probation (release_on_result):
+      - 세션 결과마다 health = (1-alpha)*health + alpha*(성공 1 / 실패 0). 기록 사이 경과 시간만큼
+        health_half_life 반감기로 1.0(건강) 쪽으로 회복시킨 뒤 반영(오래된 실패일수록 영향이 작음).
+      - 실패 쿨다운은 health가 낮을수록 길어짐: base + (max - base) * (1 - health)^2 + jitter
+      - health < ban_below 이면 probation: alive/lease에서 빼고 probation zset에 (now + probation_base * 2^(strikes-1))로 등록.
+        strikes가 max_strikes를 넘으면 score=+inf(영구 퇴출). 성공으로 health가 회복되면 strikes는 0으로 초기화.
+      - health/세션 이력 기록도 토큰 확인 후에만 반영(회수 후 재임대된 멤버를 늦은 호출이 건드리지 않도록).
+
+    reap (만료 lease 회수):
+      - claim 경로에서 분리된 별도 스크립트. lease zset의 최소 score(가장 먼저 만료되는 lease)가
+        now를 지났을 때만 reclaim_limit개씩 alive로 되돌린다.
+      - 클라이언트는 다음 만료 시각을 기억해두고 그 시각이 지났을 때만 reap을 호출(분할 상환).
+      - start_reaper()로 백그라운드 주기 실행도 가능.
+
+    스크립트 실행 방식:
+      - Redis 7+ : 모든 스크립트를 하나의 Functions 라이브러리(LIBRARY_NAME)로 묶어 한 번만 FUNCTION LOAD,
+        이후에는 FCALL <이름> 으로 호출(스크립트 본문을 매번 전송하지 않음).
+        서버 라이브러리 버전이 LIBRARY_VERSION보다 낮거나 없으면 REPLACE로 교체(무중단 업그레이드).
+      - Redis 6 이하 / FUNCTION 권한 없음 / 서버 쪽 라이브러리가 더 최신 : EVALSHA (NOSCRIPT면 SCRIPT LOAD 후 재시도)
+      - 스크립트(인자 구성 포함)를 바꾸면 LIBRARY_VERSION을 올릴 것.
     """
 
+    LIBRARY_NAME = "proxylease"
+    LIBRARY_VERSION = 10
+
     DEFAULT_ALIVE_KEY = "proxies:alive"
     DEFAULT_LEASE_KEY = "proxies:lease"
-    DEFAULT_FAIL_HASH = "proxies:fail"
+    DEFAULT_HEALTH_HASH = "proxies:health"
+    DEFAULT_PROBATION_KEY = "proxies:probation"
+    DEFAULT_QUALITY_HASH = "proxies:quality"
+    DEFAULT_FEEDBACK_HASH = "proxies:feedback"
+    DEFAULT_OWNER_HASH = "proxies:lease:owner"
+    DEFAULT_FENCE_KEY = "proxies:lease:fence"
+    DEFAULT_STATS_HASH = "proxies:stats"
+    DEFAULT_EVENTS_KEY = "proxies:events"
+    DEFAULT_SIGNAL_KEY = "proxies:signal"
+    DEFAULT_INDEX_PREFIX = "proxies:idx"
+    DEFAULT_HISTORY_PREFIX = "proxies:hist"
+
+    # 멤버별 이력 기록 (health / history 스크립트 앞에 붙여 쓰는 공용 Lua 함수)
+    #   ring   : list, "epoch|kind|ok|value" 최신순 size개 (kind: v=collector 검증(value=latency_ms) / s=consumer 세션)
+    #   hourly : hash, hour(epoch//3600) -> "checks|checks_ok|latency_sum|sessions|sessions_ok"
+    #            hours개를 넘으면 오래된 시간대부터 HDEL, 두 키 모두 hours 동안 기록이 없으면 만료
+    #   반환   : 최근 window시간(이번 시간대 포함) 합계 {checks, checks_ok, latency_sum, sessions, sessions_ok}
+    _LUA_HISTORY_FN = r"""
+    local function history_window(hourly, hour, window)
+      local totals = {0, 0, 0, 0, 0}
+      if window <= 0 then
+        return totals
+      end
+      local fields = {}
+      for h = hour - window + 1, hour do
+        fields[#fields + 1] = h
+      end
+      for _, v in ipairs(redis.call('HMGET', hourly, (table.unpack or unpack)(fields))) do
+        if v then
+          local i = 1
+          for x in string.gmatch(v, '[^|]+') do
+            totals[i] = totals[i] + (tonumber(x) or 0)
+            i = i + 1
+          end
+        end
+      end
+      return totals
+    end
+
+    local function record_history(ring, hourly, now, kind, ok, value, size, hours, window)
+      if size <= 0 then
+        return {0, 0, 0, 0, 0}
+      end
+      redis.call('LPUSH', ring, string.format('%d|%s|%d|%s', now, kind, ok, value))
+      redis.call('LTRIM', ring, 0, size - 1)
+
+      local hour = math.floor(now / 3600)
+      local b = {0, 0, 0, 0, 0}
+      local raw = redis.call('HGET', hourly, hour)
+      if raw then
+        local i = 1
+        for x in string.gmatch(raw, '[^|]+') do
+          b[i] = tonumber(x) or 0
+          i = i + 1
+        end
+      end
+      if kind == 'v' then
+        b[1] = b[1] + 1
+        if ok == 1 then
+          b[2] = b[2] + 1
+          b[3] = b[3] + (tonumber(value) or 0)
+        end
+      else
+        b[4] = b[4] + 1
+        if ok == 1 then
+          b[5] = b[5] + 1
+        end
+      end
+      redis.call('HSET', hourly, hour, string.format('%d|%d|%.1f|%d|%d', b[1], b[2], b[3], b[4], b[5]))
+
+      if redis.call('HLEN', hourly) > hours then
+        for _, f in ipairs(redis.call('HKEYS', hourly)) do
+          if tonumber(f) <= hour - hours then
+            redis.call('HDEL', hourly, f)
+          end
+        end
+      end
+      redis.call('EXPIRE', ring, hours * 3600)
+      redis.call('EXPIRE', hourly, hours * 3600)
+      return history_window(hourly, hour, window)
+    end
+    """
 
     _LUA_CLAIM = r"""
     local alive = KEYS[1]
     local lease = KEYS[2]
+    local quality = KEYS[3]
+    local feedback = KEYS[4]
+    local owner = KEYS[5]
+    local fence_key = KEYS[6]
+    local events = KEYS[7]
+    local signal = KEYS[8]
     local now = tonumber(ARGV[1])
     local lease_sec = tonumber(ARGV[2])
-    local reclaim_limit = tonumber(ARGV[3])
-    local sample_k = tonumber(ARGV[4])
-    local rand_int = tonumber(ARGV[5])
+    local sample_k = tonumber(ARGV[3])
+    local rand_int = tonumber(ARGV[4])
+    local rand_pick = tonumber(ARGV[5]) / 2147483647
+    local latency_ref = tonumber(ARGV[6])
+    local feedback_half = tonumber(ARGV[7])
+    local recency_half = tonumber(ARGV[8])
+    local min_weight = tonumber(ARGV[9])
+    local owner_id = ARGV[10]
+    local max_latency = tonumber(ARGV[11])
+    local events_maxlen = tonumber(ARGV[12])
 
-    -- 1) 만료된 lease 회수
-    local expired = redis.call('ZRANGEBYSCORE', lease, '-inf', now, 'LIMIT', 0, reclaim_limit)
-    for i, m in ipairs(expired) do
-      redis.call('ZREM', lease, m)
-      redis.call('ZADD', alive, 0, m)
+    -- 0) 속성 필터 (KEYS[9]=임시 zset, KEYS[10]=latency 인덱스, KEYS[11..]=속성 인덱스 set)
+    --    필터가 있으면 인덱스들과 alive의 교집합(score=next_available)을 임시 키에 만들어 후보 원천으로 사용
+    local source = alive
+    local tmp = KEYS[9]
+    if tmp then
+      -- first(score 유지) ∩ 속성 set들(가중치 0) -> tmp
+      local function intersect(first)
+        local args = {'ZINTERSTORE', tmp, 1 + (#KEYS - 10), first}
+        for i = 11, #KEYS do
+          table.insert(args, KEYS[i])
+        end
+        table.insert(args, 'WEIGHTS')
+        table.insert(args, 1)
+        for i = 11, #KEYS do
+          table.insert(args, 0)
+        end
+        redis.call((table.unpack or unpack)(args))
+      end
+
+      if max_latency then
+        -- latency 인덱스 기준 교집합(score=latency) -> 상한 초과 제거 -> alive와 교집합(score=next_available)
+        intersect(KEYS[10])
+        redis.call('ZREMRANGEBYSCORE', tmp, '(' .. max_latency, '+inf')
+        redis.call('ZINTERSTORE', tmp, 2, tmp, alive, 'WEIGHTS', 0, 1)
+      else
+        intersect(alive)
+      end
+      source = tmp
     end
 
-    -- 2) 사용 가능한 후보들 중 앞쪽 sample_k개
-    local cands = redis.call('ZRANGEBYSCORE', alive, '-inf', now, 'LIMIT', 0, sample_k)
+    -- 1) 사용 가능한 후보 sample_k개 (랜덤 오프셋: 항상 같은 앞쪽 멤버만 고르지 않도록)
+    --    score<=now 멤버가 항상 앞쪽 rank이므로 rank로 자름: ZRANGE O(log N + k) (ZRANGEBYSCORE LIMIT은 offset만큼 선형)
+    --    만료 lease 회수는 _LUA_REAP 담당
+    local eligible = redis.call('ZCOUNT', source, '-inf', now)
+    if eligible == 0 then
+      if tmp then
+        redis.call('DEL', tmp)
+      end
+      return nil
+    end
+    local offset = 0
+    if eligible > sample_k then
+      offset = rand_int % (eligible - sample_k + 1)
+    end
+    local cands = redis.call('ZRANGE', source, offset, math.min(offset + sample_k, eligible) - 1)
+    if tmp then
+      redis.call('DEL', tmp)
+    end
     if (not cands) or (#cands == 0) then
       return nil
     end
 
-    -- 3) 랜덤 1개 선택
-    local idx = (rand_int % #cands) + 1
-    local m = cands[idx]
+    -- 2) 품질 가중치
+    local weights = {}
+    local total = 0
+    for i, m in ipairs(cands) do
+      local w_lat = 0.5
+      local w_rec = 0.75
+      local w_type = 1.0
+      local q = redis.call('HGET', quality, m)
+      if q then
+        local lat, vt, ptype = string.match(q, '^([^|]*)|([^|]*)|?(.*)$')
+        lat = tonumber(lat)
+        vt = tonumber(vt)
+        if lat and lat > 0 then
+          w_lat = 1 / (1 + lat / latency_ref)
+        end
+        if vt then
+          w_rec = 0.5 + 0.5 * 0.5 ^ (math.max(0, now - vt) / recency_half)
+        end
+        if ptype == 'Full Rotating' then
+          w_type = 0.7
+        elseif ptype == 'Partial Rotating' then
+          w_type = 0.85
+        end
+      end
+
+      -- 성공/실패는 시간 감쇠 후 베타 사전분포(1,1)로 성공률 추정
+      local w_rel = 0.5
+      local fb = redis.call('HGET', feedback, m)
+      if fb then
+        local ok, fail, ts = string.match(fb, '^([^|]*)|([^|]*)|([^|]*)$')
+        ok = tonumber(ok) or 0
+        fail = tonumber(fail) or 0
+        ts = tonumber(ts) or now
+        local d = 0.5 ^ (math.max(0, now - ts) / feedback_half)
+        w_rel = (ok * d + 1) / ((ok + fail) * d + 2)
+      end
+
+      local w = w_lat * w_rec * w_type * w_rel
+      if w < min_weight then
+        w = min_weight
+      end
+      weights[i] = w
+      total = total + w
+    end
+
+    -- 3) 가중 랜덤 1개 선택
+    local target = rand_pick * total
+    local m = cands[#cands]
+    local acc = 0
+    for i, w in ipairs(weights) do
+      acc = acc + w
+      if target < acc then
+        m = cands[i]
+        break
+      end
+    end
 
     redis.call('ZREM', alive, m)
     redis.call('ZADD', lease, now + lease_sec, m)
-    return m
+
+    -- 깨우기 신호는 남은 사용 가능 멤버 수까지만 유지 (블록 없이 claim이 성공하면 신호가 소비되지 않고 쌓여서
+    -- 나중에 대기자들이 한꺼번에 깨어났다가 빈 풀을 보고 다시 블록하는 것 방지)
+    local left = redis.call('ZCOUNT', alive, '-inf', now)
+    if left == 0 then
+      redis.call('DEL', signal)
+    else
+      redis.call('LTRIM', signal, 0, left - 1)
+    end
+
+    -- 4) 소유자 토큰 + fencing 카운터
+    local fence = redis.call('INCR', fence_key)
+    local token = owner_id .. ':' .. fence
+    redis.call('HSET', owner, m, token)
+    if events_maxlen > 0 then
+      redis.call('XADD', events, 'MAXLEN', '~', events_maxlen, '*', 'e', 'c', 'm', m, 't', now + lease_sec)
+    end
+    return {m, token, fence}
+    """
+
+    _LUA_REAP = r"""
+    local lease = KEYS[1]
+    local alive = KEYS[2]
+    local owner = KEYS[3]
+    local signal = KEYS[4]
+    local events = KEYS[5]
+    local now = tonumber(ARGV[1])
+    local limit = tonumber(ARGV[2])
+    local signal_cap = tonumber(ARGV[3])
+    local events_maxlen = tonumber(ARGV[4])
+
+    -- 가장 먼저 만료되는 lease가 아직 유효하면 아무 것도 하지 않음 (O(log N))
+    local head = redis.call('ZRANGE', lease, 0, 0, 'WITHSCORES')
+    if #head == 0 then
+      return {0, -1}
+    end
+    if tonumber(head[2]) > now then
+      return {0, head[2]}
+    end
+
+    -- 만료된 lease를 최대 limit개만 회수 (스크립트 실행 시간 상한)
+    local expired = redis.call('ZRANGEBYSCORE', lease, '-inf', now, 'LIMIT', 0, limit)
+    for i, m in ipairs(expired) do
+      redis.call('ZREM', lease, m)
+      redis.call('HDEL', owner, m)
+      redis.call('ZADD', alive, 0, m)
+      if events_maxlen > 0 then
+        redis.call('XADD', events, 'MAXLEN', '~', events_maxlen, '*', 'e', 'x', 'm', m, 't', 0)
+      end
+    end
+
+    -- 대기 중인 claim 깨우기 (회수된 멤버 수만큼, 상한 signal_cap)
+    if #expired > 0 then
+      for i = 1, math.min(#expired, signal_cap) do
+        redis.call('LPUSH', signal, 1)
+      end
+      redis.call('LTRIM', signal, 0, signal_cap - 1)
+    end
+
+    -- 다음 만료 예정 시각 (없으면 -1)
+    local nxt = redis.call('ZRANGE', lease, 0, 0, 'WITHSCORES')
+    if #nxt == 0 then
+      return {#expired, -1}
+    end
+    return {#expired, nxt[2]}
     """
 
     _LUA_RELEASE = r"""
     local alive = KEYS[1]
     local lease = KEYS[2]
+    local feedback = KEYS[3]
+    local owner = KEYS[4]
+    local signal = KEYS[5]
+    local events = KEYS[6]
     local member = ARGV[1]
     local next_time = tonumber(ARGV[2])
+    local outcome = ARGV[3]
+    local now = tonumber(ARGV[4])
+    local feedback_half = tonumber(ARGV[5])
+    local token = ARGV[6]
+    local signal_cap = tonumber(ARGV[7])
+    local events_maxlen = tonumber(ARGV[8])
+
+    -- 소유권 확인: 토큰이 다르면(이미 회수 후 재임대됨) 거부.
+    -- 소유자 기록이 없는 lease는 구버전 클라이언트가 잡은 것으로 보고 허용(임대 중일 때만).
+    local cur = redis.call('HGET', owner, member)
+    if cur then
+      if cur ~= token then
+        return 0
+      end
+    elseif not redis.call('ZSCORE', lease, member) then
+      return 0
+    end
 
     redis.call('ZREM', lease, member)
+    redis.call('HDEL', owner, member)
     redis.call('ZADD', alive, next_time, member)
+    if events_maxlen > 0 then
+      redis.call('XADD', events, 'MAXLEN', '~', events_maxlen, '*', 'e', 'r', 'm', member, 't', next_time, 'o', outcome)
+    end
+
+    -- 쿨다운 없이 바로 사용 가능하면 대기 중인 claim 깨우기
+    if next_time <= now then
+      redis.call('LPUSH', signal, 1)
+      redis.call('LTRIM', signal, 0, signal_cap - 1)
+    end
+
+    -- 세션 결과 피드백: 기존 누적값을 now 기준으로 감쇠시킨 뒤 +1
+    if outcome == 'ok' or outcome == 'fail' then
+      local ok, fail = 0, 0
+      local fb = redis.call('HGET', feedback, member)
+      if fb then
+        local o, f, ts = string.match(fb, '^([^|]*)|([^|]*)|([^|]*)$')
+        local d = 0.5 ^ (math.max(0, now - (tonumber(ts) or now)) / feedback_half)
+        ok = (tonumber(o) or 0) * d
+        fail = (tonumber(f) or 0) * d
+      end
+      if outcome == 'ok' then
+        ok = ok + 1
+      else
+        fail = fail + 1
+      end
+      redis.call('HSET', feedback, member, string.format('%.3f|%.3f|%d', ok, fail, now))
+    end
     return 1
     """
 
     _LUA_BAN = r"""
     local alive = KEYS[1]
     local lease = KEYS[2]
+    local owner = KEYS[3]
+    local stats = KEYS[4]
+    local events = KEYS[5]
     local member = ARGV[1]
+    local token = ARGV[2]
+    local events_maxlen = tonumber(ARGV[3])
+
+    local cur = redis.call('HGET', owner, member)
+    if cur then
+      if cur ~= token then
+        return 0
+      end
+    elseif not redis.call('ZSCORE', lease, member) then
+      return 0
+    end
+
     redis.call('ZREM', alive, member)
     redis.call('ZREM', lease, member)
+    redis.call('HDEL', owner, member)
+    redis.call('HINCRBY', stats, 'ban', 1)
+    if events_maxlen > 0 then
+      redis.call('XADD', events, 'MAXLEN', '~', events_maxlen, '*', 'e', 'b', 'm', member)
+    end
+    return 1
+    """
+
+    _LUA_RENEW = r"""
+    local lease = KEYS[1]
+    local owner = KEYS[2]
+    local member = ARGV[1]
+    local token = ARGV[2]
+    local expire_at = tonumber(ARGV[3])
+
+    if redis.call('HGET', owner, member) ~= token then
+      return 0
+    end
+    if not redis.call('ZSCORE', lease, member) then
+      return 0
+    end
+    redis.call('ZADD', lease, 'XX', expire_at, member)
     return 1
     """
 
+    _LUA_HEALTH = _LUA_HISTORY_FN + r"""
+    local health = KEYS[1]
+    local member = ARGV[1]
+    local ok = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local half = tonumber(ARGV[4])
+    local alpha = tonumber(ARGV[5])
+
+    -- 소유권 확인 (ARGV[9]=='1'이면 ARGV[8] 토큰으로): 회수 후 재임대된 멤버의 health/이력을 늦은 호출이 바꾸지 않도록
+    -- (KEYS[4]=owner, KEYS[5]=lease, 판정 기준은 release와 동일)
+    local token = ARGV[8]
+    if ARGV[9] == '1' then
+      local cur = redis.call('HGET', KEYS[4], member)
+      if cur then
+        if cur ~= token then
+          return {'', -1}
+        end
+      elseif not redis.call('ZSCORE', KEYS[5], member) then
+        return {'', -1}
+      end
+    end
+
+    -- 세션 결과 이력 (KEYS[2]=ring, KEYS[3]=hourly)
+    record_history(KEYS[2], KEYS[3], now, 's', ok, '', tonumber(ARGV[6]), tonumber(ARGV[7]), 0)
+
+    local h, strikes, ts = 1, 0, now
+    local raw = redis.call('HGET', health, member)
+    if raw then
+      local a, b, c = string.match(raw, '^([^|]*)|([^|]*)|([^|]*)$')
+      h = tonumber(a) or 1
+      strikes = tonumber(b) or 0
+      ts = tonumber(c) or now
+    end
+
+    -- 마지막 기록 이후 경과 시간만큼 건강(1.0) 쪽으로 회복 -> 이번 결과를 EWMA로 반영
+    h = 1 - (1 - h) * 0.5 ^ (math.max(0, now - ts) / half)
+    h = (1 - alpha) * h + alpha * ok
+    if ok == 1 and h >= 0.9 then
+      strikes = 0
+    end
+    redis.call('HSET', health, member, string.format('%.4f|%d|%d', h, strikes, now))
+    return {tostring(h), strikes}
+    """
+
+    _LUA_PROBATION = r"""
+    local alive = KEYS[1]
+    local lease = KEYS[2]
+    local owner = KEYS[3]
+    local probation = KEYS[4]
+    local health = KEYS[5]
+    local stats = KEYS[6]
+    local events = KEYS[7]
+    local member = ARGV[1]
+    local token = ARGV[2]
+    local now = tonumber(ARGV[3])
+    local base = tonumber(ARGV[4])
+    local max_strikes = tonumber(ARGV[5])
+    local events_maxlen = tonumber(ARGV[6])
+
+    local cur = redis.call('HGET', owner, member)
+    if cur then
+      if cur ~= token then
+        return {-1, 0, 0}
+      end
+    elseif not redis.call('ZSCORE', lease, member) then
+      return {-1, 0, 0}
+    end
+
+    redis.call('ZREM', alive, member)
+    redis.call('ZREM', lease, member)
+    redis.call('HDEL', owner, member)
+    redis.call('HINCRBY', stats, 'probation', 1)
+
+    local h, strikes = '0', 0
+    local raw = redis.call('HGET', health, member)
+    if raw then
+      local a, b = string.match(raw, '^([^|]*)|([^|]*)|')
+      h = a or h
+      strikes = tonumber(b) or 0
+    end
+    strikes = strikes + 1
+    redis.call('HSET', health, member, string.format('%s|%d|%d', h, strikes, now))
+
+    -- strikes마다 재검증까지의 대기 2배, 상한 초과면 영구 퇴출(+inf)
+    if strikes > max_strikes then
+      redis.call('ZADD', probation, '+inf', member)
+      if events_maxlen > 0 then
+        redis.call('XADD', events, 'MAXLEN', '~', events_maxlen, '*', 'e', 'b', 'm', member)
+      end
+      return {0, strikes, -1}
+    end
+    local until_ts = now + base * 2 ^ (strikes - 1)
+    redis.call('ZADD', probation, until_ts, member)
+    if events_maxlen > 0 then
+      redis.call('XADD', events, 'MAXLEN', '~', events_maxlen, '*', 'e', 'p', 'm', member, 't', until_ts)
+    end
+    return {1, strikes, until_ts}
+    """
+
+    # collector 검증 결과 이력 (KEYS: ring, hourly / ARGV: now, ok, latency_ms, size, hours, window, dedup)
+    #   dedup='1'이면 같은 검증 시각(now)의 'v' 기록이 ring에 이미 있을 때 다시 세지 않고 합계만 반환
+    #   (결과 쓰기가 실패해 spool replay로 원래 시각과 함께 다시 들어온 경우 -> 이력/집계 중복 방지)
+    _LUA_HISTORY = _LUA_HISTORY_FN + r"""
+    local now = tonumber(ARGV[1])
+    local totals
+    if ARGV[7] == '1' then
+      local tag = string.format('%d|v|', now)
+      for _, e in ipairs(redis.call('LRANGE', KEYS[1], 0, -1)) do
+        if string.sub(e, 1, #tag) == tag then
+          totals = history_window(KEYS[2], math.floor(now / 3600), tonumber(ARGV[6]))
+          break
+        end
+      end
+    end
+    if not totals then
+      totals = record_history(
+        KEYS[1], KEYS[2], now, 'v', tonumber(ARGV[2]), ARGV[3],
+        tonumber(ARGV[4]), tonumber(ARGV[5]), tonumber(ARGV[6])
+      )
+    end
+    return {totals[1], totals[2], tostring(totals[3]), totals[4], totals[5]}
+    """
+
+    # op 이름 -> 스크립트 본문 (Functions 라이브러리 / EVALSHA 공용)
+    _SCRIPTS = {
+        "claim": _LUA_CLAIM,
+        "reap": _LUA_REAP,
+        "release": _LUA_RELEASE,
+        "ban": _LUA_BAN,
+        "renew": _LUA_RENEW,
+        "health": _LUA_HEALTH,
+        "probation": _LUA_PROBATION,
+        "history": _LUA_HISTORY,
+    }
+    _SCRIPT_SHAS = {op: hashlib.sha1(src.encode("utf-8")).hexdigest() for op, src in _SCRIPTS.items()}
+
     def __init__(
         self,
         config: RedisConnConfig,
         *,
         alive_key: str = DEFAULT_ALIVE_KEY,
         lease_key: str = DEFAULT_LEASE_KEY,
-        fail_hash: str = DEFAULT_FAIL_HASH,
+        health_hash: str = DEFAULT_HEALTH_HASH,
+        probation_key: str = DEFAULT_PROBATION_KEY,
+        quality_hash: str = DEFAULT_QUALITY_HASH,
+        feedback_hash: str = DEFAULT_FEEDBACK_HASH,
+        owner_hash: str = DEFAULT_OWNER_HASH,
+        fence_key: str = DEFAULT_FENCE_KEY,
+        stats_hash: str = DEFAULT_STATS_HASH,
+        events_key: str = DEFAULT_EVENTS_KEY,
+        signal_key: str = DEFAULT_SIGNAL_KEY,
+        index_prefix: str = DEFAULT_INDEX_PREFIX,
+        history_prefix: str = DEFAULT_HISTORY_PREFIX,
+        history_size: int = 64,
+        history_hours: int = 7 * 24,
+        signal_cap: int = 1000,
+        events_maxlen: int = 10000,
+        owner_id: Optional[str] = None,
+        health_half_life: int = 6 * 3600,
+        health_alpha: float = 0.3,
+        probation_base: int = 1800,
+        max_strikes: int = 4,
+        latency_ref_ms: float = 1000.0,
+        feedback_half_life: int = 6 * 3600,
+        recency_half_life: int = 4 * 3600,
+        min_weight: float = 0.05,
         decode_responses: bool = True,
         socket_timeout: Optional[float] = None,
+        reap_max_interval: float = 5.0,
+        cluster: bool = False,
     ):
         self.config = config
         self.alive_key = alive_key
         self.lease_key = lease_key
-        self.fail_hash = fail_hash
+        self.health_hash = health_hash
+        self.probation_key = probation_key
+        self.quality_hash = quality_hash
+        self.feedback_hash = feedback_hash
+        self.owner_hash = owner_hash
+        self.fence_key = fence_key
+        self.stats_hash = stats_hash
+        self.events_key = events_key
+        self.signal_key = signal_key
+        self.index_prefix = index_prefix
+        # 멤버별 이력 (ring buffer history_size개 + 시간대별 집계 history_hours시간). size=0이면 기록 안 함
+        self.history_prefix = history_prefix
+        self.history_size = max(0, int(history_size))
+        self.history_hours = max(1, int(history_hours))
+        self.signal_cap = max(1, int(signal_cap))
+        # 상태 변경 이벤트 stream 길이 상한(근사 MAXLEN ~). 0이면 이벤트를 기록하지 않음
+        self.events_maxlen = max(0, int(events_maxlen))
+        # 프로세스/클라이언트별 소유자 ID (토큰 앞부분)
+        self.owner_id = owner_id or uuid.uuid4().hex[:12]
+        # health(EWMA) / probation 파라미터
+        self.health_half_life = int(health_half_life)
+        self.health_alpha = float(health_alpha)
+        self.probation_base = int(probation_base)
+        self.max_strikes = int(max_strikes)
+        # 품질 가중치 파라미터 (claim 스크립트로 전달)
+        self.latency_ref_ms = float(latency_ref_ms)
+        self.feedback_half_life = int(feedback_half_life)
+        self.recency_half_life = int(recency_half_life)
+        self.min_weight = float(min_weight)
         self.decode_responses = decode_responses
         self.socket_timeout = socket_timeout
-        self._r: Optional[redis.Redis] = None
+        # Redis Cluster: FUNCTION LOAD는 노드별로 따로 관리되므로 EVALSHA만 사용 (키는 shard_key_names의 hash tag 필요)
+        self.cluster = bool(cluster)
+        # 캐시된 "다음 만료 시각"을 너무 믿지 않도록(다른 클라이언트가 만든 lease 등) 최대 점검 간격
+        self.reap_max_interval = float(reap_max_interval)
+        self._next_reap_at = 0.0
+        # 이 클라이언트가 잡고 있는 lease (member -> ProxyLease)
+        self._leases: Dict[str, ProxyLease] = {}
+        self._leases_lock = threading.Lock()
+        _CLIENTS.add(self)
+        # "function"(FCALL) / "evalsha" : connect() 시 _prepare_scripts()가 결정
+        self._script_mode = "evalsha"
 
-    def connect(self) -> redis.Redis:
-        r = redis.Redis(
-            host=self.config.host,
-            port=self.config.port,
-            db=self.config.db,
-            password=self.config.password,
-            decode_responses=self.decode_responses,
-            socket_timeout=self.socket_timeout,
+    # ---------------- 스크립트 호출 인자 (op, keys, args) ----------------
+
+    def _claim_call(
+        self, now: int, lease_seconds: int, sample_k: int, filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, List[str], List[Any]]:
+        keys = [
+            self.alive_key,
+            self.lease_key,
+            self.quality_hash,
+            self.feedback_hash,
+            self.owner_hash,
+            self.fence_key,
+            self.events_key,
+            self.signal_key,
+        ]
+        set_keys, max_latency = self._filter_keys(filters)
+        if set_keys or max_latency is not None:
+            keys += [f"{self.index_prefix}:tmp", f"{self.index_prefix}:latency", *set_keys]
+        args = [
+            now,
+            int(lease_seconds),
+            int(sample_k),
+            random.randint(0, 2_147_483_647),
+            random.randint(0, 2_147_483_647),
+            self.latency_ref_ms,
+            self.feedback_half_life,
+            self.recency_half_life,
+            self.min_weight,
+            self.owner_id,
+            "" if max_latency is None else max_latency,
+            self.events_maxlen,
+        ]
+        return "claim", keys, args
+
+    def _reap_call(self, now: int, limit: int) -> Tuple[str, List[str], List[Any]]:
+        keys = [self.lease_key, self.alive_key, self.owner_hash, self.signal_key, self.events_key]
+        return "reap", keys, [now, int(limit), self.signal_cap, self.events_maxlen]
+
+    def _release_call(
+        self, member: str, now: int, next_time: int, outcome: Optional[str], token: Optional[str]
+    ) -> Tuple[str, List[str], List[Any]]:
+        keys = [self.alive_key, self.lease_key, self.feedback_hash, self.owner_hash, self.signal_key, self.events_key]
+        args = [
+            member,
+            next_time,
+            outcome or "",
+            now,
+            self.feedback_half_life,
+            self._token_for(member, token),
+            self.signal_cap,
+            self.events_maxlen,
+        ]
+        return "release", keys, args
+
+    def _ban_call(self, member: str, token: Optional[str]) -> Tuple[str, List[str], List[Any]]:
+        keys = [self.alive_key, self.lease_key, self.owner_hash, self.stats_hash, self.events_key]
+        return "ban", keys, [member, self._token_for(member, token), self.events_maxlen]
+
+    def _renew_call(self, member: str, expire_at: int, token: Optional[str]) -> Tuple[str, List[str], List[Any]]:
+        keys = [self.lease_key, self.owner_hash]
+        return "renew", keys, [member, self._token_for(member, token), int(expire_at)]
+
+    def _health_call(
+        self, member: str, ok: bool, now: int, token: Optional[str] = None
+    ) -> Tuple[str, List[str], List[Any]]:
+        """token을 주면 그 토큰이 현재 lease 소유자일 때만 반영 (아니면 스크립트가 strikes=-1 반환)"""
+        keys = [self.health_hash, *self.history_keys(member, self.history_prefix), self.owner_hash, self.lease_key]
+        args = [
+            member,
+            1 if ok else 0,
+            now,
+            self.health_half_life,
+            self.health_alpha,
+            self.history_size,
+            self.history_hours,
+            token or "",
+            0 if token is None else 1,
+        ]
+        return "health", keys, args
+
+    @staticmethod
+    def history_keys(member: str, prefix: str = DEFAULT_HISTORY_PREFIX) -> List[str]:
+        """멤버 이력 키 [ring list, hourly hash] (prefix가 샤드 hash tag를 포함하므로 같은 슬롯)"""
+        return [f"{prefix}:{member}", f"{prefix}:h:{member}"]
+
+    def _probation_call(self, member: str, now: int, token: Optional[str]) -> Tuple[str, List[str], List[Any]]:
+        keys = [
+            self.alive_key,
+            self.lease_key,
+            self.owner_hash,
+            self.probation_key,
+            self.health_hash,
+            self.stats_hash,
+            self.events_key,
+        ]
+        args = [member, self._token_for(member, token), now, self.probation_base, self.max_strikes, self.events_maxlen]
+        return "probation", keys, args
+
+    # ---------------- 샤딩 (hash-tag 키 그룹) ----------------
+
+    @classmethod
+    def shard_key_names(cls, shard: int, shards: int, *, tagged: Optional[bool] = None) -> Dict[str, str]:
+        """
+        샤드 번호 -> __init__ 키 인자(dict). 한 샤드의 모든 키는 같은 hash tag({sN})를 가져 Cluster에서도 같은 슬롯.
+        shards <= 1 이고 tagged가 아니면 기존 단일 키 이름(proxies:alive ...)을 그대로 사용.
+        """
+        if tagged is None:
+            tagged = shards > 1
+        if not tagged:
+            return dict(
+                alive_key=cls.DEFAULT_ALIVE_KEY,
+                lease_key=cls.DEFAULT_LEASE_KEY,
+                quality_hash=cls.DEFAULT_QUALITY_HASH,
+                feedback_hash=cls.DEFAULT_FEEDBACK_HASH,
+                owner_hash=cls.DEFAULT_OWNER_HASH,
+                fence_key=cls.DEFAULT_FENCE_KEY,
+                stats_hash=cls.DEFAULT_STATS_HASH,
+                events_key=cls.DEFAULT_EVENTS_KEY,
+                signal_key=cls.DEFAULT_SIGNAL_KEY,
+                health_hash=cls.DEFAULT_HEALTH_HASH,
+                probation_key=cls.DEFAULT_PROBATION_KEY,
+                index_prefix=cls.DEFAULT_INDEX_PREFIX,
+                history_prefix=cls.DEFAULT_HISTORY_PREFIX,
+            )
+        tag = f"proxies:{{s{int(shard)}}}"
+        return dict(
+            alive_key=f"{tag}:alive",
+            lease_key=f"{tag}:lease",
+            quality_hash=f"{tag}:quality",
+            feedback_hash=f"{tag}:feedback",
+            owner_hash=f"{tag}:lease:owner",
+            fence_key=f"{tag}:lease:fence",
+            stats_hash=f"{tag}:stats",
+            events_key=f"{tag}:events",
+            signal_key=f"{tag}:signal",
+            health_hash=f"{tag}:health",
+            probation_key=f"{tag}:probation",
+            index_prefix=f"{tag}:idx",
+            history_prefix=f"{tag}:hist",
+        )
+
+    @staticmethod
+    def shard_of(member: str, shards: int) -> int:
+        """멤버가 속하는 샤드 (collector / 클라이언트 공용, crc32 기반으로 프로세스와 무관하게 고정)."""
+        if shards <= 1:
+            return 0
+        return zlib.crc32(member.encode("utf-8")) % int(shards)
+
+    # ---------------- 속성 인덱스 ----------------
+
+    @staticmethod
+    def _index_value(field: str, value: Any) -> str:
+        if field == "country":
+            # "South Korea (KR)" / "kr" -> "KR"
+            text = str(value).strip()
+            if text.endswith(")") and "(" in text:
+                text = text[text.rindex("(") + 1 : -1]
+            return text.upper()
+        if field == "residential":
+            return "1" if value else "0"
+        return str(value).strip().lower().replace(" ", "_")
+
+    @classmethod
+    def index_keys(
+        cls,
+        *,
+        protocol: Optional[str] = None,
+        countries: Optional[List[str]] = None,
+        proxy_type: Optional[str] = None,
+        residential: Optional[bool] = None,
+        prefix: str = DEFAULT_INDEX_PREFIX,
+    ) -> List[str]:
+        """멤버 1개가 속해야 할 속성 인덱스 set 키 목록 (collector가 SADD/SREM 할 때 사용)."""
+        keys = []
+        if protocol:
+            keys.append(f"{prefix}:proto:{cls._index_value('protocol', protocol)}")
+        for c in countries or []:
+            if c:
+                keys.append(f"{prefix}:country:{cls._index_value('country', c)}")
+        if proxy_type:
+            keys.append(f"{prefix}:type:{cls._index_value('proxy_type', proxy_type)}")
+        if residential is not None:
+            keys.append(f"{prefix}:residential:{cls._index_value('residential', residential)}")
+        return keys
+
+    def _filter_keys(self, filters: Optional[Dict[str, Any]]) -> Tuple[List[str], Optional[float]]:
+        """claim filters -> (교집합할 인덱스 set 키 목록, latency 상한 ms)."""
+        if not filters:
+            return [], None
+        unknown = set(filters) - {"protocol", "country", "proxy_type", "residential", "max_latency_ms"}
+        if unknown:
+            raise ValueError(f"unknown claim filter(s): {sorted(unknown)}")
+
+        country = filters.get("country")
+        set_keys = self.index_keys(
+            protocol=filters.get("protocol"),
+            countries=[country] if country else None,
+            proxy_type=filters.get("proxy_type"),
+            residential=filters.get("residential"),
+            prefix=self.index_prefix,
         )
+        max_latency = filters.get("max_latency_ms")
+        return set_keys, (float(max_latency) if max_latency is not None else None)
+
+    # ---------------- Functions 라이브러리 / EVALSHA ----------------
+
+    @classmethod
+    def _function_name(cls, op: str) -> str:
+        return f"{cls.LIBRARY_NAME}_{op}"
+
+    @classmethod
+    def library_code(cls) -> str:
+        """FUNCTION LOAD 용 라이브러리 소스 (각 스크립트를 function(KEYS, ARGV)로 감싸 등록 + 버전 조회 함수)."""
+        parts = [f"#!lua name={cls.LIBRARY_NAME}\n"]
+        for op, src in cls._SCRIPTS.items():
+            parts.append(
+                f"redis.register_function('{cls._function_name(op)}', function(KEYS, ARGV)\n{src}\nend)\n"
+            )
+        parts.append(
+            "redis.register_function{function_name='%s', callback=function() return %d end, flags={'no-writes'}}\n"
+            % (cls._function_name("version"), cls.LIBRARY_VERSION)
+        )
+        return "".join(parts)
+
+    def _library_action(self, server_version: Optional[int]) -> str:
+        """서버에 올라간 라이브러리 버전 -> "use"(그대로 사용) / "load"(REPLACE 로드) / "evalsha"(서버 쪽이 더 최신)."""
+        if server_version is None or server_version < self.LIBRARY_VERSION:
+            return "load"
+        if server_version > self.LIBRARY_VERSION:
+            # 다른 클라이언트가 더 새 버전을 올림 -> 인자 구성이 다를 수 있으니 내 스크립트를 EVALSHA로 실행
+            return "evalsha"
+        return "use"
+
+    @staticmethod
+    def _is_unknown_command(e: Exception) -> bool:
+        # Redis 6 이하(FUNCTION/FCALL 없음) 또는 ACL로 막힌 경우
+        msg = str(e).lower()
+        return "unknown command" in msg or "noperm" in msg
+
+    @staticmethod
+    def _is_missing_function(e: Exception) -> bool:
+        return "function not found" in str(e).lower()
+
+    # ---------------- 결과 처리 / 로컬 lease 기록 ----------------
+
+    def _on_claim_result(self, res: Any, now: int, lease_seconds: int) -> Optional[ProxyLease]:
+        if not res:
+            return None
+        member, token, fence = (str(x) for x in res)
+        if "://" not in member:
+            return None
+
+        lease = ProxyLease(member=member, token=token, fence=int(fence), expires_at=now + int(lease_seconds))
+        with self._leases_lock:
+            self._leases[member] = lease
+        return lease
+
+    @staticmethod
+    def _observe_claim(t0: float, lease: Optional[ProxyLease]) -> Optional[ProxyLease]:
+        result = "hit" if lease is not None else "empty"
+        LEASE_CLAIM_SECONDS.labels(result).observe(time.perf_counter() - t0)
+        LEASE_CLAIMS.labels(result).inc()
+        return lease
+
+    @staticmethod
+    def _observe_release(info: Dict[str, Any]) -> Dict[str, Any]:
+        LEASE_RELEASES.labels(info.get("action", "")).inc()
+        return info
+
+    def _on_reap_result(self, res: Any, limit: int) -> int:
+        moved, next_due = res
+        moved = int(moved)
+        next_due = float(next_due)
+        if moved:
+            LEASE_RECLAIMED.inc(moved)
+        if moved >= int(limit):
+            # 배치 상한에 걸림 -> 아직 남은 만료 lease가 있으니 다음 claim에서 바로 이어서 회수
+            self._next_reap_at = 0.0
+        elif next_due < 0:
+            self._next_reap_at = time.time() + self.reap_max_interval
+        else:
+            self._next_reap_at = min(next_due, time.time() + self.reap_max_interval)
+        return moved
+
+    def _on_renew_result(self, member: str, res: Any, expire_at: int) -> bool:
+        if not int(res or 0):
+            # 소유권 상실 -> 로컬 기록도 정리 (heartbeat가 lost로 판단하는 기준)
+            self._forget(member)
+            return False
+        with self._leases_lock:
+            lease = self._leases.get(member)
+            if lease is not None:
+                lease.expires_at = expire_at
+        return True
+
+    def _signal_wait(self, max_wait: float, next_cooldown: Optional[float]) -> float:
+        """BLPOP 대기 시간: max_wait / 다음 reap 시각 / 가장 빠른 쿨다운 만료 / socket_timeout 중 최소."""
+        now = time.time()
+        wait = min(max_wait, max(0.0, self._next_reap_at - now))
+        if next_cooldown is not None:
+            wait = min(wait, max(0.0, float(next_cooldown) - now))
+        # socket_timeout보다 오래 블록하면 연결 오류가 나므로 그 안에서 끊어서 대기
+        if self.socket_timeout:
+            wait = min(wait, max(0.1, float(self.socket_timeout) - 0.5))
+        return max(0.1, wait)
+
+    def _decayed_feedback(self, raw: Optional[str], *, ok: bool, now: int) -> str:
+        okv, failv = 0.0, 0.0
+        if raw:
+            o, f, ts = str(raw).split("|")
+            d = 0.5 ** (max(0, now - int(float(ts))) / self.feedback_half_life)
+            okv, failv = float(o) * d, float(f) * d
+        if ok:
+            okv += 1
+        else:
+            failv += 1
+        return f"{okv:.3f}|{failv:.3f}|{now}"
+
+    @staticmethod
+    def _health_cooldown(health: float, base: int, max_cooldown: int, jitter: int) -> int:
+        """health가 낮을수록 긴 실패 쿨다운 (1.0 -> base, 0.0 -> max_cooldown)."""
+        span = max(0, int(max_cooldown) - int(base))
+        return int(base + span * (1.0 - health) ** 2) + random.randint(0, max(0, int(jitter)))
+
+    @staticmethod
+    def _on_health_result(res: Any) -> Optional[Tuple[float, int]]:
+        """health 스크립트 결과 -> (health, strikes). 소유권 확인에서 거부됐으면 None"""
+        h, strikes = res
+        if int(strikes) < 0:
+            return None
+        return float(h), int(strikes)
+
+    @staticmethod
+    def _on_probation_result(res: Any) -> Dict[str, Any]:
+        status, strikes, until_ts = (int(float(x)) for x in res)
+        action = {1: "probation", 0: "banned"}.get(status, "rejected")
+        return {"action": action, "strikes": strikes, "until": until_ts if status == 1 else None}
+
+    def get_lease(self, member: str) -> Optional[ProxyLease]:
+        with self._leases_lock:
+            return self._leases.get(member)
+
+    def _token_for(self, member: str, token: Optional[str]) -> str:
+        if token is not None:
+            return token
+        lease = self.get_lease(member)
+        return lease.token if lease else ""
+
+    def _forget(self, member: str) -> None:
+        with self._leases_lock:
+            self._leases.pop(member, None)
+
+    def _on_settle_result(self, member: str, token: Optional[str], ok: bool) -> bool:
+        """
+        release/ban/probation 후 로컬 토큰 정리. 성공했거나, 거부됐더라도 내가 보관한 토큰 자체가 거부된 경우(이미 회수됨)만 지움.
+        틀린 토큰을 명시한 호출이 실제 보유자의 토큰을 지우면 그 보유자가 release/heartbeat를 못 하게 됨.
+        """
+        if ok:
+            self._forget(member)
+            return ok
+        with self._leases_lock:
+            lease = self._leases.get(member)
+            if lease is not None and (token is None or token == lease.token):
+                self._leases.pop(member, None)
+        return ok
+
+    def adopt(self, lease: ProxyLease) -> None:
+        """다른 클라이언트(예: LeasePrefetcher)가 잡은 lease를 이 클라이언트의 토큰 기록으로 가져옴."""
+        with self._leases_lock:
+            self._leases[lease.member] = lease
+
+
+class RedisProxyLeaseClient(LeaseClientBase):
+    """
+    동기(redis-py) 클라이언트.
+    claim/claim_lease/reap/release/ban/renew/heartbeat/release_on_result 제공.
+    start_prefetch()를 켜면 claim_lease()가 미리 잡아둔 lease를 바로 내준다(LeasePrefetcher).
+    """
+
+    def __init__(self, config: RedisConnConfig, **kwargs: Any):
+        super().__init__(config, **kwargs)
+        self._r: Optional[redis.Redis] = None
+        self._reaper_thread: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+        self._prefetcher: Optional["LeasePrefetcher"] = None
+
+    def connect(self, r: Optional[redis.Redis] = None) -> redis.Redis:
+        """r를 주면 그 연결(풀)을 공유 (ShardedRedisProxyLeaseClient가 샤드 클라이언트들에 같은 연결을 넘김)."""
+        if r is None:
+            if self.cluster:
+                r = redis.RedisCluster(
+                    host=self.config.host,
+                    port=self.config.port,
+                    password=self.config.password,
+                    decode_responses=self.decode_responses,
+                    socket_timeout=self.socket_timeout,
+                )
+            else:
+                r = redis.Redis(
+                    host=self.config.host,
+                    port=self.config.port,
+                    db=self.config.db,
+                    password=self.config.password,
+                    decode_responses=self.decode_responses,
+                    socket_timeout=self.socket_timeout,
+                )
         r.ping()
         self._r = r
+        self._prepare_scripts()
         return r
 
     @property
@@ -124,6 +1137,8 @@ class RedisProxyLeaseClient:
         return self._r
 
     def close(self) -> None:
+        self.stop_prefetch()
+        self.stop_reaper()
         try:
             if self._r is not None:
                 self._r.close()
@@ -131,59 +1146,316 @@ class RedisProxyLeaseClient:
             pass
         self._r = None
 
-    def claim(self, *, lease_seconds: int, reclaim_limit: int = 200, sample_k: int = 50) -> Optional[str]:
-        now = int(time.time())
-        rand_int = random.randint(0, 2_147_483_647)
+    def _prepare_scripts(self) -> None:
+        """라이브러리 버전 확인 후 필요하면 로드(REPLACE). FUNCTION 미지원 서버면 EVALSHA로 전환."""
+        if self.cluster:
+            self._script_mode = "evalsha"
+            return
         try:
-            member = self.r.eval(
-                self._LUA_CLAIM,
-                2,
-                self.alive_key,
-                self.lease_key,
-                now,
-                int(lease_seconds),
-                int(reclaim_limit),
-                int(sample_k),
-                int(rand_int),
+            try:
+                server_version: Optional[int] = int(self.r.fcall(self._function_name("version"), 0))
+            except redis.ResponseError as e:
+                if not self._is_missing_function(e):
+                    raise
+                server_version = None
+
+            action = self._library_action(server_version)
+            if action == "load":
+                self.r.function_load(self.library_code(), replace=True)
+            self._script_mode = "evalsha" if action == "evalsha" else "function"
+        except redis.ResponseError as e:
+            if not self._is_unknown_command(e):
+                raise
+            _log.debug("script_mode", mode="evalsha", reason=str(e))
+            self._script_mode = "evalsha"
+
+    def _eval(self, call: Tuple[str, List[str], List[Any]]) -> Any:
+        op, keys, args = call
+        if self._script_mode == "function":
+            try:
+                return self.r.fcall(self._function_name(op), len(keys), *keys, *args)
+            except redis.ResponseError as e:
+                if not self._is_missing_function(e):
+                    raise
+                # FUNCTION FLUSH / 서버 재시작 등으로 라이브러리가 사라짐 -> 다시 준비
+                self._prepare_scripts()
+                if self._script_mode == "function":
+                    return self.r.fcall(self._function_name(op), len(keys), *keys, *args)
+
+        try:
+            return self.r.evalsha(self._SCRIPT_SHAS[op], len(keys), *keys, *args)
+        except redis.exceptions.NoScriptError:
+            self.r.script_load(self._SCRIPTS[op])
+            return self.r.evalsha(self._SCRIPT_SHAS[op], len(keys), *keys, *args)
+
+    def claim(
+        self,
+        *,
+        lease_seconds: int,
+        reclaim_limit: int = 200,
+        sample_k: int = 50,
+        block_timeout: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Optional[str]:
+        """claim_lease()와 동일. 기존 호출부 호환을 위해 member 문자열만 반환(토큰은 클라이언트가 보관)."""
+        lease = self.claim_lease(
+            lease_seconds=lease_seconds,
+            reclaim_limit=reclaim_limit,
+            sample_k=sample_k,
+            block_timeout=block_timeout,
+            filters=filters,
+        )
+        return lease.member if lease else None
+
+    def claim_lease(
+        self,
+        *,
+        lease_seconds: int,
+        reclaim_limit: int = 200,
+        sample_k: int = 50,
+        block_timeout: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Optional[ProxyLease]:
+        """
+        alive에서 1개를 임대. 만료 lease 회수는 claim 스크립트에서 하지 않고,
+        다음 만료 시각이 지났을 때만 reap()을 먼저 호출한다(reclaim_limit = reap 배치 크기).
+
+        block_timeout(초)을 주면 풀이 비어있을 때 최대 그 시간만큼 대기:
+          - signal list BLPOP (collector 신규 등록 / release / reaper 회수 시 즉시 깨어남)
+          - 가장 빠른 쿨다운 만료 시각(alive의 미래 score)과 다음 lease 만료 시각에도 깨어나 재시도
+
+        filters: 속성 조건(모두 AND). 인덱스 교집합은 claim 스크립트 안에서 원자적으로 처리.
+          {"protocol": "socks5", "country": "KR", "proxy_type": "Static", "residential": True, "max_latency_ms": 500}
+
+        prefetch가 켜져 있고 filters가 같으면 버퍼의 lease를 먼저 내준다(비어 있으면 직접 claim).
+        """
+        prefetcher = self._prefetcher
+        if prefetcher is not None and prefetcher.matches(filters):
+            lease = prefetcher.pop()
+            if lease is not None:
+                LEASE_CLAIMS.labels("prefetch").inc()
+                if int(lease_seconds) != prefetcher.lease_seconds:
+                    self.renew(lease.member, lease_seconds=lease_seconds)
+                return lease
+        return self._claim_direct(
+            lease_seconds=lease_seconds,
+            reclaim_limit=reclaim_limit,
+            sample_k=sample_k,
+            block_timeout=block_timeout,
+            filters=filters,
+        )
+
+    def _claim_direct(
+        self,
+        *,
+        lease_seconds: int,
+        reclaim_limit: int,
+        sample_k: int,
+        block_timeout: Optional[float],
+        filters: Optional[Dict[str, Any]],
+    ) -> Optional[ProxyLease]:
+        deadline = time.time() + float(block_timeout or 0)
+        while True:
+            lease = self._claim_with_reap(
+                lease_seconds=lease_seconds, reclaim_limit=reclaim_limit, sample_k=sample_k, filters=filters
             )
-        except redis.RedisError:
-            return None
+            if lease is not None or not block_timeout:
+                return lease
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            self._wait_for_signal(remaining)
 
-        if not member:
-            return None
-        if not isinstance(member, str):
-            member = str(member)
-        if "://" not in member:
-            return None
-        return member
+    def _claim_with_reap(
+        self, *, lease_seconds: int, reclaim_limit: int, sample_k: int, filters: Optional[Dict[str, Any]] = None
+    ) -> Optional[ProxyLease]:
+        if time.time() >= self._next_reap_at:
+            self.reap(limit=reclaim_limit)
 
-    def release(self, member: str, *, cooldown_seconds: int = 0) -> bool:
-        next_time = int(time.time()) + max(0, int(cooldown_seconds))
+        lease = self._claim_once(lease_seconds=lease_seconds, sample_k=sample_k, filters=filters)
+        if lease is None:
+            # 풀이 비었을 때만: 캐시된 만료 시각이 낡았을 수 있으니 한 번 회수 후 재시도
+            if self.reap(limit=reclaim_limit) > 0:
+                lease = self._claim_once(lease_seconds=lease_seconds, sample_k=sample_k, filters=filters)
+        return lease
+
+    def _wait_for_signal(self, max_wait: float) -> None:
+        """신호가 오거나, 다음 쿨다운/lease 만료 시각이 되거나, max_wait이 지날 때까지 대기."""
+        next_cooldown = None
         try:
-            self.r.eval(self._LUA_RELEASE, 2, self.alive_key, self.lease_key, member, next_time)
-            return True
+            nxt = self.r.zrangebyscore(self.alive_key, f"({int(time.time())}", "+inf", start=0, num=1, withscores=True)
+            if nxt:
+                next_cooldown = float(nxt[0][1])
         except redis.RedisError:
-            return False
+            pass
 
-    def ban(self, member: str) -> bool:
+        wait = self._signal_wait(max_wait, next_cooldown)
         try:
-            self.r.eval(self._LUA_BAN, 2, self.alive_key, self.lease_key, member)
-            return True
+            self.r.blpop([self.signal_key], timeout=wait)
         except redis.RedisError:
+            time.sleep(min(wait, 1.0))
+
+    def _claim_once(
+        self, *, lease_seconds: int, sample_k: int, filters: Optional[Dict[str, Any]] = None
+    ) -> Optional[ProxyLease]:
+        now = int(time.time())
+        t0 = time.perf_counter()
+        try:
+            res = self._eval(self._claim_call(now, lease_seconds, sample_k, filters))
+        except redis.RedisError as e:
+            _log.warning("claim_error", error=str(e))
+            return self._observe_claim(t0, None)
+        return self._observe_claim(t0, self._on_claim_result(res, now, lease_seconds))
+
+    def reap(self, *, limit: int = 200) -> int:
+        """
+        만료된 lease를 최대 limit개 alive로 회수. 회수한 개수를 반환.
+        다음 만료 시각을 기억해 그 전까지는 claim 경로에서 reap을 건너뛴다.
+        """
+        try:
+            res = self._eval(self._reap_call(int(time.time()), limit))
+        except redis.RedisError as e:
+            _log.warning("reap_error", error=str(e))
+            self._next_reap_at = time.time() + self.reap_max_interval
+            return 0
+        return self._on_reap_result(res, limit)
+
+    def start_reaper(self, *, interval: float = 1.0, limit: int = 200) -> None:
+        """백그라운드 쓰레드에서 주기적으로 reap() 실행 (claim 경로의 회수 부담을 완전히 제거)."""
+        if self._reaper_thread is not None and self._reaper_thread.is_alive():
+            return
+        self._reaper_stop.clear()
+
+        def _loop():
+            while not self._reaper_stop.is_set():
+                try:
+                    moved = self.reap(limit=limit)
+                except Exception:
+                    moved = 0
+                # 배치가 꽉 찼으면 쉬지 않고 이어서 회수
+                if moved < int(limit):
+                    self._reaper_stop.wait(interval)
+
+        self._reaper_thread = threading.Thread(target=_loop, name="proxy-lease-reaper", daemon=True)
+        self._reaper_thread.start()
+
+    def start_prefetch(
+        self,
+        *,
+        size: int = 2,
+        lease_seconds: int = 60,
+        idle_timeout: float = 300.0,
+        refill_wait: float = 5.0,
+        filters: Optional[Dict[str, Any]] = None,
+        sample_k: int = 50,
+        reclaim_limit: int = 200,
+    ) -> "LeasePrefetcher":
+        """claim_lease()용 로컬 lease 버퍼를 백그라운드에서 채운다 (close()/stop_prefetch() 시 남은 lease 반납)."""
+        if self._prefetcher is None:
+            self._prefetcher = LeasePrefetcher(
+                self,
+                size=size,
+                lease_seconds=lease_seconds,
+                idle_timeout=idle_timeout,
+                refill_wait=refill_wait,
+                filters=filters,
+                sample_k=sample_k,
+                reclaim_limit=reclaim_limit,
+            ).start()
+        return self._prefetcher
+
+    def stop_prefetch(self) -> None:
+        prefetcher, self._prefetcher = self._prefetcher, None
+        if prefetcher is not None:
+            prefetcher.stop()
+
+    def stop_reaper(self) -> None:
+        self._reaper_stop.set()
+        t = self._reaper_thread
+        if t is not None and t.is_alive() and t is not threading.current_thread():
+            t.join(timeout=5)
+        self._reaper_thread = None
+
+    def release(
+        self,
+        member: str,
+        *,
+        cooldown_seconds: int = 0,
+        outcome: Optional[str] = None,
+        token: Optional[str] = None,
+    ) -> bool:
+        """
+        lease -> alive 반납. outcome="ok"/"fail"이면 feedback hash에 세션 결과를 누적(시간 감쇠)한다.
+        token을 생략하면 이 클라이언트가 claim할 때 받은 토큰을 사용.
+        소유권이 없으면(이미 만료/회수됨) False.
+        """
+        now = int(time.time())
+        next_time = now + max(0, int(cooldown_seconds))
+        try:
+            res = self._eval(self._release_call(member, now, next_time, outcome, token))
+        except redis.RedisError as e:
+            _log.warning("release_error", member=member, error=str(e))
             return False
+        return self._on_settle_result(member, token, bool(int(res or 0)))
 
-    def inc_fail(self, member: str) -> int:
+    def ban(self, member: str, *, token: Optional[str] = None) -> bool:
         try:
-            return int(self.r.hincrby(self.fail_hash, member, 1))
-        except Exception:
-            return 1
+            res = self._eval(self._ban_call(member, token))
+        except redis.RedisError as e:
+            _log.warning("ban_error", member=member, error=str(e))
+            return False
+        return self._on_settle_result(member, token, bool(int(res or 0)))
+
+    def renew(self, member: str, *, lease_seconds: int, token: Optional[str] = None) -> bool:
+        """
+        lease 만료 시각을 now + lease_seconds로 연장(heartbeat).
+        토큰이 일치하지 않거나 이미 회수된 lease면 False -> 호출부는 세션을 중단하는 게 안전.
+        """
+        expire_at = int(time.time()) + int(lease_seconds)
+        try:
+            res = self._eval(self._renew_call(member, expire_at, token))
+        except redis.RedisError as e:
+            _log.warning("renew_error", member=member, error=str(e))
+            return False
+        return self._on_renew_result(member, res, expire_at)
 
-    def reset_fail(self, member: str) -> None:
+    def heartbeat(self, member: str, *, lease_seconds: int, interval: Optional[float] = None) -> "LeaseHeartbeat":
+        """member의 lease를 백그라운드 쓰레드에서 주기적으로 renew. 반환된 객체의 stop()으로 종료."""
+        hb = LeaseHeartbeat(self, member, lease_seconds=lease_seconds, interval=interval)
+        hb.start()
+        return hb
+
+    def _record_feedback(self, member: str, *, ok: bool) -> None:
+        """ban처럼 alive로 돌려놓지 않는 경우에도 피드백은 남긴다(재수집 시 낮은 가중치로 시작)."""
         try:
-            self.r.hdel(self.fail_hash, member)
+            raw = self.r.hget(self.feedback_hash, member)
+            self.r.hset(self.feedback_hash, member, self._decayed_feedback(raw, ok=ok, now=int(time.time())))
         except Exception:
             pass
 
+    def record_health(self, member: str, *, ok: bool, token: Optional[str] = None) -> Optional[Tuple[float, int]]:
+        """
+        세션 결과를 health(EWMA)에 반영. 반환: (health, strikes). Redis 오류 시 (1.0, 0).
+        token을 주면 그 토큰이 현재 소유자일 때만 반영하고, 아니면 아무 것도 바꾸지 않고 None.
+        """
+        try:
+            res = self._eval(self._health_call(member, ok, int(time.time()), token))
+        except redis.RedisError as e:
+            _log.warning("health_error", member=member, error=str(e))
+            return 1.0, 0
+        return self._on_health_result(res)
+
+    def probation(self, member: str, *, token: Optional[str] = None) -> Dict[str, Any]:
+        """lease 중인 멤버를 probation으로 보냄(재검증 전까지 claim 불가). 토큰 불일치면 action="rejected"."""
+        try:
+            res = self._eval(self._probation_call(member, int(time.time()), token))
+        except redis.RedisError as e:
+            _log.warning("probation_error", member=member, error=str(e))
+            return {"action": "rejected", "strikes": 0, "until": None}
+        info = self._on_probation_result(res)
+        self._on_settle_result(member, token, info["action"] != "rejected")
+        return info
+
     def release_on_result(
         self,
         member: str,
@@ -191,19 +1463,381 @@ class RedisProxyLeaseClient:
         session_ok: bool,
         cooldown_success: int = 0,
         cooldown_fail_base: int = 30,
+        cooldown_fail_max: int = 1800,
         cooldown_fail_jitter: int = 60,
-        max_fail: int = 5,
+        ban_below: float = 0.25,
     ) -> Dict[str, Any]:
+        """
+        세션 결과를 health에 반영한 뒤 release / probation.
+        - 성공: cooldown_success 후 재사용
+        - 실패: health에 비례한 쿨다운 후 재사용, health < ban_below 이면 probation
+        소유권을 잃은 lease(만료 후 회수/재임대)면 health/이력도 건드리지 않고 action="rejected".
+        """
+        token = self._token_for(member, None)
+        recorded = self.record_health(member, ok=session_ok, token=token)
+        if recorded is None:
+            self._on_settle_result(member, None, False)
+            return self._observe_release({"action": "rejected", "health": None, "cooldown": 0})
+        health, strikes = recorded
         if session_ok:
-            self.reset_fail(member)
-            self.release(member, cooldown_seconds=int(cooldown_success))
-            return {"action": "released", "fails": 0, "cooldown": int(cooldown_success)}
-
-        fails = self.inc_fail(member)
-        if fails >= int(max_fail):
-            self.ban(member)
-            return {"action": "banned", "fails": int(fails), "cooldown": 0}
-
-        cooldown = int(cooldown_fail_base) + random.randint(0, max(0, int(cooldown_fail_jitter)))
-        self.release(member, cooldown_seconds=cooldown)
-        return {"action": "released", "fails": int(fails), "cooldown": int(cooldown)}
+            ok = self.release(member, cooldown_seconds=int(cooldown_success), outcome="ok")
+            return self._observe_release(
+                {"action": "released" if ok else "rejected", "health": health, "cooldown": int(cooldown_success)}
+            )
+
+        if health < float(ban_below):
+            self._record_feedback(member, ok=False)
+            info = self.probation(member)
+            info.update(health=health, cooldown=0)
+            return self._observe_release(info)
+
+        cooldown = self._health_cooldown(health, cooldown_fail_base, cooldown_fail_max, cooldown_fail_jitter)
+        ok = self.release(member, cooldown_seconds=cooldown, outcome="fail")
+        return self._observe_release({"action": "released" if ok else "rejected", "health": health, "cooldown": int(cooldown)})
+
+
+class LeaseHeartbeat:
+    """
+    lease 연장 쓰레드.
+    - interval 기본값: lease_seconds / 3 (연장 1~2번이 실패해도 만료 전 재시도 가능)
+    - 연장이 거부되면(lease 상실) lost 이벤트를 set 하고 종료
+    """
+
+    def __init__(
+        self,
+        client: RedisProxyLeaseClient,
+        member: str,
+        *,
+        lease_seconds: int,
+        interval: Optional[float] = None,
+    ):
+        self.client = client
+        self.member = member
+        self.lease_seconds = int(lease_seconds)
+        self.interval = float(interval) if interval else max(1.0, self.lease_seconds / 3.0)
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LeaseHeartbeat":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name=f"lease-heartbeat-{self.member}", daemon=True)
+            self._thread.start()
+        return self
+
+    def _loop(self) -> None:
+        misses = 0
+        while not self._stop.wait(self.interval):
+            if self.client.renew(self.member, lease_seconds=self.lease_seconds):
+                misses = 0
+                continue
+            misses += 1
+            # 토큰 불일치는 즉시 상실, 일시적 Redis 오류는 만료 전까지 재시도
+            if self.client.get_lease(self.member) is None or misses * self.interval >= self.lease_seconds:
+                self.lost.set()
+                return
+
+    def stop(self) -> None:
+        self._stop.set()
+        t = self._thread
+        if t is not None and t.is_alive() and t is not threading.current_thread():
+            t.join(timeout=5)
+        self._thread = None
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+class LeasePrefetcher:
+    """
+    미리 claim 해둔 lease를 로컬 버퍼에 보관하다가 즉시 내주는 쓰레드 (RedisProxyLeaseClient.start_prefetch()).
+    - 버퍼가 size보다 적으면 claim(block_timeout=refill_wait)으로 채움 (풀이 비면 신호 대기)
+    - 버퍼의 lease는 lease_seconds / 3 마다 renew (소유권을 잃으면 버퍼에서 버림)
+    - idle_timeout 동안 pop()이 없으면 버퍼를 모두 반납하고, 다음 pop()이 올 때까지 채우지 않음
+    - stop() 시 남은 lease 반납 (쿨다운/피드백 없이 alive로)
+    """
+
+    def __init__(
+        self,
+        client: RedisProxyLeaseClient,
+        *,
+        size: int,
+        lease_seconds: int,
+        idle_timeout: float = 300.0,
+        refill_wait: float = 5.0,
+        filters: Optional[Dict[str, Any]] = None,
+        sample_k: int = 50,
+        reclaim_limit: int = 200,
+    ):
+        self.client = client
+        self.size = max(1, int(size))
+        self.lease_seconds = int(lease_seconds)
+        self.idle_timeout = float(idle_timeout)
+        self.refill_wait = float(refill_wait)
+        self.filters = filters
+        self.sample_k = int(sample_k)
+        self.reclaim_limit = int(reclaim_limit)
+        self.interval = max(1.0, self.lease_seconds / 3.0)
+        self._buf: Deque[ProxyLease] = deque()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._last_pop = time.time()
+        self._idle = False
+        self._thread: Optional[threading.Thread] = None
+
+    def matches(self, filters: Optional[Dict[str, Any]]) -> bool:
+        return (filters or None) == (self.filters or None)
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._buf)
+
+    def start(self) -> "LeasePrefetcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="lease-prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def pop(self) -> Optional[ProxyLease]:
+        """버퍼에서 lease 1개 (없으면 None, 대기하지 않음). 호출될 때마다 idle 타이머 갱신 + 보충 깨우기."""
+        with self._cond:
+            self._last_pop = time.time()
+            self._idle = False
+            lease = None
+            while self._buf:
+                cand = self._buf.popleft()
+                # 만료 직전 lease는 내주지 않음 (renew 실패가 이어진 경우)
+                if cand.expires_at > time.time() + 1:
+                    lease = cand
+                    break
+            self._cond.notify()
+            return lease
+
+    def handoff(self) -> Optional[ProxyLease]:
+        """pop() 후 토큰 기록을 원 클라이언트에서 지움 (다른 클라이언트가 adopt() 해서 쓸 때)."""
+        lease = self.pop()
+        if lease is not None:
+            self.client._forget(lease.member)
+        return lease
+
+    def _loop(self) -> None:
+        next_renew = time.time() + self.interval
+        while not self._stop.is_set():
+            now = time.time()
+            if not self._idle and now - self._last_pop >= self.idle_timeout:
+                with self._cond:
+                    self._idle = True
+                self._drain()
+
+            if now >= next_renew:
+                self._renew_all()
+                next_renew = time.time() + self.interval
+
+            with self._cond:
+                need = (not self._idle) and len(self._buf) < self.size
+            if need:
+                lease = self.client._claim_direct(
+                    lease_seconds=self.lease_seconds,
+                    reclaim_limit=self.reclaim_limit,
+                    sample_k=self.sample_k,
+                    block_timeout=max(0.1, min(self.refill_wait, next_renew - time.time())),
+                    filters=self.filters,
+                )
+                if lease is not None:
+                    with self._cond:
+                        self._buf.append(lease)
+                    if self._stop.is_set():
+                        break
+                continue
+
+            with self._cond:
+                self._cond.wait(timeout=max(0.05, min(1.0, next_renew - time.time())))
+        self._drain()
+
+    def _renew_all(self) -> None:
+        with self._cond:
+            leases = list(self._buf)
+        for lease in leases:
+            if self.client.renew(lease.member, lease_seconds=self.lease_seconds):
+                continue
+            if self.client.get_lease(lease.member) is None:
+                with self._cond:
+                    try:
+                        self._buf.remove(lease)
+                    except ValueError:
+                        pass
+
+    def _drain(self) -> None:
+        with self._cond:
+            leases = list(self._buf)
+            self._buf.clear()
+        for lease in leases:
+            self.client.release(lease.member)
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        t = self._thread
+        if t is not None and t.is_alive() and t is not threading.current_thread():
+            t.join(timeout=self.refill_wait + 5)
+        self._thread = None
+        self._drain()
+
+
+class ShardedRedisProxyLeaseClient:
+    """
+    샤딩된 풀(shard_key_names) 위의 클라이언트. 샤드마다 RedisProxyLeaseClient 1개(연결은 공유).
+    - claim: 샤드를 least_loaded(사용 가능 멤버 수가 많은 순, load_refresh초 캐시) 또는 random 순서로 시도
+    - release/ban/renew/probation/heartbeat: member -> shard_of(member) 샤드로 라우팅
+    - cluster=True 이면 RedisCluster 연결 사용 (샤드 키는 hash tag로 한 슬롯에 모이므로 스크립트가 CROSSSLOT 없이 동작)
+
+    collector도 같은 shards 값으로 shard_key_names / shard_of를 써야 함.
+    """
+
+    def __init__(
+        self,
+        config: RedisConnConfig,
+        *,
+        shards: int,
+        order: str = "least_loaded",
+        load_refresh: float = 1.0,
+        cluster: bool = False,
+        **kwargs: Any,
+    ):
+        if order not in ("least_loaded", "random"):
+            raise ValueError(f"unknown shard order: {order}")
+        self.config = config
+        self.shards = max(1, int(shards))
+        self.order = order
+        self.load_refresh = float(load_refresh)
+        self.cluster = bool(cluster)
+        # owner_id는 샤드 클라이언트 전체가 공유 (토큰의 소유자 구분은 프로세스 단위)
+        kwargs.setdefault("owner_id", uuid.uuid4().hex[:12])
+        tagged = True if self.cluster else None
+        self.clients: List[RedisProxyLeaseClient] = [
+            RedisProxyLeaseClient(config, cluster=self.cluster, **LeaseClientBase.shard_key_names(i, self.shards, tagged=tagged), **kwargs)
+            for i in range(self.shards)
+        ]
+        self._loads: List[int] = [0] * self.shards
+        self._loads_at = 0.0
+        self._loads_lock = threading.Lock()
+
+    def connect(self) -> redis.Redis:
+        r = self.clients[0].connect()
+        for c in self.clients[1:]:
+            c.connect(r)
+        return r
+
+    def close(self) -> None:
+        for c in self.clients:
+            c.stop_prefetch()
+            c.stop_reaper()
+        self.clients[0].close()
+
+    def client_for(self, member: str) -> RedisProxyLeaseClient:
+        return self.clients[LeaseClientBase.shard_of(member, self.shards)]
+
+    # ---------------- claim ----------------
+
+    def _shard_order(self) -> List[int]:
+        idx = list(range(self.shards))
+        random.shuffle(idx)
+        if self.order == "random":
+            return idx
+
+        now = time.time()
+        with self._loads_lock:
+            stale = now - self._loads_at >= self.load_refresh
+        if stale:
+            loads = []
+            pipe = self.clients[0].r.pipeline(transaction=False)
+            for c in self.clients:
+                pipe.zcount(c.alive_key, "-inf", int(now))
+            try:
+                loads = [int(x) for x in pipe.execute()]
+            except redis.RedisError:
+                loads = []
+            with self._loads_lock:
+                if loads:
+                    self._loads = loads
+                self._loads_at = now
+        with self._loads_lock:
+            loads = list(self._loads)
+        # 셔플 후 안정 정렬 -> 같은 부하끼리는 랜덤 순서
+        return sorted(idx, key=lambda i: -loads[i])
+
+    def claim(self, **kwargs: Any) -> Optional[str]:
+        lease = self.claim_lease(**kwargs)
+        return lease.member if lease else None
+
+    def claim_lease(
+        self,
+        *,
+        lease_seconds: int,
+        reclaim_limit: int = 200,
+        sample_k: int = 50,
+        block_timeout: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Optional[ProxyLease]:
+        """
+        샤드를 순서대로 한 번씩(non-blocking) 시도. 모두 비었고 block_timeout이 있으면
+        샤드들의 signal을 짧게 번갈아 BLPOP 하며 재시도 (Cluster에서는 여러 슬롯 키를 한 BLPOP에 못 씀).
+        """
+        deadline = time.time() + float(block_timeout or 0)
+        while True:
+            for i in self._shard_order():
+                lease = self.clients[i].claim_lease(
+                    lease_seconds=lease_seconds, reclaim_limit=reclaim_limit, sample_k=sample_k, filters=filters
+                )
+                if lease is not None:
+                    with self._loads_lock:
+                        self._loads[i] = max(0, self._loads[i] - 1)
+                    return lease
+            remaining = deadline - time.time()
+            if not block_timeout or remaining <= 0:
+                return None
+            slice_wait = max(0.1, min(remaining, 1.0) / self.shards)
+            for c in self.clients:
+                c._wait_for_signal(slice_wait)
+            with self._loads_lock:
+                self._loads_at = 0.0
+
+    # ---------------- member 단위 작업 (샤드 라우팅) ----------------
+
+    def get_lease(self, member: str) -> Optional[ProxyLease]:
+        return self.client_for(member).get_lease(member)
+
+    def release(self, member: str, **kwargs: Any) -> bool:
+        return self.client_for(member).release(member, **kwargs)
+
+    def ban(self, member: str, **kwargs: Any) -> bool:
+        return self.client_for(member).ban(member, **kwargs)
+
+    def renew(self, member: str, **kwargs: Any) -> bool:
+        return self.client_for(member).renew(member, **kwargs)
+
+    def probation(self, member: str, **kwargs: Any) -> Dict[str, Any]:
+        return self.client_for(member).probation(member, **kwargs)
+
+    def heartbeat(self, member: str, **kwargs: Any) -> "LeaseHeartbeat":
+        return self.client_for(member).heartbeat(member, **kwargs)
+
+    def release_on_result(self, member: str, **kwargs: Any) -> Dict[str, Any]:
+        return self.client_for(member).release_on_result(member, **kwargs)
+
+    # ---------------- reaper ----------------
+
+    def reap(self, *, limit: int = 200) -> int:
+        return sum(c.reap(limit=limit) for c in self.clients)
+
+    def start_reaper(self, *, interval: float = 1.0, limit: int = 200) -> None:
+        for c in self.clients:
+            c.start_reaper(interval=interval, limit=limit)
+
+    def stop_reaper(self) -> None:
+        for c in self.clients:
+            c.stop_reaper()
@@ -0,0 +1,442 @@
+# redis_proxy_lease_async.py
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import Optional, Dict, Any, List, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from proxy_log import get_logger
+from proxy_metrics import LEASE_CLAIMS
+from redis_proxy_lease import LeaseClientBase, LeasePrefetcher, ProxyLease, RedisConnConfig
+
+
+_log = get_logger("lease_async")
+
+# 이벤트 루프별 공유 커넥션 풀 (redis.asyncio 커넥션은 생성된 루프에 묶여 있으므로 루프 단위로 공유)
+#   loop -> {(host, port, db, password, decode_responses, socket_timeout): ConnectionPool}
+_POOLS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, aioredis.ConnectionPool]]" = (
+    weakref.WeakKeyDictionary()
+)
+_POOLS_LOCK = threading.Lock()
+
+
+def _shared_pool(
+    config: RedisConnConfig, *, decode_responses: bool, socket_timeout: Optional[float]
+) -> aioredis.ConnectionPool:
+    loop = asyncio.get_running_loop()
+    key = (config.host, config.port, config.db, config.password, decode_responses, socket_timeout)
+    with _POOLS_LOCK:
+        pools = _POOLS.setdefault(loop, {})
+        pool = pools.get(key)
+        if pool is None:
+            pool = aioredis.ConnectionPool(
+                host=config.host,
+                port=config.port,
+                db=config.db,
+                password=config.password,
+                decode_responses=decode_responses,
+                socket_timeout=socket_timeout,
+            )
+            pools[key] = pool
+        return pool
+
+
+async def close_shared_pools() -> None:
+    """현재 이벤트 루프의 공유 풀을 모두 닫는다(프로세스/루프 종료 직전에 호출)."""
+    loop = asyncio.get_running_loop()
+    with _POOLS_LOCK:
+        pools = _POOLS.pop(loop, {})
+    for pool in pools.values():
+        try:
+            await pool.disconnect()
+        except Exception:
+            pass
+
+
+class AsyncRedisProxyLeaseClient(LeaseClientBase):
+    """
+    redis.asyncio 기반 비동기 클라이언트.
+    - Lua 스크립트/인자 구성/결과 처리는 RedisProxyLeaseClient와 동일(LeaseClientBase 공유)
+    - 커넥션은 이벤트 루프별 공유 풀을 사용하므로 세션마다 클라이언트를 만들어도 새 연결을 맺지 않음
+    - lease(...)는 claim -> heartbeat -> release_on_result 를 묶은 async context manager
+
+    사용 예)
+        client = AsyncRedisProxyLeaseClient(RedisConnConfig())
+        await client.connect()
+        async with client.lease(lease_seconds=60, block_timeout=60) as lease:
+            if not lease:
+                return
+            ... lease.member 사용 ...
+            lease.session_ok = True
+    """
+
+    def __init__(self, config: RedisConnConfig, **kwargs: Any):
+        super().__init__(config, **kwargs)
+        self._r: Optional[aioredis.Redis] = None
+
+    async def connect(self) -> aioredis.Redis:
+        pool = _shared_pool(self.config, decode_responses=self.decode_responses, socket_timeout=self.socket_timeout)
+        r = aioredis.Redis(connection_pool=pool)
+        await r.ping()
+        self._r = r
+        await self._prepare_scripts()
+        return r
+
+    @property
+    def r(self) -> aioredis.Redis:
+        if self._r is None:
+            raise RuntimeError("AsyncRedisProxyLeaseClient: not connected. call connect() first.")
+        return self._r
+
+    async def close(self) -> None:
+        # 공유 풀은 닫지 않음 (close_shared_pools() 참고)
+        self._r = None
+
+    async def _prepare_scripts(self) -> None:
+        """RedisProxyLeaseClient._prepare_scripts와 동일."""
+        try:
+            try:
+                server_version: Optional[int] = int(await self.r.fcall(self._function_name("version"), 0))
+            except redis.ResponseError as e:
+                if not self._is_missing_function(e):
+                    raise
+                server_version = None
+
+            action = self._library_action(server_version)
+            if action == "load":
+                await self.r.function_load(self.library_code(), replace=True)
+            self._script_mode = "evalsha" if action == "evalsha" else "function"
+        except redis.ResponseError as e:
+            if not self._is_unknown_command(e):
+                raise
+            _log.debug("script_mode", mode="evalsha", reason=str(e))
+            self._script_mode = "evalsha"
+
+    async def _eval(self, call: Tuple[str, List[str], List[Any]]) -> Any:
+        op, keys, args = call
+        if self._script_mode == "function":
+            try:
+                return await self.r.fcall(self._function_name(op), len(keys), *keys, *args)
+            except redis.ResponseError as e:
+                if not self._is_missing_function(e):
+                    raise
+                await self._prepare_scripts()
+                if self._script_mode == "function":
+                    return await self.r.fcall(self._function_name(op), len(keys), *keys, *args)
+
+        try:
+            return await self.r.evalsha(self._SCRIPT_SHAS[op], len(keys), *keys, *args)
+        except redis.exceptions.NoScriptError:
+            await self.r.script_load(self._SCRIPTS[op])
+            return await self.r.evalsha(self._SCRIPT_SHAS[op], len(keys), *keys, *args)
+
+    async def claim(
+        self,
+        *,
+        lease_seconds: int,
+        reclaim_limit: int = 200,
+        sample_k: int = 50,
+        block_timeout: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Optional[str]:
+        lease = await self.claim_lease(
+            lease_seconds=lease_seconds,
+            reclaim_limit=reclaim_limit,
+            sample_k=sample_k,
+            block_timeout=block_timeout,
+            filters=filters,
+        )
+        return lease.member if lease else None
+
+    async def claim_lease(
+        self,
+        *,
+        lease_seconds: int,
+        reclaim_limit: int = 200,
+        sample_k: int = 50,
+        block_timeout: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Optional[ProxyLease]:
+        """RedisProxyLeaseClient.claim_lease와 동일 (대기 중에도 이벤트 루프를 막지 않음)."""
+        deadline = time.time() + float(block_timeout or 0)
+        while True:
+            lease = await self._claim_with_reap(
+                lease_seconds=lease_seconds, reclaim_limit=reclaim_limit, sample_k=sample_k, filters=filters
+            )
+            if lease is not None or not block_timeout:
+                return lease
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            await self._wait_for_signal(remaining)
+
+    async def _claim_with_reap(
+        self, *, lease_seconds: int, reclaim_limit: int, sample_k: int, filters: Optional[Dict[str, Any]] = None
+    ) -> Optional[ProxyLease]:
+        if time.time() >= self._next_reap_at:
+            await self.reap(limit=reclaim_limit)
+
+        lease = await self._claim_once(lease_seconds=lease_seconds, sample_k=sample_k, filters=filters)
+        if lease is None:
+            if await self.reap(limit=reclaim_limit) > 0:
+                lease = await self._claim_once(lease_seconds=lease_seconds, sample_k=sample_k, filters=filters)
+        return lease
+
+    async def _wait_for_signal(self, max_wait: float) -> None:
+        next_cooldown = None
+        try:
+            nxt = await self.r.zrangebyscore(
+                self.alive_key, f"({int(time.time())}", "+inf", start=0, num=1, withscores=True
+            )
+            if nxt:
+                next_cooldown = float(nxt[0][1])
+        except redis.RedisError:
+            pass
+
+        wait = self._signal_wait(max_wait, next_cooldown)
+        try:
+            await self.r.blpop([self.signal_key], timeout=wait)
+        except redis.RedisError:
+            await asyncio.sleep(min(wait, 1.0))
+
+    async def _claim_once(
+        self, *, lease_seconds: int, sample_k: int, filters: Optional[Dict[str, Any]] = None
+    ) -> Optional[ProxyLease]:
+        now = int(time.time())
+        t0 = time.perf_counter()
+        try:
+            res = await self._eval(self._claim_call(now, lease_seconds, sample_k, filters))
+        except redis.RedisError as e:
+            _log.warning("claim_error", error=str(e))
+            return self._observe_claim(t0, None)
+        return self._observe_claim(t0, self._on_claim_result(res, now, lease_seconds))
+
+    async def reap(self, *, limit: int = 200) -> int:
+        try:
+            res = await self._eval(self._reap_call(int(time.time()), limit))
+        except redis.RedisError as e:
+            _log.warning("reap_error", error=str(e))
+            self._next_reap_at = time.time() + self.reap_max_interval
+            return 0
+        return self._on_reap_result(res, limit)
+
+    async def release(
+        self,
+        member: str,
+        *,
+        cooldown_seconds: int = 0,
+        outcome: Optional[str] = None,
+        token: Optional[str] = None,
+    ) -> bool:
+        now = int(time.time())
+        next_time = now + max(0, int(cooldown_seconds))
+        try:
+            res = await self._eval(self._release_call(member, now, next_time, outcome, token))
+        except redis.RedisError as e:
+            _log.warning("release_error", member=member, error=str(e))
+            return False
+        return self._on_settle_result(member, token, bool(int(res or 0)))
+
+    async def ban(self, member: str, *, token: Optional[str] = None) -> bool:
+        try:
+            res = await self._eval(self._ban_call(member, token))
+        except redis.RedisError as e:
+            _log.warning("ban_error", member=member, error=str(e))
+            return False
+        return self._on_settle_result(member, token, bool(int(res or 0)))
+
+    async def renew(self, member: str, *, lease_seconds: int, token: Optional[str] = None) -> bool:
+        expire_at = int(time.time()) + int(lease_seconds)
+        try:
+            res = await self._eval(self._renew_call(member, expire_at, token))
+        except redis.RedisError as e:
+            _log.warning("renew_error", member=member, error=str(e))
+            return False
+        return self._on_renew_result(member, res, expire_at)
+
+    async def _record_feedback(self, member: str, *, ok: bool) -> None:
+        try:
+            raw = await self.r.hget(self.feedback_hash, member)
+            await self.r.hset(self.feedback_hash, member, self._decayed_feedback(raw, ok=ok, now=int(time.time())))
+        except Exception:
+            pass
+
+    async def record_health(self, member: str, *, ok: bool, token: Optional[str] = None) -> Optional[Tuple[float, int]]:
+        try:
+            res = await self._eval(self._health_call(member, ok, int(time.time()), token))
+        except redis.RedisError as e:
+            _log.warning("health_error", member=member, error=str(e))
+            return 1.0, 0
+        return self._on_health_result(res)
+
+    async def probation(self, member: str, *, token: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            res = await self._eval(self._probation_call(member, int(time.time()), token))
+        except redis.RedisError as e:
+            _log.warning("probation_error", member=member, error=str(e))
+            return {"action": "rejected", "strikes": 0, "until": None}
+        info = self._on_probation_result(res)
+        self._on_settle_result(member, token, info["action"] != "rejected")
+        return info
+
+    async def release_on_result(
+        self,
+        member: str,
+        *,
+        session_ok: bool,
+        cooldown_success: int = 0,
+        cooldown_fail_base: int = 30,
+        cooldown_fail_max: int = 1800,
+        cooldown_fail_jitter: int = 60,
+        ban_below: float = 0.25,
+    ) -> Dict[str, Any]:
+        """RedisProxyLeaseClient.release_on_result와 동일."""
+        token = self._token_for(member, None)
+        recorded = await self.record_health(member, ok=session_ok, token=token)
+        if recorded is None:
+            self._on_settle_result(member, None, False)
+            return self._observe_release({"action": "rejected", "health": None, "cooldown": 0})
+        health, strikes = recorded
+        if session_ok:
+            ok = await self.release(member, cooldown_seconds=int(cooldown_success), outcome="ok")
+            return self._observe_release(
+                {"action": "released" if ok else "rejected", "health": health, "cooldown": int(cooldown_success)}
+            )
+
+        if health < float(ban_below):
+            await self._record_feedback(member, ok=False)
+            info = await self.probation(member)
+            info.update(health=health, cooldown=0)
+            return self._observe_release(info)
+
+        cooldown = self._health_cooldown(health, cooldown_fail_base, cooldown_fail_max, cooldown_fail_jitter)
+        ok = await self.release(member, cooldown_seconds=cooldown, outcome="fail")
+        return self._observe_release({"action": "released" if ok else "rejected", "health": health, "cooldown": int(cooldown)})
+
+    def lease(
+        self,
+        *,
+        lease_seconds: int,
+        block_timeout: Optional[float] = None,
+        reclaim_limit: int = 200,
+        sample_k: int = 50,
+        heartbeat_interval: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        prefetcher: Optional[LeasePrefetcher] = None,
+        **release_kwargs: Any,
+    ) -> "AsyncLeaseHandle":
+        """
+        async with client.lease(...) as lease: 형태의 임대 핸들.
+        release_kwargs는 종료 시 release_on_result로 전달(cooldown_success, cooldown_fail_base, ...).
+        prefetcher(동기 클라이언트의 LeasePrefetcher)를 주면 버퍼의 lease를 먼저 넘겨받아 사용.
+        """
+        return AsyncLeaseHandle(
+            self,
+            lease_seconds=lease_seconds,
+            block_timeout=block_timeout,
+            reclaim_limit=reclaim_limit,
+            sample_k=sample_k,
+            heartbeat_interval=heartbeat_interval,
+            filters=filters,
+            prefetcher=prefetcher,
+            release_kwargs=release_kwargs,
+        )
+
+
+class AsyncLeaseHandle:
+    """
+    claim -> (heartbeat task) -> release_on_result 를 묶은 async context manager.
+    - 진입 시 claim (block_timeout 동안 대기). 프록시가 없으면 handle은 falsy(member=None)
+    - 블록 안에서 session_ok=True 로 설정하면 성공 반납, 예외/미설정이면 실패로 반납
+    - heartbeat가 거부되면(lease 상실) lost 이벤트가 set 됨
+    - 종료 후 result에 release_on_result 결과(action/health/cooldown ...)가 들어감
+    """
+
+    def __init__(
+        self,
+        client: AsyncRedisProxyLeaseClient,
+        *,
+        lease_seconds: int,
+        block_timeout: Optional[float],
+        reclaim_limit: int,
+        sample_k: int,
+        heartbeat_interval: Optional[float],
+        filters: Optional[Dict[str, Any]],
+        prefetcher: Optional[LeasePrefetcher],
+        release_kwargs: Dict[str, Any],
+    ):
+        self.client = client
+        self.lease_seconds = int(lease_seconds)
+        self.block_timeout = block_timeout
+        self.reclaim_limit = int(reclaim_limit)
+        self.sample_k = int(sample_k)
+        self.interval = float(heartbeat_interval) if heartbeat_interval else max(1.0, self.lease_seconds / 3.0)
+        self.filters = filters
+        self.prefetcher = prefetcher
+        self.release_kwargs = release_kwargs
+        self.lease: Optional[ProxyLease] = None
+        self.session_ok = False
+        self.lost = asyncio.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self._hb_task: Optional[asyncio.Task] = None
+
+    @property
+    def member(self) -> Optional[str]:
+        return self.lease.member if self.lease else None
+
+    def __bool__(self) -> bool:
+        return self.lease is not None
+
+    async def __aenter__(self) -> "AsyncLeaseHandle":
+        if self.prefetcher is not None and self.prefetcher.matches(self.filters):
+            lease = self.prefetcher.handoff()
+            if lease is not None:
+                LEASE_CLAIMS.labels("prefetch").inc()
+                self.client.adopt(lease)
+                if self.lease_seconds != self.prefetcher.lease_seconds:
+                    await self.client.renew(lease.member, lease_seconds=self.lease_seconds)
+                self.lease = lease
+                self._hb_task = asyncio.create_task(self._heartbeat())
+                return self
+
+        self.lease = await self.client.claim_lease(
+            lease_seconds=self.lease_seconds,
+            reclaim_limit=self.reclaim_limit,
+            sample_k=self.sample_k,
+            block_timeout=self.block_timeout,
+            filters=self.filters,
+        )
+        if self.lease is not None:
+            self._hb_task = asyncio.create_task(self._heartbeat())
+        return self
+
+    async def _heartbeat(self) -> None:
+        member = self.lease.member
+        misses = 0
+        while True:
+            await asyncio.sleep(self.interval)
+            if await self.client.renew(member, lease_seconds=self.lease_seconds):
+                misses = 0
+                continue
+            misses += 1
+            if self.client.get_lease(member) is None or misses * self.interval >= self.lease_seconds:
+                self.lost.set()
+                return
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._hb_task is not None:
+            self._hb_task.cancel()
+            try:
+                await self._hb_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._hb_task = None
+        if self.lease is None:
+            return
+        ok = bool(self.session_ok) and exc_type is None
+        self.result = await self.client.release_on_result(self.lease.member, session_ok=ok, **self.release_kwargs)
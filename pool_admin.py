@@ -0,0 +1,416 @@
+"""
+프록시 풀 관리 CLI (대량 작업은 모두 배치 단위 pipeline / Lua로 처리).
+
+  python pool_admin.py stats
+  python pool_admin.py reset-leases                      # lease -> alive 전부 복귀 (init_redis.ps1 대체)
+  python pool_admin.py export pool.jsonl.gz              # alive(+메타) 내보내기
+  python pool_admin.py import pool.jsonl.gz [--reset-score] [--overwrite]
+  python pool_admin.py rescore --score 0 [--only-future]
+  python pool_admin.py purge [--source S] [--protocol P] [--older-than-hours H] [--dry-run]
+  python pool_admin.py clone --to-db 1 [--to-host H --to-port P] [--flush-target --yes]
+  python pool_admin.py history http://1.2.3.4:8080 [--daily]
+
+키 이름 / 샤딩 설정(REDIS_SHARDS 등)은 pool_config.py (collector와 공유).
+"""
+import argparse
+import gzip
+import json
+import os
+import socket
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+import redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "playwright"))
+import pool_config  # noqa: E402
+from proxy_history import load_history  # noqa: E402
+
+
+BATCH = 2000
+
+# lease -> alive 배치 이동 (ZRANGE/ZADD/ZREM/HDEL을 한 번에, 이벤트 기록 포함)
+_LUA_RESET_LEASES = r"""
+local lease = KEYS[1]
+local alive = KEYS[2]
+local owner = KEYS[3]
+local events = KEYS[4]
+local n = tonumber(ARGV[1])
+local score = tonumber(ARGV[2])
+local events_maxlen = tonumber(ARGV[3])
+
+local ms = redis.call('ZRANGE', lease, 0, n - 1)
+if #ms == 0 then
+  return 0
+end
+for i, m in ipairs(ms) do
+  redis.call('ZADD', alive, score, m)
+  if events_maxlen > 0 then
+    redis.call('XADD', events, 'MAXLEN', '~', events_maxlen, '*', 'e', 'x', 'm', m, 't', score)
+  end
+end
+redis.call('ZREM', lease, (table.unpack or unpack)(ms))
+redis.call('HDEL', owner, (table.unpack or unpack)(ms))
+return #ms
+"""
+
+
+class Progress:
+    """배치마다 한 줄 덮어쓰기 진행 표시"""
+
+    def __init__(self, label: str, total: Optional[int] = None):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.start = time.time()
+
+    def add(self, n: int) -> None:
+        self.done += n
+        total = f"/{self.total}" if self.total is not None else ""
+        rate = self.done / max(1e-6, time.time() - self.start)
+        sys.stderr.write(f"\r  {self.label}: {self.done}{total} ({rate:,.0f}/s)")
+        sys.stderr.flush()
+
+    def finish(self) -> None:
+        sys.stderr.write(f"\r  {self.label}: {self.done}개 완료 ({time.time() - self.start:.2f}초)\n")
+
+
+def _chunks(items: List, size: int) -> Iterator[List]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _all_pools() -> List[Dict[str, str]]:
+    return [pool_config.pool_keys(shard) for shard in range(max(1, pool_config.REDIS_SHARDS))]
+
+
+def _proxy_key(member: str) -> str:
+    protocol, _, address = member.partition("://")
+    return pool_config.make_proxy_key(protocol, address)
+
+
+def _index_keys(member: str, info: Dict[str, str], prefix: str) -> List[str]:
+    protocol = member.partition("://")[0]
+    return pool_config.index_keys_for(
+        protocol, info.get("countries"), info.get("proxy_type"), info.get("is_residential"), prefix=prefix
+    )
+
+
+def _open(path: str, mode: str):
+    if path == "-":
+        return sys.stdout if "w" in mode else sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _connect(host: str, port: int, db: int, password: Optional[str]) -> redis.Redis:
+    if pool_config.REDIS_CLUSTER:
+        return redis.RedisCluster(host=host, port=port, password=password, decode_responses=True)
+    return redis.Redis(host=host, port=port, db=db, password=password, decode_responses=True)
+
+
+# ======================================================
+# 명령
+# ======================================================
+
+def cmd_stats(r: redis.Redis, args) -> None:
+    now = int(time.time())
+    for shard, keys in enumerate(_all_pools()):
+        pipe = r.pipeline(transaction=False)
+        pipe.zcard(keys["alive_key"])
+        pipe.zcount(keys["alive_key"], "-inf", now)
+        pipe.zcard(keys["lease_key"])
+        pipe.zcard(keys["probation_key"])
+        pipe.xlen(keys["events_key"])
+        alive, eligible, leased, probation, events = pipe.execute()
+        print(
+            f"shard {shard}: alive={alive} (eligible={eligible}) lease={leased} probation={probation} "
+            f"events={events} ({keys['alive_key']})"
+        )
+
+
+def cmd_reset_leases(r: redis.Redis, args) -> None:
+    script = r.register_script(_LUA_RESET_LEASES)
+    maxlen = 0 if args.no_events else pool_config.REDIS_EVENTS_MAXLEN
+    for keys in _all_pools():
+        prog = Progress(f"reset {keys['lease_key']}", r.zcard(keys["lease_key"]))
+        while True:
+            n = int(script(keys=[keys["lease_key"], keys["alive_key"], keys["owner_hash"], keys["events_key"]],
+                           args=[args.batch, args.score, maxlen]))
+            if n == 0:
+                break
+            prog.add(n)
+        prog.finish()
+
+
+def cmd_export(r: redis.Redis, args) -> None:
+    with _open(args.path, "w") as f:
+        for keys in _all_pools():
+            members = r.zrange(keys["alive_key"], 0, -1, withscores=True)
+            prog = Progress(f"export {keys['alive_key']}", len(members))
+            for chunk in _chunks(members, args.batch):
+                pipe = r.pipeline(transaction=False)
+                for m, _ in chunk:
+                    pipe.hgetall(_proxy_key(m))
+                    pipe.hget(keys["quality_hash"], m)
+                    pipe.hget(keys["health_hash"], m)
+                    pipe.hget(keys["feedback_hash"], m)
+                res = pipe.execute()
+                for i, (m, score) in enumerate(chunk):
+                    info, quality, health, feedback = res[i * 4 : i * 4 + 4]
+                    row = {"m": m, "score": score, "info": info, "quality": quality, "health": health, "feedback": feedback}
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                prog.add(len(chunk))
+            prog.finish()
+
+
+def cmd_import(r: redis.Redis, args) -> None:
+    with _open(args.path, "r") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    prog = Progress("import", len(rows))
+    added = 0
+    for chunk in _chunks(rows, args.batch):
+        pipe = r.pipeline(transaction=False)
+        # ZADD를 먼저 모아 넣어 결과 앞부분에서 새로 추가된 수를 셈
+        for row in chunk:
+            m = row["m"]
+            alive_key = pool_config.member_keys(m)["alive_key"]
+            score = 0 if args.reset_score else float(row.get("score") or 0)
+            if args.overwrite:
+                pipe.zadd(alive_key, {m: score})
+            else:
+                pipe.zadd(alive_key, {m: score}, nx=True)
+        for row in chunk:
+            m = row["m"]
+            keys = pool_config.member_keys(m)
+            info = row.get("info") or {}
+            if info:
+                pipe.hset(_proxy_key(m), mapping=info)
+            for field, key in (("quality", "quality_hash"), ("health", "health_hash"), ("feedback", "feedback_hash")):
+                if row.get(field):
+                    pipe.hset(keys[key], m, row[field])
+            idx_keys = _index_keys(m, info, keys["index_prefix"])
+            for k in idx_keys:
+                pipe.sadd(k, m)
+            if idx_keys:
+                pipe.sadd(f"{keys['index_prefix']}:keys", *idx_keys)
+            if info.get("latency_ms"):
+                pipe.zadd(f"{keys['index_prefix']}:latency", {m: float(info["latency_ms"])})
+        res = pipe.execute()
+        added += sum(int(x or 0) for x in res[: len(chunk)])
+        prog.add(len(chunk))
+    prog.finish()
+    print(f"✅ import: {len(rows)}개 중 {added}개 alive에 새로 추가")
+
+
+def cmd_rescore(r: redis.Redis, args) -> None:
+    now = time.time()
+    for keys in _all_pools():
+        if args.only_future:
+            members = r.zrangebyscore(keys["alive_key"], f"({now}", "+inf")
+        else:
+            members = r.zrange(keys["alive_key"], 0, -1)
+        prog = Progress(f"rescore {keys['alive_key']}", len(members))
+        for chunk in _chunks(members, args.batch):
+            r.zadd(keys["alive_key"], {m: args.score for m in chunk}, xx=True)
+            prog.add(len(chunk))
+        prog.finish()
+        if args.score <= now and members:
+            # 바로 사용 가능해진 멤버가 있으면 대기 중인 claim 깨우기
+            pipe = r.pipeline(transaction=False)
+            pipe.lpush(keys["signal_key"], *([1] * min(len(members), pool_config.REDIS_SIGNAL_CAP)))
+            pipe.ltrim(keys["signal_key"], 0, pool_config.REDIS_SIGNAL_CAP - 1)
+            pipe.execute()
+
+
+def cmd_purge(r: redis.Redis, args) -> None:
+    if not (args.source or args.protocol or args.older_than_hours is not None):
+        raise SystemExit("purge: --source / --protocol / --older-than-hours 중 하나 이상 필요")
+    cutoff = time.time() - args.older_than_hours * 3600 if args.older_than_hours is not None else None
+    maxlen = 0 if args.no_events else pool_config.REDIS_EVENTS_MAXLEN
+    total_purged = 0
+
+    for keys in _all_pools():
+        members = r.zrange(keys["alive_key"], 0, -1)
+        if args.protocol:
+            members = [m for m in members if m.partition("://")[0] == args.protocol]
+        prog = Progress(f"purge {keys['alive_key']}", len(members))
+        for chunk in _chunks(members, args.batch):
+            pipe = r.pipeline(transaction=False)
+            for m in chunk:
+                pipe.hgetall(_proxy_key(m))
+                pipe.hget(keys["quality_hash"], m)
+            res = pipe.execute()
+
+            targets = []
+            for i, m in enumerate(chunk):
+                info, quality = res[i * 2], res[i * 2 + 1]
+                if args.source and info.get("source") != args.source:
+                    continue
+                if cutoff is not None:
+                    # quality: "latency_ms|validated_epoch|proxy_type" (검증 기록이 없으면 오래된 것으로 간주)
+                    parts = (quality or "").split("|")
+                    validated = float(parts[1]) if len(parts) > 1 and parts[1] else 0.0
+                    if validated >= cutoff:
+                        continue
+                targets.append((m, info))
+
+            if targets and not args.dry_run:
+                pipe = r.pipeline(transaction=False)
+                for m, info in targets:
+                    pipe.zrem(keys["alive_key"], m)
+                    pipe.hdel(keys["quality_hash"], m)
+                    for k in _index_keys(m, info, keys["index_prefix"]):
+                        pipe.srem(k, m)
+                    pipe.zrem(f"{keys['index_prefix']}:latency", m)
+                    if maxlen > 0:
+                        pipe.xadd(keys["events_key"], {"e": "d", "m": m}, maxlen=maxlen, approximate=True)
+                pipe.execute()
+            total_purged += len(targets)
+            prog.add(len(chunk))
+        prog.finish()
+
+    print(f"{'🔎 (dry-run) 대상' if args.dry_run else '🧹 제거'}: {total_purged}개")
+
+
+def _resolve(host: str) -> str:
+    try:
+        return socket.gethostbyname(host)
+    except OSError:
+        return host
+
+
+def _same_target(src: redis.Redis, dst: redis.Redis, src_addr: tuple, dst_addr: tuple) -> bool:
+    """(host, port, db)가 같거나, 주소는 달라도 같은 서버(run_id)의 같은 DB면 True"""
+    (src_host, src_port, src_db), (dst_host, dst_port, dst_db) = src_addr, dst_addr
+    if (_resolve(src_host), src_port) == (_resolve(dst_host), dst_port) and (pool_config.REDIS_CLUSTER or src_db == dst_db):
+        return True
+    if pool_config.REDIS_CLUSTER or src_db != dst_db:
+        return False
+    try:
+        return src.info("server")["run_id"] == dst.info("server")["run_id"]
+    except (redis.RedisError, KeyError):
+        return False
+
+
+def cmd_clone(r: redis.Redis, args) -> None:
+    """풀 키 전체(+ proxy:* hash / 인덱스)를 DUMP/RESTORE로 다른 DB(또는 서버)에 복제"""
+    src_addr = (args.host, args.port, args.db)
+    dst_addr = (args.to_host or args.host, args.to_port or args.port, args.to_db)
+    dst = _connect(dst_addr[0], dst_addr[1], dst_addr[2], args.to_password or (None if args.to_host else args.password))
+    # 원본과 같은 곳이면 복제할 것도 없고, --flush-target이면 운영 풀을 지운 뒤 빈 곳을 복사하게 됨
+    if _same_target(r, dst, src_addr, dst_addr):
+        raise SystemExit(f"clone: 대상이 원본과 같음 (host={dst_addr[0]} port={dst_addr[1]} db={dst_addr[2]})")
+    if args.flush_target:
+        if not args.yes:
+            raise SystemExit(f"clone: --flush-target은 대상 DB 전체를 지움 (host={dst_addr[0]} port={dst_addr[1]} db={dst_addr[2]}), --yes로 확인 필요")
+        dst.flushdb()
+
+    keys_to_copy: List[str] = []
+    for keys in _all_pools():
+        keys_to_copy.extend(v for k, v in keys.items() if not k.endswith("_prefix"))
+        keys_to_copy.extend(r.scan_iter(match=f"{keys['index_prefix']}:*", count=1000))
+        keys_to_copy.extend(r.scan_iter(match=f"{keys['history_prefix']}:*", count=1000))
+    keys_to_copy.extend(r.scan_iter(match=f"{pool_config.REDIS_KEY_PREFIX}:*", count=1000))
+
+    prog = Progress("clone", len(keys_to_copy))
+    copied = 0
+    for chunk in _chunks(keys_to_copy, args.batch):
+        pipe = r.pipeline(transaction=False)
+        for k in chunk:
+            pipe.dump(k)
+            pipe.pttl(k)
+        res = pipe.execute()
+        wpipe = dst.pipeline(transaction=False)
+        for i, k in enumerate(chunk):
+            payload, pttl = res[i * 2], res[i * 2 + 1]
+            if payload is None:
+                continue
+            wpipe.restore(k, max(0, int(pttl)), payload, replace=True)
+            copied += 1
+        wpipe.execute()
+        prog.add(len(chunk))
+    prog.finish()
+    print(f"✅ clone: {copied}개 키 -> db={args.to_db}")
+
+
+def cmd_history(r: redis.Redis, args) -> None:
+    """멤버별 검증/세션 이력 (ring buffer + 시간대/일별 집계) JSON 출력"""
+    for m in args.members:
+        h = load_history(r, m, pool_config.member_keys(m)["history_prefix"])
+        row = h.to_dict()
+        recent = h.window(pool_config.HISTORY_WINDOW_HOURS)
+        row["recent"] = dict(
+            recent.__dict__, check_rate=recent.check_rate, session_rate=recent.session_rate, avg_latency_ms=recent.avg_latency_ms
+        )
+        if args.daily:
+            row["daily"] = {d * 86400: t.__dict__ for d, t in h.daily().items()}
+            del row["hourly"]
+        print(json.dumps(row, ensure_ascii=False))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="프록시 풀 대량 관리 (pipeline / Lua 배치)")
+    parser.add_argument("--host", default=pool_config.REDIS_HOST)
+    parser.add_argument("--port", type=int, default=pool_config.REDIS_PORT)
+    parser.add_argument("--db", type=int, default=pool_config.REDIS_DB)
+    parser.add_argument("--password", default=pool_config.REDIS_PASSWORD)
+    parser.add_argument("--batch", type=int, default=BATCH, help="배치당 멤버/키 수")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    sub.add_parser("stats", help="샤드별 풀 크기")
+
+    p = sub.add_parser("reset-leases", help="lease 멤버를 모두 alive로 복귀")
+    p.add_argument("--score", type=float, default=0, help="복귀 시 alive score (기본 0=즉시 사용 가능)")
+    p.add_argument("--no-events", action="store_true", help="events stream에 기록하지 않음")
+
+    p = sub.add_parser("export", help="alive 멤버 + 메타데이터를 JSONL로 내보내기 (.gz면 gzip, -면 stdout)")
+    p.add_argument("path")
+
+    p = sub.add_parser("import", help="export한 JSONL을 alive로 가져오기 (인덱스도 재구성)")
+    p.add_argument("path")
+    p.add_argument("--reset-score", action="store_true", help="score를 0(즉시 사용 가능)으로")
+    p.add_argument("--overwrite", action="store_true", help="이미 alive에 있으면 score 덮어쓰기 (기본 NX)")
+
+    p = sub.add_parser("rescore", help="alive score 일괄 변경")
+    p.add_argument("--score", type=float, default=0)
+    p.add_argument("--only-future", action="store_true", help="아직 쿨다운 중(score>now)인 멤버만")
+
+    p = sub.add_parser("purge", help="조건에 맞는 alive 멤버 제거")
+    p.add_argument("--source")
+    p.add_argument("--protocol")
+    p.add_argument("--older-than-hours", type=float, default=None, help="마지막 검증이 이 시간보다 오래된 멤버")
+    p.add_argument("--dry-run", action="store_true")
+    p.add_argument("--no-events", action="store_true")
+
+    p = sub.add_parser("clone", help="풀을 다른 DB/서버로 복제 (DUMP/RESTORE)")
+    p.add_argument("--to-db", type=int, required=True)
+    p.add_argument("--to-host")
+    p.add_argument("--to-port", type=int)
+    p.add_argument("--to-password")
+    p.add_argument("--flush-target", action="store_true", help="복제 전 대상 DB FLUSHDB (--yes 필요)")
+    p.add_argument("--yes", action="store_true", help="--flush-target 확인")
+
+    p = sub.add_parser("history", help="멤버별 검증/세션 이력 (JSON lines)")
+    p.add_argument("members", nargs="+", help="예) http://1.2.3.4:8080")
+    p.add_argument("--daily", action="store_true", help="시간대 집계 대신 일별 집계 출력")
+
+    args = parser.parse_args(argv)
+    r = _connect(args.host, args.port, args.db, args.password)
+    {
+        "stats": cmd_stats,
+        "reset-leases": cmd_reset_leases,
+        "export": cmd_export,
+        "import": cmd_import,
+        "rescore": cmd_rescore,
+        "purge": cmd_purge,
+        "clone": cmd_clone,
+        "history": cmd_history,
+    }[args.cmd](r, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+collector / pool_admin 공용 Redis 접속 설정 · 풀 키 이름 · 샤딩 설정.
+
+collector(collect_to_redis_lease_compatible_patched.py)와 관리 CLI(pool_admin.py)가 같은 키를 보도록 한 곳에 둔다.
+pool_admin은 이 모듈만 import (collector를 import하면 로거 / 메트릭 / 수집 설정까지 같이 올라옴).
+
+  pool_keys(shard)     샤드 번호 -> 풀 키 dict (alive_key, lease_key, quality_hash, ...)
+  member_keys(member)  멤버가 속한 샤드의 풀 키
+  make_proxy_key()     프록시 메타 hash 키 (proxy:{protocol}:{address})
+  index_keys_for()     프록시 hash 필드 값 -> 속해야 할 속성 인덱스 set 키 목록
+"""
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "playwright"))
+from redis_proxy_lease import LeaseClientBase  # noqa: E402
+
+
+# ================= Redis 설정 =================
+REDIS_HOST = "127.0.0.1"
+REDIS_PORT = 6379
+REDIS_DB = 0
+REDIS_PASSWORD = None  # 필요하면 문자열로 설정
+
+REDIS_ZSET_ALIVE = "proxies:alive"  # 살아있는 프록시 모음 (score=next_available_epoch, lease 방식과 호환)
+REDIS_ZSET_LEASE = "proxies:lease"  # 사용 중(임대) 프록시 모음 (score=lease_expire_epoch)
+REDIS_HASH_QUALITY = "proxies:quality"  # member -> "latency_ms|validated_epoch|proxy_type" (claim 가중치용)
+REDIS_LIST_SIGNAL = "proxies:signal"    # 새 멤버 등록 시 LPUSH -> 대기 중인 claim(block_timeout)을 깨움
+REDIS_ZSET_PROBATION = "proxies:probation"  # consumer가 health 저하로 퇴출한 멤버 (score=재검증 예정 시각, +inf=영구)
+REDIS_FENCE_KEY = "proxies:lease:fence"  # claim마다 INCR (claim 누적 횟수 -> 수요 예측)
+REDIS_HASH_STATS = "proxies:stats"       # consumer의 ban / probation 누적 횟수
+REDIS_STREAM_EVENTS = "proxies:events"   # 상태 변경 이벤트 stream (a=alive 등록 / d=dead 처리, 나머지는 lease 스크립트가 기록)
+REDIS_EVENTS_MAXLEN = 10000              # 이벤트 stream 근사 길이 상한 (0이면 기록 안 함)
+REDIS_SIGNAL_CAP = 1000                 # signal list 최대 길이
+REDIS_KEY_PREFIX = "proxy"          # proxy:{protocol}:{address}
+REDIS_INDEX_PREFIX = "proxies:idx"  # 속성 인덱스: {prefix}:proto|country|type|residential:* (set), {prefix}:latency (zset)
+                                    # {prefix}:keys (set) = 지금까지 만든 인덱스 set 키 목록 (대시보드가 SCAN 없이 구성 집계)
+REDIS_HASH_COLLECTOR = "proxies:collector"  # collector 진행 상황 (state/total/done/alive/dead/updated ..., pool_top.py가 읽음)
+
+# 샤딩: REDIS_SHARDS > 1 이면 풀 키가 proxies:{sN}:alive ... 로 나뉨 (ShardedRedisProxyLeaseClient와 같은 값 사용)
+# REDIS_CLUSTER=True 이면 RedisCluster로 연결 (샤드 1개여도 hash-tag 키 사용)
+REDIS_SHARDS = 1
+REDIS_CLUSTER = False
+
+# 멤버별 검증/세션 이력 (ring buffer HISTORY_SIZE개 + 시간대별 집계 HISTORY_HOURS시간, 0이면 기록 안 함)
+HISTORY_SIZE = 64
+HISTORY_HOURS = 7 * 24
+HISTORY_WINDOW_HOURS = 24  # quality latency / 유예 판단에 쓰는 최근 구간
+
+
+def pool_keys(shard: int) -> Dict[str, str]:
+    """샤드 번호 -> 풀 키 dict (shards=1, 비클러스터면 위 REDIS_* 기본 키와 동일)"""
+    if REDIS_SHARDS <= 1 and not REDIS_CLUSTER:
+        keys = LeaseClientBase.shard_key_names(0, 1, tagged=False)
+        keys.update(
+            alive_key=REDIS_ZSET_ALIVE,
+            lease_key=REDIS_ZSET_LEASE,
+            quality_hash=REDIS_HASH_QUALITY,
+            signal_key=REDIS_LIST_SIGNAL,
+            probation_key=REDIS_ZSET_PROBATION,
+            fence_key=REDIS_FENCE_KEY,
+            stats_hash=REDIS_HASH_STATS,
+            events_key=REDIS_STREAM_EVENTS,
+            index_prefix=REDIS_INDEX_PREFIX,
+        )
+        return keys
+    return LeaseClientBase.shard_key_names(shard, REDIS_SHARDS, tagged=True)
+
+
+def member_keys(member: str) -> Dict[str, str]:
+    """멤버가 속한 샤드의 풀 키"""
+    return pool_keys(LeaseClientBase.shard_of(member, REDIS_SHARDS))
+
+
+def make_proxy_key(protocol: str, address: str) -> str:
+    """proxy:http:1.2.3.4:8080 또는 proxy:socks5:5.6.7.8:1080"""
+    return f"{REDIS_KEY_PREFIX}:{protocol}:{address}"
+
+
+def index_keys_for(
+    protocol: str,
+    countries_json: Optional[str],
+    proxy_type: Optional[str],
+    residential: Optional[str],
+    prefix: str = REDIS_INDEX_PREFIX,
+) -> List[str]:
+    """프록시 hash에 저장된 필드 값 -> 속해야 할 속성 인덱스 set 키 목록"""
+    try:
+        countries = json.loads(countries_json) if countries_json else []
+    except ValueError:
+        countries = []
+    return LeaseClientBase.index_keys(
+        protocol=protocol,
+        countries=countries,
+        proxy_type=proxy_type or None,
+        residential=None if residential in (None, "") else residential in ("1", "True", "true"),
+        prefix=prefix,
+    )
@@ -0,0 +1,646 @@
+"""
+프록시 풀 / lease 파라미터 튜닝용 오프라인 이산 사건 시뮬레이터.
+
+consumer 스크립트마다 손으로 박아 둔 LEASE_SECONDS / COOLDOWN_FAIL_BASE·JITTER / BAN_BELOW·max_strikes(예전 MAX_FAIL) /
+sample_k / reclaim_limit / COLLECT_INTERVAL_MINUTES 조합을 시뮬레이션 시계 위에서 돌려 비교한다.
+
+  - lease 로직은 재구현하지 않고 실제 RedisProxyLeaseClient(claim_lease / release_on_result / reap + Lua 스크립트)를 그대로 호출.
+    redis_proxy_lease 모듈의 time만 SimClock으로 바꿔 끼워서 스크립트에 넘기는 now / 쿨다운 / 만료 시각이 전부 시뮬레이션 시각이 됨.
+  - 프록시 수명 / 신규 유입 속도 / 세션 길이·성공률은 기록된 이력에서 추정
+      --archive DIR : 검증 아카이브(validation_archive.py)의 멤버별 연속 통과 구간 -> 수명, 새 통과 구간 시작 -> 유입 속도,
+                      사이클별 검증 소요 시간, 통과 latency
+      --events      : 운영 Redis의 events stream claim(c) -> release(r, o=ok|fail) 쌍 -> 세션 길이 / 성공률
+    이력이 없으면 기본 분포(Workload 기본값)를 씀. --save-workload로 추정치를 저장해 두고 --workload로 다시 씀.
+  - collector: COLLECT_INTERVAL마다 살아있는 후보를 검증 시간 동안 나눠 등록(ZADD NX 0 + quality), 죽은 멤버는 제거,
+    PROBATION_CHECK_MINUTES마다 probation 재검증. (이력 기반 유예(HISTORY_GRACE_*)는 모델링하지 않음 -> dead면 바로 제거)
+  - consumer: --consumers개 슬롯이 claim -> 세션 -> release_on_result 반복, 풀이 비면 신호(신규 등록/반납) 또는
+    WAIT_WHEN_NO_PROXY_SECONDS 후 재시도.
+
+파라미터 조합마다 같은 seed(같은 프록시 집합 / 수명)로 돌려서 세션 성공 처리량(ok/h)과 consumer 유휴 비율을 비교한다.
+
+예)
+  python pool_sim.py --archive archive --events --save-workload wl.json --hours 72
+  python pool_sim.py --workload wl.json --lease-seconds 600,1020,1800 --cooldown-fail-base 30,120,300 --out sim.json
+  python pool_sim.py --workload wl.json --collect-interval 60,120,240 --ban-below 0.15,0.25,0.4 --trials 12
+
+※ 반드시 비어있는/테스트용 DB에서 실행하세요 (sim:pool:* 키만 씀). fakeredis가 설치돼 있으면 --fake로 Redis 없이 실행.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field, fields
+from heapq import heappop, heappush
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "playwright"))
+import redis_proxy_lease  # noqa: E402
+from bench_lease_contention import _cleanup, bench_keys  # noqa: E402
+from proxy_events import PoolEvent  # noqa: E402
+from redis_proxy_lease import RedisConnConfig, RedisProxyLeaseClient  # noqa: E402
+from validation_archive import DEFAULT_DIR as ARCHIVE_DIR, query_sql  # noqa: E402
+
+import collect_to_redis_lease_compatible_patched as collector  # noqa: E402
+
+
+PREFIX = "sim:pool"
+SIM_EPOCH = 1_700_000_000  # 시뮬레이션 시작 시각 (고정 -> 같은 seed면 같은 결과)
+SAMPLE_SECONDS = 300  # 풀 크기 샘플 주기
+COLLECT_BATCHES = 10  # 사이클 검증 시간 동안 나눠 등록하는 배치 수
+NEXT_SESSION_GAP = 2  # 세션 종료 후 다음 claim까지 (브라우저 정리 시간)
+WAIT_WHEN_NO_PROXY_SECONDS = 60
+MAX_SAMPLES = 5000  # workload JSON에 남기는 분포 샘플 수 상한
+SEARCH_FIELDS = (
+    "lease_seconds",
+    "cooldown_fail_base",
+    "cooldown_fail_jitter",
+    "ban_below",
+    "max_strikes",
+    "sample_k",
+    "reclaim_limit",
+    "collect_interval_minutes",
+)
+
+
+class SimClock:
+    """redis_proxy_lease.time 대용. time()은 시뮬레이션 시각, 나머지(perf_counter 등 지표용)는 실제 time 모듈."""
+
+    def __init__(self, start: float):
+        self.now = float(start)
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += max(0.0, float(seconds))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(time, name)
+
+
+# ======================================================
+# 워크로드 (프록시 수명 / 유입 / 세션 분포)
+# ======================================================
+
+
+@dataclass
+class Workload:
+    arrivals_per_hour: float = 300.0  # 새로 살아나는(검증 통과 구간이 시작되는) 프록시 수
+    lifetime_mean: float = 6 * 3600.0  # lifetimes가 비었을 때 쓰는 지수분포 평균(초)
+    lifetimes: List[float] = field(default_factory=list)  # 연속 통과 구간 길이(초)
+    latencies: List[float] = field(default_factory=list)  # 통과 검증 latency(ms)
+    session_ok_rate: float = 0.7  # 살아있는 프록시에서 세션이 성공할 비율 (프록시별로 Beta 분포로 흩뿌림)
+    session_ok: List[float] = field(default_factory=list)  # 성공 세션 길이(초)
+    session_fail: List[float] = field(default_factory=list)  # 실패 세션 길이(초)
+    cycle_seconds: float = 1800.0  # 수집 1회 검증 소요 시간
+    stale_hours: float = 24.0  # 죽은 프록시가 목록에 남아 있는 시간 (그동안 수집 때 dead 처리됨)
+    source: str = "default"
+
+    def lifetime(self, rng: random.Random) -> float:
+        if self.lifetimes:
+            return rng.choice(self.lifetimes)
+        return rng.expovariate(1.0 / self.lifetime_mean)
+
+    def latency(self, rng: random.Random) -> float:
+        return rng.choice(self.latencies) if self.latencies else rng.uniform(200.0, 1500.0)
+
+    def session_length(self, rng: random.Random, ok: bool) -> float:
+        # 기본값: client_from_redis_update_lease (성공 = 로딩 + STAY_DURATION 600초, 실패 = ENSURE_TIMEOUT 300초 안쪽)
+        if ok:
+            return rng.choice(self.session_ok) if self.session_ok else rng.uniform(620.0, 900.0)
+        return rng.choice(self.session_fail) if self.session_fail else rng.uniform(15.0, 300.0)
+
+    def to_dict(self) -> Dict:
+        out = asdict(self)
+        rng = random.Random(0)
+        for k in ("lifetimes", "latencies", "session_ok", "session_fail"):
+            if len(out[k]) > MAX_SAMPLES:
+                out[k] = rng.sample(out[k], MAX_SAMPLES)
+        return out
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "Workload":
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in d.items() if k in names})
+
+    def summary(self) -> Dict:
+        def _mean(xs: List[float]) -> Optional[float]:
+            return round(sum(xs) / len(xs), 1) if xs else None
+
+        return {
+            "source": self.source,
+            "arrivals_per_hour": round(self.arrivals_per_hour, 1),
+            "lifetime_mean_h": round((_mean(self.lifetimes) or self.lifetime_mean) / 3600.0, 2),
+            "lifetime_samples": len(self.lifetimes),
+            "session_ok_rate": round(self.session_ok_rate, 3),
+            "session_ok_mean_s": _mean(self.session_ok),
+            "session_fail_mean_s": _mean(self.session_fail),
+            "session_samples": len(self.session_ok) + len(self.session_fail),
+            "cycle_seconds": round(self.cycle_seconds, 1),
+        }
+
+
+def workload_from_archive(wl: Workload, directory: str, days: float) -> Workload:
+    """
+    검증 아카이브 -> 수명 / 유입 속도 / 사이클 소요 시간 / latency.
+    멤버별로 시간순 검증을 훑어 "통과 시작 ~ 첫 실패" 구간을 수명으로 봄 (끝까지 통과 중인 구간은 마지막 통과까지로 잘림).
+    """
+    since = time.time() - days * 86400
+    _, rows = query_sql(directory, since, f"SELECT member, ts, ok, latency_ms FROM checks WHERE ts >= {since}")
+    if not rows:
+        return wl
+    by_member: Dict[str, List[Tuple[float, int]]] = {}
+    latencies: List[float] = []
+    t_min, t_max = float("inf"), 0.0
+    for member, ts, ok, latency_ms in rows:
+        by_member.setdefault(member, []).append((ts, ok))
+        t_min, t_max = min(t_min, ts), max(t_max, ts)
+        if ok and latency_ms:
+            latencies.append(float(latency_ms))
+
+    _, cycles = query_sql(directory, since, f"SELECT cycle, MIN(ts), MAX(ts) FROM checks WHERE cycle > 0 AND ts >= {since} GROUP BY cycle")
+    spans: Dict[int, List[float]] = {}
+    for cycle, lo, hi in cycles:  # 월 경계에 걸친 사이클은 파티션 두 개에 나뉘어 있음
+        s = spans.setdefault(cycle, [lo, hi])
+        s[0], s[1] = min(s[0], lo), max(s[1], hi)
+    durations = sorted(hi - cycle for cycle, (_, hi) in spans.items() if hi > cycle)
+
+    # 관측 시작 직후의 통과 구간은 "이미 살아있던" 것이라 유입에서 제외 (첫 사이클 길이만큼)
+    settle = t_min + (durations[len(durations) // 2] if durations else 0.0)
+    lifetimes: List[float] = []
+    arrivals = 0
+    for checks in by_member.values():
+        checks.sort()
+        start: Optional[float] = None
+        last_ok = 0.0
+        for ts, ok in checks:
+            if ok:
+                if start is None:
+                    start = ts
+                    if ts > settle:
+                        arrivals += 1
+                last_ok = ts
+            elif start is not None:
+                lifetimes.append(ts - start)
+                start = None
+        if start is not None and last_ok > start:
+            lifetimes.append(last_ok - start)
+
+    hours = max(1.0, (t_max - settle) / 3600.0)
+    wl.arrivals_per_hour = arrivals / hours
+    wl.lifetimes = [x for x in lifetimes if x > 0]
+    wl.latencies = latencies
+    if durations:
+        wl.cycle_seconds = durations[len(durations) // 2]
+    wl.source = f"{wl.source}+archive" if wl.source != "default" else "archive"
+    return wl
+
+
+def workload_from_events(wl: Workload, r: redis.Redis, events_key: str, count: int) -> Workload:
+    """운영 events stream의 claim(c) -> release(r) 쌍 -> 세션 길이 / 성공률 (만료(x)로 끝난 lease는 제외)"""
+    entries = r.xrevrange(events_key, count=count)
+    claimed: Dict[str, float] = {}
+    ok_durs: List[float] = []
+    fail_durs: List[float] = []
+    for entry_id, f in reversed(entries):
+        ev = PoolEvent.from_entry(events_key, entry_id, f)
+        if ev.event == "c":
+            claimed[ev.member] = ev.ts
+        elif ev.event == "r" and ev.member in claimed:
+            dur = ev.ts - claimed.pop(ev.member)
+            if ev.outcome == "ok":
+                ok_durs.append(dur)
+            elif ev.outcome == "fail":
+                fail_durs.append(dur)
+        elif ev.event in ("x", "b", "p"):
+            claimed.pop(ev.member, None)
+    if ok_durs or fail_durs:
+        wl.session_ok = ok_durs
+        wl.session_fail = fail_durs
+        # 죽은 프록시에서 난 실패도 섞여 있으므로 "살아있는 프록시에서의 성공률"의 하한
+        wl.session_ok_rate = len(ok_durs) / (len(ok_durs) + len(fail_durs))
+        wl.source = f"{wl.source}+events" if wl.source != "default" else "events"
+    return wl
+
+
+# ======================================================
+# 시뮬레이션
+# ======================================================
+
+
+@dataclass
+class SimParams:
+    # 기본값 = client_from_redis_update_lease / collector 현재 설정
+    lease_seconds: int = 1020
+    cooldown_success: int = 0
+    cooldown_fail_base: int = 30
+    cooldown_fail_max: int = 1800
+    cooldown_fail_jitter: int = 60
+    ban_below: float = 0.25
+    max_strikes: int = 4
+    sample_k: int = 50
+    reclaim_limit: int = 200
+    collect_interval_minutes: int = collector.COLLECT_INTERVAL_MINUTES
+
+    def label(self) -> str:
+        return (
+            f"lease={self.lease_seconds} cfb={self.cooldown_fail_base} jit={self.cooldown_fail_jitter} "
+            f"ban<{self.ban_below} strikes={self.max_strikes} k={self.sample_k} reclaim={self.reclaim_limit} "
+            f"collect={self.collect_interval_minutes}m"
+        )
+
+
+@dataclass
+class _Proxy:
+    member: str
+    born: float
+    dies: float
+    quality: float  # 살아있을 때 세션 성공 확률
+    latency: float
+
+    def alive(self, t: float) -> bool:
+        return self.born <= t < self.dies
+
+
+class PoolSimulator:
+    """프록시 집합 / 수집 / consumer 슬롯을 사건 큐(heap)로 돌리고, 풀 조작은 실제 lease 클라이언트로."""
+
+    def __init__(
+        self,
+        r: redis.Redis,
+        workload: Workload,
+        params: SimParams,
+        *,
+        consumers: int,
+        hours: float,
+        seed: int,
+        prefix: str = PREFIX,
+    ):
+        self.r = r
+        self.wl = workload
+        self.p = params
+        self.consumers = int(consumers)
+        self.horizon = SIM_EPOCH + hours * 3600.0
+        self.hours = float(hours)
+        self.seed = int(seed)
+        self.keys = bench_keys(prefix)
+        self.prefix = prefix
+        self.clock = SimClock(SIM_EPOCH)
+        self._queue: List[Tuple[float, int, str, Any]] = []
+        self._seq = itertools.count()
+        self.proxies: List[_Proxy] = []
+        self.by_member: Dict[str, _Proxy] = {}
+        self.known: set = set()  # 한 번이라도 풀에 등록된 멤버
+        self.waiting: Dict[int, float] = {}  # 빈 풀 때문에 신호를 기다리는 슬롯 -> 대기 시작 시각
+        self.retry_at: Dict[int, float] = {}  # 슬롯별로 예약된 다음 재시도 시각 (재시도 중복 예약 방지)
+        self.gen: List[int] = [0] * self.consumers  # 슬롯의 claim 세대 (claim 성공 시 +1 -> 낡은 claim 사건 무시)
+        self.holder: Dict[str, int] = {}  # member -> 지금 세션 중인 슬롯
+        self.clients: List[RedisProxyLeaseClient] = []
+        self.stats: Counter = Counter()
+        self.idle = 0.0
+        self.eligible: List[int] = []
+
+    # ---------------- 준비 ----------------
+
+    def _universe(self) -> None:
+        """시작 시점에 살아있는 프록시(정상 상태 수 = 유입 x 평균 수명) + 기간 중 유입을 미리 생성"""
+        rng = random.Random(self.seed)
+        wl = self.wl
+        mean_life = (sum(wl.lifetimes) / len(wl.lifetimes)) if wl.lifetimes else wl.lifetime_mean
+        alpha = max(0.5, 4.0 * wl.session_ok_rate)
+        beta = max(0.5, 4.0 * (1.0 - wl.session_ok_rate))
+
+        def add(born: float, dies: float) -> None:
+            i = len(self.proxies)
+            member = f"http://10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}:{8000 + i % 1000}"
+            p = _Proxy(member, born, dies, rng.betavariate(alpha, beta), wl.latency(rng))
+            self.proxies.append(p)
+            self.by_member[member] = p
+
+        for _ in range(int(wl.arrivals_per_hour * mean_life / 3600.0)):
+            # 이미 살아있던 프록시: 남은 수명 = 수명 x U(0,1) (근사)
+            add(SIM_EPOCH - 1, SIM_EPOCH + wl.lifetime(rng) * rng.random())
+        t = float(SIM_EPOCH)
+        rate = wl.arrivals_per_hour / 3600.0
+        while rate > 0:
+            t += rng.expovariate(rate)
+            if t >= self.horizon:
+                break
+            add(t, t + wl.lifetime(rng))
+
+    def _setup(self) -> None:
+        _cleanup(self.r, self.prefix)
+        random.seed(self.seed + 2)  # claim 샘플링 / 실패 쿨다운 jitter (lease 클라이언트는 전역 random 사용)
+        self.rng = random.Random(self.seed + 1)  # 세션 결과 / 길이
+        self._universe()
+        cfg = RedisConnConfig()
+        for slot in range(self.consumers):
+            c = RedisProxyLeaseClient(
+                cfg,
+                **self.keys,
+                owner_id=f"sim{slot}",
+                events_maxlen=0,
+                history_size=0,
+                max_strikes=self.p.max_strikes,
+            )
+            c.connect(self.r)
+            self.clients.append(c)
+
+    def _push(self, t: float, kind: str, arg: Any = None) -> None:
+        if t <= self.horizon:
+            heappush(self._queue, (t, next(self._seq), kind, arg))
+
+    # ---------------- 실행 ----------------
+
+    def run(self) -> Dict:
+        self._setup()
+        saved = redis_proxy_lease.time
+        redis_proxy_lease.time = self.clock
+        try:
+            self._push(SIM_EPOCH, "collect")
+            self._push(SIM_EPOCH + SAMPLE_SECONDS, "sample")
+            self._push(SIM_EPOCH + collector.PROBATION_CHECK_MINUTES * 60, "probation")
+            for slot in range(self.consumers):
+                self._push(SIM_EPOCH + slot, "claim", (slot, 0))  # 동시에 몰리지 않게 1초씩 어긋나게 시작
+            while self._queue:
+                t, _, kind, arg = heappop(self._queue)
+                self.clock.now = t
+                getattr(self, f"_on_{kind}")(arg)
+        finally:
+            redis_proxy_lease.time = saved
+        return self._result()
+
+    def _wake(self) -> None:
+        """collector 신규 등록 / 반납 신호 -> 대기 중인 슬롯을 바로 깨움 (wait_for_proxy_signal)"""
+        for slot in self.waiting:
+            self._push(self.clock.now, "claim", (slot, self.gen[slot]))
+
+    def _on_collect(self, _: Any) -> None:
+        now = self.clock.now
+        stale = self.wl.stale_hours * 3600.0
+        batch = [p for p in self.proxies if p.born <= now and now < p.dies + stale]
+        random.Random(int(now)).shuffle(batch)
+        step = max(1, -(-len(batch) // COLLECT_BATCHES))
+        for i in range(0, len(batch), step):
+            offset = self.wl.cycle_seconds * (i // step) / COLLECT_BATCHES
+            self._push(now + offset, "store", batch[i : i + step])
+        self._push(now + self.p.collect_interval_minutes * 60, "collect")
+        self.stats["collect_cycles"] += 1
+
+    def _on_store(self, batch: List[_Proxy]) -> None:
+        """store_proxy_to_redis 요약: 통과 -> quality + (probation 기간/lease 중 아니면) ZADD NX 0, 실패 -> alive/quality 제거"""
+        now = self.clock.now
+        k = self.keys
+        pipe = self.r.pipeline(transaction=False)
+        for p in batch:
+            pipe.zscore(k["probation_key"], p.member)
+            pipe.zscore(k["lease_key"], p.member)
+        scores = pipe.execute()
+        added = 0
+        pipe = self.r.pipeline(transaction=False)
+        for i, p in enumerate(batch):
+            probation_until, leased = scores[2 * i], scores[2 * i + 1]
+            if not p.alive(now):
+                if p.member in self.known:
+                    pipe.zrem(k["alive_key"], p.member)
+                    pipe.hdel(k["quality_hash"], p.member)
+                continue
+            pipe.hset(k["quality_hash"], p.member, f"{p.latency:.1f}|{int(now)}|Static")
+            if probation_until is not None:
+                if probation_until > now:
+                    continue
+                pipe.zrem(k["probation_key"], p.member)
+            if leased is None:
+                pipe.zadd(k["alive_key"], {p.member: 0}, nx=True)
+                self.known.add(p.member)
+                added += 1
+        pipe.execute()
+        self.stats["checks"] += len(batch)
+        if added:
+            self._wake()
+
+    def _on_probation(self, _: Any) -> None:
+        """revalidate_probation: 재검증 시각이 지난 멤버 -> 살아있으면 복귀, 죽었으면 probation에서도 제거"""
+        now = self.clock.now
+        due = self.r.zrangebyscore(self.keys["probation_key"], "-inf", int(now), start=0, num=collector.PROBATION_BATCH)
+        if due:
+            alive = [self.by_member[m] for m in due if self.by_member[m].alive(now)]
+            dead = [m for m in due if not self.by_member[m].alive(now)]
+            if dead:
+                self.r.zrem(self.keys["probation_key"], *dead)
+            if alive:
+                self._on_store(alive)
+            self.stats["probation_restored"] += len(alive)
+            self.stats["probation_dropped"] += len(dead)
+        self._push(now + collector.PROBATION_CHECK_MINUTES * 60, "probation")
+
+    def _on_sample(self, _: Any) -> None:
+        self.eligible.append(int(self.r.zcount(self.keys["alive_key"], "-inf", int(self.clock.now))))
+        self._push(self.clock.now + SAMPLE_SECONDS, "sample")
+
+    def _on_claim(self, arg: Tuple[int, int]) -> None:
+        slot, gen = arg
+        if gen != self.gen[slot]:
+            return
+        now = self.clock.now
+        lease = self.clients[slot].claim_lease(
+            lease_seconds=self.p.lease_seconds, reclaim_limit=self.p.reclaim_limit, sample_k=self.p.sample_k
+        )
+        if lease is None:
+            self.stats["empty_claims"] += 1
+            self.waiting.setdefault(slot, now)
+            if self.retry_at.get(slot, 0.0) <= now:
+                self.retry_at[slot] = now + WAIT_WHEN_NO_PROXY_SECONDS
+                self._push(now + WAIT_WHEN_NO_PROXY_SECONDS, "claim", (slot, gen))
+            return
+        self.gen[slot] += 1
+        self.retry_at.pop(slot, None)
+        if slot in self.waiting:
+            self.idle += now - self.waiting.pop(slot)
+        if lease.member in self.holder:
+            self.stats["double_use"] += 1  # lease 초과한 세션의 멤버가 회수돼 다른 슬롯에 나감
+        self.holder[lease.member] = slot
+
+        proxy = self.by_member[lease.member]
+        ok = proxy.alive(now) and self.rng.random() < proxy.quality
+        if not proxy.alive(now):
+            self.stats["sessions_dead_proxy"] += 1
+        dur = self.wl.session_length(self.rng, ok)
+        if dur > self.p.lease_seconds:
+            self.stats["lease_overruns"] += 1
+        self._push(now + dur, "end", (slot, lease.member, ok))
+
+    def _on_end(self, arg: Tuple[int, str, bool]) -> None:
+        slot, member, ok = arg
+        if self.holder.get(member) == slot:
+            del self.holder[member]
+        info = self.clients[slot].release_on_result(
+            member,
+            session_ok=ok,
+            cooldown_success=self.p.cooldown_success,
+            cooldown_fail_base=self.p.cooldown_fail_base,
+            cooldown_fail_max=self.p.cooldown_fail_max,
+            cooldown_fail_jitter=self.p.cooldown_fail_jitter,
+            ban_below=self.p.ban_below,
+        )
+        self.stats["sessions_ok" if ok else "sessions_fail"] += 1
+        self.stats[f"release_{info['action']}"] += 1
+        if info["action"] == "released":
+            self._wake()
+        self._push(self.clock.now + NEXT_SESSION_GAP, "claim", (slot, self.gen[slot]))
+
+    def _result(self) -> Dict:
+        # 끝날 때까지 기다리던 슬롯의 대기 시간도 유휴로 합산
+        for since in self.waiting.values():
+            self.idle += self.horizon - since
+        st = self.stats
+        sessions = st["sessions_ok"] + st["sessions_fail"]
+        eligible = self.eligible or [0]
+        _cleanup(self.r, self.prefix)
+        return {
+            "params": asdict(self.p),
+            "ok_per_hour": round(st["sessions_ok"] / self.hours, 2),
+            "idle_frac": round(self.idle / (self.consumers * self.hours * 3600.0), 4),
+            "session_ok_rate": round(st["sessions_ok"] / sessions, 4) if sessions else None,
+            "eligible_avg": round(sum(eligible) / len(eligible), 1),
+            "eligible_min": min(eligible),
+            "proxies": len(self.proxies),
+            "stats": dict(sorted(st.items())),
+        }
+
+
+# ======================================================
+# 탐색
+# ======================================================
+
+
+def _list(cast):
+    def parse(value: str) -> List:
+        return [cast(v) for v in value.split(",") if v.strip()]
+
+    return parse
+
+
+def param_grid(args: argparse.Namespace) -> List[SimParams]:
+    values = [getattr(args, name) for name in SEARCH_FIELDS]
+    grid = [SimParams(**dict(zip(SEARCH_FIELDS, combo)), cooldown_fail_max=args.cooldown_fail_max) for combo in itertools.product(*values)]
+    if args.trials and args.trials < len(grid):
+        grid = random.Random(args.seed).sample(grid, args.trials)
+    return grid
+
+
+def pareto(results: List[Dict]) -> List[Dict]:
+    """ok/h는 높고 idle은 낮은 쪽으로 다른 결과에 지배되지 않는 것들"""
+    front = []
+    for a in results:
+        if not any(
+            b["ok_per_hour"] >= a["ok_per_hour"] and b["idle_frac"] <= a["idle_frac"] and b is not a
+            and (b["ok_per_hour"], -b["idle_frac"]) != (a["ok_per_hour"], -a["idle_frac"])
+            for b in results
+        ):
+            front.append(a)
+    return sorted(front, key=lambda x: -x["ok_per_hour"])
+
+
+def _connect(args: argparse.Namespace) -> redis.Redis:
+    if args.fake:
+        try:
+            import fakeredis  # 선택 의존성 (pip install fakeredis lupa)
+        except ImportError:
+            raise SystemExit("--fake 에는 fakeredis(+lupa)가 필요합니다: pip install fakeredis lupa")
+        return fakeredis.FakeRedis(decode_responses=True)
+    return redis.Redis(host=args.host, port=args.port, db=args.db, password=args.password, decode_responses=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    d = SimParams()
+    parser = argparse.ArgumentParser(description="프록시 풀 / lease 파라미터 시뮬레이터 (이산 사건, 시뮬레이션 시계)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--db", type=int, default=15)
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--fake", action="store_true", help="Redis 대신 fakeredis(설치돼 있을 때)로 실행")
+    parser.add_argument("--hours", type=float, default=72, help="시뮬레이션 기간(시간)")
+    parser.add_argument("--consumers", type=int, default=8, help="동시 세션 슬롯 수 (프로세스 수 x NUM_BROWSERS)")
+    parser.add_argument("--seed", type=int, default=1)
+
+    g = parser.add_argument_group("워크로드 (이력)")
+    g.add_argument("--workload", default=None, help="저장된 워크로드 JSON")
+    g.add_argument("--archive", nargs="?", const=ARCHIVE_DIR, default=None, help="검증 아카이브 디렉터리에서 수명/유입 추정")
+    g.add_argument("--archive-days", type=float, default=14)
+    g.add_argument("--events", action="store_true", help="운영 Redis events stream에서 세션 길이/성공률 추정")
+    g.add_argument("--events-db", type=int, default=collector.REDIS_DB)
+    g.add_argument("--events-count", type=int, default=10000)
+    g.add_argument("--save-workload", default=None, help="추정한 워크로드를 JSON으로 저장")
+
+    g = parser.add_argument_group("탐색할 파라미터 (쉼표로 여러 값 -> 조합 전부)")
+    g.add_argument("--lease-seconds", type=_list(int), default=[d.lease_seconds])
+    g.add_argument("--cooldown-fail-base", type=_list(int), default=[d.cooldown_fail_base])
+    g.add_argument("--cooldown-fail-jitter", type=_list(int), default=[d.cooldown_fail_jitter])
+    g.add_argument("--cooldown-fail-max", type=int, default=d.cooldown_fail_max)
+    g.add_argument("--ban-below", type=_list(float), default=[d.ban_below])
+    g.add_argument("--max-strikes", type=_list(int), default=[d.max_strikes], help="probation 누적 후 영구 퇴출 (예전 MAX_FAIL)")
+    g.add_argument("--sample-k", type=_list(int), default=[d.sample_k])
+    g.add_argument("--reclaim-limit", type=_list(int), default=[d.reclaim_limit])
+    g.add_argument("--collect-interval", dest="collect_interval_minutes", type=_list(int), default=[d.collect_interval_minutes])
+    g.add_argument("--trials", type=int, default=0, help="조합이 많으면 무작위로 N개만")
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로(선택)")
+    args = parser.parse_args(argv)
+
+    wl = Workload()
+    if args.workload:
+        with open(args.workload, encoding="utf-8") as f:
+            wl = Workload.from_dict(json.load(f))
+    if args.archive:
+        wl = workload_from_archive(wl, args.archive, args.archive_days)
+    if args.events:
+        src = redis.Redis(host=args.host, port=args.port, db=args.events_db, password=args.password, decode_responses=True)
+        wl = workload_from_events(wl, src, collector.REDIS_STREAM_EVENTS, args.events_count)
+    if args.save_workload:
+        with open(args.save_workload, "w", encoding="utf-8") as f:
+            json.dump(wl.to_dict(), f, ensure_ascii=False)
+        print(f"[SIM] workload saved -> {args.save_workload}")
+    print(f"[SIM] workload | {json.dumps(wl.summary(), ensure_ascii=False)}")
+
+    r = _connect(args)
+    grid = param_grid(args)
+    print(f"[SIM] {len(grid)} settings x {args.hours}h, consumers={args.consumers}, seed={args.seed}")
+    results = []
+    for params in grid:
+        t0 = time.perf_counter()
+        res = PoolSimulator(r, wl, params, consumers=args.consumers, hours=args.hours, seed=args.seed).run()
+        res["wall_s"] = round(time.perf_counter() - t0, 2)
+        results.append(res)
+        st = res["stats"]
+        print(
+            f"[SIM] {params.label()} | ok/h={res['ok_per_hour']:>7} idle={res['idle_frac'] * 100:5.1f}% "
+            f"ok_rate={res['session_ok_rate']} eligible avg={res['eligible_avg']} min={res['eligible_min']} "
+            f"overrun={st.get('lease_overruns', 0)} double={st.get('double_use', 0)} "
+            f"probation={st.get('release_probation', 0)} banned={st.get('release_banned', 0)} ({res['wall_s']}s)"
+        )
+
+    ranked = sorted(results, key=lambda x: (-x["ok_per_hour"], x["idle_frac"]))
+    print(f"[SIM] top {args.top} (ok/h 내림차순, 같으면 idle 오름차순)")
+    for res in ranked[: args.top]:
+        print(f"[SIM]   ok/h={res['ok_per_hour']:>7} idle={res['idle_frac'] * 100:5.1f}% | {SimParams(**res['params']).label()}")
+    front = pareto(results)
+    print(f"[SIM] pareto (ok/h vs idle): {len(front)}")
+    for res in front:
+        print(f"[SIM]   ok/h={res['ok_per_hour']:>7} idle={res['idle_frac'] * 100:5.1f}% | {SimParams(**res['params']).label()}")
+
+    if args.out:
+        doc = {"args": {k: v for k, v in vars(args).items()}, "workload": wl.summary(), "results": ranked}
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, indent=2)
+        print(f"[SIM] saved -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+alive 풀 스냅샷 (warm start용) 바이너리 포맷 / 읽기·쓰기.
+
+파일 구조 (little endian, mmap으로 바로 읽을 수 있는 고정 크기 레코드 배열 + 문자열 영역):
+  header  : magic(8s) version(u16) reserved(u16) count(u32) created_epoch(u64)        = 24 bytes
+  records : count x [member_off(u32) member_len(u16) info_len(u16) latency_ms(f32) validated_epoch(u32)] = 16 bytes
+  blob    : member(utf-8) + info(압축 JSON: source/countries/proxy_type/is_residential ...) 연속 배치
+레코드는 validated_epoch 내림차순(최신 검증 먼저)으로 저장 -> 앞에서부터 읽으면 신선한 순서.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+
+MAGIC = b"PXSNAP\x00\x01"
+VERSION = 1
+_HEADER = struct.Struct("<8sHHIQ")
+_RECORD = struct.Struct("<IHHfI")
+
+
+@dataclass
+class SnapshotEntry:
+    member: str
+    latency_ms: Optional[float]
+    validated_epoch: int
+    info: Dict[str, str]
+
+    @property
+    def quality(self) -> str:
+        """quality hash 값 형식 ("latency_ms|validated_epoch|proxy_type")"""
+        latency = f"{self.latency_ms:.1f}" if self.latency_ms else ""
+        return f"{latency}|{self.validated_epoch}|{self.info.get('proxy_type') or ''}"
+
+
+def write_snapshot(path: str, entries: List[SnapshotEntry]) -> int:
+    """스냅샷을 임시 파일에 쓴 뒤 os.replace로 교체 (쓰는 도중 죽어도 이전 스냅샷 유지). 기록한 레코드 수 반환."""
+    entries = sorted(entries, key=lambda e: e.validated_epoch, reverse=True)
+    records = bytearray()
+    blob = bytearray()
+    for e in entries:
+        member = e.member.encode("utf-8")
+        info = json.dumps(e.info, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(member) > 0xFFFF or len(info) > 0xFFFF:
+            continue
+        records += _RECORD.pack(len(blob), len(member), len(info), float(e.latency_ms or 0.0), int(e.validated_epoch))
+        blob += member + info
+    count = len(records) // _RECORD.size
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, count, int(time.time())))
+        f.write(records)
+        f.write(blob)
+    os.replace(tmp, path)
+    return count
+
+
+class PoolSnapshot:
+    """
+    mmap 기반 읽기 전용 스냅샷. 레코드는 필요할 때만 디코드.
+
+        with PoolSnapshot(path) as snap:
+            for e in snap.iter_fresh(max_age=3600):
+                ...
+    """
+
+    def __init__(self, path: str):
+        self._f = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 빈 파일
+            self._f.close()
+            raise ValueError(f"empty snapshot: {path}")
+        magic, version, _, count, created = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"not a pool snapshot (or unsupported version): {path}")
+        self.count = count
+        self.created_epoch = created
+        self._blob_off = _HEADER.size + count * _RECORD.size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> SnapshotEntry:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        off, mlen, ilen, latency, validated = _RECORD.unpack_from(self._mm, _HEADER.size + i * _RECORD.size)
+        start = self._blob_off + off
+        member = self._mm[start : start + mlen].decode("utf-8")
+        info = json.loads(self._mm[start + mlen : start + mlen + ilen].decode("utf-8")) if ilen else {}
+        return SnapshotEntry(member=member, latency_ms=latency or None, validated_epoch=validated, info=info)
+
+    def validated_at(self, i: int) -> int:
+        """레코드 i의 검증 시각만 (문자열 디코드 없이)"""
+        return _RECORD.unpack_from(self._mm, _HEADER.size + i * _RECORD.size)[4]
+
+    def iter_fresh(self, max_age: Optional[float] = None, now: Optional[float] = None) -> Iterator[SnapshotEntry]:
+        """최신 검증 순으로, max_age(초)보다 오래된 레코드가 나오면 중단"""
+        now = time.time() if now is None else now
+        for i in range(self.count):
+            if max_age is not None and now - self.validated_at(i) > max_age:
+                return
+            yield self[i]
+
+    def close(self) -> None:
+        try:
+            self._mm.close()
+        except Exception:
+            pass
+        self._f.close()
+
+    def __enter__(self) -> "PoolSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,263 @@
+"""
+프록시 풀 실시간 대시보드 (top 스타일, Ctrl+C로 종료).
+
+  python pool_top.py                  # 1초마다 갱신
+  python pool_top.py --interval 2 --mix-interval 30
+  python pool_top.py --once           # 한 화면만 출력 (화면 지우기 없음)
+
+한 번 갱신에 샤드당 pipeline 1번(ZCARD/ZCOUNT/GET/HMGET 십여 개)만 보냄 -> 운영 Redis에 붙여 둬도 부담 없음.
+프로토콜/국가 구성은 인덱스 set과 풀의 교집합 크기(ZINTERCARD, Redis 7+)로 --mix-interval마다만 계산.
+claim/ban 속도는 대시보드가 직접 모은 샘플(fence 카운터 / stats hash)의 --window 초 차이.
+
+키 이름 / 샤딩 설정은 collector(collect_to_redis_lease_compatible_patched.py)와 공유.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import redis
+
+import collect_to_redis_lease_compatible_patched as collector
+from pool_admin import _all_pools, _connect
+
+
+# lease 남은 시간 구간 (초): (상한, 라벨). 상한 0 = 이미 만료(reaper 회수 대기)
+LEASE_BUCKETS = [(0, "만료"), (30, "<30s"), (60, "<1m"), (120, "<2m"), (300, "<5m"), (600, "<10m"), (None, "10m+")]
+# alive 쿨다운 남은 시간 구간 (초)
+COOLDOWN_BUCKETS = [(60, "<1m"), (300, "<5m"), (900, "<15m"), (3600, "<1h"), (None, "1h+")]
+
+BAR_WIDTH = 30
+MIX_TOP = 8
+
+
+def _bar(n: float, total: float, width: int = BAR_WIDTH) -> str:
+    filled = int(round(width * n / total)) if total > 0 else 0
+    return "█" * filled + "·" * (width - filled)
+
+
+def _ago(epoch: Optional[float], now: float) -> str:
+    if not epoch:
+        return "-"
+    sec = max(0, int(now - float(epoch)))
+    if sec < 60:
+        return f"{sec}초 전"
+    if sec < 3600:
+        return f"{sec // 60}분 전"
+    return f"{sec // 3600}시간 {sec % 3600 // 60}분 전"
+
+
+class PoolSampler:
+    """갱신마다 샤드별 pipeline 1번으로 풀 상태를 읽고, 카운터 샘플로 속도를 계산."""
+
+    def __init__(self, r: redis.Redis, *, window: float = 60.0, mix_interval: float = 30.0):
+        self.r = r
+        self.pools = _all_pools()
+        self.window = float(window)
+        self.mix_interval = float(mix_interval)
+        self.samples: deque = deque()
+        self.mix: Dict[str, List[Tuple[str, int]]] = {}
+        self.mix_at = 0.0
+        self._zintercard = True
+
+    def sample(self) -> Dict:
+        now = time.time()
+        t = int(now)
+        per_shard = []
+        for keys in self.pools:
+            pipe = self.r.pipeline(transaction=False)
+            pipe.zcard(keys["alive_key"])
+            pipe.zcount(keys["alive_key"], "-inf", t)
+            for upper, _ in COOLDOWN_BUCKETS:
+                pipe.zcount(keys["alive_key"], f"({t}", t + upper if upper is not None else "+inf")
+            pipe.zcard(keys["lease_key"])
+            prev = "-inf"
+            for upper, _ in LEASE_BUCKETS:
+                hi = t + upper if upper is not None else "+inf"
+                pipe.zcount(keys["lease_key"], prev, hi)
+                prev = f"({hi}" if upper is not None else prev
+            pipe.zcard(keys["probation_key"])
+            pipe.get(keys["fence_key"])
+            pipe.hmget(keys["stats_hash"], "ban", "probation")
+            per_shard.append(pipe.execute())
+        collector_state = self.r.hgetall(collector.REDIS_HASH_COLLECTOR)
+
+        snap = {
+            "ts": now,
+            "alive": 0,
+            "eligible": 0,
+            "leased": 0,
+            "probation": 0,
+            "claims": 0,
+            "bans": 0,
+            "cooldown": [0] * len(COOLDOWN_BUCKETS),
+            "lease": [0] * len(LEASE_BUCKETS),
+            "shards": [],
+            "collector": collector_state,
+        }
+        nc, nl = len(COOLDOWN_BUCKETS), len(LEASE_BUCKETS)
+        for res in per_shard:
+            alive, eligible = int(res[0]), int(res[1])
+            cooldown = [int(x) for x in res[2 : 2 + nc]]
+            leased = int(res[2 + nc])
+            lease = [int(x) for x in res[3 + nc : 3 + nc + nl]]
+            probation, fence, (ban, prob) = res[3 + nc + nl :]
+            # 누적 구간 -> 구간별 개수
+            cooldown = [c - (cooldown[i - 1] if i else 0) for i, c in enumerate(cooldown)]
+            snap["alive"] += alive
+            snap["eligible"] += eligible
+            snap["leased"] += leased
+            snap["probation"] += int(probation)
+            snap["claims"] += int(fence or 0)
+            snap["bans"] += int(ban or 0) + int(prob or 0)
+            snap["cooldown"] = [a + b for a, b in zip(snap["cooldown"], cooldown)]
+            snap["lease"] = [a + b for a, b in zip(snap["lease"], lease)]
+            snap["shards"].append((alive, eligible, leased))
+
+        self.samples.append(snap)
+        while len(self.samples) > 2 and now - self.samples[0]["ts"] > self.window:
+            self.samples.popleft()
+        if now - self.mix_at >= self.mix_interval:
+            self.mix_at = now
+            self.mix = self._sample_mix()
+        return snap
+
+    def rate(self, field: str) -> float:
+        """초당 증가량 (카운터가 초기화되면 0)"""
+        if len(self.samples) < 2:
+            return 0.0
+        first, last = self.samples[0], self.samples[-1]
+        dt = last["ts"] - first["ts"]
+        return max(0.0, last[field] - first[field]) / dt if dt > 0 else 0.0
+
+    def _sample_mix(self) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        {prefix}:keys에 등록된 proto/country 인덱스마다 풀(alive + lease)과의 교집합 크기.
+        (인덱스 set에는 ban된 멤버가 남아 있을 수 있으므로 SCARD가 아닌 교집합으로 셈)
+        ZINTERCARD 미지원 서버면 SCARD(근사값)로 대체.
+        """
+        counts: Dict[str, Dict[str, int]] = {"proto": {}, "country": {}}
+        for keys in self.pools:
+            prefix = keys["index_prefix"]
+            idx_keys = [
+                k for k in self.r.smembers(f"{prefix}:keys") if k.split(":")[-2] in counts
+            ]
+            if not idx_keys:
+                continue
+            pipe = self.r.pipeline(transaction=False)
+            for k in idx_keys:
+                if self._zintercard:
+                    pipe.execute_command("ZINTERCARD", 2, keys["alive_key"], k)
+                    pipe.execute_command("ZINTERCARD", 2, keys["lease_key"], k)
+                else:
+                    pipe.scard(k)
+            try:
+                res = pipe.execute()
+            except redis.ResponseError:
+                self._zintercard = False
+                return self._sample_mix()
+            step = 2 if self._zintercard else 1
+            for i, k in enumerate(idx_keys):
+                kind, value = k.split(":")[-2:]
+                n = sum(int(x) for x in res[i * step : i * step + step])
+                counts[kind][value] = counts[kind].get(value, 0) + n
+        return {kind: sorted(c.items(), key=lambda kv: -kv[1]) for kind, c in counts.items()}
+
+
+def render(sampler: PoolSampler, snap: Dict) -> str:
+    now = snap["ts"]
+    pool = snap["alive"] + snap["leased"]
+    cooldown = snap["alive"] - snap["eligible"]
+    target = collector.POOL_TARGET_SIZE
+    claim_rate = sampler.rate("claims") * 60
+    ban_rate = sampler.rate("bans") * 60
+
+    out = [
+        f"🧩 proxy pool  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))}  "
+        f"(shards={len(sampler.pools)}, 속도 창 {sampler.window:.0f}초)",
+        "",
+        f"  pool      {pool:>7}" + (f"  / 목표 {target}  {_bar(pool, target * (1 + collector.POOL_HEADROOM))}" if target else ""),
+        f"  eligible  {snap['eligible']:>7}  {_bar(snap['eligible'], pool)}",
+        f"  cooldown  {cooldown:>7}  {_bar(cooldown, pool)}",
+        f"  leased    {snap['leased']:>7}  {_bar(snap['leased'], pool)}",
+        f"  probation {snap['probation']:>7}",
+        "",
+        f"  claim {claim_rate:8.1f}/분    ban+probation {ban_rate:6.1f}/분",
+    ]
+    if len(sampler.pools) > 1:
+        out.append("  샤드: " + "  ".join(f"#{i} {a}/{e}/{l}" for i, (a, e, l) in enumerate(snap["shards"])) + "  (alive/eligible/lease)")
+
+    out += ["", "  lease 남은 시간"]
+    for (_, label), n in zip(LEASE_BUCKETS, snap["lease"]):
+        out.append(f"    {label:>5} {n:>7}  {_bar(n, snap['leased'])}")
+    out += ["", "  쿨다운 남은 시간"]
+    for (_, label), n in zip(COOLDOWN_BUCKETS, snap["cooldown"]):
+        out.append(f"    {label:>5} {n:>7}  {_bar(n, cooldown)}")
+
+    for kind, title in (("proto", "프로토콜"), ("country", "국가")):
+        items = sampler.mix.get(kind) or []
+        out += ["", f"  {title} (상위 {MIX_TOP}, {_ago(sampler.mix_at, now)} 집계)"]
+        if not items:
+            out.append("    (인덱스 키 목록 없음 - 다음 수집 후 표시)")
+        for value, n in items[:MIX_TOP]:
+            out.append(f"    {value:>8} {n:>7}  {_bar(n, pool)}")
+
+    c = snap["collector"]
+    out += ["", "  collector"]
+    if not c:
+        out.append("    (진행 상황 기록 없음)")
+    else:
+        total = int(c.get("total") or 0)
+        done = int(c.get("done") or 0)
+        line = f"    상태={c.get('state', '?')}  갱신 {_ago(c.get('updated'), now)}"
+        if c.get("state") == "testing" and total:
+            line += f"  {done}/{total} {_bar(done, total, 20)}"
+        out.append(line)
+        out.append(
+            f"    alive={c.get('alive', 0)} dead={c.get('dead', 0)}  시작 {_ago(c.get('started'), now)}"
+            + (f"  마지막 완료 {_ago(c.get('finished'), now)} ({c.get('elapsed')}초)" if c.get("finished") else "")
+        )
+        if c.get("reason"):
+            out.append(f"    마지막 수집 사유: {c['reason']}")
+    return "\n".join(out)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="프록시 풀 실시간 대시보드")
+    parser.add_argument("--host", default=collector.REDIS_HOST)
+    parser.add_argument("--port", type=int, default=collector.REDIS_PORT)
+    parser.add_argument("--db", type=int, default=collector.REDIS_DB)
+    parser.add_argument("--password", default=collector.REDIS_PASSWORD)
+    parser.add_argument("--interval", type=float, default=1.0, help="갱신 주기(초)")
+    parser.add_argument("--window", type=float, default=60.0, help="claim/ban 속도 계산 창(초)")
+    parser.add_argument("--mix-interval", type=float, default=30.0, help="프로토콜/국가 구성 집계 주기(초)")
+    parser.add_argument("--once", action="store_true", help="한 번만 출력")
+    args = parser.parse_args(argv)
+
+    sampler = PoolSampler(
+        _connect(args.host, args.port, args.db, args.password), window=args.window, mix_interval=args.mix_interval
+    )
+    if args.once:
+        print(render(sampler, sampler.sample()))
+        return
+
+    if os.name == "nt":
+        os.system("")  # Windows 콘솔 ANSI escape 활성화
+    try:
+        while True:
+            try:
+                frame = render(sampler, sampler.sample())
+            except redis.RedisError as e:
+                frame = f"⚠️ Redis 오류: {e}"
+            # 커서를 맨 위로 + 화면 지우기 후 한 번에 출력 (깜빡임 최소화)
+            sys.stdout.write("\x1b[H\x1b[2J" + frame + "\n")
+            sys.stdout.flush()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
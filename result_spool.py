@@ -0,0 +1,387 @@
+"""
+Redis 장애 중 검증 결과를 잃지 않기 위한 로컬 디스크 spool (append-only 세그먼트 파일).
+
+collector는 결과를 Redis에 바로 쓰다가 실패하면(또는 spool에 밀린 결과가 있으면 순서를 지키려고) append()로 넘기고
+바로 다음 검증으로 넘어간다. Redis가 돌아오면 replay 쓰레드가 오래된 순서대로 store(proxy_info, result, ts)를 다시 호출한다
+(ts = 원래 검증 시각, 반영 시각이 아니라 이 시각으로 기록해야 함).
+
+  파일: {SPOOL_DIR}/{seq:012d}.seg  한 줄 = "{crc32:08x} {json [ts, proxy_info, result]}\\n"
+        {SPOOL_DIR}/checkpoint      "{seq} {offset}" (replay가 어디까지 반영했는지, tmp + rename으로 교체)
+        {SPOOL_DIR}/deadletter.jsonl  store가 retry_on 이외의 예외를 낸 결과 {"ts", "error", "record"} (건너뛰고 계속 반영)
+  - 쓰기: append()는 큐에 넣기만 하고 writer 쓰레드 1개가 모아서 write, fsync는 fsync_batch건 또는 fsync_seconds마다 1번
+  - 세그먼트가 segment_bytes를 넘으면 새 파일로, 전체가 max_bytes를 넘으면 가장 오래된 세그먼트부터 버림
+  - replay: replay_rate건/초 상한, 실패하면 1초부터 retry_max초까지 두 배씩 늘려 가며 같은 건을 재시도 (그동안 outage=True)
+           끝까지 반영한(writer가 넘어간) 세그먼트는 삭제. max_age_seconds보다 오래된 결과는 반영하지 않고 버림
+  - 프로세스가 죽어도 다음 시작 때 checkpoint 이후부터 이어서 반영 (마지막 줄이 잘렸거나 crc가 안 맞으면 건너뜀)
+  - 같은 결과가 두 번 반영될 수는 있음 (store 도중 실패 / checkpoint 전 종료) -> store는 다시 호출돼도 되는 것이어야 함
+"""
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "playwright"))
+from proxy_log import get_logger  # noqa: E402
+
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spool")
+CHECKPOINT = "checkpoint"
+DEADLETTER = "deadletter.jsonl"
+CHECKPOINT_EVERY = 200  # replay 몇 건마다 checkpoint 기록 (세그먼트 끝 / 종료 시에도 기록)
+
+log = get_logger("spool")
+
+
+def _encode(ts: float, proxy_info: Dict, result: Dict) -> bytes:
+    data = json.dumps([ts, proxy_info, result], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return b"%08x " % zlib.crc32(data) + data + b"\n"
+
+
+def _decode(line: bytes) -> Optional[Tuple[float, Dict, Dict]]:
+    """한 줄 -> (ts, proxy_info, result). 깨진 줄이면 None"""
+    crc, _, data = line.rstrip(b"\n").partition(b" ")
+    try:
+        if int(crc, 16) != zlib.crc32(data):
+            return None
+        ts, proxy_info, result = json.loads(data)
+    except ValueError:
+        return None
+    return float(ts), proxy_info, result
+
+
+def _count_lines(path: str, start: int = 0) -> int:
+    try:
+        with open(path, "rb") as f:
+            f.seek(start)
+            return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+    except OSError:
+        return 0
+
+
+class ResultSpool:
+    """
+    append-only 세그먼트 spool + 백그라운드 replay.
+    store(proxy_info, result, ts)는 replay 쓰레드에서 호출되며, retry_on 예외를 던지면 같은 건을 백오프 후 재시도.
+    그 밖의 예외(깨진 레코드 등)는 그 건만 deadletter 파일로 옮기고 다음 건으로 (replay가 멈추면 pending이 영원히 남음).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        store: Callable[[Dict, Dict, float], None],
+        *,
+        retry_on: Tuple[Type[BaseException], ...] = (ConnectionError, TimeoutError),
+        segment_bytes: int = 16 * 1024 * 1024,
+        max_bytes: int = 1024 * 1024 * 1024,
+        fsync_batch: int = 500,
+        fsync_seconds: float = 0.5,
+        replay_rate: float = 500.0,
+        retry_max: float = 30.0,
+        max_age_seconds: Optional[float] = None,
+        max_queue: int = 100_000,
+    ):
+        self.directory = directory
+        self.store = store
+        self.retry_on = retry_on
+        self.segment_bytes = int(segment_bytes)
+        self.max_bytes = int(max_bytes)
+        self.fsync_batch = max(1, int(fsync_batch))
+        self.fsync_seconds = float(fsync_seconds)
+        self.replay_rate = float(replay_rate)
+        self.retry_max = float(retry_max)
+        self.max_age_seconds = max_age_seconds
+        self.appended = 0
+        self.replayed = 0
+        self.dropped = 0  # 오래됨 / 깨진 줄 / 용량 초과로 버린 건수
+        self.dead = 0  # store 예외로 deadletter에 옮긴 건수
+        self.outage = False
+        self._lock = threading.Lock()
+        self._pending = 0  # append됐지만 아직 반영 안 된 건수
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._stop = threading.Event()
+        self._written = threading.Event()  # writer가 새 줄을 쓰면 set -> replay가 깨어남
+        os.makedirs(directory, exist_ok=True)
+
+        segs = self._segments()
+        self._active_seq = segs[-1] + 1 if segs else 1
+        self._file = None
+        self._active_size = 0
+        self._ckpt = self._read_checkpoint(segs)
+        for seq in segs:
+            self._pending += _count_lines(self._path(seq), self._ckpt[1] if seq == self._ckpt[0] else 0)
+        if self._pending:
+            log.info("spool_resume", f"📼 spool에 이전 실행의 미반영 결과 {self._pending}건 -> 반영 재개", pending=self._pending)
+
+        self._writer = threading.Thread(target=self._write_loop, name="spool-writer", daemon=True)
+        self._replayer = threading.Thread(target=self._replay_loop, name="spool-replay", daemon=True)
+        self._writer.start()
+        self._replayer.start()
+
+    # ---------------- 상태 ----------------
+
+    def pending(self) -> int:
+        """아직 Redis에 반영되지 않은 건수 (0보다 크면 새 결과도 spool로 보내야 순서가 유지됨)"""
+        with self._lock:
+            return self._pending
+
+    def stats(self) -> Dict:
+        segs = self._segments()
+        return {
+            "pending": self.pending(),
+            "appended": self.appended,
+            "replayed": self.replayed,
+            "dropped": self.dropped,
+            "dead": self.dead,
+            "outage": self.outage,
+            "segments": len(segs),
+            "bytes": sum(os.path.getsize(self._path(s)) for s in segs if os.path.exists(self._path(s))),
+        }
+
+    # ---------------- 쓰기 ----------------
+
+    def append(self, proxy_info: Dict, result: Dict, ts: Optional[float] = None) -> None:
+        """결과 1건을 spool에 넣음 (큐가 가득 차면 writer가 따라잡을 때까지 대기)"""
+        line = _encode(time.time() if ts is None else ts, proxy_info, result)
+        with self._lock:
+            self._pending += 1
+        self._queue.put(line)
+        self.appended += 1
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{seq:012d}.seg")
+
+    def _segments(self) -> List[int]:
+        return sorted(int(os.path.basename(p)[:-4]) for p in glob.glob(os.path.join(self.directory, "*.seg")))
+
+    def _open_active(self) -> None:
+        self._file = open(self._path(self._active_seq), "ab")
+        self._active_size = self._file.tell()
+
+    def _rotate(self) -> None:
+        self._sync()
+        self._file.close()
+        self._file = None
+        self._active_seq += 1
+        self._enforce_max_bytes()
+
+    def _sync(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _enforce_max_bytes(self) -> None:
+        """전체 크기가 max_bytes를 넘으면 가장 오래된 세그먼트부터 버림 (쓰는 중인 세그먼트는 제외)"""
+        segs = [s for s in self._segments() if s < self._active_seq]
+        sizes = {s: os.path.getsize(self._path(s)) for s in segs}
+        total = sum(sizes.values())
+        for seq in segs:
+            if total <= self.max_bytes:
+                break
+            lost = _count_lines(self._path(seq), self._ckpt[1] if seq == self._ckpt[0] else 0)
+            try:
+                os.remove(self._path(seq))
+            except OSError:
+                continue
+            total -= sizes[seq]
+            with self._lock:
+                self._pending -= lost
+            self.dropped += lost
+            log.warning("spool_full", f"⚠️ spool 용량 초과 -> 가장 오래된 세그먼트 버림 ({lost}건)", segment=seq, lost=lost)
+
+    def _write_loop(self) -> None:
+        stop = False
+        while not stop:
+            lines: List[bytes] = []
+            deadline = time.time() + self.fsync_seconds
+            while len(lines) < self.fsync_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                lines.append(item)
+            if not lines:
+                continue
+            try:
+                for line in lines:
+                    if self._file is None:
+                        self._open_active()
+                    self._file.write(line)
+                    self._active_size += len(line)
+                    if self._active_size >= self.segment_bytes:
+                        self._rotate()
+                self._sync()
+            except OSError as e:
+                # 디스크 오류: 이번 묶음은 잃음 (검증은 계속)
+                with self._lock:
+                    self._pending -= len(lines)
+                self.dropped += len(lines)
+                log.error("spool_write_error", f"❌ spool 기록 실패 ({len(lines)}건): {e}", rows=len(lines), error=str(e))
+            self._written.set()
+        if self._file is not None:
+            try:
+                self._sync()
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    # ---------------- replay ----------------
+
+    def _read_checkpoint(self, segs: List[int]) -> Tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT), encoding="utf-8") as f:
+                seq, offset = (int(x) for x in f.read().split())
+        except (OSError, ValueError):
+            return (segs[0] if segs else 0), 0
+        return seq, offset
+
+    def _write_checkpoint(self, seq: int, offset: int) -> None:
+        self._ckpt = (seq, offset)
+        path = os.path.join(self.directory, CHECKPOINT)
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(f"{seq} {offset}\n")
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            log.warning("spool_checkpoint_error", f"⚠️ spool checkpoint 기록 실패: {e}", error=str(e))
+
+    def _dead_letter(self, rec: Tuple[float, Dict, Dict], error: BaseException) -> None:
+        self.dead += 1
+        log.error(
+            "spool_dead_letter",
+            f"❌ spool 반영 불가 결과 -> {DEADLETTER} ({rec[1].get('address')}): {error!r}",
+            address=rec[1].get("address"),
+            error=repr(error),
+        )
+        try:
+            with open(os.path.join(self.directory, DEADLETTER), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"ts": time.time(), "error": repr(error), "record": list(rec)}, ensure_ascii=False) + "\n")
+        except (OSError, TypeError, ValueError) as e:
+            log.warning("spool_dead_letter_error", f"⚠️ deadletter 기록 실패: {e}", error=str(e))
+
+    def _store_with_retry(self, rec: Tuple[float, Dict, Dict]) -> Optional[bool]:
+        """
+        retry_on 예외면 성공할 때까지 백오프 재시도. 반환: True=반영 / False=다른 예외로 deadletter
+        / None=종료 신호 (이 건은 다음 실행에서 다시 반영)
+        """
+        ts, proxy_info, result = rec
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                self.store(proxy_info, result, ts)
+            except self.retry_on as e:
+                if not self.outage:
+                    self.outage = True
+                    log.warning(
+                        "spool_outage",
+                        f"⚠️ spool 반영 실패 -> Redis 복구까지 재시도 (대기 {self.pending()}건): {e}",
+                        pending=self.pending(),
+                        error=str(e),
+                    )
+                self._stop.wait(backoff)
+                backoff = min(self.retry_max, backoff * 2)
+                continue
+            except Exception as e:
+                self._dead_letter(rec, e)
+                return False
+            if self.outage:
+                self.outage = False
+                log.info("spool_recovered", f"✅ Redis 복구 -> spool 반영 재개 (대기 {self.pending()}건)", pending=self.pending())
+            return True
+        return None
+
+    def _replay_segment(self, seq: int, offset: int) -> Optional[int]:
+        """seq 세그먼트를 offset부터 반영. 반환: 다 읽은 위치 (종료 신호면 None)"""
+        interval = 1.0 / self.replay_rate if self.replay_rate > 0 else 0.0
+        done = 0
+        try:
+            f = open(self._path(seq), "rb")
+        except OSError:  # 용량 초과로 지워짐
+            return offset
+        with f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # writer가 쓰는 중인 줄 -> 다음에
+                rec = _decode(line)
+                t0 = time.monotonic()
+                if rec is None:
+                    self.dropped += 1
+                elif self.max_age_seconds is not None and time.time() - rec[0] > self.max_age_seconds:
+                    self.dropped += 1  # 너무 오래된 결과로 alive를 덮어쓰지 않음
+                else:
+                    stored = self._store_with_retry(rec)
+                    if stored is None:
+                        self._write_checkpoint(seq, offset)
+                        return None
+                    if stored:
+                        self.replayed += 1
+                offset += len(line)
+                with self._lock:
+                    self._pending = max(0, self._pending - 1)  # 용량 초과로 이미 뺀 세그먼트일 수 있음
+                done += 1
+                if done % CHECKPOINT_EVERY == 0:
+                    self._write_checkpoint(seq, offset)
+                # backpressure: 복구 직후 Redis를 몰아치지 않게 replay_rate건/초 상한
+                wait = interval - (time.monotonic() - t0)
+                if wait > 0:
+                    time.sleep(wait)
+        if done:
+            self._write_checkpoint(seq, offset)
+        return offset
+
+    def _replay_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if not self._replay_once():
+                    return
+            except Exception as e:
+                # 예상 못 한 오류로 replay 쓰레드가 죽으면 pending이 줄지 않아 새 결과가 전부 spool로만 감 -> 잠시 후 다시
+                log.error("spool_replay_error", f"❌ spool replay 오류, 재시도: {e!r}", error=repr(e))
+                self._stop.wait(self.retry_max)
+
+    def _replay_once(self) -> bool:
+        """가장 오래된 세그먼트를 반영할 수 있는 데까지 처리. 종료 신호면 False"""
+        segs = self._segments()
+        if not segs:
+            self._written.wait(1.0)
+            self._written.clear()
+            return True
+        seq = segs[0]
+        offset = self._ckpt[1] if seq == self._ckpt[0] else 0
+        end = self._replay_segment(seq, offset)
+        if end is None:
+            return False
+        path = self._path(seq)
+        if seq < self._active_seq and (not os.path.exists(path) or end >= os.path.getsize(path)):
+            # writer가 넘어간 세그먼트를 끝까지 반영 -> 삭제하고 다음 세그먼트 처음부터
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            nxt = [s for s in self._segments() if s > seq]
+            self._write_checkpoint(nxt[0] if nxt else self._active_seq, 0)
+            return True
+        self._written.wait(1.0)
+        self._written.clear()
+        return True
+
+    # ---------------- 종료 ----------------
+
+    def close(self, timeout: float = 10.0) -> None:
+        """남은 결과를 디스크에 쓰고 종료 (미반영분은 파일에 남아 다음 실행에서 반영)"""
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._stop.set()
+        self._written.set()
+        self._replayer.join(timeout)
+        if self.pending():
+            log.info("spool_closed", f"📼 spool 미반영 {self.pending()}건은 다음 실행에서 반영", pending=self.pending())
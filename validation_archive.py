@@ -0,0 +1,372 @@
+"""
+검증 결과 아카이브 (오프라인 분석용, SQLite 월별 파티션) + 조회 CLI.
+
+collector는 검증 1건마다 ValidationArchive.append()로 큐에 넣기만 하고, 백그라운드 writer 쓰레드 1개가
+batch개(또는 flush_seconds마다) 모아서 트랜잭션 1번(executemany)으로 기록한다.
+파일: {ARCHIVE_DIR}/validation-YYYY-MM.sqlite (UTC 기준 월, WAL 모드 -> 기록 중에도 조회 가능)
+
+  python validation_archive.py yield [--days 7] [--by source|protocol|list_protocol|check_kind]
+  python validation_archive.py latency [--days 7] [--bucket day|hour] [--source S]
+  python validation_archive.py churn [--days 14] [--bucket day|hour]
+  python validation_archive.py sql "SELECT source, COUNT(*) FROM checks GROUP BY source" [--days 30]
+
+조회는 기간에 걸친 파티션마다 SQL로 집계한 뒤 합침 (Redis는 읽지 않음).
+"""
+import argparse
+import glob
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "playwright"))
+from proxy_log import get_logger  # noqa: E402
+
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+
+COLUMNS = (
+    "ts",  # 검증 완료 시각 (epoch 초)
+    "cycle",  # collect_once 시작 시각 (epoch 초, 수집 밖의 재검증이면 0)
+    "member",  # "http://1.2.3.4:8080" (정규화된 프로토콜)
+    "protocol",
+    "list_protocol",  # 원본 목록 분류 (https 목록 등)
+    "source",  # 목록 출처 (재검증도 원래 목록 출처를 유지)
+    "check_kind",  # 검증 경로 (collect=정기 수집 / probation=재검증 / warm_start=스냅샷 복원, proxy_info["check"])
+    "ok",
+    "latency_ms",
+    "proxy_type",
+    "countries",  # "KR,US"
+    "exit_ip",  # 첫 번째 출구 IP
+    "error",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (
+    ts REAL NOT NULL,
+    cycle INTEGER NOT NULL,
+    member TEXT NOT NULL,
+    protocol TEXT,
+    list_protocol TEXT,
+    source TEXT,
+    check_kind TEXT,
+    ok INTEGER NOT NULL,
+    latency_ms REAL,
+    proxy_type TEXT,
+    countries TEXT,
+    exit_ip TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS checks_ts ON checks (ts);
+CREATE INDEX IF NOT EXISTS checks_member ON checks (member, ts);
+"""
+
+_INSERT = f"INSERT INTO checks ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+log = get_logger("archive")
+
+
+def partition_name(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("validation-%Y-%m.sqlite")
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    # check_kind 이전에 만든 파티션 (기존 행은 NULL)
+    if not _has_column(conn, "check_kind"):
+        conn.execute("ALTER TABLE checks ADD COLUMN check_kind TEXT")
+    return conn
+
+
+def _has_column(conn: sqlite3.Connection, name: str) -> bool:
+    return any(row[1] == name for row in conn.execute("PRAGMA table_info(checks)"))
+
+
+def result_row(proxy_info: Dict, result: Dict, *, cycle: int = 0, ts: Optional[float] = None) -> Tuple:
+    """collector의 proxy_info + test_proxy 결과 -> 아카이브 행 (COLUMNS 순서)"""
+    raw_protocol = proxy_info["protocol"]
+    protocol = "http" if raw_protocol == "https" else raw_protocol
+    countries = []
+    for c in result.get("countries") or []:
+        c = str(c)
+        # "South Korea (KR)" -> "KR"
+        countries.append(c[c.rindex("(") + 1 : -1] if c.endswith(")") and "(" in c else c)
+    ips = result.get("ips") or []
+    return (
+        time.time() if ts is None else ts,
+        int(cycle),
+        f"{protocol}://{proxy_info['address']}",
+        protocol,
+        raw_protocol,
+        proxy_info.get("source") or "",
+        proxy_info.get("check") or "collect",
+        1 if result.get("ok") else 0,
+        result.get("latency_ms"),
+        result.get("proxy_type") or "",
+        ",".join(countries),
+        ips[0] if ips else "",
+        (result.get("error") or "")[:200],
+    )
+
+
+class ValidationArchive:
+    """
+    백그라운드 writer 1개로 SQLite에 배치 기록.
+    - append()는 큐에 넣기만 함 (검증 쓰레드는 디스크 I/O를 기다리지 않음)
+    - 큐가 max_queue를 넘으면 버리고 개수를 센 뒤 경고 로그
+    - close()는 남은 행을 모두 쓰고 종료
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR, *, batch: int = 500, flush_seconds: float = 2.0, max_queue: int = 100_000):
+        self.directory = directory
+        self.batch = int(batch)
+        self.flush_seconds = float(flush_seconds)
+        self.max_queue = int(max_queue)
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self._conns: Dict[str, sqlite3.Connection] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="validation-archive", daemon=True)
+        self._thread.start()
+
+    def append(self, row: Tuple) -> None:
+        if self._queue.qsize() >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.put(row)
+
+    def _write(self, rows: List[Tuple]) -> None:
+        by_part: Dict[str, List[Tuple]] = {}
+        for row in rows:
+            by_part.setdefault(partition_name(row[0]), []).append(row)
+        for name, part_rows in by_part.items():
+            conn = self._conns.get(name)
+            if conn is None:
+                # 월이 바뀌면 이전 파티션 연결은 닫음
+                for old in self._conns.values():
+                    old.close()
+                self._conns.clear()
+                conn = self._conns[name] = _connect(os.path.join(self.directory, name))
+            with conn:
+                conn.executemany(_INSERT, part_rows)
+        self.written += len(rows)
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            rows: List[Tuple] = []
+            deadline = time.time() + self.flush_seconds
+            while len(rows) < self.batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                rows.append(item)
+            if rows:
+                try:
+                    self._write(rows)
+                except sqlite3.Error as e:
+                    log.warning("archive_error", f"⚠️ 검증 결과 아카이브 기록 실패 ({len(rows)}건): {e}", rows=len(rows), error=str(e))
+            if self.dropped:
+                n, self.dropped = self.dropped, 0
+                log.warning("archive_dropped", f"⚠️ 아카이브 큐 초과로 {n}건 버림", count=n)
+        for conn in self._conns.values():
+            conn.close()
+        self._conns.clear()
+
+    def close(self, timeout: float = 10.0) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+# ======================================================
+# 조회
+# ======================================================
+
+def iter_partitions(directory: str, since: float, until: Optional[float] = None) -> Iterator[sqlite3.Connection]:
+    """기간에 걸친 파티션만 읽기 전용으로 연결"""
+    lo = partition_name(since)
+    hi = partition_name(until if until is not None else time.time())
+    for path in sorted(glob.glob(os.path.join(directory, "validation-*.sqlite"))):
+        name = os.path.basename(path)
+        if lo <= name <= hi:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                yield conn
+            finally:
+                conn.close()
+
+
+def query_yield(directory: str, since: float, by: str = "source") -> List[Dict]:
+    """그룹별 검증 수 / 통과 수 / 통과율 / 평균 latency / 고유 멤버 수"""
+    if by not in ("source", "protocol", "list_protocol", "check_kind"):
+        raise ValueError(f"unknown group: {by}")
+    acc: Dict[str, Dict] = {}
+    members: Dict[str, set] = {}
+    for conn in iter_partitions(directory, since):
+        # check_kind 컬럼이 없는 옛 파티션은 NULL로 묶음
+        col = by if by != "check_kind" or _has_column(conn, by) else "NULL"
+        for key, n, ok, lat_sum in conn.execute(
+            f"SELECT {col}, COUNT(*), SUM(ok), SUM(CASE WHEN ok THEN latency_ms END) FROM checks WHERE ts >= ? GROUP BY 1",
+            (since,),
+        ):
+            a = acc.setdefault(key, {"tested": 0, "alive": 0, "lat_sum": 0.0})
+            a["tested"] += n
+            a["alive"] += ok or 0
+            a["lat_sum"] += lat_sum or 0.0
+        for key, member in conn.execute(f"SELECT DISTINCT {col}, member FROM checks WHERE ts >= ? AND ok", (since,)):
+            members.setdefault(key, set()).add(member)
+    out = []
+    for key, a in acc.items():
+        out.append(
+            {
+                by: key,
+                "tested": a["tested"],
+                "alive": a["alive"],
+                "yield": round(a["alive"] / a["tested"], 4) if a["tested"] else 0.0,
+                "avg_latency_ms": round(a["lat_sum"] / a["alive"], 1) if a["alive"] else None,
+                "unique_alive": len(members.get(key, ())),
+            }
+        )
+    return sorted(out, key=lambda x: -x["alive"])
+
+
+def _bucket_expr(bucket: str) -> str:
+    if bucket == "day":
+        return "CAST(ts / 86400 AS INTEGER) * 86400"
+    if bucket == "hour":
+        return "CAST(ts / 3600 AS INTEGER) * 3600"
+    raise ValueError(f"unknown bucket: {bucket}")
+
+
+def query_latency(directory: str, since: float, bucket: str = "day", source: Optional[str] = None) -> List[Dict]:
+    """구간별 통과 건수 / 평균·최소·최대 latency"""
+    where, params = "ts >= ? AND ok AND latency_ms IS NOT NULL", [since]
+    if source:
+        where += " AND source = ?"
+        params.append(source)
+    acc: Dict[int, Dict] = {}
+    for conn in iter_partitions(directory, since):
+        for b, n, s, lo, hi in conn.execute(
+            f"SELECT {_bucket_expr(bucket)} AS b, COUNT(*), SUM(latency_ms), MIN(latency_ms), MAX(latency_ms) "
+            f"FROM checks WHERE {where} GROUP BY b",
+            params,
+        ):
+            a = acc.setdefault(b, {"n": 0, "sum": 0.0, "min": lo, "max": hi})
+            a["n"] += n
+            a["sum"] += s
+            a["min"] = min(a["min"], lo)
+            a["max"] = max(a["max"], hi)
+    return [
+        {"bucket": _fmt_bucket(b, bucket), "alive": a["n"], "avg_ms": round(a["sum"] / a["n"], 1), "min_ms": round(a["min"], 1), "max_ms": round(a["max"], 1)}
+        for b, a in sorted(acc.items())
+    ]
+
+
+def query_churn(directory: str, since: float, bucket: str = "day") -> List[Dict]:
+    """
+    구간별 통과 멤버 변동.
+    - alive : 그 구간에 한 번 이상 통과한 멤버 수
+    - new   : 조회 기간 안에서 처음 통과한 멤버
+    - lost  : 직전 구간에는 통과했지만 이번 구간에는 통과 기록이 없는 멤버
+    """
+    per_bucket: Dict[int, set] = {}
+    for conn in iter_partitions(directory, since):
+        for b, member in conn.execute(
+            f"SELECT DISTINCT {_bucket_expr(bucket)} AS b, member FROM checks WHERE ts >= ? AND ok", (since,)
+        ):
+            per_bucket.setdefault(b, set()).add(member)
+    out = []
+    seen: set = set()
+    prev: set = set()
+    for b in sorted(per_bucket):
+        cur = per_bucket[b]
+        out.append(
+            {"bucket": _fmt_bucket(b, bucket), "alive": len(cur), "new": len(cur - seen), "lost": len(prev - cur), "kept": len(prev & cur)}
+        )
+        seen |= cur
+        prev = cur
+    return out
+
+
+def query_sql(directory: str, since: float, sql: str) -> Tuple[List[str], List[Tuple]]:
+    """임의 SQL을 파티션마다 실행해 행을 이어 붙임 (집계는 파티션 단위라는 점에 주의)"""
+    cols: List[str] = []
+    rows: List[Tuple] = []
+    for conn in iter_partitions(directory, since):
+        cur = conn.execute(sql)
+        cols = [d[0] for d in cur.description or ()]
+        rows.extend(cur.fetchall())
+    return cols, rows
+
+
+def _fmt_bucket(b: int, bucket: str) -> str:
+    fmt = "%Y-%m-%d" if bucket == "day" else "%Y-%m-%d %H:00"
+    return datetime.fromtimestamp(b, tz=timezone.utc).strftime(fmt)
+
+
+def _print_table(rows: List[Dict]) -> None:
+    if not rows:
+        print("(결과 없음)")
+        return
+    cols = list(rows[0])
+    widths = [max(len(str(c)), *(len(str(r[c])) for r in rows)) for c in cols]
+    print("  ".join(str(c).ljust(w) for c, w in zip(cols, widths)))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(w) for c, w in zip(cols, widths)))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="검증 결과 아카이브 조회")
+    parser.add_argument("--dir", default=DEFAULT_DIR)
+    parser.add_argument("--days", type=float, default=7, help="최근 N일")
+    parser.add_argument("--json", action="store_true", help="JSON lines로 출력")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("yield", help="소스(프로토콜)별 수율")
+    p.add_argument("--by", default="source", choices=["source", "protocol", "list_protocol", "check_kind"])
+
+    p = sub.add_parser("latency", help="구간별 latency 추세 (통과 건만)")
+    p.add_argument("--bucket", default="day", choices=["day", "hour"])
+    p.add_argument("--source")
+
+    p = sub.add_parser("churn", help="구간별 통과 멤버 변동 (new / lost / kept)")
+    p.add_argument("--bucket", default="day", choices=["day", "hour"])
+
+    p = sub.add_parser("sql", help="파티션마다 SQL 실행 (테이블: checks)")
+    p.add_argument("query")
+
+    args = parser.parse_args(argv)
+    since = time.time() - args.days * 86400
+
+    if args.cmd == "sql":
+        cols, rows = query_sql(args.dir, since, args.query)
+        result = [dict(zip(cols, r)) for r in rows]
+    elif args.cmd == "yield":
+        result = query_yield(args.dir, since, args.by)
+    elif args.cmd == "latency":
+        result = query_latency(args.dir, since, args.bucket, args.source)
+    else:
+        result = query_churn(args.dir, since, args.bucket)
+
+    if args.json:
+        for row in result:
+            print(json.dumps(row, ensure_ascii=False))
+    else:
+        _print_table(result)
+
+
+if __name__ == "__main__":
+    main()